@@ -0,0 +1 @@
+"""github_rate_limits_exporter benchmarks"""
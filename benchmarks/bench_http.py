@@ -0,0 +1,129 @@
+"""
+benchmarks.bench_http
+~~~~~~~~~~~~~~~~~~~~~
+
+``/metrics`` scrapes per second and their latency percentiles (many
+concurrent keep-alive scrapers) of both exporter HTTP servers, serving
+the same registry:
+
+  - ``threaded``: ``ThreadingWSGIServer``, a thread per connection,
+    the connection is closed after every response (HTTP/1.0).
+  - ``asyncio``: ``AsyncExporterServer``, a single event loop thread,
+    persistent (HTTP/1.1 keep-alive) connections.
+
+Usage: ``python -m benchmarks.bench_http [--number N] [--clients N]``
+"""
+
+import argparse
+import asyncio
+import statistics
+import time
+from typing import Any, Callable, Dict, List, Tuple
+
+from prometheus_client import CollectorRegistry, Gauge
+
+from github_rate_limits_exporter.asyncserver import start_async_exporter_server
+from github_rate_limits_exporter.constants import RATE_LIMIT_TYPES
+from github_rate_limits_exporter.server import (
+    HTTPServer,
+    make_exporter_app,
+    start_exporter_server,
+)
+
+ACCOUNTS = 100
+REQUEST = b"GET /metrics HTTP/1.1\r\nHost: 127.0.0.1\r\n\r\n"
+
+
+def registry() -> CollectorRegistry:
+    """
+    :returns CollectorRegistry: The rate-limits of ``ACCOUNTS`` accounts.
+    """
+    metrics = CollectorRegistry()
+    gauge = Gauge(
+        "github_rate_limits_core",
+        "Github core rate-limits",
+        ["account", "type"],
+        registry=metrics,
+    )
+    for account in range(ACCOUNTS):
+        for name in RATE_LIMIT_TYPES:
+            gauge.labels(f"account-{account}", name).set(account)
+    return metrics
+
+
+async def scrape(port: int, number: int, latencies: List[float]) -> int:
+    """
+    Scrape ``number`` times, reconnect once the connection is closed.
+
+    :returns int: Number of failed scrapes (reset connections).
+    """
+    failed = 0
+    reader, writer = await asyncio.open_connection("127.0.0.1", port)
+    try:
+        for _ in range(number):
+            started = time.perf_counter()
+            try:
+                writer.write(REQUEST)
+                head = await reader.readuntil(b"\r\n\r\n")
+                headers = dict(
+                    line.split(": ", 1)
+                    for line in head.decode("iso-8859-1").lower().split("\r\n")[1:]
+                    if line
+                )
+                await reader.readexactly(int(headers["content-length"]))
+            except (asyncio.IncompleteReadError, ConnectionError):
+                failed += 1
+                head, headers = b"", {"connection": "close"}
+            else:
+                latencies.append(time.perf_counter() - started)
+            if headers.get("connection") == "close" or head.startswith(b"HTTP/1.0"):
+                writer.close()
+                reader, writer = await asyncio.open_connection("127.0.0.1", port)
+    finally:
+        writer.close()
+    return failed
+
+
+async def load(port: int, number: int, clients: int) -> Tuple[float, List[float], int]:
+    """
+    :returns tuple: The scrapes per second, the scrape latencies
+        and the number of failed scrapes.
+    """
+    latencies: List[float] = []
+    started = time.perf_counter()
+    failed = await asyncio.gather(
+        *(scrape(port, number // clients, latencies) for _ in range(clients))
+    )
+    return len(latencies) / (time.perf_counter() - started), latencies, sum(failed)
+
+
+def main() -> None:
+    """Run the exporter HTTP servers benchmark"""
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--number", type=int, default=5000)
+    parser.add_argument("--clients", type=int, default=50)
+    args = parser.parse_args()
+    app = make_exporter_app(registry())
+    servers: Dict[str, Callable[..., Tuple[HTTPServer, Any]]] = {
+        "threaded": start_exporter_server,
+        "asyncio": start_async_exporter_server,
+    }
+    for name, start in servers.items():
+        httpd, _ = start(0, "127.0.0.1", app)
+        try:
+            throughput, latencies, failed = asyncio.run(
+                load(httpd.server_port, args.number, args.clients)
+            )
+        finally:
+            httpd.shutdown()
+            httpd.server_close()
+        percentiles = statistics.quantiles(latencies, n=100)
+        print(
+            f"{name:>9}: {throughput:8.1f} scrapes/s, "
+            f"p50 {percentiles[49] * 1000:6.2f} ms, "
+            f"p99 {percentiles[98] * 1000:6.2f} ms, {failed} failed"
+        )
+
+
+if __name__ == "__main__":
+    main()
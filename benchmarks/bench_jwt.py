@@ -0,0 +1,94 @@
+"""
+benchmarks.bench_jwt
+~~~~~~~~~~~~~~~~~~~~
+
+Github App installation token mints per second (many installations
+refreshing at once, on a pool of worker threads), against a local stub
+of the Github REST API:
+
+  - ``PyGithub``: ``GithubIntegration.create_jwt``, the PEM private key
+    is parsed and a new JWT is signed per mint (the previous behavior).
+  - ``preloaded key``: the key is parsed once, a new JWT is signed per mint.
+  - ``cached JWT``: the key is parsed once, the JWT is signed once per
+    validity window (``GithubAppJwt.jwt``).
+
+Usage: ``python -m benchmarks.bench_jwt [--number N] [--workers N]``
+"""
+
+import argparse
+import json
+import os
+import time
+import timeit
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, Dict
+
+from github_rate_limits_exporter.github import GithubAppJwt, GithubHttpTransport
+from tests.utils import GithubApiStub
+
+ROOT_DIR = os.path.abspath(os.path.join(os.path.dirname(__file__), os.pardir))
+RATE_LIMITS_JSON = os.path.join(ROOT_DIR, "tests", "files", "rate_limits.json")
+PRIVATE_KEY = os.path.join(ROOT_DIR, "tests", "files", "rsa.private")
+APP_ID = 123123
+
+
+def signers(private_key: str) -> Dict[str, Callable[[], str]]:
+    """
+    :returns dict: The JWT sign function per strategy.
+    """
+    from github import GithubIntegration  # pylint: disable=import-outside-toplevel
+
+    integration = GithubIntegration(APP_ID, private_key)
+    preloaded = GithubAppJwt(APP_ID, private_key)
+    cached = GithubAppJwt(APP_ID, private_key)
+    return {
+        "PyGithub": integration.create_jwt,
+        "preloaded key": preloaded.sign,
+        "cached JWT": lambda: cached.jwt,
+    }
+
+
+def measure(
+    sign: Callable[[], str], base_url: str, number: int, workers: int
+) -> float:
+    """
+    :returns float: Installation tokens minted per second.
+    """
+    transport = GithubHttpTransport(pool_size=workers, retries=0)
+
+    def mint(installation_id: int) -> str:
+        data = transport.request(
+            "POST",
+            f"{base_url}/app/installations/{installation_id}/access_tokens",
+            f"Bearer {sign()}",
+        )
+        return data["token"]
+
+    try:
+        with ThreadPoolExecutor(max_workers=workers) as executor:
+            started = time.perf_counter()
+            list(executor.map(mint, range(number)))
+            return number / (time.perf_counter() - started)
+    finally:
+        transport.close()
+
+
+def main() -> None:
+    """Run the token mints benchmark"""
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--number", type=int, default=500)
+    parser.add_argument("--workers", type=int, default=8)
+    args = parser.parse_args()
+    with open(RATE_LIMITS_JSON, "r", encoding="utf-8") as filed:
+        rate_limits = json.load(filed)
+    with open(PRIVATE_KEY, "r", encoding="utf-8") as filed:
+        private_key = filed.read()
+    with GithubApiStub(rate_limits) as stub:
+        for name, sign in signers(private_key).items():
+            signatures = args.number / timeit.timeit(sign, number=args.number)
+            mints = measure(sign, stub.base_url, args.number, args.workers)
+            print(f"{name:>14}: {signatures:10.1f} JWT/s, {mints:8.1f} mints/s")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,86 @@
+"""
+benchmarks.bench_models
+~~~~~~~~~~~~~~~~~~~~~~~
+
+Microbenchmark of the rate-limits snapshot, per scrape:
+
+  - parse the ``/rate_limit`` resources (once per fetch).
+  - look up the ``limit/used/remaining/reset`` of every resource.
+
+Compared against the previous ``dotmap.DotMap`` representation (if installed).
+
+Usage: ``python -m benchmarks.bench_models [--number N]``
+"""
+
+import argparse
+import json
+import os
+import timeit
+import tracemalloc
+from typing import Any, Callable, Dict, Tuple
+
+from github_rate_limits_exporter.constants import DEFAULT_RATE_LIMITS, RATE_LIMIT_TYPES
+from github_rate_limits_exporter.models import RateLimitsSnapshot
+
+RATE_LIMITS_JSON = os.path.join(
+    os.path.dirname(__file__), os.pardir, "tests", "files", "rate_limits.json"
+)
+
+
+def snapshot_scrape(resources: Dict[str, Any]) -> float:
+    """Parse and read the rate-limits through the slotted snapshot"""
+    snapshot = RateLimitsSnapshot.from_json(resources)
+    total = 0.0
+    for name in snapshot:
+        limits = snapshot.get(name, DEFAULT_RATE_LIMITS)
+        total += limits.limit + limits.used + limits.remaining + limits.reset
+    return total
+
+
+def dotmap_scrape(resources: Dict[str, Any]) -> float:
+    """Parse and read the rate-limits through ``dotmap.DotMap``"""
+    import dotmap  # pylint: disable=import-outside-toplevel
+
+    limits_map = dotmap.DotMap(resources)
+    total = 0.0
+    for name in resources:
+        limits = limits_map.get(name)
+        total += sum(float(limits[limit_type]) for limit_type in RATE_LIMIT_TYPES)
+    return total
+
+
+def measure(
+    scrape: Callable[[Dict[str, Any]], float], resources: Dict[str, Any], number: int
+) -> Tuple[float, int]:
+    """
+    :returns tuple: Microseconds and allocated bytes (peak) per scrape.
+    """
+    seconds = timeit.timeit(lambda: scrape(resources), number=number)
+    tracemalloc.start()
+    scrape(resources)
+    __, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return seconds / number * 1e6, peak
+
+
+def main() -> None:
+    """Run the snapshot microbenchmark"""
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--number", type=int, default=10000)
+    args = parser.parse_args()
+    with open(RATE_LIMITS_JSON, "r", encoding="utf-8") as filed:
+        resources = json.load(filed)["resources"]
+    scrapes = {"RateLimitsSnapshot": snapshot_scrape}
+    try:
+        import dotmap  # pylint: disable=import-outside-toplevel,unused-import
+
+        scrapes["dotmap.DotMap"] = dotmap_scrape
+    except ImportError:
+        print("dotmap is not installed, skipping the baseline")
+    for name, scrape in scrapes.items():
+        usec, peak = measure(scrape, resources, args.number)
+        print(f"{name:>20}: {usec:8.2f} usec/scrape, {peak:8d} bytes allocated (peak)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,109 @@
+"""
+benchmarks.bench_startup
+~~~~~~~~~~~~~~~~~~~~~~~~
+
+Startup benchmark of the exporter (fresh interpreter per run):
+
+  - ``import github_rate_limits_exporter``.
+  - ``python -m github_rate_limits_exporter --version``.
+  - time to the first served ``/metrics`` (PAT account against a local
+    stub of the Github REST API).
+
+Usage: ``python -m benchmarks.bench_startup [--number N]``
+"""
+
+import argparse
+import json
+import os
+import socket
+import statistics
+import subprocess
+import sys
+import time
+import urllib.request
+from typing import Callable, List
+
+from tests.utils import GithubApiStub
+
+ROOT_DIR = os.path.abspath(os.path.join(os.path.dirname(__file__), os.pardir))
+RATE_LIMITS_JSON = os.path.join(ROOT_DIR, "tests", "files", "rate_limits.json")
+ENV = {**os.environ, "PYTHONPATH": ROOT_DIR}
+
+
+def run(*args: str) -> float:
+    """
+    :returns float: Seconds to run the python interpreter with the given arguments.
+    """
+    started = time.perf_counter()
+    subprocess.run([sys.executable, *args], env=ENV, capture_output=True, check=True)
+    return time.perf_counter() - started
+
+
+def first_scrape(base_url: str) -> float:
+    """
+    :returns float: Seconds from the exporter process start to the first ``/metrics``.
+    """
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        port = sock.getsockname()[1]
+    started = time.perf_counter()
+    with subprocess.Popen(
+        [
+            sys.executable,
+            "-m",
+            "github_rate_limits_exporter",
+            "--github-auth-type=pat",
+            "--github-account=bench",
+            "--github-token=bench",
+            f"--github-base-url={base_url}",
+            "--bind-address=127.0.0.1",
+            f"--listen-port={port}",
+        ],
+        env=ENV,
+    ) as exporter:
+        try:
+            while exporter.poll() is None:
+                try:
+                    with urllib.request.urlopen(
+                        f"http://127.0.0.1:{port}/metrics", timeout=5
+                    ) as response:
+                        response.read()
+                    return time.perf_counter() - started
+                except OSError:
+                    time.sleep(0.005)
+        finally:
+            exporter.terminate()
+    raise RuntimeError(f"exporter exited with status: {exporter.returncode}")
+
+
+def measure(func: Callable[[], float], number: int) -> List[float]:
+    """
+    :returns list: Milliseconds of every run.
+    """
+    return [func() * 1e3 for __ in range(number)]
+
+
+def main() -> None:
+    """Run the startup benchmark"""
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--number", type=int, default=10)
+    args = parser.parse_args()
+    with open(RATE_LIMITS_JSON, "r", encoding="utf-8") as filed:
+        rate_limits = json.load(filed)
+    with GithubApiStub(rate_limits) as stub:
+        benchmarks = {
+            "interpreter": lambda: run("-c", "pass"),
+            "import": lambda: run("-c", "import github_rate_limits_exporter"),
+            "--version": lambda: run("-m", "github_rate_limits_exporter", "--version"),
+            "first /metrics": lambda: first_scrape(stub.base_url),
+        }
+        for name, func in benchmarks.items():
+            msecs = measure(func, args.number)
+            print(
+                f"{name:>15}: {statistics.median(msecs):8.2f} msec (median),"
+                f" {min(msecs):8.2f} msec (min)"
+            )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,269 @@
+"""
+benchmarks.bench_suite
+~~~~~~~~~~~~~~~~~~~~~~
+
+Benchmark suite of the scrape hot paths, at 1, 100 and 10000 accounts:
+
+  - ``collect``: ``GithubRateLimitsCollector.collect()``, the rate-limits
+    requested on every scrape (from an in-memory Github API response).
+  - ``parse``: decode the ``/rate_limit`` responses into rate-limits snapshots.
+  - ``token_expiry``: the refresh and expiry checks of the installation tokens.
+  - ``exposition``: render the ``/metrics`` exposition of the polled rate-limits.
+
+The microseconds per call (best of ``--repeat``) are stored as baselines
+(``run --save-baseline``) and ``compare`` flags (exit status ``1``) the
+benchmarks slower than their baseline beyond ``--threshold`` and by more
+than ``--min-delta`` microseconds: the sub-microsecond benchmarks are
+within the timing noise of a pure ratio. Baselines only compare on the
+same machine (and Python), save them on the runner.
+
+Usage:
+
+  - ``python -m benchmarks.bench_suite run [--accounts 1,100] [--save-baseline]``
+  - ``python -m benchmarks.bench_suite compare [--threshold 0.25] [--min-delta 5]``
+"""
+
+import argparse
+import datetime
+import json
+import os
+import platform
+import queue
+import sys
+import timeit
+from contextlib import ExitStack
+from types import SimpleNamespace
+from typing import Any, Callable, Dict, List, Tuple
+from unittest import mock
+
+from prometheus_client import CollectorRegistry, generate_latest
+
+from github_rate_limits_exporter.collector import GithubRateLimitsCollector
+from github_rate_limits_exporter.github import GithubHttpTransport, GithubToken
+from github_rate_limits_exporter.models import RateLimitsSnapshot
+from github_rate_limits_exporter.tokens import GithubTokenManager, TokenDeadlines
+from github_rate_limits_exporter.utils import SharedExceptionQueue
+
+ROOT_DIR = os.path.abspath(os.path.join(os.path.dirname(__file__), os.pardir))
+RATE_LIMITS_JSON = os.path.join(ROOT_DIR, "tests", "files", "rate_limits.json")
+BASELINES = os.path.join(ROOT_DIR, "benchmarks", "baselines.json")
+ACCOUNTS = (1, 100, 10000)
+DEFAULT_THRESHOLD = 0.25
+# Slowdowns (microseconds per call) within the timing noise.
+DEFAULT_MIN_DELTA = 5.0
+
+# The function to time and its teardown.
+Timed = Tuple[Callable[[], Any], Callable[[], None]]
+
+
+def collector_args(accounts: int, **kwargs: Any) -> argparse.Namespace:
+    """
+    :returns argparse.Namespace: The arguments of ``accounts`` PAT accounts.
+    """
+    return argparse.Namespace(
+        github_accounts=[
+            argparse.Namespace(
+                github_auth_type="pat",
+                github_account=f"account-{account}",
+                github_token=f"token-{account}",
+                github_base_url="https://api.github.com",
+            )
+            for account in range(accounts)
+        ],
+        **kwargs,
+    )
+
+
+def in_memory_transport(body: bytes) -> Any:
+    """
+    :returns: Patches the Github API transport, every request
+        decodes the same (in-memory) ``/rate_limit`` response.
+    """
+    return mock.patch.object(
+        GithubHttpTransport,
+        "request",
+        autospec=True,
+        side_effect=lambda *_: json.loads(body),
+    )
+
+
+def bench_collect(accounts: int, body: bytes) -> Timed:
+    """Scrape with the rate-limits requested on every scrape"""
+    stack = ExitStack()
+    stack.enter_context(in_memory_transport(body))
+    collector = GithubRateLimitsCollector(
+        collector_args(accounts), SharedExceptionQueue(queue.Queue())
+    )
+    stack.callback(collector.stop)
+    return collector.collect, stack.close
+
+
+def bench_parse(accounts: int, body: bytes) -> Timed:
+    """Decode the ``/rate_limit`` response of every account"""
+
+    def parse() -> List[RateLimitsSnapshot]:
+        return [
+            RateLimitsSnapshot.from_json(json.loads(body)["resources"])
+            for __ in range(accounts)
+        ]
+
+    return parse, lambda: None
+
+
+def bench_token_expiry(accounts: int, _: bytes) -> Timed:
+    """Check the refresh deadline of every (not yet due) installation token"""
+    expires_at = datetime.datetime.now(datetime.timezone.utc) + datetime.timedelta(
+        hours=1
+    )
+    requesters = {
+        f"account-{account}": SimpleNamespace(
+            refreshable=True,
+            deadlines=TokenDeadlines(GithubToken(f"token-{account}", expires_at)),
+        )
+        for account in range(accounts)
+    }
+    manager = GithubTokenManager(requesters)
+    return manager.refresh, lambda: None
+
+
+def bench_exposition(accounts: int, body: bytes) -> Timed:
+    """Render the exposition of the polled rate-limits"""
+    stack = ExitStack()
+    stack.enter_context(in_memory_transport(body))
+    collector = GithubRateLimitsCollector(
+        collector_args(accounts, poll_interval=60), SharedExceptionQueue(queue.Queue())
+    )
+    stack.callback(collector.stop)
+    assert collector.poller is not None
+    collector.poller.poll()
+    registry = CollectorRegistry()
+    registry.register(collector)
+    return lambda: generate_latest(registry), stack.close
+
+
+BENCHMARKS: Dict[str, Callable[[int, bytes], Timed]] = {
+    "collect": bench_collect,
+    "parse": bench_parse,
+    "token_expiry": bench_token_expiry,
+    "exposition": bench_exposition,
+}
+
+
+def measure(func: Callable[[], Any], number: int, repeat: int) -> float:
+    """
+    :param int number: Calls per measure, ``0`` to calibrate (0.2s per measure).
+    :returns float: Microseconds per call, the best of ``repeat`` measures.
+    """
+    timer = timeit.Timer(func)
+    if number <= 0:
+        number, __ = timer.autorange()
+    return min(timer.repeat(repeat=repeat, number=number)) / number * 1e6
+
+
+def run(accounts: List[int], number: int, repeat: int) -> Dict[str, Any]:
+    """
+    :returns dict: The microseconds per call of every benchmark.
+    """
+    with open(RATE_LIMITS_JSON, "rb") as filed:
+        body = filed.read()
+    results = {}
+    for name, benchmark in BENCHMARKS.items():
+        for count in accounts:
+            func, teardown = benchmark(count, body)
+            try:
+                usec = measure(func, number, repeat)
+            finally:
+                teardown()
+            results[f"{name}[{count}]"] = round(usec, 3)
+            print(f"{name + f'[{count}]':>20}: {usec:14.2f} usec", flush=True)
+    return {
+        "python": platform.python_version(),
+        "machine": platform.machine(),
+        "results": results,
+    }
+
+
+def compare(
+    baseline: Dict[str, float],
+    current: Dict[str, float],
+    threshold: float,
+    min_delta: float = DEFAULT_MIN_DELTA,
+) -> List[str]:
+    """
+    :param dict baseline: The baseline microseconds per benchmark.
+    :param dict current: The current microseconds per benchmark.
+    :param float threshold: The tolerated slowdown, e.g. ``0.25`` for 25%.
+    :param float min_delta: The tolerated slowdown (microseconds per call).
+    :returns list: The benchmarks slower than their baseline beyond both.
+    """
+    regressions = []
+    for name in list(current) + [name for name in baseline if name not in current]:
+        if name not in baseline or name not in current:
+            status = "new" if name in current else "missing"
+            print(f"{name:>20}: {status}")
+            continue
+        ratio = current[name] / baseline[name]
+        regressed = ratio > 1 + threshold and current[name] - baseline[name] > min_delta
+        if regressed:
+            regressions.append(name)
+        print(
+            f"{name:>20}: {baseline[name]:14.2f} -> {current[name]:14.2f} usec"
+            f" ({ratio - 1:+7.1%}){'  REGRESSION' if regressed else ''}"
+        )
+    return regressions
+
+
+def main() -> int:
+    """Run (or compare) the benchmark suite"""
+    parser = argparse.ArgumentParser(
+        description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter
+    )
+    parser.add_argument("command", choices=("run", "compare"))
+    parser.add_argument(
+        "--accounts",
+        type=lambda value: [int(count) for count in value.split(",")],
+        default=list(ACCOUNTS),
+    )
+    parser.add_argument("--number", type=int, default=0)
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--baseline", default=BASELINES)
+    parser.add_argument("--save-baseline", action="store_true")
+    parser.add_argument("--current", help="results (JSON) to compare, run by default")
+    parser.add_argument("--output", help="write the results (JSON) to the file")
+    parser.add_argument("--threshold", type=float, default=DEFAULT_THRESHOLD)
+    parser.add_argument(
+        "--min-delta",
+        type=float,
+        default=DEFAULT_MIN_DELTA,
+        help="slowdown (usec per call) within the timing noise",
+    )
+    args = parser.parse_args()
+    if args.command == "compare" and args.save_baseline:
+        parser.error("--save-baseline would compare the results against themselves")
+    if args.command == "compare" and args.current:
+        with open(args.current, "r", encoding="utf-8") as filed:
+            current = json.load(filed)
+    else:
+        current = run(args.accounts, args.number, args.repeat)
+    for path in filter(
+        None, (args.output, args.baseline if args.save_baseline else None)
+    ):
+        with open(path, "w", encoding="utf-8") as filed:
+            json.dump(current, filed, indent=2, sort_keys=True)
+            filed.write("\n")
+    if args.command == "run":
+        return 0
+    with open(args.baseline, "r", encoding="utf-8") as filed:
+        baseline = json.load(filed)
+    if baseline.get("python") != current.get("python"):
+        print(f"Baseline of Python {baseline.get('python')}, not comparable")
+    regressions = compare(
+        baseline["results"], current["results"], args.threshold, args.min_delta
+    )
+    if regressions:
+        print(f"{len(regressions)} regression(s) beyond {args.threshold:.0%}")
+    return 1 if regressions else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
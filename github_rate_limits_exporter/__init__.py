@@ -11,43 +11,237 @@
       - GITHUB_APP_ID
       - GITHUB_INSTALLATION_ID
       - GITHUB_PRIVATE_KEY_PATH
+
+The prometheus client and the Github API requesters are imported
+once the arguments have been parsed, so ``--version`` and argument
+errors never pay for their import time.
 """
 
 import logging
 import queue
-from typing import List, Optional
-
-from prometheus_client import REGISTRY, start_http_server
+from typing import TYPE_CHECKING, Dict, List, Optional, Tuple
 
 from github_rate_limits_exporter.cli import parsecli
-from github_rate_limits_exporter.collector import GithubRateLimitsCollector
-from github_rate_limits_exporter.exceptions import ERROR_STATUS_ON_EXCEPTIONS
+from github_rate_limits_exporter.constants import DEFAULT_REQUEST_TIMEOUT
+from github_rate_limits_exporter.exceptions import error_status_on_exceptions
+from github_rate_limits_exporter.instrumentation import INSTRUMENTS
+from github_rate_limits_exporter.oneshot import run_once
 from github_rate_limits_exporter.utils import (
     GracefulShutdown,
     SharedExceptionQueue,
     initialize_logger,
 )
 
+if TYPE_CHECKING:
+    import argparse
+
+    from prometheus_client import CollectorRegistry
+    from prometheus_client.registry import Collector
+
+    from github_rate_limits_exporter.collector import GithubRateLimitsCollector
+    from github_rate_limits_exporter.remotewrite import RemoteWriter
+    from github_rate_limits_exporter.server import HTTPServer, WSGIApp
+
 logger = logging.getLogger(__name__)
 
 
+def _exporter_routes(collector: "GithubRateLimitsCollector") -> Dict[str, "WSGIApp"]:
+    """The exporter (JSON) endpoints enabled next to the ``/metrics``"""
+    # pylint: disable=import-outside-toplevel
+    from github_rate_limits_exporter.history import HISTORY_PATH, make_history_app
+    from github_rate_limits_exporter.push import OBSERVATIONS_PATH, make_push_app
+    from github_rate_limits_exporter.server import make_health_routes
+
+    routes = make_health_routes(lambda: collector.ready)
+    if collector.history is not None:
+        routes[HISTORY_PATH] = make_history_app(collector.history)
+    if collector.push_queue is not None:
+        routes[OBSERVATIONS_PATH] = make_push_app(collector.push_queue)
+    return routes
+
+
+def _self_metrics(
+    args: "argparse.Namespace", collector: "GithubRateLimitsCollector"
+) -> Optional["CollectorRegistry"]:
+    """The self-instrumentation registry (unless disabled)"""
+    INSTRUMENTS.enabled = args.self_metrics
+    if not args.self_metrics:
+        return None
+    # pylint: disable=import-outside-toplevel
+    from prometheus_client import CollectorRegistry
+
+    from github_rate_limits_exporter.collector import GithubSelfCollector
+
+    registry = CollectorRegistry(auto_describe=True)
+    registry.register(GithubSelfCollector(collector))
+    return registry
+
+
+def _register_collectors(
+    args: "argparse.Namespace", collector: "GithubRateLimitsCollector"
+) -> Tuple["CollectorRegistry", "CollectorRegistry"]:
+    """
+    Register the collectors in the default registry.
+
+    The rate-limits (they only change once per poll) are registered
+    in their own registry, every other collector is also registered in
+    the registry of the live (collected on every scrape) metrics.
+
+    :returns tuple: The rate-limits and the live registries.
+    """
+    # pylint: disable=import-outside-toplevel
+    from prometheus_client import (
+        GC_COLLECTOR,
+        PLATFORM_COLLECTOR,
+        PROCESS_COLLECTOR,
+        REGISTRY,
+        CollectorRegistry,
+    )
+
+    from github_rate_limits_exporter.collector import (
+        GithubDerivedCollector,
+        GithubRequestsCollector,
+        GithubShardCollector,
+    )
+
+    # Only the default registry describes (collects) the collectors.
+    rate_limits = CollectorRegistry()
+    rate_limits.register(collector)
+    REGISTRY.register(rate_limits)
+    live = CollectorRegistry()
+    live_collector: Optional["Collector"]
+    for live_collector in (PROCESS_COLLECTOR, PLATFORM_COLLECTOR, GC_COLLECTOR):
+        live.register(live_collector)
+    for live_collector in (
+        GithubRequestsCollector(collector),
+        GithubDerivedCollector(collector),
+        GithubShardCollector(collector),
+        _self_metrics(args, collector),
+    ):
+        if live_collector is not None:
+            REGISTRY.register(live_collector)
+            live.register(live_collector)
+    return rate_limits, live
+
+
+def _metrics_app(
+    args: "argparse.Namespace",
+    collector: "GithubRateLimitsCollector",
+    registries: Tuple["CollectorRegistry", "CollectorRegistry"],
+) -> Optional["WSGIApp"]:
+    """The pre-serialized ``/metrics`` (if enabled)"""
+    if not args.exposition_cache:
+        return None
+    # pylint: disable=import-outside-toplevel
+    from prometheus_client import REGISTRY, make_wsgi_app
+
+    from github_rate_limits_exporter.exposition import (
+        CachedExposition,
+        make_cached_metrics_app,
+    )
+
+    rate_limits, live = registries
+    exposition = CachedExposition(
+        rate_limits, lambda: collector.exposition_version, live
+    )
+    return make_cached_metrics_app(exposition, make_wsgi_app(REGISTRY))
+
+
+def _start_http_server(
+    args: "argparse.Namespace",
+    collector: "GithubRateLimitsCollector",
+    registries: Tuple["CollectorRegistry", "CollectorRegistry"],
+) -> "HTTPServer":
+    """Start the (threaded or asyncio) exporter HTTP server"""
+    # pylint: disable=import-outside-toplevel
+    from prometheus_client import REGISTRY
+
+    from github_rate_limits_exporter.server import (
+        make_exporter_app,
+        start_exporter_server,
+    )
+
+    routes = _exporter_routes(collector)
+    if args.debug_pprof:
+        from github_rate_limits_exporter.profiling import make_pprof_routes
+
+        routes.update(make_pprof_routes(args.debug_pprof_allow))
+        logger.warning("Profiling endpoints are enabled on /debug/pprof/")
+    app = make_exporter_app(REGISTRY, routes, _metrics_app(args, collector, registries))
+    if args.http_server == "asyncio":
+        from github_rate_limits_exporter.asyncserver import start_async_exporter_server
+
+        # Without polling (or observing) the scrapes request the Github API,
+        # the profiles sample (or trace) for seconds.
+        blocking = collector.exposition_version is None or args.debug_pprof
+        server, _ = start_async_exporter_server(
+            args.listen_port, args.bind_addr, app, blocking=blocking
+        )
+        return server
+    httpd, _ = start_exporter_server(args.listen_port, args.bind_addr, app)
+    return httpd
+
+
+def _start_remote_writer(
+    args: "argparse.Namespace",
+    collector: "GithubRateLimitsCollector",
+    rate_limits: "CollectorRegistry",
+) -> Optional["RemoteWriter"]:
+    """Start pushing the rate-limits to the remote-write endpoint (if enabled)"""
+    if not args.remote_write_url:
+        return None
+    # pylint: disable=import-outside-toplevel
+    from github_rate_limits_exporter.remotewrite import RemoteWriter
+
+    writer = RemoteWriter(
+        rate_limits, lambda: collector.exposition_version, args.remote_write_url
+    )
+    writer.start()
+    logger.info("Remote-write to %s started", args.remote_write_url)
+    return writer
+
+
 def main(argv: Optional[List[str]] = None) -> int:
     """Prometheus exporter Main Entrypoint"""
+    collector: Optional["GithubRateLimitsCollector"] = None
+    httpd: Optional["HTTPServer"] = None
+    remote_writer: Optional["RemoteWriter"] = None
     try:
         args = parsecli(argv=argv, description=__doc__)
         initialize_logger(args.verbosity)
-        logger.info('Register collector for "%s" Github account', args.github_account)
+        if args.once:
+            return run_once(args, SharedExceptionQueue(queue.Queue()))
+        # pylint: disable=import-outside-toplevel
+        from github_rate_limits_exporter.collector import GithubRateLimitsCollector
+
+        logger.info(
+            'Register collector for "%s" Github account(s)',
+            ", ".join(account.github_account for account in args.github_accounts),
+        )
         exception_queue = SharedExceptionQueue(queue.Queue())
         collector = GithubRateLimitsCollector(args, exception_queue)
-        REGISTRY.register(collector)
+        registries = _register_collectors(args, collector)
+        collector.start(timeout=args.poll_interval)
         logger.info(
-            "HTTP metrics server started on [%s:%d]", args.bind_addr, args.listen_port
+            "HTTP metrics server (%s) started on [%s:%d]",
+            args.http_server,
+            args.bind_addr,
+            args.listen_port,
         )
-        start_http_server(args.listen_port, addr=args.bind_addr)
+        httpd = _start_http_server(args, collector, registries)
+        remote_writer = _start_remote_writer(args, collector, registries[0])
         GracefulShutdown.register_handler()
         while not GracefulShutdown.SHUTDOWN:
             exception_queue.get_error(timeout=1)
-    except ERROR_STATUS_ON_EXCEPTIONS as err:
+    except error_status_on_exceptions() as err:
         logger.error(err, exc_info=True)
         return 1
+    finally:
+        if remote_writer is not None:
+            remote_writer.stop(timeout=DEFAULT_REQUEST_TIMEOUT)
+        if httpd is not None:
+            httpd.shutdown()
+            httpd.server_close()
+        if collector is not None:
+            collector.stop()
     return 0
@@ -0,0 +1,277 @@
+"""
+github_rate_limits_exporter.aio
+~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~
+
+asyncio Github API rate-limits requester engine.
+
+Alternative to the (synchronous) threaded requester, it talks
+directly to the Github REST API over a shared pool of keep-alive
+connections, so a single event loop can poll hundreds of tokens:
+
+  - ``GET /rate_limit``
+  - ``POST /app/installations/{installation_id}/access_tokens``
+"""
+
+import argparse
+import asyncio
+import logging
+import threading
+import time
+from typing import Any, Awaitable, Callable, Dict, Optional, Union
+
+import aiohttp
+
+from github_rate_limits_exporter.constants import (
+    DEFAULT_BASE_URL,
+    DEFAULT_CONNECT_TIMEOUT,
+    DEFAULT_MAX_WORKERS,
+    DEFAULT_REQUEST_TIMEOUT,
+    GITHUB_API_HEADERS,
+)
+from github_rate_limits_exporter.exceptions import ApiRequestError
+from github_rate_limits_exporter.github import GithubApp, GithubToken
+from github_rate_limits_exporter.instrumentation import INSTRUMENTS
+from github_rate_limits_exporter.models import RateLimitsSnapshot
+from github_rate_limits_exporter.tokens import TokenDeadlines
+from github_rate_limits_exporter.utils import extend_datetime_now, parse_github_datetime
+
+logger = logging.getLogger(__name__)
+
+
+class AsyncGithubRateLimitsRequester:
+    """
+    Represents an asyncio requester to ``GET`` the Github API rate-limits.
+
+    :param argparse.Namespace: Argparse object to store the initial requester attributes.
+        Namespace attributes are populated by the command-line interface.
+
+      - token (GithubToken): The Github Access Token (PAT or APP),
+        the APP installation token is requested on the first call.
+
+    :param GithubApp app: The Github App (installation) to request the rate-limits of.
+
+    Concurrent callers share one in-flight request and one token refresh.
+    The APP token is refreshed ahead of its expiry in a background task,
+    the requests keep using the current token until the new one arrives.
+    """
+
+    def __init__(
+        self, args: argparse.Namespace, app: Optional[GithubApp] = None
+    ) -> None:
+        self._base_url = getattr(args, "github_base_url", DEFAULT_BASE_URL).rstrip("/")
+        self._inflight: Dict[str, "asyncio.Future[Any]"] = {}
+        self._coalesced = 0
+        self._app = app
+        self._deadlines: Optional[TokenDeadlines] = None
+        if app is not None:
+            return
+        logger.debug("Github authentication type: %s", args.github_auth_type)
+        if args.github_auth_type == "pat":
+            self._deadlines = TokenDeadlines(
+                GithubToken(args.github_token, extend_datetime_now(weeks=999))
+            )
+        else:
+            self._app = GithubApp(args)
+
+    @property
+    def token(self) -> Optional[GithubToken]:
+        """The Github Access Token (``None`` until the APP token is requested)"""
+        return None if self._deadlines is None else self._deadlines.token
+
+    @property
+    def deadlines(self) -> Optional[TokenDeadlines]:
+        """The Github token and its refresh and expiry deadlines"""
+        return self._deadlines
+
+    @property
+    def refreshable(self) -> bool:
+        """``True`` if the token can be refreshed (APP)"""
+        return self._app is not None
+
+    @property
+    def coalesced(self) -> int:
+        """Number of calls coalesced with an in-flight request or token refresh"""
+        return self._coalesced
+
+    def _flight(
+        self, key: str, factory: Callable[[], Awaitable[Any]]
+    ) -> "asyncio.Future[Any]":
+        future = self._inflight.get(key)
+        if future is not None:
+            self._coalesced += 1
+            return future
+        future = asyncio.ensure_future(factory())
+        self._inflight[key] = future
+        future.add_done_callback(lambda __: self._inflight.pop(key, None))
+        return future
+
+    async def _single_flight(
+        self, key: str, factory: Callable[[], Awaitable[Any]]
+    ) -> Any:
+        # A cancelled caller must not cancel the call shared with the others.
+        return await asyncio.shield(self._flight(key, factory))
+
+    async def get_rate_limits(
+        self, session: aiohttp.ClientSession
+    ) -> RateLimitsSnapshot:
+        """
+        Retrieve the Github API rate-limits (``resources`` of ``/rate_limit``).
+
+        :param aiohttp.ClientSession session: The (shared) HTTP client session.
+        :returns RateLimitsSnapshot: The rate-limits per API resource.
+        """
+        return await self._single_flight(
+            "rate_limit", lambda: self._get_rate_limits(session)
+        )
+
+    async def _get_rate_limits(
+        self, session: aiohttp.ClientSession
+    ) -> RateLimitsSnapshot:
+        deadlines = self._deadlines
+        if deadlines is None or deadlines.has_expired():
+            deadlines = await self._single_flight(
+                "token", lambda: self._refresh_token(session)
+            )
+        elif deadlines.refresh_due() and "token" not in self._inflight:
+            self._refresh_token_in_background(session)
+        data = await self._request(
+            session, "GET", "/rate_limit", f"token {deadlines.token.token}"
+        )
+        return RateLimitsSnapshot.from_json(data["resources"])
+
+    def _refresh_token_in_background(self, session: aiohttp.ClientSession) -> None:
+        def _done(task: "asyncio.Future[Any]") -> None:
+            if not task.cancelled() and task.exception() is not None:
+                logger.warning(
+                    "Failed to refresh the Github token: %r", task.exception()
+                )
+
+        # The in-flight future is referenced until the refresh is done.
+        future = self._flight("token", lambda: self._refresh_token(session))
+        future.add_done_callback(_done)
+
+    async def _refresh_token(self, session: aiohttp.ClientSession) -> TokenDeadlines:
+        app = self._app
+        if app is None:
+            raise ApiRequestError("Github PAT has expired and can't be refreshed")
+        logger.debug("Requesting new Github Token")
+        started = time.monotonic()
+        jwt = app.signer.cached
+        if jwt is None:
+            # The RSA signature is offloaded to the default executor (worker
+            # pool), so it doesn't block the event loop.
+            jwt = await asyncio.get_running_loop().run_in_executor(
+                None, lambda: app.jwt
+            )
+        data = await self._request(
+            session,
+            "POST",
+            f"/app/installations/{app.installation_id}/access_tokens",
+            f"Bearer {jwt}",
+        )
+        latency = time.monotonic() - started
+        INSTRUMENTS.observe(INSTRUMENTS.token_mints, latency)
+        self._deadlines = TokenDeadlines(
+            GithubToken(data["token"], parse_github_datetime(data["expires_at"])),
+            latency,
+        )
+        return self._deadlines
+
+    async def _request(
+        self,
+        session: aiohttp.ClientSession,
+        method: str,
+        path: str,
+        authorization: str,
+    ) -> Dict[str, Any]:
+        headers = {**GITHUB_API_HEADERS, "Authorization": authorization}
+        started, status = INSTRUMENTS.timer(), "error"
+        try:
+            async with session.request(
+                method, f"{self._base_url}{path}", headers=headers
+            ) as response:
+                status = str(response.status)
+                response.raise_for_status()
+                return await response.json()
+        except (aiohttp.ClientError, asyncio.TimeoutError) as err:
+            raise ApiRequestError(f"{method} {path}: {err!r}") from err
+        finally:
+            INSTRUMENTS.observe_request(path, status, INSTRUMENTS.since(started))
+
+
+class AsyncGithubRateLimitsEngine:
+    """
+    Runs the asyncio requesters on a dedicated event loop (thread).
+
+    All the requesters share one HTTP client session, its connection
+    pool bounds the number of concurrent Github API requests.
+
+    :param int max_connections: Maximum number of (keep-alive) connections.
+    :param float connect_timeout: Seconds to wait for a connection to be established.
+    :param float read_timeout: Seconds to wait for the server to send a response.
+    """
+
+    def __init__(
+        self,
+        max_connections: int = DEFAULT_MAX_WORKERS,
+        connect_timeout: float = DEFAULT_CONNECT_TIMEOUT,
+        read_timeout: float = DEFAULT_REQUEST_TIMEOUT,
+    ) -> None:
+        self._max_connections = max_connections
+        self._connect_timeout = connect_timeout
+        self._timeout = read_timeout
+        self._session: Optional[aiohttp.ClientSession] = None
+        self._loop = asyncio.new_event_loop()
+        self._thread = threading.Thread(
+            target=self._loop.run_forever, name="github-rate-limits-aio", daemon=True
+        )
+        self._thread.start()
+
+    def _get_session(self) -> aiohttp.ClientSession:
+        # The session must be created within the running event loop.
+        if self._session is None:
+            self._session = aiohttp.ClientSession(
+                connector=aiohttp.TCPConnector(limit=self._max_connections),
+                timeout=aiohttp.ClientTimeout(
+                    sock_connect=self._connect_timeout, sock_read=self._timeout
+                ),
+            )
+        return self._session
+
+    async def _fetch(
+        self, requesters: Dict[str, AsyncGithubRateLimitsRequester]
+    ) -> Dict[str, Union[RateLimitsSnapshot, BaseException]]:
+        session = self._get_session()
+        results = await asyncio.gather(
+            *(requester.get_rate_limits(session) for requester in requesters.values()),
+            return_exceptions=True,
+        )
+        return dict(zip(requesters, results))
+
+    def fetch(
+        self, requesters: Dict[str, AsyncGithubRateLimitsRequester]
+    ) -> Dict[str, Union[RateLimitsSnapshot, BaseException]]:
+        """
+        Retrieve the Github API rate-limits of every account concurrently.
+
+        :param dict requesters: The asyncio requesters per account.
+        :returns dict: The rate-limits (or the raised exception) per account.
+        """
+        future = asyncio.run_coroutine_threadsafe(self._fetch(requesters), self._loop)
+        return future.result()
+
+    async def _close(self) -> None:
+        if self._session is not None:
+            await self._session.close()
+            self._session = None
+
+    def close(self) -> None:
+        """Close the HTTP client session and stop the event loop"""
+        if self._loop.is_closed():
+            return
+        asyncio.run_coroutine_threadsafe(self._close(), self._loop).result(
+            self._timeout
+        )
+        self._loop.call_soon_threadsafe(self._loop.stop)
+        self._thread.join(self._timeout)
+        self._loop.close()
@@ -0,0 +1,324 @@
+"""
+github_rate_limits_exporter.asyncserver
+~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~
+
+Single-threaded (asyncio) exporter HTTP server.
+
+Every connection is a coroutine of a single event loop (thread), not a
+thread of its own: persistent (HTTP/1.1 keep-alive) connections, many
+concurrent scrapers and slow clients cost no thread. Idle connections,
+slow request headers and slow readers are timed out.
+
+The WSGI application is called on the event loop, unless it may
+block (e.g. the rate-limits are requested on every scrape), then it is
+called on a small, bounded pool of worker threads.
+"""
+
+import asyncio
+import io
+import logging
+import sys
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Dict, List, Optional, Set, Tuple
+from urllib.parse import unquote
+
+from github_rate_limits_exporter.constants import (
+    DEFAULT_HTTP_IDLE_TIMEOUT,
+    DEFAULT_HTTP_WORKERS,
+    HTTP_BACKLOG,
+    HTTP_MAX_BODY_SIZE,
+    HTTP_MAX_HEADER_SIZE,
+)
+from github_rate_limits_exporter.server import WSGIApp, make_exporter_app
+
+logger = logging.getLogger(__name__)
+
+Response = Tuple[str, List[Tuple[str, str]], bytes]
+
+
+class HTTPError(Exception):
+    """
+    Malformed (or unsupported) HTTP request, the connection is closed.
+
+    :param str status: The HTTP status line, e.g. ``400 Bad Request``.
+    """
+
+    def __init__(self, status: str) -> None:
+        super().__init__(status)
+        self.status = status
+
+
+def call_wsgi_app(app: WSGIApp, environ: Dict[str, Any]) -> Response:
+    """
+    Call the WSGI application and buffer its response.
+
+    :param callable app: The WSGI application.
+    :param dict environ: The WSGI environment.
+    :returns tuple: The status line, the headers and the body.
+    """
+    response: List[Any] = []
+
+    def start_response(status: str, headers: List[Tuple[str, str]], *_: Any) -> Any:
+        response[:] = [status, headers]
+        return lambda data: None
+
+    result = app(environ, start_response)
+    try:
+        body = b"".join(result)
+    finally:
+        close = getattr(result, "close", None)
+        if close is not None:
+            close()
+    return response[0], list(response[1]), body
+
+
+def head_response(response: Response) -> Response:
+    """
+    The response of a ``HEAD`` request: the headers (and the
+    ``Content-Length``) of the ``GET`` response, without its body.
+
+    :param tuple response: The buffered WSGI application response.
+    :returns tuple: The status line, the headers and an empty body.
+    """
+    status, headers, body = response
+    if "content-length" not in {name.lower() for name, _ in headers}:
+        headers = headers + [("Content-Length", str(len(body)))]
+    return status, headers, b""
+
+
+class AsyncExporterServer:  # pylint: disable=too-many-instance-attributes
+    """
+    Asyncio HTTP/1.1 server of a WSGI application, on a dedicated thread.
+
+    :param callable app: The WSGI application.
+    :param str addr: The bind (IPv4 or IPv6) address.
+    :param int port: The listen port (``0`` for any free port).
+    :param bool blocking: The application may block, call it on
+        a pool of worker threads instead of the event loop.
+    :param float idle_timeout: Seconds to wait for a (complete) request
+        or for a slow client to read the response.
+    """
+
+    def __init__(
+        self,
+        app: WSGIApp,
+        addr: str = "0.0.0.0",
+        port: int = 0,
+        blocking: bool = False,
+        idle_timeout: float = DEFAULT_HTTP_IDLE_TIMEOUT,
+    ) -> None:
+        self._app = app
+        self._addr = addr
+        self._idle_timeout = idle_timeout
+        self._executor: Optional[ThreadPoolExecutor] = None
+        if blocking:
+            self._executor = ThreadPoolExecutor(
+                max_workers=DEFAULT_HTTP_WORKERS, thread_name_prefix="github-http"
+            )
+        self._loop = asyncio.new_event_loop()
+        self._server: Optional[asyncio.AbstractServer] = None
+        self._connections: Set[asyncio.StreamWriter] = set()
+        self._thread: Optional[threading.Thread] = None
+        self.server_port = port
+
+    def start(self) -> threading.Thread:
+        """
+        Start listening and serve on a dedicated (daemon) thread.
+
+        :raises OSError: If the address can not be bound.
+        :returns threading.Thread: The event loop thread.
+        """
+        self._server = self._loop.run_until_complete(
+            asyncio.start_server(
+                self._handle,
+                self._addr,
+                self.server_port,
+                limit=HTTP_MAX_HEADER_SIZE,
+                backlog=HTTP_BACKLOG,
+                reuse_address=True,
+            )
+        )
+        self.server_port = self._server.sockets[0].getsockname()[1]
+        self._thread = threading.Thread(
+            target=self._loop.run_forever, name="github-rate-limits-http", daemon=True
+        )
+        self._thread.start()
+        return self._thread
+
+    def shutdown(self) -> None:
+        """Stop serving, the open connections are closed"""
+
+        async def close() -> None:
+            if self._server is not None:
+                self._server.close()
+            for writer in self._connections:
+                writer.transport.abort()
+            tasks = [
+                task
+                for task in asyncio.all_tasks()
+                if task is not asyncio.current_task()
+            ]
+            if tasks:
+                await asyncio.wait(tasks, timeout=self._idle_timeout)
+            if self._server is not None:
+                await self._server.wait_closed()
+            self._loop.stop()
+
+        if self._thread is not None and self._thread.is_alive():
+            asyncio.run_coroutine_threadsafe(close(), self._loop)
+            self._thread.join(self._idle_timeout)
+        if self._executor is not None:
+            self._executor.shutdown(wait=False)
+
+    def server_close(self) -> None:
+        """Release the event loop (once shut down)"""
+        if not self._loop.is_running() and not self._loop.is_closed():
+            self._loop.close()
+
+    def _environ(
+        self, request_line: str, headers: Dict[str, str], body: bytes, peer: Any
+    ) -> Dict[str, Any]:
+        method, target, protocol = request_line.split(" ", 2)
+        path, _, query = target.partition("?")
+        environ = {
+            "REQUEST_METHOD": method,
+            "SCRIPT_NAME": "",
+            "PATH_INFO": unquote(path, "iso-8859-1"),
+            "QUERY_STRING": query,
+            "SERVER_NAME": self._addr,
+            "SERVER_PORT": str(self.server_port),
+            "SERVER_PROTOCOL": protocol,
+            "REMOTE_ADDR": peer[0] if isinstance(peer, tuple) else "",
+            "CONTENT_TYPE": headers.pop("content-type", ""),
+            "CONTENT_LENGTH": headers.pop("content-length", ""),
+            "wsgi.version": (1, 0),
+            "wsgi.url_scheme": "http",
+            "wsgi.input": io.BytesIO(body),
+            "wsgi.errors": sys.stderr,
+            "wsgi.multithread": self._executor is not None,
+            "wsgi.multiprocess": False,
+            "wsgi.run_once": False,
+        }
+        for name, value in headers.items():
+            environ["HTTP_" + name.upper().replace("-", "_")] = value
+        return environ
+
+    async def _read_request(
+        self, reader: asyncio.StreamReader
+    ) -> Optional[Tuple[str, Dict[str, str], bytes]]:
+        try:
+            head = await reader.readuntil(b"\r\n\r\n")
+        except asyncio.IncompleteReadError as err:
+            if err.partial.strip():
+                raise HTTPError("400 Bad Request") from err
+            return None
+        except asyncio.LimitOverrunError as err:
+            raise HTTPError("431 Request Header Fields Too Large") from err
+        lines = head.decode("iso-8859-1").split("\r\n")
+        request_line = lines[0]
+        if request_line.count(" ") != 2 or not request_line.endswith(
+            ("HTTP/1.0", "HTTP/1.1")
+        ):
+            raise HTTPError("400 Bad Request")
+        headers: Dict[str, str] = {}
+        for line in lines[1:]:
+            if not line:
+                continue
+            name, separator, value = line.partition(":")
+            if not separator:
+                raise HTTPError("400 Bad Request")
+            headers[name.strip().lower()] = value.strip()
+        if "transfer-encoding" in headers:
+            raise HTTPError("411 Length Required")
+        try:
+            length = int(headers.get("content-length") or 0)
+        except ValueError as err:
+            raise HTTPError("400 Bad Request") from err
+        if length > HTTP_MAX_BODY_SIZE:
+            raise HTTPError("413 Payload Too Large")
+        body = await reader.readexactly(length) if length > 0 else b""
+        return request_line, headers, body
+
+    async def _respond(
+        self,
+        writer: asyncio.StreamWriter,
+        protocol: str,
+        response: Response,
+        keep_alive: bool,
+    ) -> None:
+        status, headers, body = response
+        names = {name.lower() for name, _ in headers}
+        if "content-length" not in names:
+            headers.append(("Content-Length", str(len(body))))
+        headers.append(("Connection", "keep-alive" if keep_alive else "close"))
+        head = f"{protocol} {status}\r\n" + "".join(
+            f"{name}: {value}\r\n" for name, value in headers
+        )
+        writer.write(head.encode("iso-8859-1") + b"\r\n" + body)
+        await asyncio.wait_for(writer.drain(), self._idle_timeout)
+
+    async def _handle(
+        self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter
+    ) -> None:
+        keep_alive = True
+        self._connections.add(writer)
+        try:
+            while keep_alive:
+                request = await asyncio.wait_for(
+                    self._read_request(reader), self._idle_timeout
+                )
+                if request is None:
+                    break
+                request_line, headers, body = request
+                protocol = request_line.rsplit(" ", 1)[1]
+                connection = headers.get("connection", "").lower()
+                keep_alive = (
+                    connection != "close"
+                    if protocol == "HTTP/1.1"
+                    else connection == "keep-alive"
+                )
+                environ = self._environ(
+                    request_line, headers, body, writer.get_extra_info("peername")
+                )
+                if self._executor is None:
+                    response = call_wsgi_app(self._app, environ)
+                else:
+                    response = await self._loop.run_in_executor(
+                        self._executor, call_wsgi_app, self._app, environ
+                    )
+                if environ["REQUEST_METHOD"] == "HEAD":
+                    response = head_response(response)
+                await self._respond(writer, "HTTP/1.1", response, keep_alive)
+        except HTTPError as err:
+            await self._respond_error(writer, err.status)
+        except (asyncio.TimeoutError, ConnectionError, asyncio.IncompleteReadError):
+            pass
+        except Exception:  # pylint: disable=broad-except
+            logger.exception("Failed to serve an HTTP request")
+            await self._respond_error(writer, "500 Internal Server Error")
+        finally:
+            self._connections.discard(writer)
+            writer.close()
+
+    async def _respond_error(self, writer: asyncio.StreamWriter, status: str) -> None:
+        try:
+            await self._respond(writer, "HTTP/1.1", (status, [], b""), False)
+        except (asyncio.TimeoutError, ConnectionError):
+            pass
+
+
+def start_async_exporter_server(
+    port: int, addr: str = "0.0.0.0", app: Optional[WSGIApp] = None, **kwargs: Any
+) -> Tuple[AsyncExporterServer, threading.Thread]:
+    """
+    Start the asyncio exporter HTTP server on a daemon thread.
+
+    :param int port: The listen port.
+    :param str addr: The bind (IPv4 or IPv6) address.
+    :param callable app: The WSGI application.
+    :param kwargs: The ``AsyncExporterServer`` keyword arguments.
+    :returns tuple: The HTTP server and its thread.
+    """
+    server = AsyncExporterServer(app or make_exporter_app(), addr, port, **kwargs)
+    return server, server.start()
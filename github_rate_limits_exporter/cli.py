@@ -6,12 +6,39 @@
 """ ""
 
 import argparse
+import json
 import os
-from typing import List, NoReturn, Optional, Union
+import urllib.parse
+import warnings
+from typing import Any, Dict, List, NoReturn, Optional, Union
 
 from github_rate_limits_exporter._version import __version__
+from github_rate_limits_exporter.constants import (
+    DEFAULT_CONNECT_TIMEOUT,
+    DEFAULT_HISTORY_SIZE,
+    DEFAULT_HTTP_POOL_SIZE,
+    DEFAULT_HTTP_RETRIES,
+    DEFAULT_MAX_OBSERVATIONS,
+    DEFAULT_MAX_WORKERS,
+    DEFAULT_POLL_MAX_INTERVAL,
+    DEFAULT_POLL_MIN_INTERVAL,
+    DEFAULT_PPROF_ALLOW,
+    DEFAULT_REQUEST_TIMEOUT,
+    DEPRECATED_REQUESTER_ENGINES,
+    HTTP_SERVERS,
+    METRICS_LAYOUTS,
+    ONCE_OUTPUT_FORMATS,
+    POLL_SCHEDULERS,
+    REQUESTER_ENGINES,
+)
 from github_rate_limits_exporter.exceptions import ArgumentError
-from github_rate_limits_exporter.utils import is_ipv4_addr, is_ipv6_addr
+from github_rate_limits_exporter.oneshot import RemainingThreshold, parse_thresholds
+from github_rate_limits_exporter.utils import (
+    IPNetwork,
+    is_ipv4_addr,
+    is_ipv6_addr,
+    parse_networks,
+)
 
 
 def parsecli(
@@ -32,16 +59,23 @@ def parsecli(
         dest="github_auth_type",
         choices=["pat", "app"],
         default=os.getenv("GITHUB_AUTH_TYPE"),
-        required=not os.getenv("GITHUB_AUTH_TYPE"),
         help="github token authentication type",
     )
     parser.add_argument(
         "--github-account",
         dest="github_account",
         default=os.getenv("GITHUB_ACCOUNT"),
-        required=not os.getenv("GITHUB_ACCOUNT"),
         help="github account name",
     )
+    parser.add_argument(
+        "--github-accounts-file",
+        dest="github_accounts_file",
+        nargs="?",
+        default=os.getenv("GITHUB_ACCOUNTS_FILE"),
+        type=argparse.FileType("r"),
+        help="JSON file with a list of github accounts (PAT or APP) to export,"
+        '\ne.g. [{"account": "name", "auth_type": "pat", "token": "..."}]',
+    )
     parser.add_argument(
         "--github-token",
         dest="github_token",
@@ -65,6 +99,15 @@ def parsecli(
         type=int,
         help="github installation ID for App/Org Pair",
     )
+    parser.add_argument(
+        "--github-app-discover-installations",
+        dest="github_app_discover_installations",
+        action="store_true",
+        default=os.getenv("GITHUB_APP_DISCOVER_INSTALLATIONS", "").lower()
+        in ("1", "true", "yes"),
+        help="export every installation of the github App (instead of"
+        "\n--github-app-installation-id) as <account>/<installation login>",
+    )
     parser.add_argument(
         "--github-app-private-key-path",
         dest="github_app_private_key_path",
@@ -94,6 +137,179 @@ def parsecli(
         type=listen_port,
         help="exporter HTTP listen port, (default: %(default)s)",
     )
+    parser.add_argument(
+        "--requester-engine",
+        dest="requester_engine",
+        choices=REQUESTER_ENGINES,
+        default=os.getenv("EXPORTER_REQUESTER_ENGINE") or REQUESTER_ENGINES[0],
+        type=requester_engine,
+        help="github API requester engine, ``asyncio`` polls every account"
+        "\non a single event loop (``pygithub`` is a deprecated alias of"
+        "\n``threaded``), (default: %(default)s)",
+    )
+    parser.add_argument(
+        "--max-workers",
+        dest="max_workers",
+        default=os.getenv("EXPORTER_MAX_WORKERS") or DEFAULT_MAX_WORKERS,
+        type=max_workers,
+        help="maximum number of concurrent Github API requests (threads or"
+        " connections), (default: %(default)s)",
+    )
+    parser.add_argument(
+        "--http-pool-size",
+        dest="http_pool_size",
+        default=os.getenv("EXPORTER_HTTP_POOL_SIZE") or DEFAULT_HTTP_POOL_SIZE,
+        type=pool_size,
+        help="maximum number of keep-alive connections per Github API host,"
+        " (default: %(default)s)",
+    )
+    parser.add_argument(
+        "--http-connect-timeout",
+        dest="http_connect_timeout",
+        default=os.getenv("EXPORTER_HTTP_CONNECT_TIMEOUT") or DEFAULT_CONNECT_TIMEOUT,
+        type=timeout,
+        help="seconds to wait for a Github API connection, (default: %(default)s)",
+    )
+    parser.add_argument(
+        "--http-read-timeout",
+        dest="http_read_timeout",
+        default=os.getenv("EXPORTER_HTTP_READ_TIMEOUT") or DEFAULT_REQUEST_TIMEOUT,
+        type=timeout,
+        help="seconds to wait for a Github API response, (default: %(default)s)",
+    )
+    parser.add_argument(
+        "--http-retries",
+        dest="http_retries",
+        default=os.getenv("EXPORTER_HTTP_RETRIES") or DEFAULT_HTTP_RETRIES,
+        type=retries,
+        help="maximum number of retries of a Github API request on connection"
+        "\nerrors and 5xx responses (token mints are not retried on 5xx),"
+        "\n(default: %(default)s)",
+    )
+    parser.add_argument(
+        "--metrics-layout",
+        dest="metrics_layout",
+        choices=METRICS_LAYOUTS,
+        default=os.getenv("EXPORTER_METRICS_LAYOUT") or METRICS_LAYOUTS[0],
+        help="one metric family per API resource or a single"
+        "\ngithub_rate_limits{resource=...} metric family, (default: %(default)s)",
+    )
+    parser.add_argument(
+        "--no-derived-metrics",
+        dest="derived_metrics",
+        action="store_false",
+        default=os.getenv("EXPORTER_DERIVED_METRICS", "true").lower()
+        in ("1", "true", "yes"),
+        help="do not export the used requests per second, the seconds until"
+        "\nexhaustion and until reset of every API resource",
+    )
+    parser.add_argument(
+        "--ingest-logs",
+        dest="ingest_logs",
+        default=os.getenv("EXPORTER_INGEST_LOGS"),
+        type=ingest_logs,
+        help="JSON-lines access log (or directory of access logs) with the"
+        "\nX-RateLimit-* headers of the github API responses to export,"
+        "\nwithout --github-auth-type the /rate_limit is never requested",
+    )
+    parser.add_argument(
+        "--push-observations",
+        dest="push_observations",
+        action="store_true",
+        default=os.getenv("EXPORTER_PUSH_OBSERVATIONS", "").lower()
+        in ("1", "true", "yes"),
+        help="accept batches of the X-RateLimit-* headers of the github API"
+        "\nresponses on POST /api/v1/observations,"
+        "\nwithout --github-auth-type the /rate_limit is never requested",
+    )
+    parser.add_argument(
+        "--max-observations",
+        dest="max_observations",
+        default=os.getenv("EXPORTER_MAX_OBSERVATIONS") or DEFAULT_MAX_OBSERVATIONS,
+        type=max_observations,
+        help="maximum number of observed (account, resource) rate-limits"
+        "\nkept in memory, (default: %(default)s)",
+    )
+    parser.add_argument(
+        "--http-server",
+        dest="http_server",
+        choices=HTTP_SERVERS,
+        default=os.getenv("EXPORTER_HTTP_SERVER") or HTTP_SERVERS[0],
+        help="exporter HTTP server, a thread per connection or a single-threaded"
+        "\n(keep-alive) asyncio event loop, (default: %(default)s)",
+    )
+    parser.add_argument(
+        "--exposition-cache",
+        dest="exposition_cache",
+        action="store_true",
+        default=os.getenv("EXPORTER_EXPOSITION_CACHE", "").lower()
+        in ("1", "true", "yes"),
+        help="render the /metrics exposition (text, OpenMetrics and gzip) once"
+        "\nper poll and serve the cached buffers, requires --poll-interval",
+    )
+    parser.add_argument(
+        "--history-size",
+        dest="history_size",
+        default=os.getenv("EXPORTER_HISTORY_SIZE") or DEFAULT_HISTORY_SIZE,
+        type=history_size,
+        help="fetches kept per API resource and served by /api/v1/history,"
+        "\n0 disables the history, (default: %(default)s)",
+    )
+    parser.add_argument(
+        "--remote-write-url",
+        dest="remote_write_url",
+        default=os.getenv("EXPORTER_REMOTE_WRITE_URL"),
+        type=http_url,
+        help="push the metrics of every poll to a Prometheus remote-write"
+        "\nendpoint, requires --poll-interval, (default: %(default)s)",
+    )
+    _add_once_arguments(parser)
+    _add_instrumentation_arguments(parser)
+    parser.add_argument(
+        "--shard-index",
+        dest="shard_index",
+        default=os.getenv("EXPORTER_SHARD_INDEX") or 0,
+        type=shard_index,
+        help="shard of this exporter replica, only the accounts (consistently)"
+        "\nhashed to the shard are requested, (default: %(default)s)",
+    )
+    parser.add_argument(
+        "--shard-count",
+        dest="shard_count",
+        default=os.getenv("EXPORTER_SHARD_COUNT") or 1,
+        type=shard_count,
+        help="number of shards (exporter replicas), (default: %(default)s)",
+    )
+    parser.add_argument(
+        "--poll-interval",
+        dest="poll_interval",
+        default=os.getenv("EXPORTER_POLL_INTERVAL") or 0,
+        type=poll_interval,
+        help="seconds between background polls of the Github API rate-limits,"
+        " 0 requests the rate-limits on every scrape, (default: %(default)s)",
+    )
+    parser.add_argument(
+        "--poll-scheduler",
+        dest="poll_scheduler",
+        choices=POLL_SCHEDULERS,
+        default=os.getenv("EXPORTER_POLL_SCHEDULER") or POLL_SCHEDULERS[0],
+        help="``adaptive`` polls every account more often near exhaustion and"
+        "\njust after its reset (requires --poll-interval), (default: %(default)s)",
+    )
+    parser.add_argument(
+        "--poll-min-interval",
+        dest="poll_min_interval",
+        default=os.getenv("EXPORTER_POLL_MIN_INTERVAL") or DEFAULT_POLL_MIN_INTERVAL,
+        type=poll_bound,
+        help="floor of the adaptive poll interval (seconds), (default: %(default)s)",
+    )
+    parser.add_argument(
+        "--poll-max-interval",
+        dest="poll_max_interval",
+        default=os.getenv("EXPORTER_POLL_MAX_INTERVAL") or DEFAULT_POLL_MAX_INTERVAL,
+        type=poll_bound,
+        help="ceiling of the adaptive poll interval (seconds), (default: %(default)s)",
+    )
     parser.add_argument(
         "--version", "-V", action="version", version=f"%(prog)s: {__version__}"
     )
@@ -105,10 +321,221 @@ def parsecli(
         help="logging verbosity (up to 5 times),default: CRITICAL",
     )
     args, __ = parser.parse_known_args(args=argv)
-    _check_mutual_inclusive_arguments(args, parser)
+    args.github_accounts = _load_github_accounts(args, parser)
+    if not _is_passive(args) and (
+        args.github_accounts_file is None or args.github_account is not None
+    ):
+        _check_required_arguments(args, parser)
+        _check_mutual_inclusive_arguments(args, parser)
+    _check_poll_scheduler_arguments(args, parser)
+    if args.exposition_cache and not args.poll_interval and not _is_passive(args):
+        parser.error("exposition cache requires: --poll-interval")
+    _check_once_arguments(args, parser)
+    if args.remote_write_url and not args.poll_interval and not _is_passive(args):
+        parser.error("remote write requires: --poll-interval")
+    _check_shard_arguments(args, parser)
     return args
 
 
+def _add_once_arguments(parser: argparse.ArgumentParser) -> None:
+    group = parser.add_argument_group("one-shot mode (cron jobs, CI gates)")
+    group.add_argument(
+        "--once",
+        dest="once",
+        action="store_true",
+        default=os.getenv("EXPORTER_ONCE", "").lower() in ("1", "true", "yes"),
+        help="request the rate-limits once, print (or push) them and exit"
+        "\n(2 if any API resource is below its --min-remaining threshold)",
+    )
+    group.add_argument(
+        "--output-format",
+        dest="output_format",
+        choices=ONCE_OUTPUT_FORMATS,
+        default=os.getenv("EXPORTER_OUTPUT_FORMAT") or ONCE_OUTPUT_FORMATS[0],
+        help="--once output format, (default: %(default)s)",
+    )
+    group.add_argument(
+        "--pushgateway-url",
+        dest="pushgateway_url",
+        default=os.getenv("EXPORTER_PUSHGATEWAY_URL"),
+        type=http_url,
+        help="--once pushes the metrics to the Pushgateway instead of printing"
+        "\nthem, (default: %(default)s)",
+    )
+    group.add_argument(
+        "--min-remaining",
+        dest="min_remaining",
+        default=os.getenv("EXPORTER_MIN_REMAINING") or "",
+        type=min_remaining,
+        help="--once remaining thresholds of the API resources (requests or percent"
+        "\nof the limit), e.g. core=500,search=10%%, (default: none)",
+    )
+
+
+def _add_instrumentation_arguments(parser: argparse.ArgumentParser) -> None:
+    group = parser.add_argument_group("self-instrumentation and profiling")
+    group.add_argument(
+        "--no-self-metrics",
+        dest="self_metrics",
+        action="store_false",
+        default=os.getenv("EXPORTER_SELF_METRICS", "true").lower()
+        in ("1", "true", "yes"),
+        help="do not export the latencies of the exporter's Github API calls,"
+        "\ntoken mints, collections and scrapes, its errors and snapshots age",
+    )
+    group.add_argument(
+        "--debug-pprof",
+        dest="debug_pprof",
+        action="store_true",
+        default=os.getenv("EXPORTER_DEBUG_PPROF", "").lower() in ("1", "true", "yes"),
+        help="serve the on-demand CPU (sampled stacks) and memory (tracemalloc)"
+        "\nprofiles on /debug/pprof/profile and /debug/pprof/heap",
+    )
+    group.add_argument(
+        "--debug-pprof-allow",
+        dest="debug_pprof_allow",
+        default=os.getenv("EXPORTER_DEBUG_PPROF_ALLOW") or DEFAULT_PPROF_ALLOW,
+        type=networks,
+        help="comma separated networks of the clients allowed to profile the"
+        "\nexporter, (default: %(default)s)",
+    )
+
+
+def _is_passive(args: argparse.Namespace) -> bool:
+    """Only the rate-limits are observed, the Github API is never requested"""
+    observed = args.ingest_logs is not None or args.push_observations
+    return observed and args.github_auth_type is None
+
+
+def _check_once_arguments(
+    args: argparse.Namespace, parser: argparse.ArgumentParser
+) -> None:
+    if not args.once:
+        return
+    if args.poll_interval:
+        parser.error("--once requests the rate-limits once, without: --poll-interval")
+    if _is_passive(args):
+        parser.error("--once requires: --github-auth-type")
+
+
+def _check_shard_arguments(
+    args: argparse.Namespace, parser: argparse.ArgumentParser
+) -> None:
+    if args.shard_index >= args.shard_count:
+        parser.error(
+            f"shard index ({args.shard_index}) must be lower than"
+            f" the shard count ({args.shard_count})"
+        )
+
+
+def _check_poll_scheduler_arguments(
+    args: argparse.Namespace, parser: argparse.ArgumentParser
+) -> None:
+    if args.poll_scheduler != "adaptive":
+        return
+    if not args.poll_interval:
+        parser.error("adaptive poll scheduler requires: --poll-interval")
+    for account in args.github_accounts or [args]:
+        min_interval = getattr(account, "poll_min_interval", None)
+        max_interval = getattr(account, "poll_max_interval", None)
+        min_interval = args.poll_min_interval if min_interval is None else min_interval
+        max_interval = args.poll_max_interval if max_interval is None else max_interval
+        if min_interval > max_interval:
+            parser.error(
+                f"poll interval floor ({min_interval}) of {account.github_account!r}"
+                f" is greater than its ceiling ({max_interval})"
+            )
+
+
+def _check_required_arguments(
+    args: argparse.Namespace, parser: argparse.ArgumentParser
+) -> None:
+    missing = [
+        option
+        for option, dest in (
+            ("--github-auth-type", "github_auth_type"),
+            ("--github-account", "github_account"),
+        )
+        if getattr(args, dest, None) is None
+    ]
+    if missing:
+        parser.error(f"the following arguments are required: {', '.join(missing)}")
+
+
+def _load_github_accounts(
+    args: argparse.Namespace, parser: argparse.ArgumentParser
+) -> List[argparse.Namespace]:
+    """
+    Load the github accounts from the JSON accounts file.
+
+    Every account object supports the same keys as the command line
+    arguments without the ``--github-`` prefix, e.g.: ``account``,
+    ``auth_type``, ``token``, ``app_id``, ``app_installation_id``,
+    ``app_discover_installations``, ``app_private_key_path`` and ``base_url``,
+    and the ``poll_min_interval`` and ``poll_max_interval`` of the account.
+
+    :returns list: The ``--github-account`` (if any) and the accounts of the file.
+    """
+    accounts = []
+    if args.github_account is not None and not _is_passive(args):
+        accounts.append(args)
+    if args.github_accounts_file is None:
+        return accounts
+    filed = args.github_accounts_file
+    try:
+        entries = json.load(filed)
+    except ValueError as err:
+        parser.error(f"invalid github accounts file {filed.name!r}: {err}")
+    finally:
+        filed.close()
+    if not isinstance(entries, list) or not entries:
+        parser.error(f"github accounts file {filed.name!r} must be a non-empty list")
+    for entry in entries:
+        account = _github_account_namespace(entry, args, parser)
+        _check_required_arguments(account, parser)
+        _check_mutual_inclusive_arguments(account, parser)
+        accounts.append(account)
+    names = [account.github_account for account in accounts]
+    if len(set(names)) != len(names):
+        parser.error(f"github account names must be unique: {names!r}")
+    return accounts
+
+
+def _github_account_namespace(
+    entry: Dict[str, Any], args: argparse.Namespace, parser: argparse.ArgumentParser
+) -> argparse.Namespace:
+    if not isinstance(entry, dict):
+        parser.error(f"github account must be a JSON object: {entry!r}")
+    account = argparse.Namespace(
+        github_account=entry.get("account"),
+        github_auth_type=entry.get("auth_type"),
+        github_token=entry.get("token"),
+        github_app_id=entry.get("app_id"),
+        github_app_installation_id=entry.get("app_installation_id"),
+        github_app_discover_installations=bool(
+            entry.get("app_discover_installations", False)
+        ),
+        github_app_private_key_path=None,
+        github_base_url=entry.get("base_url", args.github_base_url),
+    )
+    for key in ("poll_min_interval", "poll_max_interval"):
+        value = entry.get(key)
+        try:
+            setattr(account, key, None if value is None else poll_bound(value))
+        except argparse.ArgumentTypeError as err:
+            parser.error(f"invalid {key} of {account.github_account!r}: {err}")
+    private_key_path = entry.get("app_private_key_path")
+    if private_key_path is not None:
+        try:
+            # pylint: disable=consider-using-with
+            account.github_app_private_key_path = open(
+                private_key_path, "r", encoding="utf-8"
+            )
+        except OSError as err:
+            parser.error(f"can't open {private_key_path!r}: {err}")
+    return account
+
+
 def _check_mutual_inclusive_arguments(
     args: argparse.Namespace, parser: argparse.ArgumentParser
 ) -> None:
@@ -118,13 +545,17 @@ def _check_mutual_inclusive_arguments(
     elif args.github_auth_type == "app":
         if (
             args.github_app_id is None
-            or args.github_app_installation_id is None
             or args.github_app_private_key_path is None
+            or (
+                args.github_app_installation_id is None
+                and not getattr(args, "github_app_discover_installations", False)
+            )
         ):
             parser.error(
                 "Github App authentication type requires:"
                 " --github-app-id,"
-                " --github-app-installation-id,"
+                " --github-app-installation-id"
+                " (or --github-app-discover-installations),"
                 " --github-app-private-key-path"
             )
     else:
@@ -185,3 +616,282 @@ def listen_port(port: Union[int, str]) -> int:
             f"server listening port must be greater than 1024, not: {port}"
         )
     return port
+
+
+def poll_interval(interval: Union[float, str]) -> float:
+    """
+    Validates that the polling interval is a non-negative number.
+
+    :param float_or_str interval: Seconds between two consecutive polls.
+    :raises ArgumentTypeError: If polling interval is not a number or negative.
+    """
+    try:
+        interval = float(interval)
+    except (ValueError, TypeError) as err:
+        raise argparse.ArgumentTypeError(
+            f"polling interval must be a number not: {interval!r}"
+        ) from err
+
+    if interval < 0:
+        raise argparse.ArgumentTypeError(
+            f"polling interval must be non-negative, not: {interval}"
+        )
+    return interval
+
+
+def poll_bound(seconds: Union[float, str]) -> float:
+    """
+    Validates that the floor (or ceiling) of the adaptive poll
+    interval is a positive number.
+
+    :param float_or_str seconds: Seconds between two consecutive polls.
+    :raises ArgumentTypeError: If the interval is not a positive number.
+    """
+    try:
+        seconds = float(seconds)
+    except (ValueError, TypeError) as err:
+        raise argparse.ArgumentTypeError(
+            f"poll interval bound must be a number not: {seconds!r}"
+        ) from err
+
+    if seconds <= 0:
+        raise argparse.ArgumentTypeError(
+            f"poll interval bound must be positive, not: {seconds}"
+        )
+    return seconds
+
+
+def ingest_logs(path: str) -> str:
+    """
+    Validates that the access logs path is a file or a directory.
+
+    :param str path: An access log or a directory of access logs.
+    :raises ArgumentTypeError: If the path does not exist.
+    """
+    if not os.path.exists(path):
+        raise argparse.ArgumentTypeError(f"access logs path does not exist: {path!r}")
+    return path
+
+
+def http_url(url: str) -> str:
+    """
+    Validates that the (remote-write or Pushgateway) endpoint is an HTTP(S) URL.
+
+    :param str url: The endpoint URL.
+    :raises ArgumentTypeError: If the URL is not an HTTP(S) URL.
+    """
+    parsed = urllib.parse.urlsplit(url)
+    if parsed.scheme not in ("http", "https") or not parsed.netloc:
+        raise argparse.ArgumentTypeError(f"invalid HTTP(S) URL: {url!r}")
+    return url
+
+
+def networks(value: str) -> List[IPNetwork]:
+    """
+    Validates the comma separated networks (or addresses).
+
+    :param str value: The networks, e.g. ``127.0.0.0/8,::1``.
+    :raises ArgumentTypeError: If any of the networks is invalid.
+    """
+    try:
+        return parse_networks(value)
+    except ValueError as err:
+        raise argparse.ArgumentTypeError(str(err)) from err
+
+
+def min_remaining(value: str) -> List[RemainingThreshold]:
+    """
+    Validates the remaining thresholds of the API resources.
+
+    :param str value: Comma separated ``<resource>=<requests>[%]`` thresholds.
+    :raises ArgumentTypeError: If any of the thresholds is invalid.
+    """
+    try:
+        return parse_thresholds(value)
+    except ValueError as err:
+        raise argparse.ArgumentTypeError(str(err)) from err
+
+
+def max_observations(entries: Union[int, str]) -> int:
+    """
+    Validates that the maximum number of observed rate-limits is a positive integer.
+
+    :param int_or_str entries: Maximum number of (account, resource) rate-limits.
+    :raises ArgumentTypeError: If the number is not a positive integer.
+    """
+    try:
+        entries = int(entries)
+    except (ValueError, TypeError) as err:
+        raise argparse.ArgumentTypeError(
+            f"maximum observations must be integer not: {entries!r}"
+        ) from err
+
+    if entries < 1:
+        raise argparse.ArgumentTypeError(
+            f"maximum observations must be positive, not: {entries}"
+        )
+    return entries
+
+
+def history_size(size: Union[int, str]) -> int:
+    """
+    Validates that the size of the rate-limits history is a non-negative integer.
+
+    :param int_or_str size: Fetches kept per API resource.
+    :raises ArgumentTypeError: If the size is not a non-negative integer.
+    """
+    try:
+        size = int(size)
+    except (ValueError, TypeError) as err:
+        raise argparse.ArgumentTypeError(
+            f"history size must be integer not: {size!r}"
+        ) from err
+
+    if size < 0:
+        raise argparse.ArgumentTypeError(
+            f"history size must be non-negative, not: {size}"
+        )
+    return size
+
+
+def shard_index(index: Union[int, str]) -> int:
+    """
+    Validates that the shard index is a non-negative integer.
+
+    :param int_or_str index: The shard of the exporter replica.
+    :raises ArgumentTypeError: If the index is not a non-negative integer.
+    """
+    try:
+        index = int(index)
+    except (ValueError, TypeError) as err:
+        raise argparse.ArgumentTypeError(
+            f"shard index must be integer not: {index!r}"
+        ) from err
+
+    if index < 0:
+        raise argparse.ArgumentTypeError(
+            f"shard index must be non-negative, not: {index}"
+        )
+    return index
+
+
+def shard_count(count: Union[int, str]) -> int:
+    """
+    Validates that the number of shards is a positive integer.
+
+    :param int_or_str count: The number of exporter replicas.
+    :raises ArgumentTypeError: If the count is not a positive integer.
+    """
+    try:
+        count = int(count)
+    except (ValueError, TypeError) as err:
+        raise argparse.ArgumentTypeError(
+            f"shard count must be integer not: {count!r}"
+        ) from err
+
+    if count < 1:
+        raise argparse.ArgumentTypeError(f"shard count must be positive, not: {count}")
+    return count
+
+
+def requester_engine(engine: str) -> str:
+    """
+    Resolves the deprecated names of the requester engines,
+    the engine itself is validated by the argument choices.
+
+    :param str engine: The Github API requester engine.
+    :returns str: The (current) name of the requester engine.
+    """
+    current = DEPRECATED_REQUESTER_ENGINES.get(engine)
+    if current is None:
+        return engine
+    warnings.warn(
+        f"--requester-engine {engine} is deprecated, use {current} instead",
+        FutureWarning,
+        stacklevel=2,
+    )
+    return current
+
+
+def max_workers(workers: Union[int, str]) -> int:
+    """
+    Validates that the maximum number of workers is a positive integer.
+
+    :param int_or_str workers: Maximum number of concurrent workers.
+    :raises ArgumentTypeError: If the number of workers is not a positive integer.
+    """
+    try:
+        workers = int(workers)
+    except (ValueError, TypeError) as err:
+        raise argparse.ArgumentTypeError(
+            f"maximum number of workers must be integer not: {workers!r}"
+        ) from err
+
+    if workers < 1:
+        raise argparse.ArgumentTypeError(
+            f"maximum number of workers must be positive, not: {workers}"
+        )
+    return workers
+
+
+def pool_size(size: Union[int, str]) -> int:
+    """
+    Validates that the connection pool size is a positive integer.
+
+    :param int_or_str size: Maximum number of connections per host.
+    :raises ArgumentTypeError: If the pool size is not a positive integer.
+    """
+    try:
+        size = int(size)
+    except (ValueError, TypeError) as err:
+        raise argparse.ArgumentTypeError(
+            f"connection pool size must be integer not: {size!r}"
+        ) from err
+
+    if size < 1:
+        raise argparse.ArgumentTypeError(
+            f"connection pool size must be positive, not: {size}"
+        )
+    return size
+
+
+def timeout(seconds: Union[float, str]) -> float:
+    """
+    Validates that the HTTP timeout is a positive number.
+
+    :param float_or_str seconds: Seconds to wait for the Github API.
+    :raises ArgumentTypeError: If the timeout is not a positive number.
+    """
+    try:
+        seconds = float(seconds)
+    except (ValueError, TypeError) as err:
+        raise argparse.ArgumentTypeError(
+            f"HTTP timeout must be a number not: {seconds!r}"
+        ) from err
+
+    if seconds <= 0:
+        raise argparse.ArgumentTypeError(
+            f"HTTP timeout must be positive, not: {seconds}"
+        )
+    return seconds
+
+
+def retries(count: Union[int, str]) -> int:
+    """
+    Validates that the number of HTTP retries is a non-negative integer.
+
+    :param int_or_str count: Maximum number of retries of a request.
+    :raises ArgumentTypeError: If the number of retries is not a non-negative integer.
+    """
+    try:
+        count = int(count)
+    except (ValueError, TypeError) as err:
+        raise argparse.ArgumentTypeError(
+            f"number of HTTP retries must be integer not: {count!r}"
+        ) from err
+
+    if count < 0:
+        raise argparse.ArgumentTypeError(
+            f"number of HTTP retries must be non-negative, not: {count}"
+        )
+    return count
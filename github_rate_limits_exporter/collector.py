@@ -9,22 +9,74 @@
 when the exporter starts up.
 """
 
+# pylint: disable=too-many-lines
+
 import argparse
+import functools
 import logging
-from typing import Dict, Iterable, Optional
+import sys
+from concurrent.futures import ThreadPoolExecutor
+from typing import TYPE_CHECKING, Any, Dict, Iterable, List, Optional, Tuple
 
-import dotmap
 from prometheus_client import Metric
-from prometheus_client.core import GaugeMetricFamily
+from prometheus_client.core import (
+    CounterMetricFamily,
+    GaugeMetricFamily,
+    HistogramMetricFamily,
+)
 from prometheus_client.registry import Collector
+from prometheus_client.samples import Sample
+
+from github_rate_limits_exporter.constants import (
+    DEFAULT_CONNECT_TIMEOUT,
+    DEFAULT_MAX_OBSERVATIONS,
+    DEFAULT_MAX_WORKERS,
+    DEFAULT_POLL_MAX_INTERVAL,
+    DEFAULT_POLL_MIN_INTERVAL,
+    DEFAULT_RATE_LIMITS,
+    DEFAULT_REQUEST_TIMEOUT,
+    DEFAULT_RESOURCES,
+    METRIC_NAME_INVALID_CHARS,
+    METRICS_LAYOUTS,
+    POLL_SCHEDULERS,
+    RATE_LIMIT_TYPES,
+    REQUESTER_ENGINES,
+)
+from github_rate_limits_exporter.derived import BurnRateTracker
+from github_rate_limits_exporter.github import (
+    GithubApp,
+    GithubHttpTransport,
+    GithubRateLimitsRequester,
+)
+from github_rate_limits_exporter.history import RateLimitsHistory
+from github_rate_limits_exporter.ingest import GithubAccessLogTailer
+from github_rate_limits_exporter.installations import GithubAppInstallations
+from github_rate_limits_exporter.instrumentation import (
+    INSTRUMENTS,
+    ExporterInstruments,
+)
+from github_rate_limits_exporter.models import RateLimitsSnapshot
+from github_rate_limits_exporter.observations import RateLimitObservations
+from github_rate_limits_exporter.poller import GithubRateLimitsPoller
+from github_rate_limits_exporter.push import ObservationsPushQueue
+from github_rate_limits_exporter.scheduler import AdaptivePollScheduler
+from github_rate_limits_exporter.sharding import Shard
+from github_rate_limits_exporter.tokens import GithubTokenManager, TokenDeadlines
+from github_rate_limits_exporter.utils import (
+    AccountErrors,
+    SharedExceptionQueue,
+    get_unix_timestamp,
+)
 
-from github_rate_limits_exporter.constants import DEFAULT_RATE_LIMITS
-from github_rate_limits_exporter.github import GithubRateLimitsRequester
-from github_rate_limits_exporter.utils import SharedExceptionQueue, get_unix_timestamp
+if TYPE_CHECKING:
+    from github_rate_limits_exporter.aio import AsyncGithubRateLimitsEngine
 
 logger = logging.getLogger(__name__)
 
+RateLimits = Dict[str, Optional[RateLimitsSnapshot]]
+
 
+# pylint: disable=too-many-instance-attributes,too-many-public-methods
 class GithubRateLimitsCollector(Collector):
     """
     Prometheus GitHub Rate Limits collector.
@@ -33,8 +85,47 @@ class GithubRateLimitsCollector(Collector):
         Namespace attributes are populated by the command-line interface.
 
       - account (str): The Github account name.
+      - accounts (list): Additional Github accounts (``argparse.Namespace`` each),
+        every account has its own requester.
       - requester (GithubRateLimitsRequester): Github API Rate-Limits requester.
-      - exception_queue: Queue with exception objects.
+      - requester_engine (str): ``threaded`` (default) requests every account
+        on a thread pool, ``asyncio`` on a single event loop.
+      - max_workers (int): Maximum number of concurrent Github API requests.
+      - http_pool_size, http_connect_timeout, http_read_timeout, http_retries:
+        The HTTP transport (connection pool) shared by all the requesters.
+      - metrics_layout (str): ``per-resource`` (default) exports one metric family
+        per API resource, ``single-family`` exports all the resources as
+        ``github_rate_limits{resource=...}``.
+      - poll_interval (float): Seconds between background polls,
+        ``0`` requests the rate-limits on every scrape (default).
+      - poll_scheduler (str): ``fixed`` (default) polls every account each
+        ``poll_interval``, ``adaptive`` schedules the polls of every account
+        by its remaining rate-limits, burn rate and reset time.
+      - poll_min_interval, poll_max_interval (float): Floor and ceiling of the
+        adaptive poll interval, per account (``argparse.Namespace``) or default.
+      - derived_metrics (bool): Track the burn rate of every API resource
+        (default), exported by the ``GithubDerivedCollector``.
+      - history_size (int): Fetches kept in the rate-limits history of every
+        API resource, ``0`` disables the history (default).
+      - token_manager (GithubTokenManager): Refreshes the APP tokens
+        in the background (``threaded`` requester engine).
+      - github_app_discover_installations (bool): Export every installation
+        of the Github App account, as ``<account>/<installation login>``.
+      - ingest_logs (str): JSON-lines access log (or directory of access logs)
+        with the rate-limit headers of the Github API responses, the newest
+        (fetched or observed) rate-limit wins per account and API resource.
+        Without a ``github_auth_type`` no Github API call is made (as well as
+        with ``push_observations``).
+      - push_observations (bool): Accept the rate-limit headers pushed by the
+        Github API clients, see ``push_queue``.
+      - max_observations (int): Maximum number of observed (account, resource)
+        rate-limits kept in memory.
+      - shard_index, shard_count (int): The exporter's shard, only the accounts
+        (and discovered installations) of the shard are requested.
+      - exception_queue: Queue with exception objects, the (fatal) errors of
+        the background threads. The failed rate-limits requests of an account
+        are not fatal: logged, counted per account and the account keeps
+        serving its previous (or empty) rate-limits.
 
     :raises ValueError: Any of the attributes is not an string type.
     """
@@ -42,72 +133,895 @@ class GithubRateLimitsCollector(Collector):
     def __init__(
         self, args: argparse.Namespace, exception_queue: SharedExceptionQueue
     ) -> None:
-        self.account = args.github_account
-        self._requester = GithubRateLimitsRequester(args)
         self._exception_queue = exception_queue
+        self._errors = AccountErrors()
+        self._observations: Optional[RateLimitObservations] = None
+        self._tailer: Optional[GithubAccessLogTailer] = None
+        self._push_queue: Optional[ObservationsPushQueue] = None
+        self._observe_rate_limits(args)
+        self._shard = Shard.from_args(args)
+        self._configured_accounts = _github_accounts(
+            args, passive=self._observations is not None
+        )
+        accounts = _shard_accounts(self._configured_accounts, self._shard)
+        self._accounts: List[str] = []
+        if accounts:
+            self.accounts = [account.github_account for account in accounts]
+        self._executor: Optional[ThreadPoolExecutor] = None
+        self._engine: Optional["AsyncGithubRateLimitsEngine"] = None
+        self._transport: Optional[GithubHttpTransport] = None
+        max_workers = getattr(args, "max_workers", DEFAULT_MAX_WORKERS)
+        if getattr(args, "requester_engine", REQUESTER_ENGINES[0]) == "asyncio":
+            self._engine = _async_engine(args, max_workers)
+        discovered = [
+            account for account in accounts if _discovers_installations(account)
+        ]
+        if self._engine is None or discovered:
+            self._transport = GithubHttpTransport.from_args(args)
+        self._installations = [
+            GithubAppInstallations(
+                account,
+                self._transport,
+                functools.partial(self._create_requester, account),
+                shard=self._shard,
+            )
+            for account in discovered
+        ]
+        self._static_requesters: Dict[str, Any] = {
+            account.github_account: self._create_requester(account)
+            for account in accounts
+            if account not in discovered
+        }
+        self._requesters = dict(self._static_requesters)
+        self._token_manager: Optional[GithubTokenManager] = None
+        if self._engine is None:
+            token_manager = GithubTokenManager(self._requesters)
+            if token_manager.requesters or self._installations:
+                self._token_manager = token_manager
+        if self._engine is None and (len(self._requesters) > 1 or self._installations):
+            self._executor = ThreadPoolExecutor(
+                max_workers=(
+                    max_workers
+                    if self._installations
+                    else min(max_workers, len(self._requesters))
+                ),
+                thread_name_prefix="github-rate-limits",
+            )
+        self._burn_rates: Optional[BurnRateTracker] = None
+        if getattr(args, "derived_metrics", True):
+            self._burn_rates = BurnRateTracker()
+        self._history: Optional[RateLimitsHistory] = None
+        if getattr(args, "history_size", 0):
+            self._history = RateLimitsHistory(args.history_size)
+        self._metrics_layout = getattr(args, "metrics_layout", METRICS_LAYOUTS[0])
+        self._labels_cache: Dict[Tuple[str, Optional[str], str], Dict[str, str]] = {}
+        self._metrics_cache: Optional[
+            Tuple[Tuple[Optional[RateLimitsSnapshot], ...], List[Metric]]
+        ] = None
+        self._poller: Optional[GithubRateLimitsPoller] = None
+        self._scheduler: Optional[AdaptivePollScheduler] = None
+        self._poll_bounds = {
+            account.github_account: (
+                getattr(account, "poll_min_interval", None),
+                getattr(account, "poll_max_interval", None),
+            )
+            for account in accounts
+        }
+        poll_interval = getattr(args, "poll_interval", 0)
+        if not poll_interval:
+            return
+        if getattr(args, "poll_scheduler", POLL_SCHEDULERS[0]) == "adaptive":
+            self._scheduler = AdaptivePollScheduler(
+                getattr(args, "poll_min_interval", DEFAULT_POLL_MIN_INTERVAL),
+                getattr(args, "poll_max_interval", DEFAULT_POLL_MAX_INTERVAL),
+                poll_interval,
+            )
+            for account, bounds in self._poll_bounds.items():
+                self._scheduler.set_bounds(account, *bounds)
+        self._poller = GithubRateLimitsPoller(
+            self._poll_rate_limits,
+            poll_interval,
+            None if self._scheduler is None else self._scheduler.wait,
+        )
 
     @property
     def account(self) -> str:
-        """The Github Account"""
-        return self._account
+        """The (first) Github Account"""
+        return self._accounts[0]
+
+    @property
+    def accounts(self) -> List[str]:
+        """The Github Accounts"""
+        return self._accounts
+
+    @accounts.setter
+    def accounts(self, values: List[str]) -> None:
+        if not values:
+            raise ValueError("At least one Github account is required")
+        for value in values:
+            if not isinstance(value, str):
+                raise ValueError(f"Github account must be a string type: {value!r}")
+        if len(set(values)) != len(values):
+            raise ValueError(f"Github accounts must be unique: {values!r}")
+        self._accounts = values
 
-    @account.setter
-    def account(self, value: str) -> None:
-        if not isinstance(value, str):
-            raise ValueError(f"Github account must be a string type: {value!r}")
-        self._account = value
+    @property
+    def coalesced(self) -> Dict[str, int]:
+        """Number of Github API calls coalesced with an in-flight call, per account"""
+        return {
+            account: requester.coalesced
+            for account, requester in self._requesters.items()
+        }
+
+    @property
+    def errors(self) -> AccountErrors:
+        """The failed rate-limits requests, per account"""
+        return self._errors
+
+    @property
+    def installations(self) -> Dict[str, int]:
+        """Number of discovered installations, per Github App account"""
+        return {
+            installations.account: len(installations.requesters)
+            for installations in self._installations
+        }
+
+    @property
+    def shard(self) -> Shard:
+        """The exporter's shard"""
+        return self._shard
 
-    def _get_rate_limits(self) -> Dict[str, str]:
-        return self._requester.get_rate_limits()
+    @property
+    def shard_accounts(self) -> Tuple[int, int]:
+        """
+        The number of accounts requested by the shard and of the
+        accounts of every shard (configured and discovered installations).
+        """
+        configured = [
+            account
+            for account in self._configured_accounts
+            if not _discovers_installations(account)
+        ]
+        return len(self._requesters), len(configured) + sum(
+            installations.listed for installations in self._installations
+        )
+
+    @property
+    def tokens(self) -> Dict[str, TokenDeadlines]:
+        """The (refreshable) Github APP tokens and their deadlines, per account"""
+        tokens = {}
+        for account, requester in self._requesters.items():
+            if requester.refreshable and requester.deadlines is not None:
+                tokens[account] = requester.deadlines
+        return tokens
+
+    @property
+    def burn_rates(self) -> Optional[BurnRateTracker]:
+        """The burn rates of the API resources (``None`` if disabled)"""
+        return self._burn_rates
+
+    @property
+    def history(self) -> Optional[RateLimitsHistory]:
+        """The rate-limits history of the API resources (``None`` if disabled)"""
+        return self._history
+
+    @property
+    def poll_intervals(self) -> Dict[str, float]:
+        """The adaptive poll interval (seconds), per account"""
+        if self._scheduler is None:
+            return {}
+        return self._scheduler.intervals
+
+    @property
+    def observations(self) -> Optional[RateLimitObservations]:
+        """The observed rate-limits (``None`` if no access logs are ingested)"""
+        return self._observations
+
+    @property
+    def ready(self) -> bool:
+        """The first rate-limits snapshot is available (always, without polling)"""
+        return self._poller is None or self._poller.snapshot is not None
+
+    @property
+    def exposition_version(self) -> Optional[Tuple[int, int]]:
+        """
+        The version of the exported rate-limits, changes on every poll and
+        observation. ``None`` if the rate-limits are requested on every scrape.
+        """
+        if self._poller is None and self._requesters:
+            return None
+        return (
+            0 if self._poller is None else self._poller.generation,
+            0 if self._observations is None else self._observations.version,
+        )
+
+    @property
+    def push_queue(self) -> Optional[ObservationsPushQueue]:
+        """The pushed observations queue (``None`` if not accepted)"""
+        return self._push_queue
+
+    @property
+    def poller(self) -> Optional[GithubRateLimitsPoller]:
+        """The background poller (``None`` when polling is disabled)"""
+        return self._poller
+
+    def start(self, timeout: Optional[float] = None) -> None:
+        """
+        Start the token manager and the background poller (if enabled)
+        and wait for the first snapshot.
+
+        :param float timeout: Seconds to wait for the first snapshot.
+        """
+        if self._token_manager is not None and not self._token_manager.is_alive():
+            self._token_manager.start()
+        for thread in (self._tailer, self._push_queue):
+            if thread is not None and not thread.is_alive():
+                thread.start()
+        if self._poller is None or self._poller.is_alive():
+            return
+        self._poller.start()
+        if not self._poller.wait_ready(timeout):
+            logger.warning("First rate-limits snapshot is not yet available")
+
+    def stop(self) -> None:
+        """Stop the background threads (if enabled) and the requests pool"""
+        if self._token_manager is not None:
+            self._token_manager.stop(timeout=DEFAULT_REQUEST_TIMEOUT)
+        for thread in (self._tailer, self._push_queue):
+            if thread is not None:
+                thread.stop(timeout=DEFAULT_REQUEST_TIMEOUT)
+        if self._poller is not None:
+            self._poller.stop(timeout=self._poller.interval)
+        if self._executor is not None:
+            self._executor.shutdown(wait=False)
+        if self._transport is not None:
+            self._transport.close()
+        if self._engine is not None:
+            self._engine.close()
+
+    def _observe_rate_limits(self, args: argparse.Namespace) -> None:
+        """Observe the rate-limits of the access logs and of the pushed batches"""
+        ingest_logs = getattr(args, "ingest_logs", None)
+        push_observations = getattr(args, "push_observations", False)
+        if ingest_logs is None and not push_observations:
+            return
+        observations = self._observations = RateLimitObservations(
+            getattr(args, "max_observations", DEFAULT_MAX_OBSERVATIONS)
+        )
+        if ingest_logs is not None:
+            self._tailer = GithubAccessLogTailer(
+                ingest_logs,
+                observations,
+                account=getattr(args, "github_account", None),
+            )
+        if push_observations:
+            self._push_queue = ObservationsPushQueue(
+                observations, self._exception_queue
+            )
+
+    def _create_requester(
+        self, account: argparse.Namespace, app: Optional[GithubApp] = None
+    ) -> Any:
+        if self._engine is not None:
+            # pylint: disable=import-outside-toplevel
+            from github_rate_limits_exporter.aio import AsyncGithubRateLimitsRequester
+
+            return AsyncGithubRateLimitsRequester(account, app=app)
+        return GithubRateLimitsRequester(account, self._transport, app=app)
+
+    def _discover_installations(self) -> Dict[str, Any]:
+        """
+        The requesters of the configured accounts and of the
+        (discovered) Github App installations.
+        """
+        if not self._installations:
+            return self._requesters
+        requesters = dict(self._static_requesters)
+        for installations in self._installations:
+            try:
+                discovered = installations.discover()
+            except Exception as error:  # pylint: disable=broad-except
+                self._request_failed(installations.account, error)
+                discovered = installations.requesters
+            requesters.update(discovered)
+            if self._scheduler is not None:
+                # The installations share the poll bounds of the Github App account.
+                for account in discovered:
+                    self._scheduler.set_bounds(
+                        account, *self._poll_bounds[installations.account]
+                    )
+        evicted = set(self._requesters) - set(requesters)
+        if evicted:
+            self._labels_cache = {
+                key: labels
+                for key, labels in self._labels_cache.items()
+                if key[0] not in evicted
+            }
+            self._errors.retain(requesters)
+        self._requesters = requesters
+        if self._token_manager is not None:
+            self._token_manager.update(requesters)
+        return requesters
+
+    def _fetch_rate_limits(self, scheduled: bool = False) -> RateLimits:
+        """
+        Fetch the rate-limits of every (or every due, if ``scheduled``)
+        account, all the snapshots of a fetch carry the same (fetch) timestamp.
+        """
+        limits = self._request_rate_limits(scheduled)
+        timestamp = get_unix_timestamp()
+        limits = {
+            account: None if resources is None else resources.with_timestamp(timestamp)
+            for account, resources in limits.items()
+        }
+        self._errors.succeeded(
+            account for account, resources in limits.items() if resources is not None
+        )
+        if self._burn_rates is not None:
+            for account, resources in limits.items():
+                if resources is not None:
+                    self._burn_rates.observe(account, resources)
+            self._burn_rates.retain(self._requesters)
+        if self._history is not None:
+            for account, resources in limits.items():
+                if resources is not None:
+                    self._history.record(account, resources)
+            self._history.retain(self._requesters)
+        return limits
+
+    def _request_rate_limits(self, scheduled: bool = False) -> RateLimits:
+        """
+        Request the rate-limits of every account, concurrently when there
+        are more than one accounts. A scrape takes as long as the slowest account.
+        """
+        requesters = self._discover_installations()
+        if scheduled and self._scheduler is not None:
+            due = self._scheduler.due(requesters)
+            requesters = {account: requesters[account] for account in due}
+        if self._engine is not None:
+            return self._fetch_rate_limits_async(self._engine, requesters)
+        if self._executor is None:
+            return {
+                account: self._get_rate_limits(account, requester)
+                for account, requester in requesters.items()
+            }
+        futures = {
+            account: self._executor.submit(self._get_rate_limits, account, requester)
+            for account, requester in requesters.items()
+        }
+        return {account: future.result() for account, future in futures.items()}
+
+    def _get_rate_limits(
+        self, account: str, requester: Any
+    ) -> Optional[RateLimitsSnapshot]:
+        try:
+            return requester.get_rate_limits()
+        except Exception as error:  # pylint: disable=broad-except
+            self._request_failed(account, error)
+        return None
+
+    def _request_failed(self, account: str, error: BaseException) -> None:
+        """
+        Log and count the failed rate-limits request of an account, the
+        account keeps serving its previous (or empty) rate-limits and the
+        other accounts are not affected.
+        """
+        self._errors.failed(account, error)
+        logger.warning("Failed to request the rate-limits of %s: %r", account, error)
+        for installations in self._installations:
+            if installations.rediscover(account):
+                break
+
+    def _fetch_rate_limits_async(
+        self, engine: "AsyncGithubRateLimitsEngine", requesters: Dict[str, Any]
+    ) -> RateLimits:
+        limits: RateLimits = {}
+        try:
+            results = engine.fetch(requesters)
+        except Exception as error:  # pylint: disable=broad-except
+            results = dict.fromkeys(requesters, error)
+        for account, result in results.items():
+            if isinstance(result, BaseException):
+                self._request_failed(account, result)
+                limits[account] = None
+            else:
+                limits[account] = result
+        return limits
+
+    def _poll_rate_limits(self) -> RateLimits:
+        # Accounts failed to be polled keep serving their previous rate-limits.
+        previous = self._poller.snapshot if self._poller is not None else None
+        limits = self._fetch_rate_limits(scheduled=True)
+        if self._scheduler is not None:
+            self._scheduler.update(limits)
+            self._scheduler.retain(self._requesters)
+            # Accounts not due (yet) keep serving their previous rate-limits.
+            limits = {
+                account: (
+                    limits[account]
+                    if account in limits
+                    else (previous or {}).get(account)
+                )
+                for account in self._requesters
+            }
+        if previous:
+            for account, resources in limits.items():
+                if resources is None:
+                    limits[account] = previous.get(account)
+        return limits
+
+    def rate_limits(self) -> RateLimits:
+        """
+        The current rate-limits of every account: the latest polled
+        snapshot (if the background poller is enabled) or requested
+        once, merged with the observed rate-limits.
+
+        :return dict: The rate-limits snapshot, per account.
+        """
+        if self._poller is not None:
+            limits = self._poller.snapshot or {}
+        else:
+            limits = self._fetch_rate_limits()
+        # The polled accounts (or the current ones before the first poll).
+        resources = {
+            account: limits.get(account) for account in limits or self._requesters
+        }
+        if self._observations is not None:
+            resources = self._observations.merge(resources)
+        return resources
 
     def collect(self) -> Iterable[Metric]:
         """
         Returns the requested Github (per API) rate-limit metrics.
 
+        When the background poller is enabled, the metrics are served from
+        the latest in-memory snapshot and no Github API call is made.
+
+        :return list: List of metrics.
+        """
+        started = INSTRUMENTS.timer()
+        metrics = self.metrics(self.rate_limits())
+        INSTRUMENTS.observe(INSTRUMENTS.collections, INSTRUMENTS.since(started))
+        logger.info("Collected metrics for %s account(s)", ", ".join(self._accounts))
+        return metrics
+
+    def metrics(self, resources: RateLimits) -> List[Metric]:
+        """
+        Build the metrics of the rate-limits. The metrics are built once
+        per snapshot and reused by the following collections, until the
+        next snapshot.
+
+        :param dict resources: The rate-limits snapshot, per account.
         :return list: List of metrics.
         """
-        metrics = []
-        logger.info("Collected metrics for %s account", self._account)
-        decorated = self._exception_queue.put(self._requester.get_rate_limits)
-        limits = decorated()
-        metrics.extend(
-            [
-                self._add_metric(resources=limits),
-                self._add_metric(api_name="search", resources=limits),
-                self._add_metric(api_name="graphql", resources=limits),
-                self._add_metric(api_name="integration_manifest", resources=limits),
-                self._add_metric(api_name="code_scanning_upload", resources=limits),
+        snapshots = tuple(resources.values())
+        cached = self._metrics_cache
+        if cached is not None and _same_snapshots(cached[0], snapshots):
+            return cached[1]
+        timestamp = _collection_timestamp(snapshots)
+        api_names = self._discover_api_names(resources)
+        if self._metrics_layout == "single-family":
+            metrics = [
+                self._add_single_metric(api_names, resources, timestamp=timestamp)
             ]
-        )
+        else:
+            metrics = [
+                self._add_metric(api_name, resources, timestamp=timestamp)
+                for api_name in api_names
+            ]
+        if None not in snapshots:
+            # Accounts without rate-limits are timestamped on every collection.
+            self._metrics_cache = (snapshots, metrics)
         logger.debug("%s", metrics)
         return metrics
 
-    def _add_metric(
-        self, api_name: str = "core", resources: Optional[dotmap.DotMap] = None
-    ) -> Metric:
+    @staticmethod
+    def _discover_api_names(resources: RateLimits) -> List[str]:
+        """
+        The Github API resources of the ``/rate_limit`` response(s),
+        the default resources are always exported (first).
+        """
+        api_names = dict.fromkeys(DEFAULT_RESOURCES)
+        for account_resources in resources.values():
+            if isinstance(account_resources, RateLimitsSnapshot):
+                api_names.update(dict.fromkeys(account_resources))
+        return list(api_names)
+
+    def _validate_resources(
+        self, resources: Optional[RateLimits]
+    ) -> Dict[str, RateLimitsSnapshot]:
         if resources is None:
-            resources = dotmap.DotMap(api_name=DEFAULT_RATE_LIMITS)
-        if not isinstance(resources, dotmap.DotMap):
+            resources = {account: None for account in self._requesters}
+        if not isinstance(resources, dict):
             raise ValueError(
-                f"Github resources must be type of: {dotmap.DotMap.__name__}"
+                "Github resources must be a mapping of account to:"
+                f" {RateLimitsSnapshot.__name__}"
             )
+        validated = {}
+        for account, account_resources in resources.items():
+            if account_resources is None:
+                account_resources = RateLimitsSnapshot()
+            if not isinstance(account_resources, RateLimitsSnapshot):
+                raise ValueError(
+                    f"Github resources must be type of: {RateLimitsSnapshot.__name__}"
+                )
+            validated[account] = account_resources
+        return validated
+
+    def _labels(
+        self, account: str, limit_type: str, api_name: Optional[str] = None
+    ) -> Dict[str, str]:
+        """
+        The (cached) labels of a sample, shared by all the collections.
+        """
+        key = (account, api_name, limit_type)
+        labels = self._labels_cache.get(key)
+        if labels is None:
+            labels = {"account": sys.intern(account)}
+            if api_name is not None:
+                labels["resource"] = sys.intern(api_name)
+            labels["type"] = sys.intern(limit_type)
+            self._labels_cache[key] = labels
+        return labels
+
+    def _add_metric(
+        self,
+        api_name: str = "core",
+        resources: Optional[RateLimits] = None,
+        timestamp: Optional[float] = None,
+    ) -> Metric:
+        validated = self._validate_resources(resources)
+        if timestamp is None:
+            timestamp = _collection_timestamp(validated.values())
         api_name = str(api_name).lower()
-        limits = resources.get(api_name, DEFAULT_RATE_LIMITS)
+        name = f"github_rate_limits_{METRIC_NAME_INVALID_CHARS.sub('_', api_name)}"
+        gauge = GaugeMetricFamily(
+            name, f"API requests in {api_name} per hour", labels=["account", "type"]
+        )
+        samples = gauge.samples
+        for account, account_resources in validated.items():
+            limits = account_resources.get(api_name, DEFAULT_RATE_LIMITS)
+            sample_timestamp = account_resources.timestamp or timestamp
+            for limit_type, value in zip(RATE_LIMIT_TYPES, limits):
+                samples.append(
+                    Sample(
+                        name,
+                        self._labels(account, limit_type),
+                        value,
+                        sample_timestamp,
+                    )
+                )
+        return gauge
+
+    def _add_single_metric(
+        self,
+        api_names: Iterable[str],
+        resources: Optional[RateLimits] = None,
+        timestamp: Optional[float] = None,
+    ) -> Metric:
+        validated = self._validate_resources(resources)
+        if timestamp is None:
+            timestamp = _collection_timestamp(validated.values())
+        name = "github_rate_limits"
         gauge = GaugeMetricFamily(
-            f"github_rate_limits_{api_name}",
-            f"API requests in {api_name} per hour",
-            labels=["account", "type"],
+            name,
+            "API requests per hour, per API resource",
+            labels=["account", "resource", "type"],
+        )
+        samples = gauge.samples
+        for api_name in api_names:
+            api_name = str(api_name).lower()
+            for account, account_resources in validated.items():
+                limits = account_resources.get(api_name, DEFAULT_RATE_LIMITS)
+                sample_timestamp = account_resources.timestamp or timestamp
+                for limit_type, value in zip(RATE_LIMIT_TYPES, limits):
+                    samples.append(
+                        Sample(
+                            name,
+                            self._labels(account, limit_type, api_name),
+                            value,
+                            sample_timestamp,
+                        )
+                    )
+        return gauge
+
+
+def _github_accounts(
+    args: argparse.Namespace, passive: bool = False
+) -> List[argparse.Namespace]:
+    """
+    The Github accounts to request, none if only the rate-limits
+    are observed (``passive`` without a ``github_auth_type``).
+    """
+    accounts = list(getattr(args, "github_accounts", None) or [])
+    if accounts or (passive and getattr(args, "github_auth_type", None) is None):
+        return accounts
+    return [args]
+
+
+def _async_engine(
+    args: argparse.Namespace, max_workers: int
+) -> "AsyncGithubRateLimitsEngine":
+    # aiohttp is only imported by the asyncio requester engine.
+    # pylint: disable=import-outside-toplevel
+    from github_rate_limits_exporter.aio import AsyncGithubRateLimitsEngine
+
+    return AsyncGithubRateLimitsEngine(
+        max_connections=max_workers,
+        connect_timeout=getattr(args, "http_connect_timeout", DEFAULT_CONNECT_TIMEOUT),
+        read_timeout=getattr(args, "http_read_timeout", DEFAULT_REQUEST_TIMEOUT),
+    )
+
+
+def _discovers_installations(account: argparse.Namespace) -> bool:
+    return bool(getattr(account, "github_app_discover_installations", False))
+
+
+def _shard_accounts(
+    accounts: List[argparse.Namespace], shard: Shard
+) -> List[argparse.Namespace]:
+    """
+    The Github accounts of the shard, the Github App accounts that
+    discover their installations shard the installations instead.
+    """
+    if shard.count == 1:
+        return accounts
+    sharded = [
+        account
+        for account in accounts
+        if _discovers_installations(account) or shard.owns(account.github_account)
+    ]
+    logger.info(
+        "Shard %d of %d requests %d of %d Github account(s)",
+        shard.index,
+        shard.count,
+        len(sharded),
+        len(accounts),
+    )
+    return sharded
+
+
+def _collection_timestamp(
+    snapshots: Iterable[Optional[RateLimitsSnapshot]],
+) -> Optional[float]:
+    # Single timestamp of the collection, for the snapshots not fetched (yet).
+    if any(snapshot is None or snapshot.timestamp is None for snapshot in snapshots):
+        return get_unix_timestamp()
+    return None
+
+
+def _same_snapshots(
+    cached: Tuple[Optional[RateLimitsSnapshot], ...],
+    current: Tuple[Optional[RateLimitsSnapshot], ...],
+) -> bool:
+    return len(cached) == len(current) and all(
+        first is second for first, second in zip(cached, current)
+    )
+
+
+class GithubRequestsCollector(Collector):
+    """
+    Prometheus collector of the exporter's own Github API requests.
+
+    :param GithubRateLimitsCollector collector: The rate-limits collector.
+    """
+
+    def __init__(self, collector: GithubRateLimitsCollector) -> None:
+        self._collector = collector
+
+    def collect(self) -> Iterable[Metric]:
+        """
+        Returns the exporter's Github API requests metrics.
+
+        :return list: List of metrics.
+        """
+        coalesced = CounterMetricFamily(
+            "github_rate_limits_exporter_coalesced_requests",
+            "Github API calls coalesced with an in-flight call of the same account",
+            labels=["account"],
         )
-        gauge.add_metric(
-            [self._account, "limit"], float(limits.limit), get_unix_timestamp()
+        for account, value in self._collector.coalesced.items():
+            coalesced.add_metric([account], float(value))
+        token_age = GaugeMetricFamily(
+            "github_rate_limits_exporter_token_age_seconds",
+            "Seconds since the Github APP installation token was minted",
+            labels=["account"],
         )
-        gauge.add_metric(
-            [self._account, "used"], float(limits.used), get_unix_timestamp()
+        token_refresh = GaugeMetricFamily(
+            "github_rate_limits_exporter_token_refresh_duration_seconds",
+            "Seconds the latest Github APP installation token request took",
+            labels=["account"],
         )
-        gauge.add_metric(
-            [self._account, "remaining"], float(limits.remaining), get_unix_timestamp()
+        for account, deadlines in self._collector.tokens.items():
+            token_age.add_metric([account], deadlines.age)
+            token_refresh.add_metric([account], deadlines.latency)
+        installations = GaugeMetricFamily(
+            "github_rate_limits_exporter_app_installations",
+            "Number of discovered installations of the Github App",
+            labels=["account"],
         )
-        gauge.add_metric(
-            [self._account, "reset"], float(limits.reset), get_unix_timestamp()
+        for account, value in self._collector.installations.items():
+            installations.add_metric([account], float(value))
+        poll_interval = GaugeMetricFamily(
+            "github_rate_limits_exporter_poll_interval_seconds",
+            "Current (adaptive) poll interval of the Github account",
+            labels=["account"],
         )
-        return gauge
+        for account, interval in self._collector.poll_intervals.items():
+            poll_interval.add_metric([account], interval)
+        errors = CounterMetricFamily(
+            "github_rate_limits_exporter_account_errors",
+            "Failed rate-limits requests of the Github account",
+            labels=["account"],
+        )
+        for account, value in self._collector.errors.counts.items():
+            errors.add_metric([account], float(value))
+        return [
+            coalesced,
+            token_age,
+            token_refresh,
+            installations,
+            poll_interval,
+            errors,
+        ]
+
+
+class GithubShardCollector(Collector):
+    """
+    Prometheus collector of the exporter's shard assignment, the shards
+    of a complete deployment add up to every Github account.
+
+    :param GithubRateLimitsCollector collector: The rate-limits collector.
+    """
+
+    def __init__(self, collector: GithubRateLimitsCollector) -> None:
+        self._collector = collector
+
+    def collect(self) -> Iterable[Metric]:
+        """
+        Returns the shard assignment metrics.
+
+        :return list: List of metrics.
+        """
+        shard = self._collector.shard
+        labels = [str(shard.index), str(shard.count)]
+        assigned, total = self._collector.shard_accounts
+        shard_accounts = GaugeMetricFamily(
+            "github_rate_limits_exporter_shard_accounts",
+            "Number of Github accounts requested by the exporter's shard",
+            labels=["shard_index", "shard_count"],
+        )
+        shard_accounts.add_metric(labels, float(assigned))
+        accounts = GaugeMetricFamily(
+            "github_rate_limits_exporter_accounts",
+            "Number of Github accounts of every shard",
+            labels=["shard_index", "shard_count"],
+        )
+        accounts.add_metric(labels, float(total))
+        return [shard_accounts, accounts]
+
+
+class GithubSelfCollector(Collector):
+    """
+    Prometheus collector of the exporter's self-instrumentation: the
+    latencies of its hot paths, its errors and the age of the snapshots.
+
+    :param GithubRateLimitsCollector collector: The rate-limits collector.
+    :param ExporterInstruments instruments: The hot paths instruments.
+    """
+
+    def __init__(
+        self,
+        collector: GithubRateLimitsCollector,
+        instruments: ExporterInstruments = INSTRUMENTS,
+    ) -> None:
+        self._collector = collector
+        self._instruments = instruments
+
+    def collect(self) -> Iterable[Metric]:
+        """
+        Returns the exporter's self-instrumentation metrics.
+
+        :return list: List of metrics.
+        """
+        instruments = self._instruments.snapshot()
+        requests = HistogramMetricFamily(
+            "github_rate_limits_exporter_github_request_duration_seconds",
+            "Latency of the exporter's own Github API calls",
+            labels=["endpoint", "status"],
+        )
+        histograms = [
+            HistogramMetricFamily(
+                f"github_rate_limits_exporter_{name}_duration_seconds",
+                documentation,
+            )
+            for name, documentation in (
+                ("token_mint", "Latency of the Github APP installation token mints"),
+                ("collect", "Latency of the rate-limits collections"),
+                ("scrape", "Latency of the /metrics scrapes (with serialization)"),
+            )
+        ]
+        errors = CounterMetricFamily(
+            "github_rate_limits_exporter_errors",
+            "Errors of the exporter's background tasks, per exception type",
+            labels=["exception"],
+        )
+        for (endpoint, status), histogram in sorted(instruments.requests.items()):
+            requests.add_metric(
+                [endpoint, status], histogram.buckets(), histogram.total
+            )
+        for metric, histogram in zip(
+            histograms,
+            (instruments.token_mints, instruments.collections, instruments.scrapes),
+        ):
+            metric.add_metric([], histogram.buckets(), histogram.total)
+        for name, value in sorted(instruments.errors.items()):
+            errors.add_metric([name], float(value))
+        snapshot_age = GaugeMetricFamily(
+            "github_rate_limits_exporter_snapshot_age_seconds",
+            "Seconds since the rate-limits of the Github account were fetched",
+            labels=["account"],
+        )
+        for account, age in self.snapshot_ages().items():
+            snapshot_age.add_metric([account], age)
+        return [requests, *histograms, errors, snapshot_age]
+
+    def snapshot_ages(self) -> Dict[str, float]:
+        """
+        :returns dict: Seconds since the rate-limits of every account were
+            fetched (or observed), empty if the rate-limits are requested
+            on every scrape (no Github API call is made).
+        """
+        if self._collector.exposition_version is None:
+            return {}
+        now = get_unix_timestamp()
+        return {
+            account: max(now - snapshot.timestamp, 0.0)
+            for account, snapshot in self._collector.rate_limits().items()
+            if snapshot is not None and snapshot.timestamp is not None
+        }
+
+
+class GithubDerivedCollector(Collector):
+    """
+    Prometheus collector of the derived rate-limits of every API resource:
+    used requests per second, seconds until exhaustion and until reset.
+
+    :param GithubRateLimitsCollector collector: The rate-limits collector.
+    """
+
+    def __init__(self, collector: GithubRateLimitsCollector) -> None:
+        self._collector = collector
+
+    def collect(self) -> Iterable[Metric]:
+        """
+        Returns the derived rate-limits metrics.
+
+        :return list: List of metrics.
+        """
+        burn_rates = self._collector.burn_rates
+        if burn_rates is None:
+            return []
+        labels = ["account", "resource"]
+        used_per_second = GaugeMetricFamily(
+            "github_rate_limits_used_per_second",
+            "Used API requests per second (moving average), per API resource",
+            labels=labels,
+        )
+        exhaustion = GaugeMetricFamily(
+            "github_rate_limits_exhaustion_seconds",
+            "Predicted seconds until no API requests remain, per API resource",
+            labels=labels,
+        )
+        reset = GaugeMetricFamily(
+            "github_rate_limits_reset_seconds",
+            "Seconds until the rate-limit window resets, per API resource",
+            labels=labels,
+        )
+        now = get_unix_timestamp()
+        for (account, resource), (rate, seconds, epoch) in burn_rates.values().items():
+            if rate is not None and seconds is not None:
+                used_per_second.add_metric([account, resource], rate)
+                exhaustion.add_metric([account, resource], seconds)
+            reset.add_metric([account, resource], max(epoch - now, 0.0))
+        return [used_per_second, exhaustion, reset]
@@ -6,12 +6,105 @@
 """
 
 import logging
+import re
 import types
 
-import dotmap
+from github_rate_limits_exporter.models import RateLimit
 
 DEFAULT_LOG_FMT = "[%(levelname)s - %(asctime)s]: %(message)s"
-DEFAULT_RATE_LIMITS = dotmap.DotMap(limit=0.0, used=0.0, remaining=0.0, reset=0.0)
+DEFAULT_RATE_LIMITS = RateLimit(limit=0.0, used=0.0, remaining=0.0, reset=0.0)
+DEFAULT_RESOURCES = (
+    "core",
+    "search",
+    "graphql",
+    "integration_manifest",
+    "code_scanning_upload",
+)
+RATE_LIMIT_TYPES = RateLimit._fields
+METRIC_NAME_INVALID_CHARS = re.compile(r"[^a-zA-Z0-9_]")
+METRICS_LAYOUTS = ("per-resource", "single-family")
+DEFAULT_MAX_WORKERS = 8
+DEFAULT_BASE_URL = "https://api.github.com"
+DEFAULT_REQUEST_TIMEOUT = 15
+DEFAULT_CONNECT_TIMEOUT = 5
+DEFAULT_HTTP_POOL_SIZE = 10
+DEFAULT_HTTP_RETRIES = 3
+HTTP_RETRY_BACKOFF_FACTOR = 0.5
+HTTP_RETRY_STATUS_CODES = (500, 502, 503, 504)
+DEFAULT_TOKEN_REFRESH_AHEAD = 300
+DEFAULT_TOKEN_RETRY_INTERVAL = 30
+GITHUB_JWT_ALGORITHM = "RS256"
+GITHUB_JWT_EXPIRY = 300
+GITHUB_JWT_ISSUED_AT = -60
+GITHUB_JWT_REFRESH_AHEAD = 60
+GITHUB_API_HEADERS = types.MappingProxyType(
+    {
+        "Accept": "application/vnd.github+json",
+        "X-GitHub-Api-Version": "2022-11-28",
+        "User-Agent": "github-rate-limits-exporter",
+    }
+)
+GITHUB_API_PAGE_SIZE = 100
+REQUESTER_ENGINES = ("threaded", "asyncio")
+# Deprecated requester engine names, and the engine they stand for.
+DEPRECATED_REQUESTER_ENGINES = types.MappingProxyType({"pygithub": "threaded"})
+DEFAULT_INSTALLATIONS_INTERVAL = 300
+POLL_SCHEDULERS = ("fixed", "adaptive")
+DEFAULT_POLL_MIN_INTERVAL = 5
+DEFAULT_POLL_MAX_INTERVAL = 300
+POLL_AFTER_RESET = 1
+POLLS_TO_EXHAUSTION = 4
+DEFAULT_BURN_RATE_WINDOW = 300
+DEFAULT_HISTORY_SIZE = 0
+EXPOSITION_CACHE_VARIANTS = 8
+DEFAULT_INGEST_INTERVAL = 1.0
+INGEST_BATCH_SIZE = 1000
+DEFAULT_MAX_OBSERVATIONS = 10000
+DEFAULT_PUSH_QUEUE_SIZE = 1000
+PUSH_DRAIN_INTERVAL = 0.5
+PUSH_MAX_BATCH_SIZE = 1000
+PUSH_MAX_BODY_SIZE = 1024 * 1024
+HTTP_SERVERS = ("threaded", "asyncio")
+DEFAULT_HTTP_IDLE_TIMEOUT = 30.0
+DEFAULT_HTTP_WORKERS = 4
+HTTP_MAX_BODY_SIZE = PUSH_MAX_BODY_SIZE
+HTTP_MAX_HEADER_SIZE = 64 * 1024
+HTTP_BACKLOG = 1024
+DEFAULT_REMOTE_WRITE_QUEUE_SIZE = 10000
+DEFAULT_REMOTE_WRITE_RETRIES = 3
+REMOTE_WRITE_BATCH_SIZE = 2000
+REMOTE_WRITE_CHECK_INTERVAL = 1.0
+REMOTE_WRITE_MIN_BACKOFF = 0.1
+REMOTE_WRITE_MAX_BACKOFF = 5.0
+REMOTE_WRITE_LABELS_CACHE = 10000
+ONCE_OUTPUT_FORMATS = ("exposition", "json")
+ONCE_BELOW_THRESHOLD_STATUS = 2
+PUSHGATEWAY_JOB = "github_rate_limits_exporter"
+DEFAULT_PPROF_ALLOW = "127.0.0.0/8,::1/128"
+DEFAULT_PROFILE_SECONDS = 30.0
+MAX_PROFILE_SECONDS = 300.0
+PROFILE_SAMPLE_INTERVAL = 0.005
+PROFILE_FORMATS = ("text", "pstats", "collapsed")
+HEAP_FORMATS = ("text", "collapsed")
+PROFILE_TOP_ENTRIES = 50
+TRACEMALLOC_FRAMES = 32
+REMOTE_WRITE_HEADERS = types.MappingProxyType(
+    {
+        "Content-Encoding": "snappy",
+        "Content-Type": "application/x-protobuf",
+        "User-Agent": "github-rate-limits-exporter",
+        "X-Prometheus-Remote-Write-Version": "0.1.0",
+    }
+)
+RATE_LIMIT_HEADERS = types.MappingProxyType(
+    {
+        "limit": "x-ratelimit-limit",
+        "used": "x-ratelimit-used",
+        "remaining": "x-ratelimit-remaining",
+        "reset": "x-ratelimit-reset",
+        "resource": "x-ratelimit-resource",
+    }
+)
 
 
 LOGGING_LEVELS = types.MappingProxyType(
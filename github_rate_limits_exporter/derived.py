@@ -0,0 +1,151 @@
+"""
+github_rate_limits_exporter.derived
+~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~
+
+In-process derived rate-limits of every Github API resource:
+
+  - used requests per second, an exponentially weighted moving
+    average (EWMA) of the ``used`` increase between two fetches.
+  - predicted seconds until ``remaining`` hits zero at that rate.
+  - seconds until the ``reset`` epoch.
+
+Only the previous fetch and the moving average are kept per resource,
+the derived values are computed once per fetch instead of by PromQL
+over the raw series on every query.
+"""
+
+import math
+import threading
+from typing import Dict, Iterable, Optional, Tuple
+
+from github_rate_limits_exporter.constants import DEFAULT_BURN_RATE_WINDOW
+from github_rate_limits_exporter.models import RateLimitsSnapshot
+
+
+class ResourceBurnRate:
+    """
+    Burn rate of a single Github API resource.
+
+    :param float used: Used requests of the latest fetch.
+    :param float remaining: Remaining requests of the latest fetch.
+    :param float reset: Reset (unix) epoch of the latest fetch.
+    :param float timestamp: Unix timestamp of the latest fetch.
+    """
+
+    __slots__ = ("used", "remaining", "reset", "timestamp", "rate")
+
+    def __init__(
+        self, used: float, remaining: float, reset: float, timestamp: float
+    ) -> None:
+        self.used = used
+        self.remaining = remaining
+        self.reset = reset
+        self.timestamp = timestamp
+        # Used requests per second, unknown until the second fetch.
+        self.rate: Optional[float] = None
+
+    @property
+    def exhaustion(self) -> Optional[float]:
+        """Predicted seconds until no requests remain (``inf`` if idle)"""
+        if self.rate is None:
+            return None
+        if self.remaining <= 0:
+            return 0.0
+        if self.rate <= 0:
+            return math.inf
+        return self.remaining / self.rate
+
+    def update(
+        self,
+        used: float,
+        remaining: float,
+        reset: float,
+        timestamp: float,
+        window: float,
+    ) -> None:
+        """
+        Update the moving average with a newer fetch of the resource.
+
+        :param float window: Time constant (seconds) of the moving average.
+        """
+        elapsed = timestamp - self.timestamp
+        if elapsed <= 0:
+            return
+        if reset != self.reset or used < self.used:
+            # New rate-limit window, requests used since it has started.
+            increase = used
+        else:
+            increase = used - self.used
+        rate = increase / elapsed
+        if self.rate is None:
+            self.rate = rate
+        else:
+            alpha = 1.0 - math.exp(-elapsed / window)
+            self.rate += alpha * (rate - self.rate)
+        self.used = used
+        self.remaining = remaining
+        self.reset = reset
+        self.timestamp = timestamp
+
+
+class BurnRateTracker:
+    """
+    Tracks the burn rate of every Github API resource, per account.
+
+    :param float window: Time constant (seconds) of the moving average.
+    """
+
+    def __init__(self, window: float = DEFAULT_BURN_RATE_WINDOW) -> None:
+        self._window = window
+        self._rates: Dict[Tuple[str, str], ResourceBurnRate] = {}
+        self._lock = threading.Lock()
+
+    def observe(self, account: str, resources: RateLimitsSnapshot) -> None:
+        """
+        Observe a (timestamped) fetch of the rate-limits of an account.
+
+        :param str account: The Github account name.
+        :param RateLimitsSnapshot resources: The fetched rate-limits.
+        """
+        timestamp = resources.timestamp
+        if timestamp is None:
+            return
+        with self._lock:
+            for name, limits in resources.items():
+                burn_rate = self._rates.get((account, name))
+                if burn_rate is None:
+                    self._rates[(account, name)] = ResourceBurnRate(
+                        limits.used, limits.remaining, limits.reset, timestamp
+                    )
+                else:
+                    burn_rate.update(
+                        limits.used,
+                        limits.remaining,
+                        limits.reset,
+                        timestamp,
+                        self._window,
+                    )
+
+    def retain(self, accounts: Iterable[str]) -> None:
+        """
+        Forget the resources of the accounts that are no longer fetched.
+
+        :param iterable accounts: The Github accounts to keep.
+        """
+        accounts = set(accounts)
+        with self._lock:
+            for key in [key for key in self._rates if key[0] not in accounts]:
+                del self._rates[key]
+
+    def values(
+        self,
+    ) -> Dict[Tuple[str, str], Tuple[Optional[float], Optional[float], float]]:
+        """
+        :returns dict: The used requests per second, the predicted seconds
+            until exhaustion and the reset epoch, per (account, resource).
+        """
+        with self._lock:
+            return {
+                key: (burn_rate.rate, burn_rate.exhaustion, burn_rate.reset)
+                for key, burn_rate in self._rates.items()
+            }
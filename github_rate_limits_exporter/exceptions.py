@@ -5,9 +5,8 @@
 Prometheus exporter custom exceptions.
 """
 
-from github import GithubException
-from requests import RequestException
-from urllib3.exceptions import HTTPError
+import sys
+from typing import Tuple, Type
 
 
 class Error(Exception):
@@ -21,11 +20,35 @@ class ArgumentError(Error):
     """An error from creating or using an argument"""
 
 
+class ApiRequestError(Error):
+    """An error from requesting the Github REST API"""
+
+
 # Those exceptions will be handle gracefully by the main thread.
 ERROR_STATUS_ON_EXCEPTIONS = (
     Error,
     ValueError,
-    GithubException,
-    RequestException,
-    HTTPError,
 )
+# Third-party (module, exception) handled gracefully by the main thread.
+THIRD_PARTY_ERROR_STATUS_ON_EXCEPTIONS = (
+    ("requests", "RequestException"),
+    ("urllib3.exceptions", "HTTPError"),
+)
+
+
+def error_status_on_exceptions() -> Tuple[Type[BaseException], ...]:
+    """
+    Returns the exceptions to be handled gracefully by the main thread.
+
+    A third-party exception can't be raised before its module has been
+    imported, so only the already imported modules are looked up and
+    the (heavy) third-party packages are never imported from here.
+
+    :returns tuple: The exception classes.
+    """
+    errors = list(ERROR_STATUS_ON_EXCEPTIONS)
+    for module_name, name in THIRD_PARTY_ERROR_STATUS_ON_EXCEPTIONS:
+        module = sys.modules.get(module_name)
+        if module is not None:
+            errors.append(getattr(module, name))
+    return tuple(errors)
@@ -0,0 +1,152 @@
+"""
+github_rate_limits_exporter.exposition
+~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~
+
+Pre-serialized ``/metrics`` exposition.
+
+The prometheus client WSGI application collects, serializes and
+compresses the metrics on every scrape. The rate-limits only change
+once per poll, so their exposition is rendered once per ``version`` of
+the rate-limits instead: the metrics are collected once, serialized
+once per negotiated format (Prometheus text or OpenMetrics) and
+compressed once per format, every scrape until the next version is
+served the same (cached) buffer. The live metrics (derived, process,
+self-instrumentation, ...) change on every scrape, they are rendered
+on every scrape and appended to the cached buffer (as another gzip
+member of the compressed exposition).
+"""
+
+import gzip
+import threading
+from typing import Any, Callable, Dict, Hashable, List, Optional, Tuple
+
+from prometheus_client import Metric
+from prometheus_client.exposition import choose_encoder, gzip_accepted
+from prometheus_client.registry import Collector
+
+from github_rate_limits_exporter.constants import EXPOSITION_CACHE_VARIANTS
+from github_rate_limits_exporter.server import WSGIApp
+
+_UNRENDERED = object()
+_OPENMETRICS_EOF = b"# EOF\n"
+
+
+class CollectedMetrics(Collector):
+    """
+    Registry of already collected metrics.
+
+    :param list metrics: The collected metrics.
+    """
+
+    def __init__(self, metrics: List[Metric]) -> None:
+        self._metrics = metrics
+
+    def collect(self) -> List[Metric]:
+        return self._metrics
+
+
+class CachedExposition:
+    """
+    The exposition buffers of the current rate-limits version.
+
+    :param Collector registry: The prometheus registry of the rate-limits.
+    :param callable version: Returns the (hashable) version of the
+        rate-limits, ``None`` if every scrape must be collected.
+    :param Collector live: The prometheus registry of the metrics
+        collected on every scrape.
+    """
+
+    def __init__(
+        self,
+        registry: Collector,
+        version: Callable[[], Optional[Hashable]],
+        live: Optional[Collector] = None,
+    ) -> None:
+        self._registry = registry
+        self._version = version
+        self._live = live
+        self._lock = threading.Lock()
+        # The rendered version, its metrics and its buffers per variant.
+        self._state: Tuple[Any, List[Metric], Dict[Tuple[str, bool], bytes]] = (
+            _UNRENDERED,
+            [],
+            {},
+        )
+        self.renders = 0
+
+    @property
+    def version(self) -> Optional[Hashable]:
+        """The current rate-limits version"""
+        return self._version()
+
+    def render(self, accept: str = "", gzipped: bool = False) -> Tuple[bytes, str]:
+        """
+        Render the exposition, the rate-limits once per version and the
+        live metrics on every call.
+
+        :param str accept: The ``Accept`` request header.
+        :param bool gzipped: Render the gzip compressed exposition.
+        :returns tuple: The exposition buffer and its content type.
+        """
+        encoder, content_type = choose_encoder(accept)
+        output = self._render_cached(encoder, content_type, gzipped)
+        if self._live is None:
+            return output, content_type
+        live = encoder(self._live)
+        if gzipped:
+            live = gzip.compress(live, mtime=0)
+        return output + live, content_type
+
+    def _render_cached(
+        self, encoder: Callable[[Collector], bytes], content_type: str, gzipped: bool
+    ) -> bytes:
+        """The (once per version) rendered exposition of the rate-limits"""
+        key = (content_type, gzipped)
+        version = self._version()
+        rendered, _, buffers = self._state
+        if rendered == version and key in buffers:
+            return buffers[key]
+        with self._lock:
+            rendered, metrics, buffers = self._state
+            if rendered != version:
+                metrics = list(self._registry.collect())
+                buffers = {}
+                self._state = (version, metrics, buffers)
+            output = buffers.get(key)
+            if output is None:
+                output = encoder(CollectedMetrics(metrics))
+                if self._live is not None and output.endswith(_OPENMETRICS_EOF):
+                    # The live metrics end the exposition.
+                    output = output[: -len(_OPENMETRICS_EOF)]
+                if gzipped:
+                    output = gzip.compress(output, mtime=0)
+                self.renders += 1
+                if len(buffers) < EXPOSITION_CACHE_VARIANTS:
+                    buffers[key] = output
+        return output
+
+
+def make_cached_metrics_app(exposition: CachedExposition, fallback: WSGIApp) -> WSGIApp:
+    """
+    Create the ``/metrics`` WSGI application of the cached exposition.
+
+    :param CachedExposition exposition: The cached exposition.
+    :param callable fallback: The WSGI application of the filtered
+        (``name[]``) scrapes and of the unversioned rate-limits.
+    :returns callable: The WSGI application.
+    """
+
+    def app(environ: Dict[str, Any], start_response: Callable[..., Any]) -> Any:
+        if environ.get("QUERY_STRING") or exposition.version is None:
+            return fallback(environ, start_response)
+        gzipped = gzip_accepted(environ.get("HTTP_ACCEPT_ENCODING", ""))
+        output, content_type = exposition.render(
+            environ.get("HTTP_ACCEPT", ""), gzipped
+        )
+        headers = [("Content-Type", content_type), ("Content-Length", str(len(output)))]
+        if gzipped:
+            headers.append(("Content-Encoding", "gzip"))
+        start_response("200 OK", headers)
+        return [output]
+
+    return app
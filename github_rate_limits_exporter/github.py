@@ -15,24 +15,223 @@
 
 - PAT access token lifetime is defined by the user.
 - IAT access token (GithubApp) lifetime is at 1 hour.
+
+The rate-limits and the access tokens are requested over a shared
+(pooled) HTTP transport, so the connections (and their TLS sessions)
+are reused across polls and token refreshes.
+
+The App private key is parsed once and the signed App JWT is reused
+for most of its validity window, so refreshing the tokens of many
+installations costs a single RSA signature. The JWT/crypto dependencies
+are only imported by the GithubApp authentication type.
 """
 
 import argparse
+import copy
 import datetime
 import io
 import logging
+import threading
+import time
 from dataclasses import InitVar, dataclass, field
-from typing import TextIO, Union
+from typing import Any, Dict, List, Optional, TextIO, Union
+
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+
+from github_rate_limits_exporter.constants import (
+    DEFAULT_BASE_URL,
+    DEFAULT_CONNECT_TIMEOUT,
+    DEFAULT_HTTP_POOL_SIZE,
+    DEFAULT_HTTP_RETRIES,
+    DEFAULT_REQUEST_TIMEOUT,
+    GITHUB_API_HEADERS,
+    GITHUB_API_PAGE_SIZE,
+    GITHUB_JWT_ALGORITHM,
+    GITHUB_JWT_EXPIRY,
+    GITHUB_JWT_ISSUED_AT,
+    GITHUB_JWT_REFRESH_AHEAD,
+    HTTP_RETRY_BACKOFF_FACTOR,
+    HTTP_RETRY_STATUS_CODES,
+)
+from github_rate_limits_exporter.exceptions import ApiRequestError
+from github_rate_limits_exporter.instrumentation import INSTRUMENTS
+from github_rate_limits_exporter.models import RateLimitsSnapshot
+from github_rate_limits_exporter.tokens import TokenDeadlines
+from github_rate_limits_exporter.utils import (
+    SingleFlight,
+    base64_decode,
+    extend_datetime_now,
+    parse_github_datetime,
+)
 
-import dotmap
-from github import Github, GithubIntegration
-from github.InstallationAuthorization import InstallationAuthorization
+logger = logging.getLogger(__name__)
 
-from github_rate_limits_exporter.utils import base64_decode, extend_datetime_now
 
-logger = logging.getLogger(__name__)
+class GithubHttpTransport:
+    """
+    Represents a (thread-safe) HTTP transport of the Github REST API.
+
+    Keeps a pool of keep-alive connections per host, connection errors
+    and ``5xx`` responses are retried with an exponential backoff. Only
+    the (idempotent) ``GET`` requests are retried once sent, a retried
+    token mint (``POST``) would mint another installation token: a
+    failed mint is retried by the token refresh instead.
+
+    :param int pool_size: Maximum number of (keep-alive) connections per host.
+    :param float connect_timeout: Seconds to wait for a connection to be established.
+    :param float read_timeout: Seconds to wait for the server to send a response.
+    :param int retries: Maximum number of retries of a request.
+    """
+
+    def __init__(
+        self,
+        pool_size: int = DEFAULT_HTTP_POOL_SIZE,
+        connect_timeout: float = DEFAULT_CONNECT_TIMEOUT,
+        read_timeout: float = DEFAULT_REQUEST_TIMEOUT,
+        retries: int = DEFAULT_HTTP_RETRIES,
+    ) -> None:
+        self.timeout = (connect_timeout, read_timeout)
+        retry = Retry(
+            total=retries,
+            backoff_factor=HTTP_RETRY_BACKOFF_FACTOR,
+            status_forcelist=HTTP_RETRY_STATUS_CODES,
+            allowed_methods=frozenset({"GET"}),
+            raise_on_status=False,
+        )
+        adapter = HTTPAdapter(
+            pool_connections=pool_size, pool_maxsize=pool_size, max_retries=retry
+        )
+        self._session = requests.Session()
+        self._session.headers.update(GITHUB_API_HEADERS)
+        # A session without auth falls back to the .netrc credentials,
+        # which would override the Github token.
+        self._session.auth = lambda request: request
+        self._session.mount("https://", adapter)
+        self._session.mount("http://", adapter)
+
+    @classmethod
+    def from_args(cls, args: argparse.Namespace) -> "GithubHttpTransport":
+        """
+        Create the transport from the command line arguments.
+
+        :param argparse.Namespace args: The ``http_*`` command line arguments.
+        :returns GithubHttpTransport: The HTTP transport.
+        """
+        return cls(
+            pool_size=getattr(args, "http_pool_size", DEFAULT_HTTP_POOL_SIZE),
+            connect_timeout=getattr(
+                args, "http_connect_timeout", DEFAULT_CONNECT_TIMEOUT
+            ),
+            read_timeout=getattr(args, "http_read_timeout", DEFAULT_REQUEST_TIMEOUT),
+            retries=getattr(args, "http_retries", DEFAULT_HTTP_RETRIES),
+        )
+
+    def request(self, method: str, url: str, authorization: str) -> Any:
+        """
+        Send a Github REST API request.
+
+        :param str method: The HTTP method.
+        :param str url: The absolute URL of the API endpoint.
+        :param str authorization: The ``Authorization`` header value.
+        :raises RequestException: On connection errors or error responses.
+        :returns: The decoded JSON response.
+        """
+        started, status = INSTRUMENTS.timer(), "error"
+        try:
+            response = self._session.request(
+                method,
+                url,
+                headers={"Authorization": authorization},
+                timeout=self.timeout,
+                allow_redirects=False,
+            )
+            status = str(response.status_code)
+        finally:
+            INSTRUMENTS.observe_request(url, status, INSTRUMENTS.since(started))
+        response.raise_for_status()
+        return response.json()
 
+    def close(self) -> None:
+        """Close the pooled connections"""
+        self._session.close()
 
+
+class GithubAppJwt:
+    """
+    Signs the Github App JSON Web Tokens (JWT).
+
+    The PEM private key is parsed once into a key object and the signed
+    JWT is reused until shortly before it expires, concurrent callers
+    share one signature.
+
+    :param int app_id: Github App identifier (JWT issuer).
+    :param str private_key: Github App private key (PEM format).
+    :param int expiry: Seconds the JWT is valid for (at most 10 minutes).
+    :raises ValueError: If the private key can't be parsed.
+    """
+
+    def __init__(
+        self, app_id: int, private_key: str, expiry: int = GITHUB_JWT_EXPIRY
+    ) -> None:
+        # pylint: disable=import-outside-toplevel
+        from cryptography.hazmat.primitives.asymmetric.rsa import RSAPrivateKey
+        from cryptography.hazmat.primitives.serialization import load_pem_private_key
+
+        key = load_pem_private_key(private_key.encode(), password=None)
+        if not isinstance(key, RSAPrivateKey):
+            raise ValueError("Github App private key must be an RSA key")
+        self._app_id = app_id
+        self._key = key
+        self._expiry = expiry
+        self._jwt: Optional[str] = None
+        self._valid_until = -float("inf")
+        self._lock = threading.Lock()
+        self.signatures = 0
+
+    @property
+    def cached(self) -> Optional[str]:
+        """The signed JWT, ``None`` if it has to be signed again"""
+        if time.monotonic() < self._valid_until:
+            return self._jwt
+        return None
+
+    def sign(self) -> str:
+        """
+        Sign a new JWT (``RS256``), regardless of the cached one.
+
+        :returns str: The signed JWT.
+        """
+        import jwt  # pylint: disable=import-outside-toplevel
+
+        now = int(time.time())
+        payload = {
+            "iat": now + GITHUB_JWT_ISSUED_AT,
+            "exp": now + self._expiry,
+            "iss": str(self._app_id),
+        }
+        self.signatures += 1
+        return jwt.encode(payload, self._key, algorithm=GITHUB_JWT_ALGORITHM)
+
+    @property
+    def jwt(self) -> str:
+        """The cached (or a newly signed) JWT"""
+        token = self.cached
+        if token is not None:
+            return token
+        with self._lock:
+            token = self.cached
+            if token is None:
+                token = self.sign()
+                self._jwt = token
+                self._valid_until = (
+                    time.monotonic() + self._expiry - GITHUB_JWT_REFRESH_AHEAD
+                )
+        return token
+
+
+# pylint: disable=too-many-instance-attributes
 @dataclass
 class GithubApp:
     """
@@ -44,20 +243,24 @@ class GithubApp:
       - private_key (str): Github App private key (will be used to sign the JWT token).
       - installation_id (int): Github App installation identifier.
 
+    :param GithubHttpTransport transport: The (shared) HTTP transport
+        of the access token requests.
     :raises ValueError: Github App arguments of invalid type.
     """
 
     args: InitVar[argparse.Namespace]
-    _app: GithubIntegration = field(init=False)
+    transport: InitVar[Optional[GithubHttpTransport]] = None
+    _signer: GithubAppJwt = field(init=False)
 
-    def __post_init__(self, args: argparse.Namespace) -> None:
+    def __post_init__(
+        self, args: argparse.Namespace, transport: Optional[GithubHttpTransport]
+    ) -> None:
         self.app_id = args.github_app_id
         self.private_key = args.github_app_private_key_path
         self.installation_id = args.github_app_installation_id
-        self._base_url = getattr(args, "github_base_url", "https://api.github.com")
-        self._app = GithubIntegration(
-            self.app_id, self.private_key, base_url=self._base_url
-        )
+        self._base_url = getattr(args, "github_base_url", DEFAULT_BASE_URL)
+        self._transport = transport
+        self._signer = GithubAppJwt(self.app_id, self.private_key)
 
     @property
     def app_id(self) -> int:
@@ -71,13 +274,13 @@ def app_id(self, value: int) -> None:
         self._app_id = value
 
     @property
-    def installation_id(self) -> int:
-        """Github App Installation Identifier"""
+    def installation_id(self) -> Optional[int]:
+        """Github App Installation Identifier (``None`` to discover the installations)"""
         return self._installation_id
 
     @installation_id.setter
-    def installation_id(self, value: int) -> None:
-        if not isinstance(value, int):
+    def installation_id(self, value: Optional[int]) -> None:
+        if value is not None and not isinstance(value, int):
             raise ValueError(
                 f"Github App installation id must be a int type: {value!r}"
             )
@@ -102,9 +305,70 @@ def private_key(self, value: Union[TextIO, str]) -> None:
         self._private_key = value
 
     @property
-    def access_token(self) -> InstallationAuthorization:
-        """Github App (global)) access token"""
-        return self._app.get_access_token(self.installation_id)
+    def base_url(self) -> str:
+        """Github API base URL"""
+        return self._base_url
+
+    @property
+    def access_token(self) -> "GithubToken":
+        """Github App installation access token"""
+        if self.installation_id is None:
+            raise ApiRequestError("Github App installation id is required")
+        data = self._request(
+            "POST", f"/app/installations/{self.installation_id}/access_tokens"
+        )
+        return GithubToken(data["token"], parse_github_datetime(data["expires_at"]))
+
+    def installations(self) -> List[Dict[str, Any]]:
+        """
+        List the installations of the Github App (``GET /app/installations``).
+
+        :returns list: The (not suspended) installations of the Github App.
+        """
+        installations: List[Dict[str, Any]] = []
+        page = 1
+        while True:
+            data = self._request(
+                "GET",
+                f"/app/installations?per_page={GITHUB_API_PAGE_SIZE}&page={page}",
+            )
+            installations.extend(
+                installation
+                for installation in data
+                if installation.get("suspended_at") is None
+            )
+            if len(data) < GITHUB_API_PAGE_SIZE:
+                return installations
+            page += 1
+
+    def with_installation_id(self, installation_id: int) -> "GithubApp":
+        """
+        Returns a copy of the Github App for another installation, the
+        JWT signer and the HTTP transport are shared with the copy.
+
+        :param int installation_id: Github App installation identifier.
+        :returns GithubApp: The Github App of the installation.
+        """
+        app = copy.copy(self)
+        app.installation_id = installation_id
+        return app
+
+    def _request(self, method: str, path: str) -> Any:
+        if self._transport is None:
+            self._transport = GithubHttpTransport()
+        return self._transport.request(
+            method, f"{self._base_url.rstrip('/')}{path}", f"Bearer {self.jwt}"
+        )
+
+    @property
+    def signer(self) -> GithubAppJwt:
+        """Signer of the Github App JWT (shared by the installations)"""
+        return self._signer
+
+    @property
+    def jwt(self) -> str:
+        """Github App JSON Web Token (JWT), signed by the App private key"""
+        return self._signer.jwt
 
 
 @dataclass
@@ -179,37 +443,106 @@ class GithubRateLimitsRequester:
         Namespace attributes are populated by the command-line interface.
 
       - token (GithubToken): The Github Access Token (PAT or APP).
-      - api (Github API): The Github API to ``GET`` the rate-limit data from.
-    """
 
-    def __init__(self, args: argparse.Namespace) -> None:
-        self._base_url = getattr(args, "github_base_url", "https://api.github.com")
-        self.token = self._initialize_token(args)
-        self._api = Github(login_or_token=self.token.token, base_url=self._base_url)
+    :param GithubHttpTransport transport: The (shared) HTTP transport,
+        a dedicated transport is created from the ``http_*`` arguments by default.
+    :param GithubApp app: The Github App (installation) to request the rate-limits
+        of, its installation token is requested on the first call.
+
+    Concurrent callers share one in-flight request and one token refresh.
+    Once ``managed`` by the token manager, the APP token is refreshed in the
+    background and the requests only wait for a refresh of an expired token.
+    """
 
-    def _initialize_token(self, args: argparse.Namespace) -> GithubToken:
+    def __init__(
+        self,
+        args: argparse.Namespace,
+        transport: Optional[GithubHttpTransport] = None,
+        app: Optional[GithubApp] = None,
+    ) -> None:
+        self._base_url = getattr(args, "github_base_url", DEFAULT_BASE_URL).rstrip("/")
+        self._transport = transport or GithubHttpTransport.from_args(args)
+        self._flight = SingleFlight()
+        self._app = app
+        self.managed = False
+        self._deadlines: Optional[TokenDeadlines] = None
+        if app is None:
+            self._deadlines = self._initialize_token(args)
+
+    def _initialize_token(self, args: argparse.Namespace) -> TokenDeadlines:
         logger.debug("Github authentication type: %s", args.github_auth_type)
         if args.github_auth_type == "pat":
-            return GithubToken(args.github_token, extend_datetime_now(weeks=999))
-        self._app = GithubApp(args)
-        token = self._app.access_token
-        return GithubToken(token.token, token.expires_at)
+            return TokenDeadlines(
+                GithubToken(args.github_token, extend_datetime_now(weeks=999))
+            )
+        self._app = GithubApp(args, self._transport)
+        return self._mint_token(self._app)
+
+    @property
+    def token(self) -> Optional[GithubToken]:
+        """The Github Access Token (PAT or APP), ``None`` until requested"""
+        return None if self._deadlines is None else self._deadlines.token
+
+    @property
+    def deadlines(self) -> Optional[TokenDeadlines]:
+        """The Github token and its refresh and expiry deadlines"""
+        return self._deadlines
 
-    def get_rate_limits(self) -> dotmap.DotMap:
+    @property
+    def refreshable(self) -> bool:
+        """``True`` if the token can be refreshed (APP)"""
+        return self._app is not None
+
+    @property
+    def coalesced(self) -> int:
+        """Number of calls coalesced with an in-flight request or token refresh"""
+        return self._flight.coalesced
+
+    def get_rate_limits(self) -> RateLimitsSnapshot:
         """Retrieve the Github API rate-limits.
 
-        ``RateLimitOverview.raw_data`` returns the full ``/rate_limit``
-        response (``{"resources": {...}, "rate": {...}}``); the collector
+        The ``/rate_limit`` endpoint returns the full response
+        (``{"resources": {...}, "rate": {...}}``); the collector
         consumes the per-resource map directly, so unwrap ``resources`` here.
         """
-        if self.token.has_expired():
-            logger.debug("Github Token expired at: %s", self.token.expires_at)
-            self._refresh_token()
-        rate_limits = self._api.get_rate_limit()
-        return dotmap.DotMap(rate_limits.raw_data["resources"])
+        return self._flight.do("rate_limit", self._get_rate_limits)
+
+    def refresh_token(self) -> GithubToken:
+        """
+        Request a new Github APP installation token,
+        concurrent callers share one token refresh.
+
+        :raises ApiRequestError: If the token can't be refreshed (PAT).
+        :returns GithubToken: The new Github token.
+        """
+        return self._flight.do("token", self._refresh_token)
+
+    def _get_rate_limits(self) -> RateLimitsSnapshot:
+        deadlines = self._deadlines
+        if deadlines is None:
+            token = self.refresh_token()
+        elif deadlines.refresh_due() and (not self.managed or deadlines.has_expired()):
+            logger.debug("Github Token expires at: %s", deadlines.token.expires_at)
+            token = self.refresh_token()
+        else:
+            token = deadlines.token
+        raw_data = self._transport.request(
+            "GET", f"{self._base_url}/rate_limit", f"token {token.token}"
+        )
+        return RateLimitsSnapshot.from_json(raw_data["resources"])
 
-    def _refresh_token(self) -> None:
+    def _refresh_token(self) -> GithubToken:
+        if self._app is None:
+            raise ApiRequestError("Github PAT has expired and can't be refreshed")
         logger.debug("Requesting new Github Token")
-        token = self._app.access_token
-        self.token = GithubToken(token.token, token.expires_at)
-        self._api = Github(login_or_token=token.token, base_url=self._base_url)
+        # Single reference assignment, the current token is used until then.
+        self._deadlines = self._mint_token(self._app)
+        return self._deadlines.token
+
+    @staticmethod
+    def _mint_token(app: GithubApp) -> TokenDeadlines:
+        started = time.monotonic()
+        token = app.access_token
+        latency = time.monotonic() - started
+        INSTRUMENTS.observe(INSTRUMENTS.token_mints, latency)
+        return TokenDeadlines(GithubToken(token.token, token.expires_at), latency)
@@ -0,0 +1,226 @@
+"""
+github_rate_limits_exporter.history
+~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~
+
+Bounded history of the recent Github API rate-limits.
+
+Every account and API resource has a fixed-size ring buffer, backed by
+a preallocated ``array`` of doubles (``timestamp``, ``limit``, ``used``,
+``remaining`` and ``reset`` per sample), the oldest sample is overwritten
+once the buffer is full. The memory use only depends on the number of
+accounts and resources, never on the uptime of the exporter.
+
+The history is served as JSON by ``GET /api/v1/history``:
+
+  - ``account``: Accounts to return (repeated or comma separated), all by default.
+  - ``start``, ``end``: Unix timestamps (inclusive) of the time range.
+"""
+
+import array
+import threading
+from typing import Any, Callable, Dict, Iterable, List, Optional, Set, Tuple
+from urllib.parse import parse_qs
+
+from github_rate_limits_exporter.constants import RATE_LIMIT_TYPES
+from github_rate_limits_exporter.models import RateLimit, RateLimitsSnapshot
+from github_rate_limits_exporter.server import WSGIApp, json_error, json_response
+
+HISTORY_FIELDS = ("timestamp",) + RATE_LIMIT_TYPES
+HISTORY_PATH = "/api/v1/history"
+
+
+class RingBuffer:
+    """
+    Fixed-size, array-backed ring buffer of rate-limit samples.
+
+    :param int capacity: Maximum number of samples.
+    :raises ValueError: If the capacity is not a positive integer.
+    """
+
+    __slots__ = ("_capacity", "_data", "_head", "_size")
+
+    width = len(HISTORY_FIELDS)
+
+    def __init__(self, capacity: int) -> None:
+        if not isinstance(capacity, int) or capacity < 1:
+            raise ValueError(
+                f"History capacity must be a positive integer: {capacity!r}"
+            )
+        self._capacity = capacity
+        self._data = array.array("d", [0.0]) * (capacity * self.width)
+        self._head = 0
+        self._size = 0
+
+    @property
+    def nbytes(self) -> int:
+        """Bytes allocated by the samples"""
+        return self._data.itemsize * len(self._data)
+
+    @property
+    def last_timestamp(self) -> Optional[float]:
+        """Timestamp of the newest sample (``None`` if empty)"""
+        if not self._size:
+            return None
+        index = (self._head - 1) % self._capacity
+        return self._data[index * self.width]
+
+    def __len__(self) -> int:
+        return self._size
+
+    def append(self, timestamp: float, limits: RateLimit) -> None:
+        """
+        Append a sample, overwrites the oldest sample if the buffer is full.
+
+        :param float timestamp: Unix timestamp of the sample.
+        :param RateLimit limits: The rate-limit of the resource.
+        """
+        offset = self._head * self.width
+        self._data[offset] = timestamp
+        self._data[offset + 1 : offset + self.width] = array.array("d", limits)
+        self._head = (self._head + 1) % self._capacity
+        self._size = min(self._size + 1, self._capacity)
+
+    def samples(
+        self, start: Optional[float] = None, end: Optional[float] = None
+    ) -> List[Tuple[float, ...]]:
+        """
+        :param float start: Oldest timestamp (inclusive) to return.
+        :param float end: Newest timestamp (inclusive) to return.
+        :returns list: The samples (oldest first) within the time range.
+        """
+        samples = []
+        first = (self._head - self._size) % self._capacity
+        for position in range(self._size):
+            offset = ((first + position) % self._capacity) * self.width
+            timestamp = self._data[offset]
+            if (start is not None and timestamp < start) or (
+                end is not None and timestamp > end
+            ):
+                continue
+            samples.append(tuple(self._data[offset : offset + self.width]))
+        return samples
+
+
+class RateLimitsHistory:
+    """
+    The recent rate-limits of every account and API resource.
+
+    :param int capacity: Maximum number of samples per account and resource.
+    :raises ValueError: If the capacity is not a positive integer.
+    """
+
+    def __init__(self, capacity: int) -> None:
+        # Validates the capacity.
+        RingBuffer(capacity)
+        self._capacity = capacity
+        self._buffers: Dict[str, Dict[str, RingBuffer]] = {}
+        self._lock = threading.Lock()
+
+    @property
+    def nbytes(self) -> int:
+        """Bytes allocated by the samples of every account and resource"""
+        with self._lock:
+            return sum(
+                buffer.nbytes
+                for buffers in self._buffers.values()
+                for buffer in buffers.values()
+            )
+
+    def record(self, account: str, resources: RateLimitsSnapshot) -> None:
+        """
+        Record a (timestamped) fetch of the rate-limits of an account,
+        a fetch which has already been recorded is ignored.
+
+        :param str account: The Github account name.
+        :param RateLimitsSnapshot resources: The fetched rate-limits.
+        """
+        timestamp = resources.timestamp
+        if timestamp is None:
+            return
+        with self._lock:
+            buffers = self._buffers.setdefault(account, {})
+            for name, limits in resources.items():
+                buffer = buffers.get(name)
+                if buffer is None:
+                    buffer = buffers[name] = RingBuffer(self._capacity)
+                elif buffer.last_timestamp == timestamp:
+                    continue
+                buffer.append(timestamp, limits)
+
+    def retain(self, accounts: Iterable[str]) -> None:
+        """
+        Forget the history of the accounts that are no longer fetched.
+
+        :param iterable accounts: The Github accounts to keep.
+        """
+        accounts = set(accounts)
+        with self._lock:
+            for account in set(self._buffers) - accounts:
+                del self._buffers[account]
+
+    def query(
+        self,
+        accounts: Optional[Set[str]] = None,
+        start: Optional[float] = None,
+        end: Optional[float] = None,
+    ) -> Dict[str, Dict[str, List[Tuple[float, ...]]]]:
+        """
+        :param set accounts: The accounts to return, all if ``None``.
+        :param float start: Oldest timestamp (inclusive) to return.
+        :param float end: Newest timestamp (inclusive) to return.
+        :returns dict: The samples (oldest first) per account and resource.
+        """
+        with self._lock:
+            return {
+                account: {
+                    name: buffer.samples(start, end) for name, buffer in buffers.items()
+                }
+                for account, buffers in self._buffers.items()
+                if accounts is None or account in accounts
+            }
+
+
+def _timestamp_parameter(query: Dict[str, List[str]], name: str) -> Optional[float]:
+    values = query.get(name)
+    if not values:
+        return None
+    try:
+        return float(values[-1])
+    except ValueError as err:
+        raise ValueError(f"{name} must be a unix timestamp: {values[-1]!r}") from err
+
+
+def make_history_app(history: RateLimitsHistory) -> WSGIApp:
+    """
+    Create the WSGI application of the ``/api/v1/history`` endpoint.
+
+    :param RateLimitsHistory history: The rate-limits history.
+    :returns callable: The WSGI application.
+    """
+
+    def app(environ: Dict[str, Any], start_response: Callable[..., Any]) -> List[bytes]:
+        if environ.get("REQUEST_METHOD", "GET") != "GET":
+            return json_error(start_response, "405 Method Not Allowed", "GET only")
+        query = parse_qs(environ.get("QUERY_STRING", ""))
+        accounts = {
+            account
+            for value in query.get("account", [])
+            for account in value.split(",")
+            if account
+        }
+        try:
+            start = _timestamp_parameter(query, "start")
+            end = _timestamp_parameter(query, "end")
+        except ValueError as err:
+            return json_error(start_response, "400 Bad Request", str(err))
+        samples = history.query(accounts or None, start, end)
+        return json_response(
+            start_response,
+            "200 OK",
+            {
+                "status": "success",
+                "data": {"fields": HISTORY_FIELDS, "accounts": samples},
+            },
+        )
+
+    return app
@@ -0,0 +1,201 @@
+"""
+github_rate_limits_exporter.ingest
+~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~
+
+Passive ingestion of the rate-limits from Github API access logs.
+
+Tails a JSON-lines access log (or every log of a directory) on a
+dedicated (daemon) thread, every line holds the headers of a single
+Github API response, either flat or as a ``headers`` object:
+
+    {"account": "my-org", "timestamp": 1671885900.0,
+     "headers": {"X-RateLimit-Limit": "5000", "X-RateLimit-Remaining": "4999",
+                 "X-RateLimit-Used": "1", "X-RateLimit-Reset": "1671889500",
+                 "X-RateLimit-Resource": "core"}}
+
+The ``account`` defaults to the ``--github-account`` and the
+``timestamp`` (unix or ``2016-07-11T22:14:10Z``) to the ingestion time.
+
+The logs are read incrementally, line by line, from the last read
+offset, a rotated (new inode) or truncated log is read from its start.
+A log which can not be read is logged, counted and skipped, the other
+logs are still tailed and it is read again on the next interval.
+"""
+
+import itertools
+import json
+import logging
+import os
+import threading
+from typing import Dict, Iterator, List, Optional, Set
+
+from github_rate_limits_exporter.constants import (
+    DEFAULT_INGEST_INTERVAL,
+    INGEST_BATCH_SIZE,
+)
+from github_rate_limits_exporter.instrumentation import INSTRUMENTS
+from github_rate_limits_exporter.observations import (
+    Observation,
+    RateLimitObservations,
+    parse_observation,
+)
+
+logger = logging.getLogger(__name__)
+
+
+class TailedFile:
+    """
+    Read position of a tailed access log.
+
+    :param str path: The access log path.
+    """
+
+    __slots__ = ("path", "inode", "offset")
+
+    def __init__(self, path: str) -> None:
+        self.path = path
+        self.inode: Optional[int] = None
+        self.offset = 0
+
+    def lines(self) -> Iterator[bytes]:
+        """
+        :raises OSError: If the access log can not be read.
+        :returns iterator: The complete lines appended since the last read.
+        """
+        stat = os.stat(self.path)
+        if stat.st_ino != self.inode or stat.st_size < self.offset:
+            self.inode = stat.st_ino
+            self.offset = 0
+        if stat.st_size == self.offset:
+            return
+        with open(self.path, "rb") as log:
+            log.seek(self.offset)
+            for line in log:
+                if not line.endswith(b"\n"):
+                    # Partially written, read once complete.
+                    return
+                self.offset += len(line)
+                yield line
+
+
+def parse_access_log_line(
+    line: bytes, account: Optional[str] = None
+) -> Optional[Observation]:
+    """
+    Parse the rate-limit of a JSON-lines access log line.
+
+    :param bytes line: The access log line.
+    :param str account: The default Github account name.
+    :raises ValueError: If the line is not a valid access log entry.
+    :returns tuple: The ``(account, resource, rate-limit, timestamp)``
+        observation, ``None`` if the response has no rate-limit headers.
+    """
+    return parse_observation(json.loads(line), account)
+
+
+class GithubAccessLogTailer(
+    threading.Thread
+):  # pylint: disable=too-many-instance-attributes
+    """
+    Tails the Github API access log(s) into the observed rate-limits.
+
+    :param str path: An access log or a directory of access logs.
+    :param RateLimitObservations observations: The observed rate-limits.
+    :param str account: The default Github account name.
+    :param float interval: Seconds between two consecutive reads.
+    """
+
+    def __init__(
+        self,
+        path: str,
+        observations: RateLimitObservations,
+        account: Optional[str] = None,
+        interval: float = DEFAULT_INGEST_INTERVAL,
+    ) -> None:
+        super().__init__(name="github-rate-limits-ingest", daemon=True)
+        self._path = path
+        self._observations = observations
+        self._account = account
+        self._interval = interval
+        self._files: Dict[str, TailedFile] = {}
+        self._unreadable: Set[str] = set()
+        self._stopped = threading.Event()
+        self.lines = 0
+        self.errors = 0
+        self.read_errors = 0
+
+    def _paths(self) -> List[str]:
+        if not os.path.isdir(self._path):
+            return [self._path]
+        return sorted(
+            entry.path
+            for entry in os.scandir(self._path)
+            if entry.is_file() and not entry.name.startswith(".")
+        )
+
+    def _observe(self, tailed: TailedFile) -> Iterator[Observation]:
+        for line in tailed.lines():
+            self.lines += 1
+            if not line.strip():
+                continue
+            try:
+                observation = parse_access_log_line(line, self._account)
+            except ValueError as err:
+                self.errors += 1
+                logger.debug("Skipped %s line: %s", tailed.path, err)
+                continue
+            if observation is not None:
+                yield observation
+
+    def ingest(self) -> int:
+        """
+        Read the lines appended to the access log(s) since the last read.
+
+        :returns int: Number of updated rate-limits.
+        """
+        paths = self._paths()
+        self._files = {
+            path: self._files.get(path) or TailedFile(path) for path in paths
+        }
+        updated = 0
+        for tailed in self._files.values():
+            observations = self._observe(tailed)
+            try:
+                # Batched, the observed rate-limits are not locked while reading.
+                batch = list(itertools.islice(observations, INGEST_BATCH_SIZE))
+                while batch:
+                    updated += self._observations.update(batch)
+                    batch = list(itertools.islice(observations, INGEST_BATCH_SIZE))
+            except FileNotFoundError:
+                logger.debug("Access log %s does not exist (yet)", tailed.path)
+            except OSError as error:
+                self._read_failed(tailed.path, error)
+            else:
+                self._unreadable.discard(tailed.path)
+        return updated
+
+    def _read_failed(self, path: str, error: BaseException) -> None:
+        """Count (and log once until it is read again) an unreadable access log"""
+        self.read_errors += 1
+        INSTRUMENTS.count_error(error)
+        level = logging.DEBUG if path in self._unreadable else logging.WARNING
+        self._unreadable.add(path)
+        logger.log(level, "Skipped access log %s: %s", path, error)
+
+    def run(self) -> None:
+        while not self._stopped.is_set():
+            try:
+                self.ingest()
+            except Exception as error:  # pylint: disable=broad-except
+                self._read_failed(self._path, error)
+            self._stopped.wait(self._interval)
+
+    def stop(self, timeout: Optional[float] = None) -> None:
+        """
+        Stop tailing and wait for the thread to finish.
+
+        :param float timeout: Seconds to wait for the thread to finish.
+        """
+        self._stopped.set()
+        if self.is_alive():
+            self.join(timeout)
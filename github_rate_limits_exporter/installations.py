@@ -0,0 +1,136 @@
+"""
+github_rate_limits_exporter.installations
+~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~
+
+Discovery of the Github App installations.
+
+Every installation of a Github App (organization or user) has its own
+rate-limits. The installations are listed with the App JWT
+(``GET /app/installations``) and exported as separate accounts,
+``<account>/<installation account login>`` (the ``slug`` of an
+enterprise installation, or the installation identifier):
+
+  - the installation tokens are requested on the first poll.
+  - the installations are listed again at most once per interval, or on
+    the next poll once an installation fails (e.g. uninstalled, ``404``).
+  - the uninstalled (or suspended) installations are evicted, the failed
+    (but still listed) installations are retried with a new requester.
+  - only the installations of the exporter's shard are exported.
+"""
+
+import argparse
+import logging
+import threading
+import time
+from typing import Any, Callable, Dict, Optional, Set, Tuple
+
+from github_rate_limits_exporter.constants import DEFAULT_INSTALLATIONS_INTERVAL
+from github_rate_limits_exporter.github import GithubApp, GithubHttpTransport
+from github_rate_limits_exporter.sharding import Shard
+
+logger = logging.getLogger(__name__)
+
+
+def _installation_login(installation: Dict[str, Any]) -> str:
+    """
+    :param dict installation: The listed Github App installation.
+    :returns str: The login (or slug) of the installation account, the
+        installation identifier if the account has neither.
+    """
+    account = installation.get("account") or {}
+    return str(account.get("login") or account.get("slug") or installation["id"])
+
+
+class GithubAppInstallations:  # pylint: disable=too-many-instance-attributes
+    """
+    Represents the (discovered) installations of a Github App.
+
+    :param argparse.Namespace: Argparse object of the Github App account
+        (without an installation identifier).
+    :param GithubHttpTransport transport: The (shared) HTTP transport.
+    :param callable requester_factory: Returns the requester of a Github App installation.
+    :param float interval: Seconds between two consecutive listings of the installations.
+    :param Shard shard: The exporter's shard, the installations of other shards are skipped.
+    """
+
+    def __init__(
+        self,
+        args: argparse.Namespace,
+        transport: Optional[GithubHttpTransport],
+        requester_factory: Callable[[GithubApp], Any],
+        interval: float = DEFAULT_INSTALLATIONS_INTERVAL,
+        shard: Shard = Shard(),
+    ) -> None:
+        self.account = args.github_account
+        self._app = GithubApp(args, transport)
+        self._requester_factory = requester_factory
+        self._interval = interval
+        self._shard = shard
+        self.listed = 0
+        self._installations: Dict[str, Tuple[int, Any]] = {}
+        self._failed: Set[str] = set()
+        self._discovered_at = -float(interval)
+        self._lock = threading.Lock()
+
+    @property
+    def requesters(self) -> Dict[str, Any]:
+        """The requesters of the installations, per account"""
+        return {
+            account: requester
+            for account, (__, requester) in self._installations.items()
+        }
+
+    def rediscover(self, account: str) -> bool:
+        """
+        List the installations again on the next discovery, once the
+        token mint (or the rate-limits request) of an installation fails.
+
+        :param str account: The account of the failed installation.
+        :returns bool: ``True`` if the account is an installation of the Github App.
+        """
+        with self._lock:
+            if account not in self._installations:
+                return False
+            self._failed.add(account)
+            self._discovered_at = -float(self._interval)
+            return True
+
+    def discover(self) -> Dict[str, Any]:
+        """
+        List the installations of the Github App, unless they have
+        been listed within the interval.
+
+        :returns dict: The requesters of the installations, per account.
+        """
+        with self._lock:
+            if time.monotonic() - self._discovered_at < self._interval:
+                return self.requesters
+            installations = {}
+            listed = self._app.installations()
+            for installation in listed:
+                account = f"{self.account}/{_installation_login(installation)}"
+                if not self._shard.owns(account):
+                    continue
+                installation_id = installation["id"]
+                current = self._installations.get(account)
+                if (
+                    current is None
+                    or current[0] != installation_id
+                    or account in self._failed
+                ):
+                    app = self._app.with_installation_id(installation_id)
+                    current = (installation_id, self._requester_factory(app))
+                installations[account] = current
+            evicted = sorted(set(self._installations) - set(installations))
+            if evicted:
+                logger.info("Evicted Github App installation(s): %s", evicted)
+            self._installations = installations
+            self._failed.clear()
+            self.listed = len(listed)
+            self._discovered_at = time.monotonic()
+            logger.debug(
+                "Discovered %d installation(s) of the %s Github App",
+                len(installations),
+                self.account,
+            )
+            return self.requesters
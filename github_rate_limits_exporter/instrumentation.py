@@ -0,0 +1,170 @@
+"""
+github_rate_limits_exporter.instrumentation
+~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~
+
+Self-instrumentation of the exporter hot paths.
+
+The latencies of the Github API requests (per endpoint and status),
+of the Github App token mints, of the rate-limits collections and of
+the ``/metrics`` scrapes (collection and serialization) are observed
+into fixed-bucket histograms, the errors are counted per exception type.
+
+The instruments are plain (lock protected) counters, observing costs
+no prometheus client import: they are exported by the
+``GithubSelfCollector`` of a separate registry, see ``--no-self-metrics``.
+"""
+
+import bisect
+import re
+import threading
+import time
+from typing import Dict, List, NamedTuple, Tuple
+from urllib.parse import urlsplit
+
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+_IDENTIFIERS = re.compile(r"/\d+(?=/|$)")
+
+
+def github_endpoint(url: str) -> str:
+    """
+    :param str url: The (absolute or relative) Github API URL.
+    :returns str: The URL path, its numeric identifiers replaced by ``{id}``.
+    """
+    return _IDENTIFIERS.sub("/{id}", urlsplit(url).path)
+
+
+class LatencyHistogram:
+    """Cumulative histogram of latencies (seconds), of ``LATENCY_BUCKETS``"""
+
+    __slots__ = ("counts", "total")
+
+    def __init__(self) -> None:
+        # The count of every bucket and of the +Inf bucket (last).
+        self.counts: List[int] = [0] * (len(LATENCY_BUCKETS) + 1)
+        self.total = 0.0
+
+    @property
+    def count(self) -> int:
+        """Number of observations"""
+        return sum(self.counts)
+
+    def observe(self, seconds: float) -> None:
+        """
+        :param float seconds: The observed latency.
+        """
+        self.counts[bisect.bisect_left(LATENCY_BUCKETS, seconds)] += 1
+        self.total += seconds
+
+    def copy(self) -> "LatencyHistogram":
+        """
+        :returns LatencyHistogram: A copy of the histogram.
+        """
+        histogram = LatencyHistogram()
+        histogram.counts = list(self.counts)
+        histogram.total = self.total
+        return histogram
+
+    def buckets(self) -> List[Tuple[str, float]]:
+        """
+        :returns list: The cumulative ``(upper bound, count)`` buckets.
+        """
+        bounds = [str(bound) for bound in LATENCY_BUCKETS] + ["+Inf"]
+        buckets, cumulative = [], 0
+        for bound, count in zip(bounds, self.counts):
+            cumulative += count
+            buckets.append((bound, float(cumulative)))
+        return buckets
+
+
+class InstrumentsSnapshot(NamedTuple):
+    """Consistent copy of the instruments, for the collections"""
+
+    requests: Dict[Tuple[str, str], LatencyHistogram]
+    token_mints: LatencyHistogram
+    collections: LatencyHistogram
+    scrapes: LatencyHistogram
+    errors: Dict[str, int]
+
+
+class ExporterInstruments:
+    """
+    The instruments of the exporter hot paths.
+
+    :param bool enabled: Observe the hot paths, every observation
+        is a no-op once disabled.
+    """
+
+    def __init__(self, enabled: bool = True) -> None:
+        self.enabled = enabled
+        self._lock = threading.Lock()
+        self.requests: Dict[Tuple[str, str], LatencyHistogram] = {}
+        self.token_mints = LatencyHistogram()
+        self.collections = LatencyHistogram()
+        self.scrapes = LatencyHistogram()
+        self.errors: Dict[str, int] = {}
+
+    def observe_request(self, url: str, status: str, seconds: float) -> None:
+        """
+        :param str url: The requested Github API URL.
+        :param str status: The response status code, ``error`` if none.
+        :param float seconds: The request latency.
+        """
+        if not self.enabled:
+            return
+        key = (github_endpoint(url), status)
+        with self._lock:
+            histogram = self.requests.get(key)
+            if histogram is None:
+                histogram = self.requests[key] = LatencyHistogram()
+            histogram.observe(seconds)
+
+    def observe(self, histogram: LatencyHistogram, seconds: float) -> None:
+        """
+        :param LatencyHistogram histogram: The token mints, collections
+            or scrapes histogram.
+        :param float seconds: The observed latency.
+        """
+        if not self.enabled:
+            return
+        with self._lock:
+            histogram.observe(seconds)
+
+    def count_error(self, error: BaseException) -> None:
+        """
+        :param Exception error: The raised (or queued) error.
+        """
+        if not self.enabled:
+            return
+        name = type(error).__name__
+        with self._lock:
+            self.errors[name] = self.errors.get(name, 0) + 1
+
+    def snapshot(self) -> InstrumentsSnapshot:
+        """
+        :returns InstrumentsSnapshot: A copy of the current instruments.
+        """
+        with self._lock:
+            return InstrumentsSnapshot(
+                {key: value.copy() for key, value in self.requests.items()},
+                self.token_mints.copy(),
+                self.collections.copy(),
+                self.scrapes.copy(),
+                dict(self.errors),
+            )
+
+    def timer(self) -> float:
+        """
+        :returns float: The start of an observation (monotonic clock).
+        """
+        return time.monotonic() if self.enabled else 0.0
+
+    def since(self, started: float) -> float:
+        """
+        :param float started: The start of the observation.
+        :returns float: Seconds since the start.
+        """
+        return time.monotonic() - started
+
+
+INSTRUMENTS = ExporterInstruments()
@@ -0,0 +1,118 @@
+"""
+github_rate_limits_exporter.models
+~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~
+
+Compact (immutable) models of the Github API rate-limits.
+
+The ``/rate_limit`` response is parsed once into a snapshot of
+resource name to rate-limit tuples (``limit``, ``used``, ``remaining``
+and ``reset``), no per-resource dictionaries are kept around.
+"""
+
+from typing import Any, Dict, Iterator, Mapping, NamedTuple, Optional
+
+
+class RateLimit(NamedTuple):
+    """Rate-limit of a single Github API resource"""
+
+    limit: float = 0.0
+    used: float = 0.0
+    remaining: float = 0.0
+    reset: float = 0.0
+
+    @classmethod
+    def from_dict(cls, data: Mapping[str, Any]) -> "RateLimit":
+        """
+        Parse the rate-limit of a ``/rate_limit`` resource.
+
+        :param dict data: The resource, e.g. ``{"limit": 5000, "used": 1, ...}``.
+        :raises ValueError: If the resource is not a mapping of numbers.
+        :returns RateLimit: The parsed rate-limit.
+        """
+        if not isinstance(data, Mapping):
+            raise ValueError(f"Github rate-limit must be a mapping type: {data!r}")
+        try:
+            limit = float(data.get("limit", 0))
+            remaining = float(data.get("remaining", 0))
+            used = data.get("used")
+            # Older Github Enterprise Servers do not report the used requests.
+            used = limit - remaining if used is None else float(used)
+            return cls(limit, used, remaining, float(data.get("reset", 0)))
+        except (TypeError, ValueError) as err:
+            raise ValueError(f"Invalid Github rate-limit: {data!r}") from err
+
+
+class RateLimitsSnapshot(Mapping[str, RateLimit]):
+    """
+    Read-only mapping of Github API resource name to its rate-limit.
+
+    :param dict resources: The rate-limits per API resource.
+    :param float timestamp: Unix timestamp (UTC) the rate-limits were fetched at.
+    """
+
+    __slots__ = ("_resources", "_timestamp")
+
+    def __init__(
+        self,
+        resources: Optional[Dict[str, RateLimit]] = None,
+        timestamp: Optional[float] = None,
+    ) -> None:
+        self._resources: Dict[str, RateLimit] = dict(resources or {})
+        self._timestamp = timestamp
+
+    @property
+    def timestamp(self) -> Optional[float]:
+        """Unix timestamp (UTC) the rate-limits were fetched at"""
+        return self._timestamp
+
+    def with_timestamp(self, timestamp: float) -> "RateLimitsSnapshot":
+        """
+        Returns a copy of the snapshot fetched at the given timestamp,
+        the (read-only) rate-limits are shared with the copy.
+
+        :param float timestamp: Unix timestamp (UTC) of the fetch.
+        :returns RateLimitsSnapshot: The timestamped snapshot.
+        """
+        # pylint: disable=protected-access
+        snapshot = self.__class__.__new__(self.__class__)
+        snapshot._resources = self._resources
+        snapshot._timestamp = timestamp
+        return snapshot
+
+    @classmethod
+    def from_json(cls, data: Mapping[str, Any]) -> "RateLimitsSnapshot":
+        """
+        Parse the (decoded) ``/rate_limit`` JSON response.
+
+        Both the full response (``{"resources": {...}, "rate": {...}}``)
+        and its ``resources`` object are accepted.
+
+        :param dict data: The decoded ``/rate_limit`` response.
+        :raises ValueError: If the response is not a mapping of resources.
+        :returns RateLimitsSnapshot: The parsed snapshot.
+        """
+        if not isinstance(data, Mapping):
+            raise ValueError(f"Github rate-limits must be a mapping type: {data!r}")
+        resources = data.get("resources", data)
+        if not isinstance(resources, Mapping):
+            raise ValueError(
+                f"Github rate-limits resources must be a mapping type: {resources!r}"
+            )
+        return cls(
+            {
+                str(name): RateLimit.from_dict(resource)
+                for name, resource in resources.items()
+            }
+        )
+
+    def __getitem__(self, name: str) -> RateLimit:
+        return self._resources[name]
+
+    def __iter__(self) -> Iterator[str]:
+        return iter(self._resources)
+
+    def __len__(self) -> int:
+        return len(self._resources)
+
+    def __repr__(self) -> str:
+        return f"{self.__class__.__name__}({self._resources!r})"
@@ -0,0 +1,187 @@
+"""
+github_rate_limits_exporter.observations
+~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~
+
+Rate-limits observed by other Github API clients.
+
+Every Github API response carries the rate-limit of its resource in the
+``X-RateLimit-Limit``, ``X-RateLimit-Used``, ``X-RateLimit-Remaining``,
+``X-RateLimit-Reset`` and ``X-RateLimit-Resource`` headers. The headers
+are reported by the clients themselves, so their rate-limits are
+exported without spending any ``/rate_limit`` call.
+
+The newest observation wins, per account and API resource.
+"""
+
+import threading
+from typing import Any, Dict, Iterable, Mapping, Optional, Tuple
+
+from github_rate_limits_exporter.constants import RATE_LIMIT_HEADERS
+from github_rate_limits_exporter.models import RateLimit, RateLimitsSnapshot
+from github_rate_limits_exporter.utils import get_unix_timestamp, parse_github_datetime
+
+Observation = Tuple[str, str, RateLimit, float]
+
+
+def parse_rate_limit_headers(
+    headers: Mapping[str, Any], resource: str = "core"
+) -> Optional[Tuple[str, RateLimit]]:
+    """
+    Parse the rate-limit headers of a Github API response.
+
+    :param dict headers: The (case-insensitive) response headers.
+    :param str resource: The API resource, if not reported by the headers.
+    :raises ValueError: If any of the rate-limit headers is not a number.
+    :returns tuple: The API resource and its rate-limit,
+        ``None`` if the response has no rate-limit headers.
+    """
+    values = {str(name).lower(): value for name, value in headers.items()}
+    if RATE_LIMIT_HEADERS["limit"] not in values:
+        return None
+    limits = {
+        "limit": values[RATE_LIMIT_HEADERS["limit"]],
+        "remaining": values.get(RATE_LIMIT_HEADERS["remaining"], 0),
+        "used": values.get(RATE_LIMIT_HEADERS["used"]),
+        "reset": values.get(RATE_LIMIT_HEADERS["reset"], 0),
+    }
+    name = values.get(RATE_LIMIT_HEADERS["resource"]) or resource
+    return str(name), RateLimit.from_dict(limits)
+
+
+def parse_observation(
+    entry: Any, account: Optional[str] = None
+) -> Optional[Observation]:
+    """
+    Parse an observed Github API response, its rate-limit headers
+    are either flat or a ``headers`` object, e.g.:
+
+        {"account": "my-org", "resource": "core", "timestamp": 1671885900.0,
+         "headers": {"X-RateLimit-Limit": "5000", "X-RateLimit-Remaining": "4999"}}
+
+    :param dict entry: The observed response.
+    :param str account: The Github account name, if the entry has none.
+    :raises ValueError: If the entry is not a valid observation.
+    :returns tuple: The ``(account, resource, rate-limit, timestamp)``
+        observation, ``None`` if the response has no rate-limit headers.
+        The ``timestamp`` (unix or ``2016-07-11T22:14:10Z``) defaults to now.
+    """
+    if not isinstance(entry, dict):
+        raise ValueError(f"Observation must be a JSON object: {entry!r}")
+    headers = entry.get("headers", entry)
+    if not isinstance(headers, dict):
+        raise ValueError(f"Observation headers must be a JSON object: {headers!r}")
+    parsed = parse_rate_limit_headers(headers, str(entry.get("resource") or "core"))
+    if parsed is None:
+        return None
+    account = entry.get("account", account)
+    if not isinstance(account, str) or not account:
+        raise ValueError(f"Observation without a Github account: {entry!r}")
+    timestamp = entry.get("timestamp")
+    if timestamp is None:
+        timestamp = get_unix_timestamp()
+    elif isinstance(timestamp, str):
+        timestamp = parse_github_datetime(timestamp).timestamp()
+    elif not isinstance(timestamp, (int, float)) or isinstance(timestamp, bool):
+        raise ValueError(f"Invalid observation timestamp: {timestamp!r}")
+    return account, parsed[0], parsed[1], float(timestamp)
+
+
+class RateLimitObservations:
+    """
+    The newest observed rate-limit of every account and API resource.
+
+    The snapshot of an account is rebuilt only when any of its
+    resources is updated, so unchanged accounts keep serving the same
+    (cached) snapshot object to the collector.
+
+    :param int max_entries: Maximum number of (account, resource) rate-limits
+        kept in memory, observations of new ones are dropped once reached.
+    """
+
+    def __init__(self, max_entries: Optional[int] = None) -> None:
+        self._max_entries = max_entries
+        self._entries = 0
+        self.dropped = 0
+        self.version = 0
+        self._observed: Dict[str, Dict[str, Tuple[float, RateLimit]]] = {}
+        self._snapshots: Dict[str, RateLimitsSnapshot] = {}
+        self._merged: Dict[
+            str, Tuple[RateLimitsSnapshot, RateLimitsSnapshot, RateLimitsSnapshot]
+        ] = {}
+        self._lock = threading.Lock()
+
+    def __len__(self) -> int:
+        return self._entries
+
+    def update(self, observations: Iterable[Observation]) -> int:
+        """
+        Update the rate-limits with a batch of observations, observations
+        older than the current rate-limit of their resource are ignored.
+
+        :param iterable observations: The ``(account, resource, rate-limit,
+            timestamp)`` observations.
+        :returns int: Number of updated rate-limits.
+        """
+        updated = 0
+        with self._lock:
+            for account, name, limits, timestamp in observations:
+                current = self._observed.get(account, {}).get(name)
+                if current is None:
+                    if self._max_entries and self._entries >= self._max_entries:
+                        self.dropped += 1
+                        continue
+                    self._entries += 1
+                elif current[0] > timestamp:
+                    continue
+                self._observed.setdefault(account, {})[name] = (timestamp, limits)
+                self._snapshots.pop(account, None)
+                updated += 1
+            if updated:
+                self.version += 1
+        return updated
+
+    def snapshots(self) -> Dict[str, RateLimitsSnapshot]:
+        """
+        :returns dict: The observed rate-limits snapshot (timestamped by
+            its newest observation), per account.
+        """
+        with self._lock:
+            for account, resources in self._observed.items():
+                if account not in self._snapshots:
+                    self._snapshots[account] = RateLimitsSnapshot(
+                        {name: limits for name, (_, limits) in resources.items()},
+                        timestamp=max(timestamp for timestamp, _ in resources.values()),
+                    )
+            return dict(self._snapshots)
+
+    def merge(
+        self, limits: Mapping[str, Optional[RateLimitsSnapshot]]
+    ) -> Dict[str, Optional[RateLimitsSnapshot]]:
+        """
+        Merge the observed rate-limits with the fetched ones, the newest
+        rate-limit wins per API resource.
+
+        :param dict limits: The fetched rate-limits snapshot, per account.
+        :returns dict: The fetched and the observed accounts.
+        """
+        merged = dict(limits)
+        for account, observed in self.snapshots().items():
+            fetched = merged.get(account)
+            if fetched is None or fetched.timestamp is None:
+                merged[account] = observed
+                continue
+            cached = self._merged.get(account)
+            if cached is not None and cached[0] is fetched and cached[1] is observed:
+                merged[account] = cached[2]
+                continue
+            resources = dict(fetched)
+            with self._lock:
+                for name, (timestamp, limit) in self._observed[account].items():
+                    if name not in resources or timestamp >= fetched.timestamp:
+                        resources[name] = limit
+            snapshot = RateLimitsSnapshot(
+                resources, timestamp=max(fetched.timestamp, observed.timestamp or 0)
+            )
+            self._merged[account] = (fetched, observed, snapshot)
+            merged[account] = snapshot
+        return merged
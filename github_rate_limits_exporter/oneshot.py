@@ -0,0 +1,188 @@
+"""
+github_rate_limits_exporter.oneshot
+~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~
+
+One-shot (``--once``) mode, for cron jobs and CI gates.
+
+The rate-limits of every account are requested once (concurrently),
+either printed to the standard output (Prometheus exposition or JSON)
+or pushed to a Pushgateway, no HTTP server nor background thread is
+started. The exit status tells whether any API resource is below its
+remaining threshold, e.g. ``--min-remaining core=500,search=10%``:
+
+  - ``0``: every API resource is above its threshold.
+  - ``1``: the rate-limits could not be requested (or pushed).
+  - ``2``: any API resource is below its threshold.
+"""
+
+import argparse
+import json
+import logging
+import sys
+from typing import Any, Dict, Iterable, List, Mapping, NamedTuple, Optional
+
+from github_rate_limits_exporter.constants import (
+    DEFAULT_REQUEST_TIMEOUT,
+    ONCE_BELOW_THRESHOLD_STATUS,
+    PUSHGATEWAY_JOB,
+)
+from github_rate_limits_exporter.models import RateLimit, RateLimitsSnapshot
+from github_rate_limits_exporter.utils import SharedExceptionQueue
+
+logger = logging.getLogger(__name__)
+
+
+class RemainingThreshold(NamedTuple):
+    """Minimum remaining requests (or percent of the limit) of an API resource"""
+
+    resource: str
+    remaining: float
+    percent: bool = False
+
+    def __str__(self) -> str:
+        return f"{self.resource}={self.remaining:g}{'%' if self.percent else ''}"
+
+    def breached(self, limit: RateLimit) -> bool:
+        """
+        :param RateLimit limit: The rate-limit of the API resource.
+        :returns bool: Fewer requests than the threshold remain.
+        """
+        floor = limit.limit * self.remaining / 100 if self.percent else self.remaining
+        return limit.remaining < floor
+
+
+def parse_thresholds(value: str) -> List[RemainingThreshold]:
+    """
+    Parse the comma separated remaining thresholds, e.g. ``core=500,search=10%``.
+
+    :param str value: The ``<resource>=<requests>[%]`` thresholds.
+    :raises ValueError: If any of the thresholds is invalid.
+    :returns list: The remaining thresholds.
+    """
+    thresholds = []
+    for item in filter(None, (item.strip() for item in value.split(","))):
+        resource, separator, remaining = item.partition("=")
+        percent = remaining.endswith("%")
+        try:
+            number = float(remaining[:-1] if percent else remaining)
+        except ValueError as err:
+            raise ValueError(f"Invalid remaining threshold: {item!r}") from err
+        if not separator or not resource.strip() or number < 0:
+            raise ValueError(f"Invalid remaining threshold: {item!r}")
+        thresholds.append(RemainingThreshold(resource.strip(), number, percent))
+    return thresholds
+
+
+def below_thresholds(
+    limits: Mapping[str, Optional[RateLimitsSnapshot]],
+    thresholds: Iterable[RemainingThreshold],
+) -> List[Dict[str, Any]]:
+    """
+    :param dict limits: The rate-limits snapshot, per account.
+    :param iterable thresholds: The remaining thresholds.
+    :returns list: The API resources below their threshold, per account.
+    """
+    thresholds = list(thresholds)
+    breaches = []
+    for account, resources in limits.items():
+        for threshold in thresholds:
+            limit = None if resources is None else resources.get(threshold.resource)
+            if limit is not None and threshold.breached(limit):
+                breaches.append(
+                    {
+                        "account": account,
+                        "resource": threshold.resource,
+                        "remaining": limit.remaining,
+                        "threshold": str(threshold),
+                    }
+                )
+    return breaches
+
+
+def rate_limits_json(
+    limits: Mapping[str, Optional[RateLimitsSnapshot]],
+    breaches: List[Dict[str, Any]],
+) -> str:
+    """
+    :param dict limits: The rate-limits snapshot, per account.
+    :param list breaches: The API resources below their threshold.
+    :returns str: The JSON document of the rate-limits and the breaches.
+    """
+    return json.dumps(
+        {
+            "accounts": {
+                account: {
+                    name: limit._asdict() for name, limit in (resources or {}).items()
+                }
+                for account, resources in limits.items()
+            },
+            "below_threshold": breaches,
+        },
+        indent=2,
+    )
+
+
+def _push_to_gateway(url: str, metrics: List[Any]) -> None:
+    # pylint: disable=import-outside-toplevel
+    from prometheus_client import CollectorRegistry, Metric, push_to_gateway
+
+    from github_rate_limits_exporter.exposition import CollectedMetrics
+
+    pushed = []
+    for metric in metrics:
+        # The Pushgateway rejects the timestamped samples.
+        untimed = Metric(metric.name, metric.documentation, metric.type)
+        untimed.samples = [sample._replace(timestamp=None) for sample in metric.samples]
+        pushed.append(untimed)
+    registry = CollectorRegistry()
+    registry.register(CollectedMetrics(pushed))
+    push_to_gateway(
+        url, job=PUSHGATEWAY_JOB, registry=registry, timeout=DEFAULT_REQUEST_TIMEOUT
+    )
+
+
+def run_once(args: argparse.Namespace, exception_queue: SharedExceptionQueue) -> int:
+    """
+    Request the rate-limits of every account once and print (or push) them.
+
+    :param argparse.Namespace args: The command-line arguments.
+    :param SharedExceptionQueue exception_queue: Queue with exception objects.
+    :raises Exception: The first error of the rate-limits requests.
+    :returns int: The exit status.
+    """
+    # pylint: disable=import-outside-toplevel
+    from github_rate_limits_exporter.collector import GithubRateLimitsCollector
+
+    collector = GithubRateLimitsCollector(args, exception_queue)
+    try:
+        limits = collector.rate_limits()
+        exception_queue.get_error(block=False)
+        # Unlike the exporter, a single failed account fails the one-shot run.
+        for error in collector.errors.failures.values():
+            raise error
+        breaches = below_thresholds(limits, args.min_remaining or [])
+        if args.pushgateway_url:
+            _push_to_gateway(args.pushgateway_url, collector.metrics(limits))
+            logger.info("Pushed the rate-limits to %s", args.pushgateway_url)
+        elif args.output_format == "json":
+            sys.stdout.write(rate_limits_json(limits, breaches) + "\n")
+        else:
+            # pylint: disable=import-outside-toplevel
+            from prometheus_client import CollectorRegistry, generate_latest
+
+            from github_rate_limits_exporter.exposition import CollectedMetrics
+
+            registry = CollectorRegistry()
+            registry.register(CollectedMetrics(collector.metrics(limits)))
+            sys.stdout.write(generate_latest(registry).decode("utf-8"))
+    finally:
+        collector.stop()
+    for breach in breaches:
+        logger.warning(
+            "Github account %s %s rate-limit is below %s: %g remaining",
+            breach["account"],
+            breach["resource"],
+            breach["threshold"],
+            breach["remaining"],
+        )
+    return ONCE_BELOW_THRESHOLD_STATUS if breaches else 0
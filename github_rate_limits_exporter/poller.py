@@ -0,0 +1,104 @@
+"""
+github_rate_limits_exporter.poller
+~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~
+
+Background poller of the Github API rate-limits.
+
+The poller refreshes an in-memory snapshot of the rate-limits
+on a dedicated (daemon) thread, so the prometheus scrapes
+are served from memory and never wait on a Github API call.
+
+The polls are either evenly spaced (fixed interval) or scheduled
+by the ``schedule`` callable (e.g. the adaptive poll scheduler).
+"""
+
+import logging
+import threading
+from typing import Any, Callable, Optional
+
+logger = logging.getLogger(__name__)
+
+
+class GithubRateLimitsPoller(threading.Thread):
+    """
+    Periodically refreshes the rate-limits snapshot.
+
+    :param callable fetch: Callable which returns the latest rate-limits.
+    :param float interval: Seconds to wait between two consecutive polls.
+    :param callable schedule: Callable which returns the seconds to wait
+        until the next poll, instead of the fixed interval.
+    :raises ValueError: If the polling interval is not a positive number.
+    """
+
+    def __init__(
+        self,
+        fetch: Callable[[], Any],
+        interval: float,
+        schedule: Optional[Callable[[], float]] = None,
+    ) -> None:
+        super().__init__(name="github-rate-limits-poller", daemon=True)
+        if not isinstance(interval, (int, float)) or interval <= 0:
+            raise ValueError(
+                f"Polling interval must be a positive number: {interval!r}"
+            )
+        self._fetch = fetch
+        self._interval = float(interval)
+        self._schedule = schedule
+        self._snapshot: Optional[Any] = None
+        self._generation = 0
+        self._ready = threading.Event()
+        self._stopped = threading.Event()
+
+    @property
+    def interval(self) -> float:
+        """Seconds between two consecutive polls"""
+        return self._interval
+
+    @property
+    def generation(self) -> int:
+        """Number of snapshots taken so far, increases on every new snapshot"""
+        return self._generation
+
+    @property
+    def snapshot(self) -> Optional[Any]:
+        """The latest rate-limits snapshot (``None`` until the first poll)"""
+        return self._snapshot
+
+    def poll(self) -> None:
+        """Fetch the rate-limits and replace the current snapshot."""
+        snapshot = self._fetch()
+        if snapshot is not None:
+            # Single reference assignment, readers never observe partial updates.
+            self._snapshot = snapshot
+            self._generation += 1
+        self._ready.set()
+
+    def wait_ready(self, timeout: Optional[float] = None) -> bool:
+        """
+        Wait until the first poll has been completed.
+
+        :param float timeout: Seconds to wait, ``None`` to block forever.
+        :returns bool: ``True`` if the first poll has been completed.
+        """
+        return self._ready.wait(timeout)
+
+    def run(self) -> None:
+        if self._schedule is None:
+            logger.info("Polling Github rate-limits every %.2f seconds", self._interval)
+        else:
+            logger.info("Polling Github rate-limits on an adaptive schedule")
+        while not self._stopped.is_set():
+            self.poll()
+            wait = self._interval if self._schedule is None else self._schedule()
+            self._stopped.wait(wait)
+
+    def stop(self, timeout: Optional[float] = None) -> None:
+        """
+        Stop the poller and wait for the thread to terminate, unless
+        stopped by the poller thread itself (e.g. by the ``schedule``).
+
+        :param float timeout: Seconds to wait for the thread to terminate.
+        """
+        self._stopped.set()
+        if self.is_alive() and threading.current_thread() is not self:
+            self.join(timeout)
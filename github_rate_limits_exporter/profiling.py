@@ -0,0 +1,347 @@
+"""
+github_rate_limits_exporter.profiling
+~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~
+
+On-demand (``--debug-pprof``) profiling of the running exporter.
+
+  - ``/debug/pprof/profile``: The call stacks of every thread are sampled
+    for ``seconds``, served as text (``pstats`` report), as a ``pstats``
+    file (``python -m pstats``, snakeviz, ...) or as collapsed stacks
+    (``flamegraph.pl``, speedscope, ...).
+  - ``/debug/pprof/heap``: The memory allocations (``tracemalloc``) are
+    traced for ``seconds``, the allocations still alive at the end are
+    served as text (top source lines) or as collapsed stacks (bytes).
+
+The endpoints are only routed once enabled, so they cost nothing while
+off, and only answer the clients of the allowed networks (``localhost``
+by default). A single profile runs at a time, on the requesting thread.
+"""
+
+import collections
+import io
+import ipaddress
+import marshal
+import os
+import pstats
+import sys
+import threading
+import time
+import tracemalloc
+from types import FrameType
+from typing import Any, Callable, Dict, List, Optional, Sequence, Tuple, cast
+from urllib.parse import parse_qs
+
+from github_rate_limits_exporter.constants import (
+    DEFAULT_PROFILE_SECONDS,
+    HEAP_FORMATS,
+    MAX_PROFILE_SECONDS,
+    PROFILE_FORMATS,
+    PROFILE_SAMPLE_INTERVAL,
+    PROFILE_TOP_ENTRIES,
+    TRACEMALLOC_FRAMES,
+)
+from github_rate_limits_exporter.server import WSGIApp, json_error
+from github_rate_limits_exporter.utils import IPNetwork
+
+PROFILE_PATH = "/debug/pprof/profile"
+HEAP_PATH = "/debug/pprof/heap"
+
+# The pstats key of a function: (filename, first line, name).
+Function = Tuple[str, int, str]
+
+
+def _function(frame: FrameType) -> Function:
+    code = frame.f_code
+    return code.co_filename, code.co_firstlineno, code.co_name
+
+
+class StackSampler:
+    """
+    Statistical profiler of every thread (but the sampling one).
+
+    The deterministic ``cProfile`` only traces the thread which enables
+    it, the samples of the stacks cover the event loop, the poller and
+    the HTTP threads alike.
+
+    :param float interval: Seconds between two samples.
+    """
+
+    def __init__(self, interval: float = PROFILE_SAMPLE_INTERVAL) -> None:
+        self.interval = interval
+        # The sampled seconds per sample, measured by ``run``.
+        self.period = interval
+        # The number of samples per (root first) call stack.
+        self.stacks: Dict[Tuple[Function, ...], int] = collections.Counter()
+
+    def sample(self) -> None:
+        """Sample the current call stack of every other thread"""
+        current = threading.get_ident()
+        # pylint: disable-next=protected-access
+        for thread_id, frame in sys._current_frames().items():
+            if thread_id == current:
+                continue
+            stack: List[Function] = []
+            caller: Optional[FrameType] = frame
+            while caller is not None:
+                stack.append(_function(caller))
+                caller = caller.f_back
+            self.stacks[tuple(reversed(stack))] += 1
+
+    def run(self, seconds: float) -> None:
+        """
+        :param float seconds: Seconds to sample the call stacks for.
+        """
+        started = time.monotonic()
+        rounds = 0
+        while time.monotonic() - started < seconds:
+            self.sample()
+            rounds += 1
+            time.sleep(self.interval)
+        self.period = (time.monotonic() - started) / max(rounds, 1)
+
+    def collapsed(self) -> str:
+        """
+        :returns str: The collapsed stacks, ``frame;frame;... samples`` lines.
+        """
+        return "".join(
+            ";".join(
+                f"{name} ({os.path.basename(filename)}:{line})"
+                for filename, line, name in stack
+            )
+            + f" {count}\n"
+            for stack, count in sorted(self.stacks.items())
+        )
+
+    def stats(self) -> Dict[Function, Tuple[Any, ...]]:
+        """
+        The ``pstats`` statistics of the samples: the call counts are
+        sample counts, the times are the sampled seconds.
+
+        :returns dict: ``(cc, nc, tt, ct, callers)`` per function.
+        """
+        calls: Dict[Function, List[float]] = collections.defaultdict(lambda: [0, 0])
+        callers: Dict[Function, Dict[Function, List[float]]] = collections.defaultdict(
+            lambda: collections.defaultdict(lambda: [0, 0])
+        )
+        for stack, count in self.stacks.items():
+            calls[stack[-1]][0] += count
+            for function in set(stack):
+                calls[function][1] += count
+            for caller, callee in set(zip(stack, stack[1:])):
+                callers[callee][caller][1] += count
+                if callee == stack[-1]:
+                    callers[callee][caller][0] += count
+        return {
+            function: (
+                int(cumulative),
+                int(cumulative),
+                own * self.period,
+                cumulative * self.period,
+                {
+                    caller: (
+                        int(edge[1]),
+                        int(edge[1]),
+                        edge[0] * self.period,
+                        edge[1] * self.period,
+                    )
+                    for caller, edge in callers[function].items()
+                },
+            )
+            for function, (own, cumulative) in calls.items()
+        }
+
+    def report(self, top: int = PROFILE_TOP_ENTRIES) -> str:
+        """
+        :param int top: Number of functions to report.
+        :returns str: The ``pstats`` report, by cumulative time.
+        """
+        stream = io.StringIO()
+        stream.write(f"{sum(self.stacks.values())} samples\n")
+        if self.stacks:
+            profile = cast(Any, _SampledProfile(self.stats()))
+            stats = pstats.Stats(profile, stream=stream)
+            stats.sort_stats("cumulative").print_stats(top)
+        return stream.getvalue()
+
+
+class _SampledProfile:
+    """The ``create_stats`` protocol of ``pstats.Stats``"""
+
+    def __init__(self, stats: Dict[Function, Tuple[Any, ...]]) -> None:
+        self.stats = stats
+
+    def create_stats(self) -> None:
+        """The statistics are already created"""
+
+
+def trace_allocations(seconds: float) -> Tuple[Any, Any]:
+    """
+    Trace the memory allocations for ``seconds``, if not already traced.
+
+    :param float seconds: Seconds to trace the allocations for.
+    :returns tuple: The ``tracemalloc`` snapshots at the start and the end.
+    """
+    tracing = tracemalloc.is_tracing()
+    if not tracing:
+        tracemalloc.start(TRACEMALLOC_FRAMES)
+    try:
+        start = tracemalloc.take_snapshot()
+        time.sleep(seconds)
+        end = tracemalloc.take_snapshot()
+    finally:
+        if not tracing:
+            tracemalloc.stop()
+    untraced = (tracemalloc.Filter(False, tracemalloc.__file__),)
+    return start.filter_traces(untraced), end.filter_traces(untraced)
+
+
+def heap_report(start: Any, end: Any, top: int = PROFILE_TOP_ENTRIES) -> str:
+    """
+    :param Snapshot start: The ``tracemalloc`` snapshot at the start.
+    :param Snapshot end: The ``tracemalloc`` snapshot at the end.
+    :param int top: Number of source lines to report.
+    :returns str: The source lines which allocated the most (alive) memory.
+    """
+    stats = end.compare_to(start, "lineno")
+    size = sum(stat.size_diff for stat in stats)
+    lines = [f"{size / 1024:.1f} KiB allocated (and alive) while tracing\n"]
+    lines.extend(f"{stat}\n" for stat in stats[:top] if stat.size_diff > 0)
+    return "".join(lines)
+
+
+def heap_collapsed(start: Any, end: Any) -> str:
+    """
+    :param Snapshot start: The ``tracemalloc`` snapshot at the start.
+    :param Snapshot end: The ``tracemalloc`` snapshot at the end.
+    :returns str: The collapsed allocation stacks, ``frame;... bytes`` lines.
+    """
+    lines = []
+    for stat in end.compare_to(start, "traceback"):
+        if stat.size_diff <= 0:
+            continue
+        # The tracebacks are sorted from the oldest to the most recent frame.
+        frames = ";".join(
+            f"{os.path.basename(frame.filename)}:{frame.lineno}"
+            for frame in stat.traceback
+        )
+        lines.append(f"{frames} {stat.size_diff}\n")
+    return "".join(sorted(lines))
+
+
+def _seconds_parameter(query: Dict[str, List[str]]) -> float:
+    values = query.get("seconds")
+    if not values:
+        return DEFAULT_PROFILE_SECONDS
+    try:
+        seconds = float(values[-1])
+    except ValueError as err:
+        raise ValueError(f"Invalid seconds: {values[-1]!r}") from err
+    if not 0 < seconds <= MAX_PROFILE_SECONDS:
+        raise ValueError(f"seconds must be in (0, {MAX_PROFILE_SECONDS:g}]")
+    return seconds
+
+
+def _format_parameter(query: Dict[str, List[str]], formats: Sequence[str]) -> str:
+    output = (query.get("format") or [formats[0]])[-1]
+    if output not in formats:
+        raise ValueError(f"format must be one of: {', '.join(formats)}")
+    return output
+
+
+def _allowed(environ: Dict[str, Any], networks: Sequence[IPNetwork]) -> bool:
+    try:
+        address = ipaddress.ip_address(environ.get("REMOTE_ADDR", ""))
+    except ValueError:
+        return False
+    if isinstance(address, ipaddress.IPv6Address) and address.ipv4_mapped:
+        address = address.ipv4_mapped
+    return any(address in network for network in networks)
+
+
+def _file_response(
+    start_response: Callable[..., Any],
+    body: bytes,
+    content_type: str,
+    filename: Optional[str] = None,
+) -> List[bytes]:
+    headers = [("Content-Type", content_type), ("Content-Length", str(len(body)))]
+    if filename is not None:
+        headers.append(("Content-Disposition", f'attachment; filename="{filename}"'))
+    start_response("200 OK", headers)
+    return [body]
+
+
+def make_pprof_routes(networks: Sequence[IPNetwork]) -> Dict[str, WSGIApp]:
+    """
+    Create the WSGI applications of the profiling endpoints.
+
+    :param list networks: The networks of the allowed clients.
+    :returns dict: The WSGI application per path.
+    """
+    running = threading.Lock()
+
+    def profile(query: Dict[str, List[str]], start_response: Callable[..., Any]) -> Any:
+        seconds = _seconds_parameter(query)
+        output = _format_parameter(query, PROFILE_FORMATS)
+        sampler = StackSampler()
+        sampler.run(seconds)
+        if output == "pstats":
+            return _file_response(
+                start_response,
+                marshal.dumps(sampler.stats()),
+                "application/octet-stream",
+                "profile.pstats",
+            )
+        if output == "collapsed":
+            return _file_response(
+                start_response,
+                sampler.collapsed().encode("utf-8"),
+                "text/plain; charset=utf-8",
+                "profile.collapsed",
+            )
+        return _file_response(
+            start_response,
+            sampler.report().encode("utf-8"),
+            "text/plain; charset=utf-8",
+        )
+
+    def heap(query: Dict[str, List[str]], start_response: Callable[..., Any]) -> Any:
+        seconds = _seconds_parameter(query)
+        output = _format_parameter(query, HEAP_FORMATS)
+        start, end = trace_allocations(seconds)
+        if output == "collapsed":
+            return _file_response(
+                start_response,
+                heap_collapsed(start, end).encode("utf-8"),
+                "text/plain; charset=utf-8",
+                "heap.collapsed",
+            )
+        return _file_response(
+            start_response,
+            heap_report(start, end).encode("utf-8"),
+            "text/plain; charset=utf-8",
+        )
+
+    def guarded(handler: Callable[..., Any]) -> WSGIApp:
+        def app(environ: Dict[str, Any], start_response: Callable[..., Any]) -> Any:
+            if not _allowed(environ, networks):
+                return json_error(start_response, "403 Forbidden", "Forbidden")
+            if environ.get("REQUEST_METHOD", "GET") != "GET":
+                return json_error(start_response, "405 Method Not Allowed", "GET only")
+            # pylint: disable-next=consider-using-with
+            if not running.acquire(blocking=False):
+                return json_error(
+                    start_response, "409 Conflict", "A profile is already running"
+                )
+            try:
+                return handler(
+                    parse_qs(environ.get("QUERY_STRING", "")), start_response
+                )
+            except ValueError as err:
+                return json_error(start_response, "400 Bad Request", str(err))
+            finally:
+                running.release()
+
+        return app
+
+    return {PROFILE_PATH: guarded(profile), HEAP_PATH: guarded(heap)}
@@ -0,0 +1,187 @@
+"""
+github_rate_limits_exporter.push
+~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~
+
+Rate-limits pushed by short-lived Github API clients (e.g. CI jobs).
+
+The clients ``POST /api/v1/observations`` a JSON list of observed
+responses, tagged with their account and resource:
+
+    [{"account": "my-org", "resource": "core", "timestamp": 1671885900.0,
+      "headers": {"X-RateLimit-Limit": "5000", "X-RateLimit-Remaining": "4999",
+                  "X-RateLimit-Used": "1", "X-RateLimit-Reset": "1671889500"}}]
+
+A batch is validated and queued, the request never waits on the
+observed rate-limits: a (daemon) thread drains the queued batches into
+them. Both the queued batches and the observed rate-limits are capped,
+batches are rejected (``503``) while the queue is full.
+"""
+
+import json
+import logging
+import queue
+import threading
+from typing import Any, Callable, Dict, List, Optional
+
+from github_rate_limits_exporter.constants import (
+    DEFAULT_PUSH_QUEUE_SIZE,
+    PUSH_DRAIN_INTERVAL,
+    PUSH_MAX_BATCH_SIZE,
+    PUSH_MAX_BODY_SIZE,
+)
+from github_rate_limits_exporter.observations import (
+    Observation,
+    RateLimitObservations,
+    parse_observation,
+)
+from github_rate_limits_exporter.server import WSGIApp, json_error, json_response
+from github_rate_limits_exporter.utils import SharedExceptionQueue
+
+logger = logging.getLogger(__name__)
+
+OBSERVATIONS_PATH = "/api/v1/observations"
+
+
+class ObservationsPushQueue(threading.Thread):
+    """
+    Bounded queue of pushed observation batches, drained
+    into the observed rate-limits on a dedicated thread.
+
+    :param RateLimitObservations observations: The observed rate-limits.
+    :param SharedExceptionQueue exception_queue: Queue with exception objects.
+    :param int maxsize: Maximum number of queued batches.
+    """
+
+    def __init__(
+        self,
+        observations: RateLimitObservations,
+        exception_queue: SharedExceptionQueue,
+        maxsize: int = DEFAULT_PUSH_QUEUE_SIZE,
+    ) -> None:
+        super().__init__(name="github-rate-limits-push", daemon=True)
+        self._observations = observations
+        self._exception_queue = exception_queue
+        self._queue: "queue.Queue[List[Observation]]" = queue.Queue(maxsize)
+        self._stopped = threading.Event()
+        self.accepted = 0
+        self.rejected = 0
+
+    def submit(self, batch: List[Observation]) -> bool:
+        """
+        Queue a batch of observations, without blocking.
+
+        :param list batch: The ``(account, resource, rate-limit, timestamp)``
+            observations.
+        :returns bool: ``False`` if the batch is rejected (full queue).
+        """
+        try:
+            self._queue.put_nowait(batch)
+        except queue.Full:
+            self.rejected += 1
+            return False
+        self.accepted += 1
+        return True
+
+    def drain(self, timeout: Optional[float] = None) -> int:
+        """
+        Update the observed rate-limits with every queued batch, at once.
+
+        :param float timeout: Seconds to wait for the first batch,
+            do not wait if ``None``.
+        :returns int: Number of updated rate-limits.
+        """
+        batches = []
+        try:
+            batches.append(self._queue.get(timeout is not None, timeout))
+            while True:
+                batches.append(self._queue.get_nowait())
+        except queue.Empty:
+            pass
+        return self._observations.update(
+            observation for batch in batches for observation in batch
+        )
+
+    def run(self) -> None:
+        while not self._stopped.is_set():
+            try:
+                self.drain(timeout=PUSH_DRAIN_INTERVAL)
+            except Exception as error:  # pylint: disable=broad-except
+                self._exception_queue.put_error(error)
+
+    def stop(self, timeout: Optional[float] = None) -> None:
+        """
+        Stop draining, wait for the thread to finish and drain
+        the (already) queued batches.
+
+        :param float timeout: Seconds to wait for the thread to finish.
+        """
+        self._stopped.set()
+        if self.is_alive():
+            self.join(timeout)
+        self.drain()
+
+
+def _read_body(environ: Dict[str, Any]) -> bytes:
+    try:
+        length = int(environ.get("CONTENT_LENGTH") or 0)
+    except ValueError as err:
+        raise ValueError("invalid Content-Length") from err
+    if length > PUSH_MAX_BODY_SIZE:
+        raise OverflowError(f"request body exceeds {PUSH_MAX_BODY_SIZE} bytes")
+    return environ["wsgi.input"].read(length) if length > 0 else b""
+
+
+def parse_observations(body: bytes) -> List[Observation]:
+    """
+    Parse a pushed batch of observations.
+
+    :param bytes body: The JSON list of observed responses.
+    :raises ValueError: If the batch or any of its observations is invalid.
+    :returns list: The observations (responses without rate-limit
+        headers are skipped).
+    """
+    entries = json.loads(body)
+    if not isinstance(entries, list):
+        raise ValueError("observations must be a JSON list")
+    if len(entries) > PUSH_MAX_BATCH_SIZE:
+        raise ValueError(f"observations exceed {PUSH_MAX_BATCH_SIZE} per batch")
+    batch = []
+    for index, entry in enumerate(entries):
+        try:
+            observation = parse_observation(entry)
+        except ValueError as err:
+            raise ValueError(f"observation {index}: {err}") from err
+        if observation is not None:
+            batch.append(observation)
+    return batch
+
+
+def make_push_app(push_queue: ObservationsPushQueue) -> WSGIApp:
+    """
+    Create the WSGI application of the ``/api/v1/observations`` endpoint.
+
+    :param ObservationsPushQueue push_queue: The pushed observations queue.
+    :returns callable: The WSGI application.
+    """
+
+    def app(environ: Dict[str, Any], start_response: Callable[..., Any]) -> List[bytes]:
+        if environ.get("REQUEST_METHOD") != "POST":
+            return json_error(start_response, "405 Method Not Allowed", "POST only")
+        try:
+            batch = parse_observations(_read_body(environ))
+        except OverflowError as err:
+            return json_error(start_response, "413 Payload Too Large", str(err))
+        except ValueError as err:
+            return json_error(start_response, "400 Bad Request", str(err))
+        if batch and not push_queue.submit(batch):
+            logger.debug("Rejected %d observations, the queue is full", len(batch))
+            return json_error(
+                start_response, "503 Service Unavailable", "observations queue is full"
+            )
+        return json_response(
+            start_response,
+            "202 Accepted",
+            {"status": "success", "data": {"accepted": len(batch)}},
+        )
+
+    return app
@@ -0,0 +1,268 @@
+"""
+github_rate_limits_exporter.remotewrite
+~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~
+
+Prometheus remote-write push of the exported metrics.
+
+For clusters which can not be scraped, the exported metrics are pushed
+to a remote-write endpoint (Prometheus, Mimir, Thanos receive, etc.)
+instead: every new rate-limits snapshot (poll or observation) is
+collected from the registry of the rate-limits collector (the same
+rate-limits series the ``/metrics`` endpoint serves, without the
+exporter's own metrics) and its samples are queued. A (daemon) thread sends the queued samples in
+batches, as snappy compressed ``WriteRequest`` protobuf messages.
+
+The queue is bounded, the oldest samples are dropped once full. Failed
+sends (connection errors, ``429`` and ``5xx`` responses) are retried
+with an exponential backoff, the batch is dropped once the retries are
+exhausted or on any other (``4xx``) error response.
+"""
+
+import collections
+import functools
+import logging
+import struct
+import threading
+import time
+from typing import Callable, Deque, Hashable, Iterable, List, Optional, Tuple
+
+import requests
+from prometheus_client import Metric
+from prometheus_client.registry import Collector
+
+from github_rate_limits_exporter.constants import (
+    DEFAULT_REMOTE_WRITE_QUEUE_SIZE,
+    DEFAULT_REMOTE_WRITE_RETRIES,
+    DEFAULT_REQUEST_TIMEOUT,
+    REMOTE_WRITE_BATCH_SIZE,
+    REMOTE_WRITE_CHECK_INTERVAL,
+    REMOTE_WRITE_HEADERS,
+    REMOTE_WRITE_LABELS_CACHE,
+    REMOTE_WRITE_MAX_BACKOFF,
+    REMOTE_WRITE_MIN_BACKOFF,
+)
+
+logger = logging.getLogger(__name__)
+
+Labels = Tuple[Tuple[str, str], ...]
+# The (sorted) labels, the value and the timestamp (ms) of a sample.
+Series = Tuple[Labels, float, int]
+
+_DOUBLE = struct.Struct("<d")
+_UNVERSIONED = object()
+
+
+def _varint(value: int) -> bytes:
+    encoded = bytearray()
+    while value > 0x7F:
+        encoded.append((value & 0x7F) | 0x80)
+        value >>= 7
+    encoded.append(value)
+    return bytes(encoded)
+
+
+def _length_delimited(field: int, payload: bytes) -> bytes:
+    return _varint(field << 3 | 2) + _varint(len(payload)) + payload
+
+
+@functools.lru_cache(maxsize=REMOTE_WRITE_LABELS_CACHE)
+def _encode_labels(labels: Labels) -> bytes:
+    # The labels of a series are pushed on every snapshot, encoded once.
+    return b"".join(
+        _length_delimited(
+            1,
+            _length_delimited(1, name.encode("utf-8"))
+            + _length_delimited(2, value.encode("utf-8")),
+        )
+        for name, value in labels
+    )
+
+
+def encode_write_request(series: Iterable[Series]) -> bytes:
+    """
+    Encode the ``prometheus.WriteRequest`` protobuf message of the samples,
+    a time series (``labels`` and a single ``sample``) per sample.
+
+    :param iterable series: The ``(labels, value, timestamp)`` samples,
+        the labels sorted by name (``__name__`` included).
+    :returns bytes: The serialized message.
+    """
+    messages = []
+    for labels, value, timestamp in series:
+        # Sample: double value = 1; int64 timestamp = 2 (ms).
+        sample = b"\x09" + _DOUBLE.pack(value) + b"\x10" + _varint(timestamp)
+        messages.append(
+            _length_delimited(1, _encode_labels(labels) + _length_delimited(2, sample))
+        )
+    return b"".join(messages)
+
+
+def metrics_to_series(metrics: Iterable[Metric], timestamp: int) -> List[Series]:
+    """
+    :param iterable metrics: The collected metrics.
+    :param int timestamp: Timestamp (ms) of the samples without one.
+    :returns list: The ``(labels, value, timestamp)`` samples of the metrics.
+    """
+    series = []
+    for metric in metrics:
+        for sample in metric.samples:
+            labels = dict(sample.labels)
+            labels["__name__"] = sample.name
+            series.append(
+                (
+                    tuple(sorted(labels.items())),
+                    float(sample.value),
+                    (
+                        timestamp
+                        if sample.timestamp is None
+                        else int(float(sample.timestamp) * 1000)
+                    ),
+                )
+            )
+    return series
+
+
+class RemoteWriter(threading.Thread):  # pylint: disable=too-many-instance-attributes
+    """
+    Pushes the samples of every new rate-limits snapshot to a
+    Prometheus remote-write endpoint, on a dedicated thread.
+
+    :param Collector registry: The prometheus registry of the rate-limits.
+    :param callable version: Returns the (hashable) version of the
+        rate-limits, the registry is collected once per version.
+    :param str url: The remote-write endpoint URL.
+    :param int max_samples: Maximum number of queued samples.
+    :param int retries: Maximum number of retries of a failed send.
+    """
+
+    def __init__(
+        self,
+        registry: Collector,
+        version: Callable[[], Optional[Hashable]],
+        url: str,
+        max_samples: int = DEFAULT_REMOTE_WRITE_QUEUE_SIZE,
+        retries: int = DEFAULT_REMOTE_WRITE_RETRIES,
+    ) -> None:
+        super().__init__(name="github-rate-limits-remote-write", daemon=True)
+        self._registry = registry
+        self._version = version
+        self._url = url
+        self._retries = retries
+        self._queue: Deque[Series] = collections.deque(maxlen=max_samples)
+        self._pushed: object = _UNVERSIONED
+        self._lock = threading.Lock()
+        self._stopped = threading.Event()
+        self._session = requests.Session()
+        self._session.headers.update(REMOTE_WRITE_HEADERS)
+        # A session without auth falls back to the .netrc credentials.
+        self._session.auth = lambda request: request
+        self.sent = 0
+        self.dropped = 0
+        self.retried = 0
+
+    def __len__(self) -> int:
+        return len(self._queue)
+
+    def enqueue(self) -> int:
+        """
+        Queue the samples of the current rate-limits version,
+        unless already queued.
+
+        :returns int: Number of queued samples.
+        """
+        version = self._version()
+        if version is not None and version == self._pushed:
+            return 0
+        series = metrics_to_series(self._registry.collect(), int(time.time() * 1000))
+        with self._lock:
+            overflow = len(self._queue) + len(series) - (self._queue.maxlen or 0)
+            if overflow > 0:
+                self.dropped += overflow
+                logger.warning(
+                    "Remote-write queue is full, dropped %d samples", overflow
+                )
+            self._queue.extend(series)
+        self._pushed = version
+        return len(series)
+
+    def _send(self, payload: bytes) -> bool:
+        """
+        Send a compressed ``WriteRequest``, retry the recoverable failures.
+
+        :returns bool: ``False`` if the batch has been dropped.
+        """
+        for attempt in range(self._retries + 1):
+            if attempt:
+                self.retried += 1
+                backoff = REMOTE_WRITE_MIN_BACKOFF * 2 ** (attempt - 1)
+                self._stopped.wait(min(backoff, REMOTE_WRITE_MAX_BACKOFF))
+            try:
+                response = self._session.post(
+                    self._url, data=payload, timeout=DEFAULT_REQUEST_TIMEOUT
+                )
+            except requests.RequestException as err:
+                logger.debug("Remote-write request failed: %s", err)
+                continue
+            if response.status_code < 300:
+                return True
+            if response.status_code != 429 and response.status_code < 500:
+                logger.warning(
+                    "Remote-write endpoint rejected the samples: %d %s",
+                    response.status_code,
+                    response.text[:256],
+                )
+                return False
+            logger.debug("Remote-write endpoint responded: %d", response.status_code)
+        logger.warning("Remote-write failed after %d retries", self._retries)
+        return False
+
+    def flush(self, batch_size: int = REMOTE_WRITE_BATCH_SIZE) -> int:
+        """
+        Send the queued samples, in batches.
+
+        :param int batch_size: Maximum number of samples per request.
+        :returns int: Number of sent samples.
+        """
+        # pylint: disable=import-outside-toplevel
+        import snappy
+
+        sent = 0
+        while True:
+            with self._lock:
+                batch = [
+                    self._queue.popleft()
+                    for _ in range(min(batch_size, len(self._queue)))
+                ]
+            if not batch:
+                return sent
+            if self._send(snappy.compress(encode_write_request(batch))):
+                sent += len(batch)
+                self.sent += len(batch)
+            else:
+                self.dropped += len(batch)
+
+    def run(self) -> None:
+        while not self._stopped.is_set():
+            try:
+                self.enqueue()
+                self.flush()
+            except Exception:  # pylint: disable=broad-except
+                # The remote-write never stops the exporter (nor its scrapes).
+                logger.exception("Remote-write failed")
+            self._stopped.wait(REMOTE_WRITE_CHECK_INTERVAL)
+
+    def stop(self, timeout: Optional[float] = None) -> None:
+        """
+        Stop pushing, wait for the thread to finish and send
+        the (already) queued samples, without retries.
+
+        :param float timeout: Seconds to wait for the thread to finish.
+        """
+        self._stopped.set()
+        if self.is_alive():
+            self.join(timeout)
+        self._retries = 0
+        try:
+            self.flush()
+        finally:
+            self._session.close()
@@ -0,0 +1,252 @@
+"""
+github_rate_limits_exporter.scheduler
+~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~
+
+Adaptive (per account) poll scheduler of the Github API rate-limits.
+
+Instead of polling every account at a fixed cadence, the interval of an
+account follows its most constrained API resource:
+
+  - the ``remaining`` fraction of the limit, a full idle bucket is
+    polled at the ceiling interval and an almost exhausted one at the floor.
+  - the burn rate (``used`` requests per second since the previous poll),
+    the bucket is polled a few times before it would be exhausted.
+  - the ``reset`` epoch, a bucket in use is polled just after its reset
+    to capture the new window.
+
+Every interval is clamped to the (per account) floor and ceiling.
+"""
+
+import math
+import threading
+import time
+from typing import Dict, Iterable, List, Optional, Tuple
+
+from github_rate_limits_exporter.constants import (
+    DEFAULT_POLL_MAX_INTERVAL,
+    DEFAULT_POLL_MIN_INTERVAL,
+    POLL_AFTER_RESET,
+    POLLS_TO_EXHAUSTION,
+)
+from github_rate_limits_exporter.models import RateLimitsSnapshot
+
+
+class AccountSchedule:
+    """
+    Poll schedule of a single Github account.
+
+    :param float min_interval: Floor of the poll interval (seconds).
+    :param float max_interval: Ceiling of the poll interval (seconds).
+    :param float interval: Interval after a failed (or an empty) poll.
+    :raises ValueError: If the floor is not positive or greater than the ceiling.
+    """
+
+    __slots__ = (
+        "min_interval",
+        "max_interval",
+        "default_interval",
+        "interval",
+        "next_poll_at",
+        "_observed",
+    )
+
+    def __init__(
+        self,
+        min_interval: float = DEFAULT_POLL_MIN_INTERVAL,
+        max_interval: float = DEFAULT_POLL_MAX_INTERVAL,
+        interval: Optional[float] = None,
+    ) -> None:
+        if not 0 < min_interval <= max_interval:
+            raise ValueError(
+                "Poll interval floor must be positive and not greater than"
+                f" the ceiling: {min_interval!r}, {max_interval!r}"
+            )
+        self.min_interval = float(min_interval)
+        self.max_interval = float(max_interval)
+        self.default_interval = self.clamp(
+            max_interval if interval is None else interval
+        )
+        self.interval = self.default_interval
+        # Accounts are polled as soon as they are scheduled.
+        self.next_poll_at = -math.inf
+        # Resource name to the (used, reset, monotonic time) of the previous poll.
+        self._observed: Dict[str, Tuple[float, float, float]] = {}
+
+    def clamp(self, interval: float) -> float:
+        """
+        :returns float: The interval clamped to the floor and the ceiling.
+        """
+        return min(max(interval, self.min_interval), self.max_interval)
+
+    def update(self, resources: Optional[RateLimitsSnapshot], now: float) -> float:
+        """
+        Schedule the next poll of the account.
+
+        :param RateLimitsSnapshot resources: The polled rate-limits,
+            ``None`` if the poll has failed.
+        :param float now: Monotonic time of the poll.
+        :returns float: Seconds until the next poll.
+        """
+        if resources is None:
+            interval = self.default_interval
+        else:
+            interval = self._interval(resources, now)
+        self.interval = self.clamp(interval)
+        self.next_poll_at = now + self.interval
+        return self.interval
+
+    def _interval(self, resources: RateLimitsSnapshot, now: float) -> float:
+        interval = self.max_interval
+        observed = {}
+        for name, limits in resources.items():
+            if limits.limit <= 0:
+                continue
+            observed[name] = (limits.used, limits.reset, now)
+            fraction = limits.remaining / limits.limit
+            interval = min(
+                interval,
+                self.min_interval + (self.max_interval - self.min_interval) * fraction,
+            )
+            previous = self._observed.get(name)
+            if (
+                previous is not None
+                and previous[1] == limits.reset
+                and limits.used > previous[0]
+                and now > previous[2]
+            ):
+                burn_rate = (limits.used - previous[0]) / (now - previous[2])
+                interval = min(
+                    interval, limits.remaining / burn_rate / POLLS_TO_EXHAUSTION
+                )
+            if limits.used > 0 and resources.timestamp is not None:
+                to_reset = limits.reset - resources.timestamp
+                if 0 <= to_reset < interval:
+                    interval = to_reset + POLL_AFTER_RESET
+        self._observed = observed
+        return interval
+
+
+class AdaptivePollScheduler:
+    """
+    Schedules the polls of every Github account.
+
+    :param float min_interval: Default floor of the poll interval (seconds).
+    :param float max_interval: Default ceiling of the poll interval (seconds).
+    :param float interval: Interval after a failed (or an empty) poll.
+    """
+
+    def __init__(
+        self,
+        min_interval: float = DEFAULT_POLL_MIN_INTERVAL,
+        max_interval: float = DEFAULT_POLL_MAX_INTERVAL,
+        interval: Optional[float] = None,
+    ) -> None:
+        # Validates the default bounds.
+        AccountSchedule(min_interval, max_interval, interval)
+        self._bounds: Dict[str, Tuple[float, float]] = {}
+        self._min_interval = min_interval
+        self._max_interval = max_interval
+        self._interval = interval
+        self._schedules: Dict[str, AccountSchedule] = {}
+        self._lock = threading.Lock()
+
+    @property
+    def intervals(self) -> Dict[str, float]:
+        """The current poll interval (seconds), per account"""
+        return {
+            account: schedule.interval for account, schedule in self._schedules.items()
+        }
+
+    def set_bounds(
+        self,
+        account: str,
+        min_interval: Optional[float] = None,
+        max_interval: Optional[float] = None,
+    ) -> None:
+        """
+        Set the floor and the ceiling of the poll interval of an account.
+
+        :param str account: The Github account name.
+        :param float min_interval: Floor of the poll interval, the default if ``None``.
+        :param float max_interval: Ceiling of the poll interval, the default if ``None``.
+        :raises ValueError: If the floor is not positive or greater than the ceiling.
+        """
+        bounds = (
+            self._min_interval if min_interval is None else min_interval,
+            self._max_interval if max_interval is None else max_interval,
+        )
+        AccountSchedule(*bounds)
+        with self._lock:
+            default = (self._min_interval, self._max_interval)
+            if self._bounds.get(account, default) == bounds:
+                return
+            self._bounds[account] = bounds
+            self._schedules.pop(account, None)
+
+    def _schedule(self, account: str) -> AccountSchedule:
+        schedule = self._schedules.get(account)
+        if schedule is None:
+            min_interval, max_interval = self._bounds.get(
+                account, (self._min_interval, self._max_interval)
+            )
+            schedule = AccountSchedule(min_interval, max_interval, self._interval)
+            self._schedules[account] = schedule
+        return schedule
+
+    def due(self, accounts: Iterable[str], now: Optional[float] = None) -> List[str]:
+        """
+        :param iterable accounts: The Github accounts to poll.
+        :param float now: Monotonic time, the current time if ``None``.
+        :returns list: The accounts whose next poll is due.
+        """
+        now = time.monotonic() if now is None else now
+        with self._lock:
+            return [
+                account
+                for account in accounts
+                if self._schedule(account).next_poll_at <= now
+            ]
+
+    def update(
+        self,
+        polled: Dict[str, Optional[RateLimitsSnapshot]],
+        now: Optional[float] = None,
+    ) -> None:
+        """
+        Schedule the next poll of the polled accounts.
+
+        :param dict polled: The polled rate-limits (``None`` if failed), per account.
+        :param float now: Monotonic time of the poll, the current time if ``None``.
+        """
+        now = time.monotonic() if now is None else now
+        with self._lock:
+            for account, resources in polled.items():
+                self._schedule(account).update(resources, now)
+
+    def retain(self, accounts: Iterable[str]) -> None:
+        """
+        Forget the schedules of the accounts that are no longer polled.
+
+        :param iterable accounts: The Github accounts to keep.
+        """
+        accounts = set(accounts)
+        with self._lock:
+            for account in set(self._schedules) - accounts:
+                del self._schedules[account]
+            for account in set(self._bounds) - accounts:
+                del self._bounds[account]
+
+    def wait(self, now: Optional[float] = None) -> float:
+        """
+        :param float now: Monotonic time, the current time if ``None``.
+        :returns float: Seconds until the next due poll (the default
+            ceiling without scheduled accounts).
+        """
+        now = time.monotonic() if now is None else now
+        with self._lock:
+            if not self._schedules:
+                return float(self._max_interval)
+            next_poll_at = min(
+                schedule.next_poll_at for schedule in self._schedules.values()
+            )
+        return max(next_poll_at - now, 0.0)
@@ -0,0 +1,179 @@
+"""
+github_rate_limits_exporter.server
+~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~
+
+Exporter HTTP server.
+
+The prometheus client WSGI application serves ``/metrics``, the
+exporter (JSON) endpoints are routed by path next to it, e.g.:
+
+  - ``/api/v1/history``: The recent rate-limits history.
+  - ``/-/healthy``: Always ``200``, the exporter is serving.
+  - ``/-/ready``: ``200`` once the first rate-limits are available, ``503`` before.
+"""
+
+import json
+import socket
+import threading
+from typing import Any, Callable, Dict, Iterable, List, Optional, Protocol, Tuple
+from wsgiref.simple_server import WSGIRequestHandler, WSGIServer, make_server
+
+from prometheus_client import make_wsgi_app
+from prometheus_client.exposition import ThreadingWSGIServer
+from prometheus_client.registry import REGISTRY, Collector
+
+from github_rate_limits_exporter.instrumentation import INSTRUMENTS
+from github_rate_limits_exporter.utils import is_ipv6_addr
+
+WSGIApp = Callable[[Dict[str, Any], Callable[..., Any]], Iterable[bytes]]
+
+
+class HTTPServer(Protocol):
+    """The exporter HTTP server (threaded or asyncio)"""
+
+    server_port: int
+
+    def shutdown(self) -> None:
+        """Stop serving"""
+
+    def server_close(self) -> None:
+        """Release the server resources"""
+
+
+HEALTHY_PATH = "/-/healthy"
+READY_PATH = "/-/ready"
+
+
+class SilentWSGIRequestHandler(WSGIRequestHandler):
+    """WSGI request handler that does not log the requests"""
+
+    def log_message(self, *args: Any) -> None:  # pylint: disable=arguments-differ
+        pass
+
+
+def json_response(
+    start_response: Callable[..., Any], status: str, body: Any
+) -> List[bytes]:
+    """
+    Start a JSON (WSGI) response.
+
+    :param callable start_response: The WSGI ``start_response`` callable.
+    :param str status: The HTTP status line, e.g. ``200 OK``.
+    :param body: The JSON serializable response body.
+    :returns list: The encoded response body.
+    """
+    payload = json.dumps(body, separators=(",", ":")).encode()
+    start_response(
+        status,
+        [
+            ("Content-Type", "application/json"),
+            ("Content-Length", str(len(payload))),
+        ],
+    )
+    return [payload]
+
+
+def json_error(
+    start_response: Callable[..., Any], status: str, error: str
+) -> List[bytes]:
+    """
+    Start a JSON (WSGI) error response, ``{"status": "error", "error": ...}``.
+
+    :param callable start_response: The WSGI ``start_response`` callable.
+    :param str status: The HTTP status line, e.g. ``400 Bad Request``.
+    :param str error: The error message.
+    :returns list: The encoded response body.
+    """
+    return json_response(start_response, status, {"status": "error", "error": error})
+
+
+def make_health_routes(ready: Callable[[], bool]) -> Dict[str, WSGIApp]:
+    """
+    Create the WSGI applications of the health endpoints.
+
+    :param callable ready: Returns ``True`` once the exporter is ready.
+    :returns dict: The WSGI application per path.
+    """
+
+    def text(start_response: Callable[..., Any], status: str) -> List[bytes]:
+        body = status.split(" ", 1)[1].encode() + b"\n"
+        start_response(
+            status,
+            [
+                ("Content-Type", "text/plain; charset=utf-8"),
+                ("Content-Length", str(len(body))),
+            ],
+        )
+        return [body]
+
+    def healthy(_: Dict[str, Any], start_response: Callable[..., Any]) -> List[bytes]:
+        return text(start_response, "200 OK")
+
+    def readiness(_: Dict[str, Any], start_response: Callable[..., Any]) -> List[bytes]:
+        return text(start_response, "200 OK" if ready() else "503 Service Unavailable")
+
+    return {HEALTHY_PATH: healthy, READY_PATH: readiness}
+
+
+def make_exporter_app(
+    registry: Collector = REGISTRY,
+    routes: Optional[Dict[str, WSGIApp]] = None,
+    metrics_app: Optional[WSGIApp] = None,
+) -> WSGIApp:
+    """
+    Create the exporter WSGI application.
+
+    :param Collector registry: The prometheus registry of the ``/metrics``.
+    :param dict routes: The WSGI application per (exact) path, every
+        other path is served by the ``metrics_app``.
+    :param callable metrics_app: The ``/metrics`` WSGI application, the
+        prometheus client application of the ``registry`` by default.
+    :returns callable: The WSGI application.
+    """
+    metrics_app = metrics_app or make_wsgi_app(registry)
+    routes = dict(routes or {})
+
+    def app(
+        environ: Dict[str, Any], start_response: Callable[..., Any]
+    ) -> Iterable[bytes]:
+        route = routes.get(environ.get("PATH_INFO", "/"))
+        if route is not None:
+            return route(environ, start_response)
+        # The metrics applications serialize the exposition before returning.
+        started = INSTRUMENTS.timer()
+        body = metrics_app(environ, start_response)
+        INSTRUMENTS.observe(INSTRUMENTS.scrapes, INSTRUMENTS.since(started))
+        return body
+
+    return app
+
+
+def start_exporter_server(
+    port: int, addr: str = "0.0.0.0", app: Optional[WSGIApp] = None
+) -> Tuple[WSGIServer, threading.Thread]:
+    """
+    Start the exporter HTTP server (a thread per request) on a daemon thread.
+
+    :param int port: The listen port.
+    :param str addr: The bind (IPv4 or IPv6) address.
+    :param callable app: The WSGI application, the ``/metrics`` only by default.
+    :returns tuple: The HTTP server and its thread.
+    """
+
+    class ExporterServer(ThreadingWSGIServer):
+        """Threading WSGI server of the bind address family"""
+
+        address_family = socket.AF_INET6 if is_ipv6_addr(addr) else socket.AF_INET
+
+    httpd = make_server(
+        addr,
+        port,
+        app or make_exporter_app(),
+        ExporterServer,
+        handler_class=SilentWSGIRequestHandler,
+    )
+    thread = threading.Thread(
+        target=httpd.serve_forever, name="github-rate-limits-http", daemon=True
+    )
+    thread.start()
+    return httpd, thread
@@ -0,0 +1,79 @@
+"""
+github_rate_limits_exporter.sharding
+~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~
+
+Assignment of the Github accounts to the exporter replicas (shards).
+
+Every replica is configured with the same accounts and polls only the
+accounts of its own shard (``--shard-index`` of ``--shard-count``). The
+accounts are assigned with the jump consistent hash (Lamping & Veach)
+of their name, a stable (process independent) hash: growing from ``n``
+to ``n + 1`` shards moves only ``1 / (n + 1)`` of the accounts, all of
+them to the new shard.
+"""
+
+import hashlib
+from typing import Any
+
+_JUMP_MULTIPLIER = 2862933555777941757
+_UINT64_MASK = (1 << 64) - 1
+
+
+def jump_hash(key: int, buckets: int) -> int:
+    """
+    Jump consistent hash of a 64-bit key.
+
+    :param int key: The (unsigned 64-bit) key.
+    :param int buckets: The number of buckets.
+    :returns int: The bucket of the key, in ``[0, buckets)``.
+    """
+    bucket, jump = -1, 0
+    while jump < buckets:
+        bucket = jump
+        key = (key * _JUMP_MULTIPLIER + 1) & _UINT64_MASK
+        jump = int((bucket + 1) * ((1 << 31) / ((key >> 33) + 1)))
+    return bucket
+
+
+def shard_of(account: str, count: int) -> int:
+    """
+    :param str account: The Github account name.
+    :param int count: The number of shards.
+    :returns int: The shard index of the Github account.
+    """
+    digest = hashlib.blake2b(account.encode("utf-8"), digest_size=8).digest()
+    return jump_hash(int.from_bytes(digest, "big"), count)
+
+
+class Shard:
+    """
+    The shard (replica) of the exporter, the only one by default.
+
+    :param int index: The shard index, in ``[0, count)``.
+    :param int count: The number of shards.
+    """
+
+    __slots__ = ("index", "count")
+
+    def __init__(self, index: int = 0, count: int = 1) -> None:
+        self.index = index
+        self.count = count
+
+    def __repr__(self) -> str:
+        return f"Shard(index={self.index}, count={self.count})"
+
+    @classmethod
+    def from_args(cls, args: Any) -> "Shard":
+        """
+        :param argparse.Namespace args: The ``shard_index``
+            and ``shard_count`` command-line arguments.
+        :returns Shard: The configured shard.
+        """
+        return cls(getattr(args, "shard_index", 0), getattr(args, "shard_count", 1))
+
+    def owns(self, account: str) -> bool:
+        """
+        :param str account: The Github account name.
+        :returns bool: The Github account is polled by this shard.
+        """
+        return self.count == 1 or shard_of(account, self.count) == self.index
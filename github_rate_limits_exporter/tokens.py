@@ -0,0 +1,188 @@
+"""
+github_rate_limits_exporter.tokens
+~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~
+
+Proactive (background) refresh of the Github App installation tokens.
+
+The refresh and expiry deadlines of a token are computed once, when
+the token is minted, on the monotonic clock; the scrape path compares
+two floats instead of building timezone aware datetimes.
+
+The token manager renews every installation token ahead of its
+expiry on a dedicated (daemon) thread, the current token keeps
+being used until the new one arrives.
+"""
+
+import datetime
+import logging
+import math
+import threading
+import time
+from typing import TYPE_CHECKING, Any, Dict, Optional
+
+from github_rate_limits_exporter.constants import (
+    DEFAULT_TOKEN_REFRESH_AHEAD,
+    DEFAULT_TOKEN_RETRY_INTERVAL,
+)
+
+if TYPE_CHECKING:
+    from github_rate_limits_exporter.github import GithubToken
+
+logger = logging.getLogger(__name__)
+
+
+class TokenDeadlines:
+    """
+    Github token with its (monotonic clock) refresh and expiry deadlines.
+
+    :param GithubToken token: The Github (Access) Token.
+    :param float latency: Seconds it took to mint the token.
+    :param float refresh_ahead: Seconds before the expiration to refresh the token.
+    """
+
+    __slots__ = ("token", "latency", "minted_at", "refresh_at", "expires_at")
+
+    def __init__(
+        self,
+        token: "GithubToken",
+        latency: float = 0.0,
+        refresh_ahead: float = DEFAULT_TOKEN_REFRESH_AHEAD,
+    ) -> None:
+        now = time.monotonic()
+        lifetime = token.expires_at - datetime.datetime.now(datetime.timezone.utc)
+        lifetime_seconds = lifetime.total_seconds()
+        self.token = token
+        self.latency = latency
+        self.minted_at = now
+        self.refresh_at = now + lifetime_seconds - refresh_ahead
+        self.expires_at = now + lifetime_seconds
+
+    @property
+    def age(self) -> float:
+        """Seconds since the token was minted"""
+        return time.monotonic() - self.minted_at
+
+    def refresh_due(self) -> bool:
+        """
+        :returns bool: ``True`` if the token has to be refreshed.
+        """
+        return time.monotonic() >= self.refresh_at
+
+    def has_expired(self) -> bool:
+        """
+        :returns bool: ``True`` if the token has expired.
+        """
+        return time.monotonic() >= self.expires_at
+
+
+class GithubTokenManager(threading.Thread):
+    """
+    Refreshes the Github App installation tokens ahead of their expiry.
+
+    Every requester must provide the ``refreshable`` and ``deadlines``
+    attributes and the ``refresh_token`` method. Requesters that are
+    not refreshable (PAT) or without a token yet are ignored.
+
+    A failed refresh is retried and never stops the exporter: once the
+    current token has expired, the rate-limits requests of the account
+    fail (and are counted) until a new token is minted.
+
+    :param dict requesters: The Github API requesters per account.
+    :param float retry_interval: Seconds to wait to retry a failed refresh.
+    """
+
+    def __init__(
+        self,
+        requesters: Dict[str, Any],
+        retry_interval: float = DEFAULT_TOKEN_RETRY_INTERVAL,
+    ) -> None:
+        super().__init__(name="github-token-manager", daemon=True)
+        self._requesters: Dict[str, Any] = {}
+        self.update(requesters)
+        self._retry_interval = retry_interval
+        self._retry_at: Dict[str, float] = {}
+        self._stopped = threading.Event()
+
+    @property
+    def requesters(self) -> Dict[str, Any]:
+        """The refreshable requesters per account"""
+        return self._requesters
+
+    def update(self, requesters: Dict[str, Any]) -> None:
+        """
+        Replace the requesters, e.g. with the discovered App installations.
+
+        :param dict requesters: The Github API requesters per account.
+        """
+        refreshable = {
+            account: requester
+            for account, requester in requesters.items()
+            if requester.refreshable
+        }
+        if self.is_alive():
+            for requester in refreshable.values():
+                requester.managed = True
+        self._requesters = refreshable
+
+    def refresh(self) -> float:
+        """
+        Refresh the tokens whose refresh deadline has passed.
+
+        :returns float: Seconds until the next refresh deadline
+            (``inf`` without refreshable requesters).
+        """
+        wait = math.inf
+        for account, requester in self._requesters.items():
+            deadlines = requester.deadlines
+            if deadlines is None:
+                continue
+            now = time.monotonic()
+            deadline = max(deadlines.refresh_at, self._retry_at.get(account, 0.0))
+            if deadline <= now:
+                deadline = self._refresh(account, requester, now)
+            wait = min(wait, deadline - now)
+        return max(wait, 0.0)
+
+    def _refresh(self, account: str, requester: Any, now: float) -> float:
+        try:
+            requester.refresh_token()
+        except Exception as error:  # pylint: disable=broad-except
+            self._retry_at[account] = now + self._retry_interval
+            logger.log(
+                logging.ERROR if requester.deadlines.has_expired() else logging.WARNING,
+                "Failed to refresh the Github token of %s, retrying in %.0f"
+                " seconds: %r",
+                account,
+                self._retry_interval,
+                error,
+            )
+            return self._retry_at[account]
+        self._retry_at.pop(account, None)
+        logger.debug(
+            "Refreshed the Github token of %s in %.3f seconds",
+            account,
+            requester.deadlines.latency,
+        )
+        # Tokens shorter lived than the refresh ahead period must not spin.
+        return max(requester.deadlines.refresh_at, now + self._retry_interval)
+
+    def start(self) -> None:
+        for requester in self._requesters.values():
+            requester.managed = True
+        super().start()
+
+    def run(self) -> None:
+        logger.info("Refreshing %d Github App token(s)", len(self._requesters))
+        while not self._stopped.is_set():
+            # Tokens of new (or lazy) requesters are picked up on the next wake up.
+            self._stopped.wait(min(self.refresh(), self._retry_interval))
+
+    def stop(self, timeout: Optional[float] = None) -> None:
+        """
+        Stop the token manager and wait for the thread to terminate.
+
+        :param float timeout: Seconds to wait for the thread to terminate.
+        """
+        self._stopped.set()
+        if self.is_alive():
+            self.join(timeout)
@@ -8,16 +8,21 @@
 import base64
 import binascii
 import datetime
+import ipaddress
 import logging
 import os
 import queue
 import signal
 import socket
 import sys
+import threading
 from types import FrameType
-from typing import Any, Callable, Optional
+from typing import Any, Callable, Dict, Hashable, Iterable, List, Optional, Union
 
 from github_rate_limits_exporter.constants import DEFAULT_LOG_FMT, LOGGING_LEVELS
+from github_rate_limits_exporter.instrumentation import INSTRUMENTS
+
+IPNetwork = Union[ipaddress.IPv4Network, ipaddress.IPv6Network]
 
 
 def get_unix_timestamp() -> float:
@@ -125,6 +130,33 @@ def is_ipv6_addr(ip_addr: str) -> bool:
     return True
 
 
+def parse_networks(value: str) -> List[IPNetwork]:
+    """
+    Parse the comma separated networks (or addresses).
+
+    :param str value: The networks, e.g. ``127.0.0.0/8,::1``.
+    :raises ValueError: If any of the networks is invalid.
+    :returns list: The networks.
+    """
+    return [
+        ipaddress.ip_network(item.strip(), strict=False)
+        for item in value.split(",")
+        if item.strip()
+    ]
+
+
+def parse_github_datetime(value: str) -> datetime.datetime:
+    """
+    Parse a Github API (ISO 8601) UTC timestamp, e.g. ``2016-07-11T22:14:10Z``.
+
+    :param str value: The Github API timestamp.
+    :returns datetime.datetime: Timezone aware (UTC) datetime object.
+    """
+    return datetime.datetime.strptime(value, "%Y-%m-%dT%H:%M:%SZ").replace(
+        tzinfo=datetime.timezone.utc
+    )
+
+
 def extend_datetime_now(weeks: int = 1) -> datetime.datetime:
     """
     Extend the current date in UTC by X number of weeks.
@@ -149,11 +181,16 @@ def wrapper(*args: Any, **kwargs: Any) -> Any:
             try:
                 return func(*args, **kwargs)
             except Exception as error:  # pylint: disable=broad-except
-                self.equeue.put(error, block=False)
+                self.put_error(error)
             return None
 
         return wrapper
 
+    def put_error(self, error: BaseException) -> None:
+        """Put error (exception) into the queue"""
+        INSTRUMENTS.count_error(error)
+        self.equeue.put(error, block=False)
+
     def get(self, *args: Any, **kwargs: Any) -> Exception:
         """Remove error (exception) from the queue"""
         return self.equeue.get(*args, **kwargs)
@@ -165,3 +202,114 @@ def get_error(self, *args: Any, **kwargs: Any) -> None:
             raise exc
         except queue.Empty:
             pass
+
+
+class AccountErrors:
+    """
+    The failed (non-fatal) requests of the Github accounts: counted per
+    account, the latest error is kept until the account succeeds again.
+    """
+
+    def __init__(self) -> None:
+        self._lock = threading.Lock()
+        self._counts: Dict[str, int] = {}
+        self._failures: Dict[str, BaseException] = {}
+
+    @property
+    def counts(self) -> Dict[str, int]:
+        """Number of failed requests, per account"""
+        with self._lock:
+            return dict(self._counts)
+
+    @property
+    def failures(self) -> Dict[str, BaseException]:
+        """The error of the latest request, per failing account"""
+        with self._lock:
+            return dict(self._failures)
+
+    def failed(self, account: str, error: BaseException) -> None:
+        """
+        :param str account: The Github account.
+        :param Exception error: The error of the failed request.
+        """
+        INSTRUMENTS.count_error(error)
+        with self._lock:
+            self._counts[account] = self._counts.get(account, 0) + 1
+            self._failures[account] = error
+
+    def succeeded(self, accounts: Iterable[str]) -> None:
+        """
+        :param iterable accounts: The Github accounts requested successfully.
+        """
+        with self._lock:
+            for account in accounts:
+                self._failures.pop(account, None)
+
+    def retain(self, accounts: Iterable[str]) -> None:
+        """
+        :param iterable accounts: The Github accounts still requested.
+        """
+        accounts = set(accounts)
+        with self._lock:
+            for errors in (self._counts, self._failures):
+                for account in set(errors) - accounts:
+                    del errors[account]
+
+
+class SingleFlight:
+    """
+    Coalesces concurrent calls of the same key into a single in-flight call,
+    the callers waiting on the in-flight call share its result (or error).
+    """
+
+    class _Call:  # pylint: disable=too-few-public-methods
+        __slots__ = ("done", "result", "error")
+
+        def __init__(self) -> None:
+            self.done = threading.Event()
+            self.result: Any = None
+            self.error: Optional[BaseException] = None
+
+    def __init__(self) -> None:
+        self._lock = threading.Lock()
+        self._calls: Dict[Hashable, "SingleFlight._Call"] = {}
+        self._coalesced = 0
+
+    @property
+    def coalesced(self) -> int:
+        """Number of calls coalesced with an in-flight call"""
+        return self._coalesced
+
+    def do(self, key: Hashable, func: Callable[[], Any]) -> Any:
+        """
+        Call ``func`` unless a call of the same key is already in-flight,
+        in which case wait for the in-flight call and share its outcome.
+
+        :param hashable key: The key of the call.
+        :param callable func: The (expensive) callable.
+        :returns: The return value of the (in-flight) call.
+        :raises: The error raised by the (in-flight) call.
+        """
+        leader = False
+        with self._lock:
+            call = self._calls.get(key)
+            if call is not None:
+                self._coalesced += 1
+            else:
+                call = self._calls[key] = self._Call()
+                leader = True
+        if not leader:
+            call.done.wait()
+            if call.error is not None:
+                raise call.error
+            return call.result
+        try:
+            call.result = func()
+        except BaseException as error:
+            call.error = error
+            raise
+        finally:
+            with self._lock:
+                del self._calls[key]
+            call.done.set()
+        return call.result
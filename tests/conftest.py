@@ -6,15 +6,17 @@
 import json
 import os
 import queue
-from unittest.mock import Mock, PropertyMock
+from unittest.mock import PropertyMock
 
-import dotmap
+import freezegun
 import pytest
 from github.InstallationAuthorization import InstallationAuthorization
 
 from github_rate_limits_exporter import cli, github
 from github_rate_limits_exporter.collector import GithubRateLimitsCollector
 from github_rate_limits_exporter.github import GithubRateLimitsRequester
+from github_rate_limits_exporter.instrumentation import ExporterInstruments
+from github_rate_limits_exporter.models import RateLimitsSnapshot
 from github_rate_limits_exporter.utils import SharedExceptionQueue
 from tests.utils import (
     CURRENT_TIME,
@@ -23,6 +25,14 @@
     TOKEN_EXPIRES_AT,
 )
 
+# The ``gi`` (PyGObject) prefix of the freezegun ignore list also matches
+# ``github_rate_limits_exporter``, whose monotonic clock must be frozen too.
+freezegun.configure(
+    default_ignore_list=[
+        module for module in freezegun.config.DEFAULT_IGNORE_LIST if module != "gi"
+    ]
+)
+
 
 @pytest.fixture(scope="module")
 def file_path():
@@ -90,9 +100,9 @@ def rate_limits_resources(rate_limits_json):
 
 
 @pytest.fixture(scope="module")
-def rate_limits_json_dotmap(rate_limits_resources):
-    """Returns a dotmap.Dotmap object of the pre-defined rate-limits"""
-    return dotmap.DotMap(rate_limits_resources)
+def rate_limits_snapshot(rate_limits_resources):
+    """Returns a RateLimitsSnapshot object of the pre-defined rate-limits"""
+    return RateLimitsSnapshot.from_json(rate_limits_resources)
 
 
 @pytest.fixture
@@ -101,7 +111,7 @@ def github_rate_limits_requester_mock(mocker, rate_limits_resources):
     return mocker.patch.object(
         GithubRateLimitsRequester,
         "get_rate_limits",
-        return_value=dotmap.DotMap(rate_limits_resources),
+        return_value=RateLimitsSnapshot.from_json(rate_limits_resources),
         autospec=True,
     )
 
@@ -116,6 +126,15 @@ def mock_unix_timestamp(mocker):
     )
 
 
+@pytest.fixture
+def instruments(mocker):
+    """Returns fresh exporter instruments, observed by every hot path"""
+    fresh = ExporterInstruments()
+    for module in ("aio", "collector", "github", "server", "utils"):
+        mocker.patch(f"github_rate_limits_exporter.{module}.INSTRUMENTS", fresh)
+    return fresh
+
+
 @pytest.fixture
 def exception_queue():
     """Returns an Queue object"""
@@ -144,6 +163,67 @@ def collector(private_key_str, exception_queue):
     )
 
 
+@pytest.fixture
+def poller_collector(private_key_str, exception_queue):
+    """Returns a collector instance serving metrics from the background poller"""
+    return GithubRateLimitsCollector(
+        argparse.Namespace(
+            github_auth_type="app",
+            github_account="github_account",
+            github_app_id=11112222,
+            github_app_installation_id=12345678,
+            github_app_private_key_path=private_key_str,
+            github_base_url="https://api.github.com",
+            poll_interval=60,
+        ),
+        exception_queue,
+    )
+
+
+@pytest.fixture
+def single_family_collector(private_key_str, exception_queue):
+    """Returns a collector instance exporting the single metric family layout"""
+    return GithubRateLimitsCollector(
+        argparse.Namespace(
+            github_auth_type="app",
+            github_account="github_account",
+            github_app_id=11112222,
+            github_app_installation_id=12345678,
+            github_app_private_key_path=private_key_str,
+            github_base_url="https://api.github.com",
+            metrics_layout="single-family",
+        ),
+        exception_queue,
+    )
+
+
+@pytest.fixture
+def multi_account_collector(private_key_str, exception_queue):
+    """Returns a collector instance of a PAT and an APP github account"""
+    return GithubRateLimitsCollector(
+        argparse.Namespace(
+            github_accounts=[
+                argparse.Namespace(
+                    github_auth_type="pat",
+                    github_account="pat_account",
+                    github_token="some-value",
+                    github_base_url="https://api.github.com",
+                ),
+                argparse.Namespace(
+                    github_auth_type="app",
+                    github_account="app_account",
+                    github_app_id=11112222,
+                    github_app_installation_id=12345678,
+                    github_app_private_key_path=private_key_str,
+                    github_base_url="https://api.github.com",
+                ),
+            ],
+            max_workers=4,
+        ),
+        exception_queue,
+    )
+
+
 @pytest.fixture(scope="session")
 def argparser():
     """Returns an ArgumentParser instance"""
@@ -171,10 +251,10 @@ def access_token():
 
 @pytest.fixture
 def github_mock(mocker, rate_limits_json):
-    """Returns a Mock object of the Github.get_rate_limit attribute"""
+    """Returns a Mock object of the GithubHttpTransport.request attribute"""
     return mocker.patch(
-        "github_rate_limits_exporter.github.Github.get_rate_limit",
-        return_value=Mock(raw_data=rate_limits_json),
+        "github_rate_limits_exporter.github.GithubHttpTransport.request",
+        return_value=rate_limits_json,
         autospec=True,
     )
 
@@ -194,8 +274,9 @@ def github_app_access_token_mock(mocker, install_auth):
 
 
 @pytest.fixture
-def github_app_requester(private_key_str):
+def github_app_requester(private_key_str, freezer):
     """Returns an APP GithubRateLimitsRequester instance"""
+    freezer.move_to(CURRENT_TIME)
     return GithubRateLimitsRequester(
         argparse.Namespace(
             github_auth_type="app",
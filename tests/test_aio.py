@@ -0,0 +1,213 @@
+import asyncio
+import threading
+import time
+from argparse import Namespace
+from datetime import datetime, timedelta, timezone
+
+import aiohttp
+import pytest
+
+from github_rate_limits_exporter.aio import (
+    AsyncGithubRateLimitsEngine,
+    AsyncGithubRateLimitsRequester,
+)
+from github_rate_limits_exporter.collector import GithubRateLimitsCollector
+from github_rate_limits_exporter.exceptions import ApiRequestError
+from github_rate_limits_exporter.github import GithubAppJwt
+from tests.utils import GithubApiStub
+
+
+@pytest.fixture
+def github_api_stub(rate_limits_json):
+    """Returns a running local stub of the Github REST API"""
+    with GithubApiStub(rate_limits_json, expires_at="2099-01-01T00:00:00Z") as stub:
+        yield stub
+
+
+@pytest.fixture
+def engine():
+    """Returns an asyncio requester engine"""
+    engine = AsyncGithubRateLimitsEngine(max_connections=4, read_timeout=5)
+    yield engine
+    engine.close()
+
+
+def pat_namespace(base_url, account="pat_account"):
+    return Namespace(
+        github_auth_type="pat",
+        github_account=account,
+        github_token="some-value",
+        github_base_url=base_url,
+    )
+
+
+def app_namespace(base_url, private_key, account="app_account"):
+    return Namespace(
+        github_auth_type="app",
+        github_account=account,
+        github_app_id=123123,
+        github_app_installation_id=11112222,
+        github_app_private_key_path=private_key,
+        github_base_url=base_url,
+    )
+
+
+def test_async_pat_requester(github_api_stub, engine, rate_limits_snapshot):
+    requester = AsyncGithubRateLimitsRequester(pat_namespace(github_api_stub.base_url))
+    results = engine.fetch({"pat_account": requester})
+    assert results == {"pat_account": rate_limits_snapshot}
+    [(method, path, headers)] = github_api_stub.requests
+    assert (method, path) == ("GET", "/rate_limit")
+    assert headers["Authorization"] == "token some-value"
+
+
+def test_async_app_requester(github_api_stub, engine, private_key_str):
+    requester = AsyncGithubRateLimitsRequester(
+        app_namespace(github_api_stub.base_url, private_key_str)
+    )
+    assert requester.token is None
+    for __ in range(2):
+        engine.fetch({"app_account": requester})
+    assert requester.token.token == "installation-token"
+    requests = [(method, path) for method, path, __ in github_api_stub.requests]
+    assert requests == [
+        ("POST", "/app/installations/11112222/access_tokens"),
+        ("GET", "/rate_limit"),
+        ("GET", "/rate_limit"),
+    ]
+    assert github_api_stub.requests[0][2]["Authorization"].startswith("Bearer ")
+    assert github_api_stub.requests[1][2]["Authorization"] == "token installation-token"
+
+
+def test_async_app_requester_signs_jwt_off_the_event_loop(
+    mocker, github_api_stub, engine, private_key_str
+):
+    threads = []
+    sign = GithubAppJwt.sign
+
+    def _sign(signer):
+        threads.append(threading.current_thread().name)
+        return sign(signer)
+
+    mocker.patch.object(GithubAppJwt, "sign", autospec=True, side_effect=_sign)
+    requesters = {
+        f"app_account_{i}": AsyncGithubRateLimitsRequester(
+            app_namespace(github_api_stub.base_url, private_key_str)
+        )
+        for i in range(2)
+    }
+    engine.fetch(requesters)
+    assert len(threads) == 2
+    assert "github-rate-limits-aio" not in threads
+
+
+def test_async_requester_keep_alive(github_api_stub, engine):
+    requester = AsyncGithubRateLimitsRequester(pat_namespace(github_api_stub.base_url))
+    for __ in range(5):
+        engine.fetch({"pat_account": requester})
+    assert len(github_api_stub.requests) == 5
+    assert len(github_api_stub.connections) == 1
+
+
+def test_async_requester_error(github_api_stub, engine):
+    github_api_stub.status = 401
+    requester = AsyncGithubRateLimitsRequester(pat_namespace(github_api_stub.base_url))
+    results = engine.fetch({"pat_account": requester})
+    assert isinstance(results["pat_account"], ApiRequestError)
+
+
+def test_collector_asyncio_engine(
+    github_api_stub, exception_queue, private_key_str, rate_limits_json
+):
+    collector = GithubRateLimitsCollector(
+        Namespace(
+            github_accounts=[
+                pat_namespace(github_api_stub.base_url),
+                app_namespace(github_api_stub.base_url, private_key_str),
+            ],
+            requester_engine="asyncio",
+            max_workers=2,
+        ),
+        exception_queue,
+    )
+    try:
+        core = collector.collect()[0]
+    finally:
+        collector.stop()
+    assert [sample.value for sample in core.samples] == [
+        float(value)
+        for __ in range(2)
+        for value in (5000, 1, 4999, 1372700873)
+    ]
+    assert exception_queue.equeue.empty()
+
+
+def test_collector_asyncio_engine_error(github_api_stub, exception_queue):
+    github_api_stub.status = 500
+    collector = GithubRateLimitsCollector(
+        Namespace(
+            github_accounts=[pat_namespace(github_api_stub.base_url)],
+            requester_engine="asyncio",
+        ),
+        exception_queue,
+    )
+    try:
+        core = collector.collect()[0]
+    finally:
+        collector.stop()
+    assert [sample.value for sample in core.samples] == [0.0] * 4
+    assert isinstance(collector.errors.failures["pat_account"], ApiRequestError)
+    assert collector.errors.counts == {"pat_account": 1}
+    assert exception_queue.equeue.empty()
+
+
+def test_engine_close_twice():
+    engine = AsyncGithubRateLimitsEngine()
+    engine.close()
+    engine.close()
+    assert not engine._thread.is_alive()
+
+
+def test_async_requester_coalesces_concurrent_calls(github_api_stub, private_key_str):
+    requester = AsyncGithubRateLimitsRequester(
+        app_namespace(github_api_stub.base_url, private_key_str)
+    )
+
+    async def concurrent_calls():
+        async with aiohttp.ClientSession() as session:
+            return await asyncio.gather(
+                *(requester.get_rate_limits(session) for __ in range(5))
+            )
+
+    results = asyncio.run(concurrent_calls())
+    assert all(result is results[0] for result in results)
+    assert requester.coalesced == 4
+    requests = [(method, path) for method, path, __ in github_api_stub.requests]
+    assert requests == [
+        ("POST", "/app/installations/11112222/access_tokens"),
+        ("GET", "/rate_limit"),
+    ]
+
+
+def test_async_app_requester_refreshes_token_in_background(
+    github_api_stub, engine, private_key_str
+):
+    expires_at = datetime.now(timezone.utc) + timedelta(seconds=200)
+    github_api_stub.expires_at = expires_at.strftime("%Y-%m-%dT%H:%M:%SZ")
+    requester = AsyncGithubRateLimitsRequester(
+        app_namespace(github_api_stub.base_url, private_key_str)
+    )
+    engine.fetch({"app_account": requester})
+    deadlines = requester.deadlines
+    # due for a refresh (ahead of its expiry), the current token is used.
+    assert deadlines.refresh_due() and not deadlines.has_expired()
+    engine.fetch({"app_account": requester})
+    for __ in range(500):
+        if requester.deadlines is not deadlines:
+            break
+        time.sleep(0.01)
+    assert requester.deadlines is not deadlines
+    requests = [(method, path) for method, path, __ in github_api_stub.requests]
+    assert requests.count(("POST", "/app/installations/11112222/access_tokens")) == 2
+    assert requests.count(("GET", "/rate_limit")) == 2
+    assert requester.coalesced == 0
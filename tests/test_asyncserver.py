@@ -0,0 +1,192 @@
+import http.client
+import io
+import socket
+import threading
+
+import pytest
+from prometheus_client import CollectorRegistry, Gauge
+
+from github_rate_limits_exporter.asyncserver import (
+    AsyncExporterServer,
+    call_wsgi_app,
+    start_async_exporter_server,
+)
+from github_rate_limits_exporter.server import (
+    json_response,
+    make_exporter_app,
+    make_health_routes,
+)
+
+
+def echo_app(environ, start_response):
+    body = environ["wsgi.input"].read(int(environ["CONTENT_LENGTH"] or 0))
+    return json_response(
+        start_response,
+        "200 OK",
+        {
+            "method": environ["REQUEST_METHOD"],
+            "path": environ["PATH_INFO"],
+            "query": environ["QUERY_STRING"],
+            "body": body.decode(),
+            "thread": threading.current_thread().name,
+            "agent": environ.get("HTTP_USER_AGENT"),
+            "remote": environ.get("REMOTE_ADDR"),
+        },
+    )
+
+
+def failing_app(environ, start_response):
+    raise RuntimeError("failed")
+
+
+@pytest.fixture
+def async_server(request):
+    app = getattr(request, "param", echo_app)
+    registry = CollectorRegistry()
+    Gauge("exporter_test", "Test gauge", registry=registry).set(1)
+    routes = {"/echo": app, **make_health_routes(lambda: True)}
+    server, thread = start_async_exporter_server(
+        0,
+        "127.0.0.1",
+        make_exporter_app(registry, routes),
+        idle_timeout=0.5,
+    )
+    yield server
+    server.shutdown()
+    server.server_close()
+    assert not thread.is_alive()
+
+
+def raw_request(port, payload):
+    with socket.create_connection(("127.0.0.1", port), timeout=5) as sock:
+        sock.sendall(payload)
+        chunks = []
+        while True:
+            chunk = sock.recv(65536)
+            if not chunk:
+                return b"".join(chunks)
+            chunks.append(chunk)
+
+
+def test_call_wsgi_app():
+    environ = {
+        "REQUEST_METHOD": "GET",
+        "PATH_INFO": "/",
+        "QUERY_STRING": "",
+        "CONTENT_LENGTH": "",
+        "wsgi.input": io.BytesIO(),
+    }
+    status, headers, body = call_wsgi_app(echo_app, environ)
+    assert status == "200 OK"
+    assert ("Content-Type", "application/json") in headers
+    assert b'"method":"GET"' in body
+
+
+def test_async_server_keep_alive(async_server):
+    connection = http.client.HTTPConnection("127.0.0.1", async_server.server_port, timeout=5)
+    try:
+        connection.request("GET", "/metrics")
+        response = connection.getresponse()
+        assert response.status == 200
+        assert b"exporter_test 1.0" in response.read()
+        assert response.getheader("Connection") == "keep-alive"
+        sock = connection.sock
+        connection.request("POST", "/echo?a=b", body=b"batch", headers={"User-Agent": "ci"})
+        response = connection.getresponse()
+        echoed = response.read()
+        # The same (persistent) connection.
+        assert connection.sock is sock
+        assert b'"body":"batch"' in echoed
+        assert b'"query":"a=b"' in echoed
+        assert b'"agent":"ci"' in echoed
+        assert b'"remote":"127.0.0.1"' in echoed
+        # The application is called on the event loop thread.
+        assert b'"thread":"github-rate-limits-http"' in echoed
+    finally:
+        connection.close()
+
+
+def test_async_server_head(async_server):
+    response = raw_request(
+        async_server.server_port,
+        b"HEAD /-/healthy HTTP/1.1\r\nHost: localhost\r\n\r\n"
+        b"GET /-/healthy HTTP/1.1\r\nHost: localhost\r\nConnection: close\r\n\r\n",
+    )
+    head, separator, get = response.partition(b"\r\n\r\n")
+    # No body, the next (pipelined) response follows the headers.
+    assert separator
+    assert get.startswith(b"HTTP/1.1 200 OK\r\n")
+    get_headers, _, body = get.partition(b"\r\n\r\n")
+    assert body == b"OK\n"
+    length = f"Content-Length: {len(body)}".encode()
+    assert length in head.split(b"\r\n")
+    assert length in get_headers.split(b"\r\n")
+
+
+def test_async_server_connection_close(async_server):
+    response = raw_request(
+        async_server.server_port, b"GET /metrics HTTP/1.0\r\nHost: localhost\r\n\r\n"
+    )
+    assert response.startswith(b"HTTP/1.1 200 OK\r\n")
+    assert b"Connection: close\r\n" in response
+    assert response.endswith(b"exporter_test 1.0\n")
+
+
+@pytest.mark.parametrize(
+    "payload, status",
+    [
+        (b"GARBAGE\r\n\r\n", b"400 Bad Request"),
+        (b"GET / HTTP/1.1\r\nno-colon\r\n\r\n", b"400 Bad Request"),
+        (b"GET / HTTP/1.1\r\nContent-Length: many\r\n\r\n", b"400 Bad Request"),
+        (b"POST /echo HTTP/1.1\r\nTransfer-Encoding: chunked\r\n\r\n", b"411 Length Required"),
+        (b"POST /echo HTTP/1.1\r\nContent-Length: 99999999\r\n\r\n", b"413 Payload Too Large"),
+        (b"GET / HTTP/1.1\r\nX: " + b"x" * 70000 + b"\r\n\r\n", b"431 Request Header Fields Too Large"),
+    ],
+)
+def test_async_server_bad_requests(async_server, payload, status):
+    response = raw_request(async_server.server_port, payload)
+    assert response.startswith(b"HTTP/1.1 " + status + b"\r\n")
+
+
+@pytest.mark.parametrize("async_server", [failing_app], indirect=True)
+def test_async_server_application_error(async_server):
+    response = raw_request(async_server.server_port, b"GET /echo HTTP/1.1\r\n\r\n")
+    assert response.startswith(b"HTTP/1.1 500 Internal Server Error\r\n")
+
+
+def test_async_server_idle_and_slow_clients(async_server):
+    with socket.create_connection(("127.0.0.1", async_server.server_port), timeout=5) as sock:
+        # A partial request, the connection is closed once idle.
+        sock.sendall(b"GET /metrics HTTP/1.1\r\n")
+        assert sock.recv(1024) == b""
+
+
+def test_async_server_many_connections_without_threads(async_server):
+    threads = set(threading.enumerate())
+    sockets = [
+        socket.create_connection(("127.0.0.1", async_server.server_port), timeout=5)
+        for _ in range(200)
+    ]
+    try:
+        for sock in sockets:
+            sock.sendall(b"GET /metrics HTTP/1.1\r\n\r\n")
+        for sock in sockets:
+            assert sock.recv(65536).startswith(b"HTTP/1.1 200 OK")
+        # Threads of the other tests may exit meanwhile, none is started.
+        assert set(threading.enumerate()) <= threads
+    finally:
+        for sock in sockets:
+            sock.close()
+
+
+def test_async_server_blocking_application():
+    server = AsyncExporterServer(echo_app, "127.0.0.1", 0, blocking=True)
+    server.start()
+    try:
+        response = raw_request(
+            server.server_port, b"GET /echo HTTP/1.1\r\nConnection: close\r\n\r\n"
+        )
+        assert b'"thread":"github-http' in response
+    finally:
+        server.shutdown()
+        server.server_close()
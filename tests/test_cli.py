@@ -1,4 +1,5 @@
 import argparse
+import json
 from contextlib import nullcontext as does_not_raise
 
 import pytest
@@ -158,3 +159,585 @@ def test_github_base_url_cli_argument():
 def test_github_base_url_env_variable(github_env_vars):
     args = cli.parsecli(["--github-auth-type", "pat", "--github-account", "test"])
     assert args.github_base_url == github_env_vars["GITHUB_BASE_URL"]
+
+
+@pytest.mark.parametrize(
+    "interval, expectation",
+    [
+        ("-1", pytest.raises(argparse.ArgumentTypeError)),
+        ("interval", pytest.raises(argparse.ArgumentTypeError)),
+        ([], pytest.raises(argparse.ArgumentTypeError)),
+        ("0", does_not_raise()),
+        ("2.5", does_not_raise()),
+    ],
+)
+def test_poll_interval_argument(interval, expectation):
+    with expectation:
+        cli.poll_interval(interval)
+
+
+def test_derived_metrics_argument():
+    argv = ["--github-auth-type", "pat", "--github-token", "tok", "--github-account", "a"]
+    assert cli.parsecli(argv).derived_metrics
+    assert not cli.parsecli(argv + ["--no-derived-metrics"]).derived_metrics
+
+
+@pytest.mark.parametrize(
+    "github_env_vars",
+    [
+        {
+            "GITHUB_AUTH_TYPE": "pat",
+            "GITHUB_TOKEN": "token",
+            "GITHUB_ACCOUNT": "test",
+            "EXPORTER_DERIVED_METRICS": "false",
+        }
+    ],
+    indirect=True,
+)
+def test_derived_metrics_env_variable(github_env_vars):
+    assert not cli.parsecli([]).derived_metrics
+
+
+def test_debug_pprof_arguments():
+    argv = ["--github-auth-type", "pat", "--github-token", "tok", "--github-account", "a"]
+    args = cli.parsecli(argv)
+    assert not args.debug_pprof
+    assert [str(network) for network in args.debug_pprof_allow] == [
+        "127.0.0.0/8",
+        "::1/128",
+    ]
+    args = cli.parsecli(argv + ["--debug-pprof", "--debug-pprof-allow", "10.0.0.1"])
+    assert args.debug_pprof
+    assert [str(network) for network in args.debug_pprof_allow] == ["10.0.0.1/32"]
+    with pytest.raises(argparse.ArgumentTypeError):
+        cli.networks("10.0.0.0/33")
+
+
+def test_self_metrics_argument(monkeypatch):
+    argv = ["--github-auth-type", "pat", "--github-token", "tok", "--github-account", "a"]
+    assert cli.parsecli(argv).self_metrics
+    assert not cli.parsecli(argv + ["--no-self-metrics"]).self_metrics
+    monkeypatch.setenv("EXPORTER_SELF_METRICS", "false")
+    assert not cli.parsecli(argv).self_metrics
+
+
+@pytest.mark.parametrize(
+    "size, expectation",
+    [
+        ("-1", pytest.raises(argparse.ArgumentTypeError)),
+        ("2.5", pytest.raises(argparse.ArgumentTypeError)),
+        (None, pytest.raises(argparse.ArgumentTypeError)),
+        ("0", does_not_raise()),
+        ("720", does_not_raise()),
+    ],
+)
+def test_history_size_argument(size, expectation):
+    with expectation:
+        cli.history_size(size)
+
+
+@pytest.mark.parametrize(
+    "github_env_vars",
+    [
+        {
+            "GITHUB_AUTH_TYPE": "pat",
+            "GITHUB_TOKEN": "token",
+            "GITHUB_ACCOUNT": "test",
+            "EXPORTER_HISTORY_SIZE": "720",
+        }
+    ],
+    indirect=True,
+)
+def test_history_size_env_variable(github_env_vars):
+    assert cli.parsecli([]).history_size == 720
+
+
+def test_poll_interval_default():
+    args = cli.parsecli(
+        ["--github-auth-type", "pat", "--github-token", "tok", "--github-account", "a"]
+    )
+    assert args.poll_interval == 0
+
+
+@pytest.mark.parametrize(
+    "github_env_vars",
+    [
+        {
+            "GITHUB_AUTH_TYPE": "pat",
+            "GITHUB_TOKEN": "token",
+            "GITHUB_ACCOUNT": "test",
+            "EXPORTER_POLL_INTERVAL": "30",
+        }
+    ],
+    indirect=True,
+)
+def test_poll_interval_env_variable(github_env_vars):
+    args = cli.parsecli([])
+    assert args.poll_interval == 30.0
+
+
+@pytest.mark.parametrize(
+    "seconds, expectation",
+    [
+        ("0", pytest.raises(argparse.ArgumentTypeError)),
+        ("bound", pytest.raises(argparse.ArgumentTypeError)),
+        ("0.5", does_not_raise()),
+    ],
+)
+def test_poll_bound_argument(seconds, expectation):
+    with expectation:
+        cli.poll_bound(seconds)
+
+
+def test_poll_scheduler_adaptive():
+    args = cli.parsecli(
+        [
+            "--github-auth-type", "pat",
+            "--github-token", "tok",
+            "--github-account", "a",
+            "--poll-interval", "60",
+            "--poll-scheduler", "adaptive",
+            "--poll-min-interval", "2",
+        ]
+    )
+    assert args.poll_scheduler == "adaptive"
+    assert (args.poll_min_interval, args.poll_max_interval) == (2.0, 300)
+
+
+@pytest.mark.parametrize(
+    "argv, match",
+    [
+        (["--poll-scheduler", "adaptive"], "requires: --poll-interval"),
+        (
+            [
+                "--poll-scheduler", "adaptive",
+                "--poll-interval", "60",
+                "--poll-min-interval", "120",
+                "--poll-max-interval", "60",
+            ],
+            "is greater than its ceiling",
+        ),
+    ],
+)
+def test_poll_scheduler_adaptive_errors(argv, match):
+    account = ["--github-auth-type", "pat", "--github-token", "tok", "--github-account", "a"]
+    with pytest.raises(exceptions.ArgumentError, match=match):
+        cli.parsecli(account + argv)
+
+
+def test_github_accounts_file_poll_bounds(tmp_path):
+    path = tmp_path / "accounts.json"
+    path.write_text(
+        json.dumps(
+            [
+                {"account": "a", "auth_type": "pat", "token": "tok"},
+                {
+                    "account": "b",
+                    "auth_type": "pat",
+                    "token": "tok",
+                    "poll_min_interval": 1,
+                    "poll_max_interval": 30,
+                },
+            ]
+        )
+    )
+    args = cli.parsecli(
+        [
+            "--github-accounts-file", str(path),
+            "--poll-interval", "60",
+            "--poll-scheduler", "adaptive",
+        ]
+    )
+    assert [
+        (account.poll_min_interval, account.poll_max_interval)
+        for account in args.github_accounts
+    ] == [(None, None), (1.0, 30.0)]
+
+
+def test_github_accounts_file_invalid_poll_bound(tmp_path):
+    path = tmp_path / "accounts.json"
+    path.write_text(
+        '[{"account": "a", "auth_type": "pat", "token": "tok", "poll_min_interval": 0}]'
+    )
+    with pytest.raises(exceptions.ArgumentError, match="invalid poll_min_interval"):
+        cli.parsecli(["--github-accounts-file", str(path)])
+
+
+@pytest.mark.parametrize(
+    "workers, expectation",
+    [
+        ("0", pytest.raises(argparse.ArgumentTypeError)),
+        ("workers", pytest.raises(argparse.ArgumentTypeError)),
+        (None, pytest.raises(argparse.ArgumentTypeError)),
+        ("16", does_not_raise()),
+    ],
+)
+def test_max_workers_argument(workers, expectation):
+    with expectation:
+        cli.max_workers(workers)
+
+
+@pytest.mark.parametrize(
+    "argv",
+    [
+        ["--github-auth-type", "pat", "--github-token", "tok"],
+        ["--github-account", "a", "--github-token", "tok"],
+    ],
+)
+def test_required_arguments(argv):
+    with pytest.raises(exceptions.ArgumentError, match="arguments are required"):
+        cli.parsecli(argv)
+
+
+@pytest.fixture
+def github_accounts_file(tmp_path, private_key_path):
+    """Returns the path of a github accounts file with a PAT and an APP account"""
+    path = tmp_path / "accounts.json"
+    path.write_text(
+        json.dumps(
+            [
+                {"account": "pat_account", "auth_type": "pat", "token": "tok"},
+                {
+                    "account": "app_account",
+                    "auth_type": "app",
+                    "app_id": 123,
+                    "app_installation_id": 456,
+                    "app_private_key_path": private_key_path,
+                    "base_url": "https://ghe.example.com/api/v3",
+                },
+            ]
+        )
+    )
+    return str(path)
+
+
+def test_github_accounts_file(github_accounts_file):
+    args = cli.parsecli(["--github-accounts-file", github_accounts_file])
+    assert [account.github_account for account in args.github_accounts] == [
+        "pat_account",
+        "app_account",
+    ]
+    pat, app = args.github_accounts
+    assert pat.github_token == "tok"
+    assert pat.github_base_url == "https://api.github.com"
+    assert app.github_app_id == 123
+    assert app.github_app_installation_id == 456
+    assert app.github_base_url == "https://ghe.example.com/api/v3"
+    app.github_app_private_key_path.close()
+
+
+def test_github_accounts_file_with_account_argument(github_accounts_file):
+    args = cli.parsecli(
+        [
+            "--github-auth-type", "pat",
+            "--github-token", "tok",
+            "--github-account", "cli_account",
+            "--github-accounts-file", github_accounts_file,
+        ]
+    )
+    assert [account.github_account for account in args.github_accounts] == [
+        "cli_account",
+        "pat_account",
+        "app_account",
+    ]
+    args.github_accounts[-1].github_app_private_key_path.close()
+
+
+@pytest.mark.parametrize(
+    "content, match",
+    [
+        ("not json", "invalid github accounts file"),
+        ("[]", "must be a non-empty list"),
+        ('["account"]', "must be a JSON object"),
+        ('[{"account": "a", "auth_type": "pat"}]', "requires: --github-token"),
+        ('[{"auth_type": "pat", "token": "tok"}]', "arguments are required"),
+        (
+            '[{"account": "a", "auth_type": "pat", "token": "tok"},'
+            ' {"account": "a", "auth_type": "pat", "token": "tok"}]',
+            "must be unique",
+        ),
+        (
+            '[{"account": "a", "auth_type": "app", "app_id": 1,'
+            ' "app_installation_id": 2, "app_private_key_path": "/non/existent"}]',
+            "can't open",
+        ),
+    ],
+)
+def test_github_accounts_file_errors(tmp_path, content, match):
+    path = tmp_path / "accounts.json"
+    path.write_text(content)
+    with pytest.raises(exceptions.ArgumentError, match=match):
+        cli.parsecli(["--github-accounts-file", str(path)])
+
+
+@pytest.mark.parametrize(
+    "argv, expected",
+    [
+        ([], "threaded"),
+        (["--requester-engine", "threaded"], "threaded"),
+        (["--requester-engine", "asyncio"], "asyncio"),
+    ],
+)
+def test_requester_engine_argument(argv, expected):
+    args = cli.parsecli(
+        ["--github-auth-type", "pat", "--github-token", "tok", "--github-account", "a"]
+        + argv
+    )
+    assert args.requester_engine == expected
+
+
+def test_requester_engine_deprecated_alias(monkeypatch):
+    argv = ["--github-auth-type", "pat", "--github-token", "tok", "--github-account", "a"]
+    with pytest.warns(FutureWarning, match="pygithub is deprecated, use threaded"):
+        args = cli.parsecli(argv + ["--requester-engine", "pygithub"])
+    assert args.requester_engine == "threaded"
+    monkeypatch.setenv("EXPORTER_REQUESTER_ENGINE", "pygithub")
+    with pytest.warns(FutureWarning):
+        assert cli.parsecli(argv).requester_engine == "threaded"
+
+
+def test_requester_engine_invalid_argument():
+    with pytest.raises(exceptions.ArgumentError, match="invalid choice"):
+        cli.parsecli(
+            [
+                "--github-auth-type", "pat",
+                "--github-token", "tok",
+                "--github-account", "a",
+                "--requester-engine", "curl",
+            ]
+        )
+
+
+@pytest.mark.parametrize(
+    "argv, expected",
+    [
+        ([], "per-resource"),
+        (["--metrics-layout", "single-family"], "single-family"),
+    ],
+)
+def test_metrics_layout_argument(argv, expected):
+    args = cli.parsecli(
+        ["--github-auth-type", "pat", "--github-token", "tok", "--github-account", "a"]
+        + argv
+    )
+    assert args.metrics_layout == expected
+
+
+@pytest.mark.parametrize(
+    "validator, value, expectation",
+    [
+        (cli.pool_size, "0", pytest.raises(argparse.ArgumentTypeError)),
+        (cli.pool_size, "size", pytest.raises(argparse.ArgumentTypeError)),
+        (cli.pool_size, "20", does_not_raise()),
+        (cli.timeout, "0", pytest.raises(argparse.ArgumentTypeError)),
+        (cli.timeout, "timeout", pytest.raises(argparse.ArgumentTypeError)),
+        (cli.timeout, "2.5", does_not_raise()),
+        (cli.retries, "-1", pytest.raises(argparse.ArgumentTypeError)),
+        (cli.retries, None, pytest.raises(argparse.ArgumentTypeError)),
+        (cli.retries, "0", does_not_raise()),
+    ],
+)
+def test_http_transport_arguments(validator, value, expectation):
+    with expectation:
+        validator(value)
+
+
+def test_http_transport_defaults():
+    args = cli.parsecli(
+        ["--github-auth-type", "pat", "--github-token", "tok", "--github-account", "a"]
+    )
+    assert (
+        args.http_pool_size,
+        args.http_connect_timeout,
+        args.http_read_timeout,
+        args.http_retries,
+    ) == (10, 5, 15, 3)
+
+
+@pytest.mark.parametrize(
+    "github_env_vars",
+    [
+        {
+            "GITHUB_AUTH_TYPE": "pat",
+            "GITHUB_TOKEN": "token",
+            "GITHUB_ACCOUNT": "test",
+            "EXPORTER_HTTP_POOL_SIZE": "4",
+            "EXPORTER_HTTP_CONNECT_TIMEOUT": "1.5",
+            "EXPORTER_HTTP_READ_TIMEOUT": "30",
+            "EXPORTER_HTTP_RETRIES": "0",
+        }
+    ],
+    indirect=True,
+)
+def test_http_transport_env_variables(github_env_vars):
+    args = cli.parsecli([])
+    assert (
+        args.http_pool_size,
+        args.http_connect_timeout,
+        args.http_read_timeout,
+        args.http_retries,
+    ) == (4, 1.5, 30.0, 0)
+
+
+def test_github_app_discover_installations(private_key_path):
+    args = cli.parsecli(
+        [
+            "--github-auth-type", "app",
+            "--github-account", "app",
+            "--github-app-id", "123",
+            "--github-app-private-key-path", private_key_path,
+            "--github-app-discover-installations",
+        ]
+    )
+    assert args.github_app_discover_installations
+    assert args.github_app_installation_id is None
+    args.github_app_private_key_path.close()
+
+
+def test_github_app_without_installation_id(private_key_path):
+    argv = [
+        "--github-auth-type", "app",
+        "--github-account", "app",
+        "--github-app-id", "123",
+        "--github-app-private-key-path", private_key_path,
+    ]
+    with pytest.raises(exceptions.ArgumentError, match="discover-installations"):
+        cli.parsecli(argv)
+
+
+def test_github_accounts_file_discover_installations(tmp_path, private_key_path):
+    path = tmp_path / "accounts.json"
+    path.write_text(
+        json.dumps(
+            [
+                {
+                    "account": "app",
+                    "auth_type": "app",
+                    "app_id": 123,
+                    "app_discover_installations": True,
+                    "app_private_key_path": private_key_path,
+                }
+            ]
+        )
+    )
+    [app] = cli.parsecli(["--github-accounts-file", str(path)]).github_accounts
+    assert app.github_app_discover_installations
+    app.github_app_private_key_path.close()
+
+
+def test_ingest_logs_passive(tmp_path):
+    args = cli.parsecli(["--ingest-logs", str(tmp_path), "--github-account", "logs"])
+    assert args.ingest_logs == str(tmp_path)
+    assert args.github_accounts == []
+    assert args.github_account == "logs"
+
+
+def test_ingest_logs_with_polling(tmp_path):
+    args = cli.parsecli(
+        [
+            "--ingest-logs", str(tmp_path),
+            "--github-auth-type", "pat",
+            "--github-token", "tok",
+            "--github-account", "a",
+        ]
+    )
+    assert [account.github_account for account in args.github_accounts] == ["a"]
+
+
+def test_ingest_logs_missing_path(tmp_path):
+    with pytest.raises(exceptions.ArgumentError):
+        cli.parsecli(["--ingest-logs", str(tmp_path / "missing.log")])
+
+
+def test_push_observations_passive():
+    args = cli.parsecli(["--push-observations", "--max-observations", "100"])
+    assert args.push_observations
+    assert args.max_observations == 100
+    assert args.github_accounts == []
+
+
+@pytest.mark.parametrize(
+    "entries, expectation",
+    [
+        ("0", pytest.raises(argparse.ArgumentTypeError)),
+        ("many", pytest.raises(argparse.ArgumentTypeError)),
+        ("1", does_not_raise()),
+    ],
+)
+def test_max_observations_argument(entries, expectation):
+    with expectation:
+        cli.max_observations(entries)
+
+
+def test_exposition_cache_requires_poll_interval():
+    argv = ["--github-auth-type", "pat", "--github-token", "tok", "--github-account", "a"]
+    with pytest.raises(exceptions.ArgumentError, match="--poll-interval"):
+        cli.parsecli(argv + ["--exposition-cache"])
+    args = cli.parsecli(argv + ["--exposition-cache", "--poll-interval", "30"])
+    assert args.exposition_cache
+
+
+def test_http_server_argument(monkeypatch):
+    argv = ["--github-auth-type", "pat", "--github-token", "tok", "--github-account", "a"]
+    assert cli.parsecli(argv).http_server == "threaded"
+    assert cli.parsecli(argv + ["--http-server", "asyncio"]).http_server == "asyncio"
+    with pytest.raises(exceptions.ArgumentError, match="invalid choice"):
+        cli.parsecli(argv + ["--http-server", "twisted"])
+    monkeypatch.setenv("EXPORTER_HTTP_SERVER", "asyncio")
+    assert cli.parsecli(argv).http_server == "asyncio"
+
+
+@pytest.mark.parametrize(
+    "value, validator, expectation",
+    [
+        ("-1", cli.shard_index, pytest.raises(argparse.ArgumentTypeError)),
+        ("first", cli.shard_index, pytest.raises(argparse.ArgumentTypeError)),
+        ("0", cli.shard_index, does_not_raise()),
+        ("0", cli.shard_count, pytest.raises(argparse.ArgumentTypeError)),
+        ("all", cli.shard_count, pytest.raises(argparse.ArgumentTypeError)),
+        ("3", cli.shard_count, does_not_raise()),
+    ],
+)
+def test_shard_arguments(value, validator, expectation):
+    with expectation:
+        validator(value)
+
+
+def test_shard_index_lower_than_count(monkeypatch):
+    argv = ["--github-auth-type", "pat", "--github-token", "tok", "--github-account", "a"]
+    args = cli.parsecli(argv)
+    assert (args.shard_index, args.shard_count) == (0, 1)
+    with pytest.raises(exceptions.ArgumentError, match="lower than the shard count"):
+        cli.parsecli(argv + ["--shard-index", "2", "--shard-count", "2"])
+    monkeypatch.setenv("EXPORTER_SHARD_INDEX", "1")
+    monkeypatch.setenv("EXPORTER_SHARD_COUNT", "2")
+    args = cli.parsecli(argv)
+    assert (args.shard_index, args.shard_count) == (1, 2)
+
+
+def test_remote_write_url_argument():
+    argv = ["--github-auth-type", "pat", "--github-token", "tok", "--github-account", "a"]
+    url = "http://prometheus:9090/api/v1/write"
+    with pytest.raises(exceptions.ArgumentError, match="--poll-interval"):
+        cli.parsecli(argv + ["--remote-write-url", url])
+    with pytest.raises(exceptions.ArgumentError, match="invalid HTTP"):
+        cli.parsecli(argv + ["--remote-write-url", "prometheus:9090"])
+    args = cli.parsecli(argv + ["--remote-write-url", url, "--poll-interval", "60"])
+    assert args.remote_write_url == url
+
+
+def test_once_arguments():
+    argv = ["--github-auth-type", "pat", "--github-token", "tok", "--github-account", "a"]
+    args = cli.parsecli(
+        argv + ["--once", "--output-format", "json", "--min-remaining", "core=10%"]
+    )
+    assert args.once
+    assert args.output_format == "json"
+    assert [str(threshold) for threshold in args.min_remaining] == ["core=10%"]
+    assert cli.parsecli(argv).min_remaining == []
+    with pytest.raises(exceptions.ArgumentError, match="without: --poll-interval"):
+        cli.parsecli(argv + ["--once", "--poll-interval", "60"])
+    with pytest.raises(exceptions.ArgumentError, match="Invalid remaining threshold"):
+        cli.parsecli(argv + ["--once", "--min-remaining", "core"])
+    with pytest.raises(exceptions.ArgumentError, match="requires: --github-auth-type"):
+        cli.parsecli(["--once", "--push-observations"])
@@ -1,10 +1,22 @@
+import argparse
+import json
+import threading
 from contextlib import nullcontext as does_not_raise
 
-import dotmap
 import pytest
+import requests
 from prometheus_client.core import GaugeMetricFamily
 
-from tests.utils import CURRENT_TIMESTAMP
+from github_rate_limits_exporter.collector import (
+    GithubDerivedCollector,
+    GithubRateLimitsCollector,
+    GithubRequestsCollector,
+    GithubSelfCollector,
+    GithubShardCollector,
+)
+from github_rate_limits_exporter.github import GithubRateLimitsRequester
+from github_rate_limits_exporter.models import RateLimit, RateLimitsSnapshot
+from tests.utils import CURRENT_TIME, CURRENT_TIMESTAMP, GithubApiStub
 
 
 def test_add_metrics(
@@ -13,7 +25,7 @@ def test_add_metrics(
     rate_limits_resources,
     mock_unix_timestamp,
 ):
-    mock_resources = dotmap.DotMap(rate_limits_resources)
+    mock_resources = RateLimitsSnapshot.from_json(rate_limits_resources)
     expected_metric = GaugeMetricFamily(
         "github_rate_limits_search",
         "API requests in search per hour",
@@ -29,8 +41,10 @@ def test_add_metrics(
     expected_metric.add_metric(
         ["github_account", "reset"], float(1372697452), CURRENT_TIMESTAMP
     )
-    actual_metric = collector._add_metric(api_name="search", resources=mock_resources)
-    assert mock_unix_timestamp.call_count == 4
+    actual_metric = collector._add_metric(
+        api_name="search", resources={"github_account": mock_resources}
+    )
+    assert mock_unix_timestamp.call_count == 1
     assert github_app_access_token_mock.call_count == 1
     assert actual_metric == expected_metric
 
@@ -120,7 +134,7 @@ def test_collect_metrics(
     assert collector.collect() == expected_metrics
     assert github_app_access_token_mock.call_count == 1
     assert github_rate_limits_requester_mock.call_count == 1
-    assert mock_unix_timestamp.call_count == 20
+    assert mock_unix_timestamp.call_count == 1
 
 
 @pytest.mark.parametrize(
@@ -129,7 +143,11 @@ def test_collect_metrics(
         (dict(api_name="core"), pytest.raises(ValueError)),
         (None, does_not_raise()),
         (list(), pytest.raises(ValueError)),
-        (dotmap.DotMap(), does_not_raise()),
+        (RateLimitsSnapshot(), pytest.raises(ValueError)),
+        ({"github_account": {"core": {}}}, pytest.raises(ValueError)),
+        ({"github_account": None}, does_not_raise()),
+        ({"github_account": RateLimitsSnapshot()}, does_not_raise()),
+        ({"github_account": list()}, pytest.raises(ValueError)),
     ],
 )
 def test_collector_resource_type(
@@ -141,3 +159,628 @@ def test_collector_resource_type(
     with expectation:
         collector._add_metric(api_name="test", resources=resources)
     assert github_app_access_token_mock.call_count == 1
+
+
+def test_collect_metrics_from_poller_snapshot(
+    github_app_access_token_mock,
+    github_rate_limits_requester_mock,
+    poller_collector,
+    mock_unix_timestamp,
+):
+    assert poller_collector.poller is not None
+    assert poller_collector.collect()[0].samples[0].value == 0.0
+    assert github_rate_limits_requester_mock.call_count == 0
+
+    poller_collector.poller.poll()
+    assert github_rate_limits_requester_mock.call_count == 1
+    for __ in range(3):
+        metrics = poller_collector.collect()
+        assert metrics[0].samples[0].value == float(5000)
+    assert github_rate_limits_requester_mock.call_count == 1
+
+
+def test_collector_start_stop_poller(
+    github_app_access_token_mock,
+    github_rate_limits_requester_mock,
+    poller_collector,
+):
+    poller_collector.start(timeout=5)
+    assert poller_collector.poller.is_alive()
+    assert poller_collector.poller.snapshot is not None
+    poller_collector.stop()
+    assert not poller_collector.poller.is_alive()
+    assert github_rate_limits_requester_mock.call_count == 1
+
+
+def test_collector_without_poller(github_app_access_token_mock, collector):
+    assert collector.poller is None
+    collector.start()
+    collector.stop()
+
+
+def test_collect_multiple_accounts(
+    github_app_access_token_mock,
+    github_rate_limits_requester_mock,
+    multi_account_collector,
+    mock_unix_timestamp,
+):
+    metrics = multi_account_collector.collect()
+    assert multi_account_collector.accounts == ["pat_account", "app_account"]
+    assert github_rate_limits_requester_mock.call_count == 2
+    assert github_app_access_token_mock.call_count == 1
+    for metric in metrics:
+        accounts = [sample.labels["account"] for sample in metric.samples]
+        assert accounts == ["pat_account"] * 4 + ["app_account"] * 4
+    multi_account_collector.stop()
+
+
+def test_collect_multiple_accounts_concurrently(
+    mocker, github_app_access_token_mock, multi_account_collector
+):
+    # Both requests must be in-flight at the same time to cross the barrier.
+    barrier = threading.Barrier(2, timeout=5)
+
+    def get_rate_limits(requester):
+        barrier.wait()
+        return RateLimitsSnapshot()
+
+    mocker.patch.object(
+        GithubRateLimitsRequester,
+        "get_rate_limits",
+        side_effect=get_rate_limits,
+        autospec=True,
+    )
+    with does_not_raise():
+        multi_account_collector.collect()
+    assert not barrier.broken
+    multi_account_collector.stop()
+
+
+def test_collector_unique_accounts(github_app_access_token_mock, collector):
+    with pytest.raises(ValueError):
+        collector.accounts = ["account", "account"]
+    with pytest.raises(ValueError):
+        collector.accounts = []
+    with pytest.raises(ValueError):
+        collector.accounts = [123]
+
+
+@pytest.fixture
+def rate_limits_extra_resources(rate_limits_resources):
+    """Returns the rate-limits with resources beyond the default ones"""
+    resources = dict(rate_limits_resources)
+    resources["actions_runner_registration"] = {
+        "limit": 10000,
+        "used": 3,
+        "remaining": 9997,
+        "reset": 1372700873,
+    }
+    resources["audit_log"] = {
+        "limit": 1750,
+        "used": 0,
+        "remaining": 1750,
+        "reset": 1372700873,
+    }
+    return RateLimitsSnapshot.from_json(resources)
+
+
+def test_collect_discovers_resources(
+    mocker,
+    github_app_access_token_mock,
+    collector,
+    rate_limits_extra_resources,
+):
+    mocker.patch.object(
+        GithubRateLimitsRequester,
+        "get_rate_limits",
+        return_value=rate_limits_extra_resources,
+        autospec=True,
+    )
+    metrics = collector.collect()
+    assert [metric.name for metric in metrics] == [
+        "github_rate_limits_core",
+        "github_rate_limits_search",
+        "github_rate_limits_graphql",
+        "github_rate_limits_integration_manifest",
+        "github_rate_limits_code_scanning_upload",
+        "github_rate_limits_actions_runner_registration",
+        "github_rate_limits_audit_log",
+    ]
+    assert [sample.value for sample in metrics[5].samples] == [
+        10000.0,
+        3.0,
+        9997.0,
+        1372700873.0,
+    ]
+
+
+def test_collect_single_metric_family(
+    mocker,
+    github_app_access_token_mock,
+    single_family_collector,
+    rate_limits_extra_resources,
+    mock_unix_timestamp,
+):
+    mocker.patch.object(
+        GithubRateLimitsRequester,
+        "get_rate_limits",
+        return_value=rate_limits_extra_resources,
+        autospec=True,
+    )
+    [metric] = single_family_collector.collect()
+    assert metric.name == "github_rate_limits"
+    assert len(metric.samples) == 7 * 4
+    assert metric.samples[0].labels == {
+        "account": "github_account",
+        "resource": "core",
+        "type": "limit",
+    }
+    expected = GaugeMetricFamily(
+        "github_rate_limits",
+        "API requests per hour, per API resource",
+        labels=["account", "resource", "type"],
+    )
+    for limit_type, value in (
+        ("limit", 1750),
+        ("used", 0),
+        ("remaining", 1750),
+        ("reset", 1372700873),
+    ):
+        expected.add_metric(
+            ["github_account", "audit_log", limit_type], float(value), CURRENT_TIMESTAMP
+        )
+    assert metric.samples[-4:] == expected.samples
+
+
+def test_collect_single_metric_family_defaults(
+    github_app_access_token_mock, single_family_collector
+):
+    metric = single_family_collector._add_single_metric(["core"], resources=None)
+    assert [sample.value for sample in metric.samples] == [0.0] * 4
+
+
+def test_collect_single_timestamp_per_fetch(
+    mocker,
+    github_app_access_token_mock,
+    github_rate_limits_requester_mock,
+    multi_account_collector,
+):
+    timestamps = mocker.patch(
+        "github_rate_limits_exporter.collector.get_unix_timestamp",
+        side_effect=[1000.0, 2000.0],
+        autospec=True,
+    )
+    first = multi_account_collector.collect()
+    second = multi_account_collector.collect()
+    multi_account_collector.stop()
+    assert {s.timestamp for metric in first for s in metric.samples} == {1000.0}
+    assert {s.timestamp for metric in second for s in metric.samples} == {2000.0}
+    assert timestamps.call_count == 2
+
+
+def test_collect_reuses_metrics_of_snapshot(
+    github_app_access_token_mock,
+    github_rate_limits_requester_mock,
+    poller_collector,
+    mock_unix_timestamp,
+):
+    poller_collector.poller.poll()
+    first = poller_collector.collect()
+    assert poller_collector.collect() is first
+    poller_collector.poller.poll()
+    second = poller_collector.collect()
+    assert second is not first
+    assert second == first
+    # the sample labels are built once and shared across collections
+    assert all(
+        old.labels is new.labels
+        for old_metric, new_metric in zip(first, second)
+        for old, new in zip(old_metric.samples, new_metric.samples)
+    )
+
+
+def test_collect_stale_account_keeps_fetch_timestamp(
+    mocker, github_app_access_token_mock, poller_collector, rate_limits_resources
+):
+    mocker.patch(
+        "github_rate_limits_exporter.collector.get_unix_timestamp",
+        side_effect=[1000.0, 2000.0],
+        autospec=True,
+    )
+    mocker.patch.object(
+        GithubRateLimitsRequester,
+        "get_rate_limits",
+        side_effect=[
+            RateLimitsSnapshot.from_json(rate_limits_resources),
+            ValueError("failed"),
+        ],
+        autospec=True,
+    )
+    poller_collector.poller.poll()
+    poller_collector.poller.poll()
+    metrics = poller_collector.collect()
+    assert metrics[0].samples[0].value == 5000.0
+    assert {s.timestamp for metric in metrics for s in metric.samples} == {1000.0}
+
+
+def test_github_requests_collector(
+    github_app_access_token_mock, multi_account_collector
+):
+    metric, *__ = GithubRequestsCollector(multi_account_collector).collect()
+    multi_account_collector.stop()
+    assert metric.name == "github_rate_limits_exporter_coalesced_requests"
+    assert metric.type == "counter"
+    assert [(s.labels["account"], s.value) for s in metric.samples] == [
+        ("pat_account", 0.0),
+        ("app_account", 0.0),
+    ]
+
+
+def test_github_requests_collector_tokens(
+    freezer, github_app_access_token_mock, multi_account_collector
+):
+    freezer.tick(10)
+    __, token_age, token_refresh, *__ = GithubRequestsCollector(
+        multi_account_collector
+    ).collect()
+    multi_account_collector.stop()
+    assert token_age.name == "github_rate_limits_exporter_token_age_seconds"
+    assert [(s.labels["account"], s.value) for s in token_age.samples] == [
+        ("app_account", 10.0)
+    ]
+    assert [(s.labels["account"], s.value) for s in token_refresh.samples] == [
+        ("app_account", 0.0)
+    ]
+
+
+@pytest.fixture
+def github_api_stub(rate_limits_json):
+    with GithubApiStub(rate_limits_json) as stub:
+        yield stub
+
+
+def test_collector_failed_account_is_not_fatal(github_api_stub, exception_queue):
+    github_api_stub.rejected_tokens.add("revoked-token")
+    collector = GithubRateLimitsCollector(
+        argparse.Namespace(
+            github_accounts=[
+                argparse.Namespace(
+                    github_auth_type="pat",
+                    github_account=account,
+                    github_token=f"{token}-token",
+                    github_base_url=github_api_stub.base_url,
+                )
+                for account, token in (("a", "valid"), ("b", "revoked"), ("c", "valid"))
+            ],
+            poll_interval=60,
+            http_retries=0,
+            max_workers=3,
+        ),
+        exception_queue,
+    )
+
+    def remaining():
+        core = collector.collect()[0]
+        return {s.labels["account"]: s.value for s in core.samples[2::4]}
+
+    try:
+        collector.poller.poll()
+        assert remaining() == {"a": 4999.0, "b": 0.0, "c": 4999.0}
+        assert isinstance(collector.errors.failures["b"], requests.HTTPError)
+        github_api_stub.rejected_tokens.clear()
+        collector.poller.poll()
+        assert collector.errors.failures == {}
+        github_api_stub.rejected_tokens.add("revoked-token")
+        github_api_stub.rate_limits = {"resources": {}}
+        collector.poller.poll()
+        # The failed account keeps serving its previous rate-limits.
+        assert remaining() == {"a": 0.0, "b": 4999.0, "c": 0.0}
+        errors = GithubRequestsCollector(collector).collect()[-1]
+    finally:
+        collector.stop()
+    assert collector.errors.counts == {"b": 2}
+    assert errors.name == "github_rate_limits_exporter_account_errors"
+    assert [(s.labels["account"], s.value) for s in errors.samples] == [("b", 2.0)]
+    assert exception_queue.equeue.empty()
+
+
+def test_collector_token_manager(
+    freezer, github_app_access_token_mock, multi_account_collector
+):
+    manager = multi_account_collector._token_manager
+    assert list(manager.requesters) == ["app_account"]
+    multi_account_collector.start()
+    assert manager.is_alive()
+    assert multi_account_collector._requesters["app_account"].managed
+    multi_account_collector.stop()
+    assert not manager.is_alive()
+
+
+def test_collector_adaptive_poll_scheduler(freezer, github_mock, exception_queue):
+    collector = GithubRateLimitsCollector(
+        argparse.Namespace(
+            github_accounts=[
+                argparse.Namespace(
+                    github_auth_type="pat",
+                    github_account="slow",
+                    github_token="some-value",
+                ),
+                argparse.Namespace(
+                    github_auth_type="pat",
+                    github_account="fast",
+                    github_token="some-value",
+                    poll_max_interval=10,
+                ),
+            ],
+            poll_interval=60,
+            poll_scheduler="adaptive",
+            poll_min_interval=5,
+            poll_max_interval=300,
+        ),
+        exception_queue,
+    )
+    collector.poller.poll()
+    first = collector.poller.snapshot
+    assert github_mock.call_count == 2
+    # The search resource (18 of 30 remaining) is the most constrained.
+    assert collector.poll_intervals == {
+        "slow": pytest.approx(5 + 295 * 0.6),
+        "fast": pytest.approx(5 + 5 * 0.6),
+    }
+    freezer.tick(8)
+    collector.poller.poll()
+    assert github_mock.call_count == 3
+    second = collector.poller.snapshot
+    assert list(second) == ["slow", "fast"]
+    assert second["slow"] is first["slow"]
+    assert second["fast"] is not first["fast"]
+    poll_interval = GithubRequestsCollector(collector).collect()[4]
+    assert poll_interval.name == "github_rate_limits_exporter_poll_interval_seconds"
+    assert [s.labels["account"] for s in poll_interval.samples] == ["slow", "fast"]
+    collector.stop()
+
+
+def test_github_derived_collector(freezer, github_mock, exception_queue):
+    freezer.move_to(CURRENT_TIME)
+    collector = GithubRateLimitsCollector(
+        argparse.Namespace(
+            github_auth_type="pat",
+            github_account="pat_account",
+            github_token="some-value",
+        ),
+        exception_queue,
+    )
+    derived = GithubDerivedCollector(collector)
+    assert [metric.samples for metric in derived.collect()] == [[], [], []]
+    collector.collect()
+    freezer.tick(60)
+    collector.collect()
+    used_per_second, exhaustion, reset = derived.collect()
+    samples = {
+        metric.name: {s.labels["resource"]: s.value for s in metric.samples}
+        for metric in (used_per_second, exhaustion, reset)
+    }
+    assert samples["github_rate_limits_used_per_second"]["core"] == 0.0
+    assert samples["github_rate_limits_exhaustion_seconds"]["core"] == float("inf")
+    # The reset epochs of the fixture are in the past.
+    assert samples["github_rate_limits_reset_seconds"]["core"] == 0.0
+    assert used_per_second.samples[0].labels == {
+        "account": "pat_account",
+        "resource": "core",
+    }
+    collector.stop()
+
+
+def test_github_derived_collector_disabled(github_mock, exception_queue):
+    collector = GithubRateLimitsCollector(
+        argparse.Namespace(
+            github_auth_type="pat",
+            github_account="pat_account",
+            github_token="some-value",
+            derived_metrics=False,
+        ),
+        exception_queue,
+    )
+    collector.collect()
+    assert collector.burn_rates is None
+    assert GithubDerivedCollector(collector).collect() == []
+    collector.stop()
+
+
+def test_github_rate_limits_history(freezer, github_mock, exception_queue):
+    freezer.move_to(CURRENT_TIME)
+    args = argparse.Namespace(
+        github_auth_type="pat",
+        github_account="pat_account",
+        github_token="some-value",
+    )
+    collector = GithubRateLimitsCollector(args, exception_queue)
+    assert collector.history is None
+    collector.stop()
+    args.history_size = 1
+    collector = GithubRateLimitsCollector(args, exception_queue)
+    collector.collect()
+    freezer.tick(60)
+    collector.collect()
+    core = collector.history.query()["pat_account"]["core"]
+    assert len(core) == 1
+    assert core[0][0] == CURRENT_TIME.timestamp() + 60
+    collector.stop()
+
+
+def test_github_rate_limits_passive_collector(tmp_path, github_mock, exception_queue):
+    access_log = tmp_path / "access.log"
+    access_log.write_text(
+        json.dumps(
+            {
+                "account": "observed",
+                "timestamp": CURRENT_TIMESTAMP,
+                "X-RateLimit-Limit": "5000",
+                "X-RateLimit-Remaining": "4000",
+                "X-RateLimit-Resource": "core",
+            }
+        )
+        + "\n",
+        encoding="utf-8",
+    )
+    collector = GithubRateLimitsCollector(
+        argparse.Namespace(
+            github_auth_type=None,
+            github_account=None,
+            github_accounts=[],
+            ingest_logs=str(access_log),
+        ),
+        exception_queue,
+    )
+    assert collector.accounts == []
+    collector.start()
+    try:
+        for _ in range(500):
+            if len(collector.observations):
+                break
+            threading.Event().wait(0.01)
+        core = collector.collect()[0]
+    finally:
+        collector.stop()
+    assert github_mock.call_count == 0
+    assert {s.labels["type"]: s.value for s in core.samples} == {
+        "limit": 5000.0,
+        "used": 1000.0,
+        "remaining": 4000.0,
+        "reset": 0.0,
+    }
+    assert core.samples[0].labels["account"] == "observed"
+
+
+def test_github_rate_limits_observed_newest_wins(
+    freezer, tmp_path, github_mock, exception_queue
+):
+    freezer.move_to(CURRENT_TIME)
+    access_log = tmp_path / "access.log"
+    access_log.write_text("", encoding="utf-8")
+    collector = GithubRateLimitsCollector(
+        argparse.Namespace(
+            github_auth_type="pat",
+            github_account="pat_account",
+            github_token="some-value",
+            ingest_logs=str(access_log),
+        ),
+        exception_queue,
+    )
+    collector.observations.update(
+        [
+            ("pat_account", "core", RateLimit(5000.0, 7.0, 4993.0, 0.0), 0.0),
+            ("pat_account", "search", RateLimit(30.0, 3.0, 27.0, 0.0), 2e9),
+        ]
+    )
+    metrics = {metric.name: metric for metric in collector.collect()}
+    core = {s.labels["type"]: s.value for s in metrics["github_rate_limits_core"].samples}
+    search = {
+        s.labels["type"]: s.value for s in metrics["github_rate_limits_search"].samples
+    }
+    # The fetched core and the (newer) observed search rate-limits.
+    assert core["used"] == 1.0
+    assert search["used"] == 3.0
+    collector.stop()
+
+
+def test_github_rate_limits_exposition_version(github_mock, exception_queue):
+    args = argparse.Namespace(
+        github_auth_type="pat",
+        github_account="pat_account",
+        github_token="some-value",
+    )
+    collector = GithubRateLimitsCollector(args, exception_queue)
+    assert collector.exposition_version is None
+    collector.stop()
+    args.poll_interval = 60
+    args.push_observations = True
+    collector = GithubRateLimitsCollector(args, exception_queue)
+    assert collector.exposition_version == (0, 0)
+    collector.poller.poll()
+    collector.observations.update(
+        [("pat_account", "search", RateLimit(30.0, 1.0, 29.0, 0.0), 0.0)]
+    )
+    assert collector.exposition_version == (1, 1)
+    collector.stop()
+
+
+@pytest.mark.parametrize(
+    "shard_index, expected",
+    [(0, ["app_account"]), (1, []), (2, ["pat_account"])],
+)
+def test_collector_shard_accounts(
+    github_app_access_token_mock,
+    private_key_str,
+    exception_queue,
+    shard_index,
+    expected,
+):
+    args = argparse.Namespace(
+        github_accounts=[
+            argparse.Namespace(
+                github_auth_type="pat",
+                github_account="pat_account",
+                github_token="some-value",
+                github_base_url="https://api.github.com",
+            ),
+            argparse.Namespace(
+                github_auth_type="app",
+                github_account="app_account",
+                github_app_id=11112222,
+                github_app_installation_id=12345678,
+                github_app_private_key_path=private_key_str,
+                github_base_url="https://api.github.com",
+            ),
+        ],
+        shard_index=shard_index,
+        shard_count=3,
+    )
+    collector = GithubRateLimitsCollector(args, exception_queue)
+    try:
+        assert collector.accounts == expected
+        assert list(collector._requesters) == expected
+        shard_accounts, accounts = GithubShardCollector(collector).collect()
+    finally:
+        collector.stop()
+    labels = {"shard_index": str(shard_index), "shard_count": "3"}
+    assert shard_accounts.name == "github_rate_limits_exporter_shard_accounts"
+    assert [(s.labels, s.value) for s in shard_accounts.samples] == [
+        (labels, float(len(expected)))
+    ]
+    assert [(s.labels, s.value) for s in accounts.samples] == [(labels, 2.0)]
+
+
+def test_self_collector(
+    instruments,
+    github_app_access_token_mock,
+    github_rate_limits_requester_mock,
+    poller_collector,
+    exception_queue,
+    mocker,
+):
+    self_collector = GithubSelfCollector(poller_collector, instruments)
+    assert self_collector.snapshot_ages() == {}
+    poller_collector.poller.poll()
+    poller_collector.collect()
+    exception_queue.put_error(ValueError("invalid value"))
+    mocker.patch(
+        "github_rate_limits_exporter.collector.get_unix_timestamp",
+        return_value=poller_collector.rate_limits()["github_account"].timestamp + 5,
+    )
+    metrics = {metric.name: metric for metric in self_collector.collect()}
+    collect = metrics["github_rate_limits_exporter_collect_duration_seconds"]
+    assert [s.value for s in collect.samples if s.name.endswith("_count")] == [1.0]
+    errors = metrics["github_rate_limits_exporter_errors"]
+    assert [(s.labels, s.value) for s in errors.samples] == [
+        ({"exception": "ValueError"}, 1.0)
+    ]
+    snapshot_age = metrics["github_rate_limits_exporter_snapshot_age_seconds"]
+    assert [(s.labels, s.value) for s in snapshot_age.samples] == [
+        ({"account": "github_account"}, 5.0)
+    ]
+
+
+def test_self_collector_requests_on_every_scrape(github_app_access_token_mock, collector):
+    # The rate-limits are not requested (again) for the snapshots age.
+    assert GithubSelfCollector(collector).snapshot_ages() == {}
@@ -0,0 +1,71 @@
+import math
+
+import pytest
+
+from github_rate_limits_exporter.derived import BurnRateTracker, ResourceBurnRate
+from github_rate_limits_exporter.models import RateLimit, RateLimitsSnapshot
+
+TIMESTAMP = 1671885900.0
+RESET = TIMESTAMP + 3600
+
+
+def snapshot(used, timestamp, reset=RESET, limit=5000.0):
+    return RateLimitsSnapshot(
+        {"core": RateLimit(limit, used, limit - used, reset)}, timestamp=timestamp
+    )
+
+
+def test_resource_burn_rate():
+    burn_rate = ResourceBurnRate(100.0, 4900.0, RESET, TIMESTAMP)
+    assert burn_rate.rate is None
+    assert burn_rate.exhaustion is None
+    burn_rate.update(700.0, 4300.0, RESET, TIMESTAMP + 60, window=300)
+    assert burn_rate.rate == 10.0
+    assert burn_rate.exhaustion == 430.0
+
+
+def test_resource_burn_rate_ewma():
+    burn_rate = ResourceBurnRate(0.0, 5000.0, RESET, TIMESTAMP)
+    burn_rate.update(600.0, 4400.0, RESET, TIMESTAMP + 60, window=300)
+    burn_rate.update(600.0, 4400.0, RESET, TIMESTAMP + 120, window=300)
+    alpha = 1 - math.exp(-60 / 300)
+    assert burn_rate.rate == pytest.approx(10.0 - alpha * 10.0)
+
+
+def test_resource_burn_rate_new_window():
+    burn_rate = ResourceBurnRate(4000.0, 1000.0, RESET, TIMESTAMP)
+    burn_rate.update(120.0, 4880.0, RESET + 3600, TIMESTAMP + 60, window=300)
+    assert burn_rate.rate == 2.0
+    assert burn_rate.reset == RESET + 3600
+
+
+@pytest.mark.parametrize(
+    "used, remaining, exhaustion",
+    [(100.0, 4900.0, math.inf), (5000.0, 0.0, 0.0)],
+)
+def test_resource_burn_rate_exhaustion(used, remaining, exhaustion):
+    burn_rate = ResourceBurnRate(used, remaining, RESET, TIMESTAMP)
+    burn_rate.update(used, remaining, RESET, TIMESTAMP + 60, window=300)
+    assert burn_rate.exhaustion == exhaustion
+
+
+def test_resource_burn_rate_same_fetch():
+    burn_rate = ResourceBurnRate(100.0, 4900.0, RESET, TIMESTAMP)
+    burn_rate.update(200.0, 4800.0, RESET, TIMESTAMP, window=300)
+    assert burn_rate.rate is None
+    assert burn_rate.used == 100.0
+
+
+def test_burn_rate_tracker():
+    tracker = BurnRateTracker(window=300)
+    tracker.observe("account", snapshot(100.0, TIMESTAMP))
+    tracker.observe("evicted", snapshot(100.0, TIMESTAMP))
+    # Snapshots not fetched (no timestamp) are ignored.
+    tracker.observe("account", RateLimitsSnapshot(snapshot(0.0, None)))
+    tracker.observe("account", snapshot(700.0, TIMESTAMP + 60))
+    assert tracker.values() == {
+        ("account", "core"): (10.0, 430.0, RESET),
+        ("evicted", "core"): (None, None, RESET),
+    }
+    tracker.retain(["account"])
+    assert list(tracker.values()) == [("account", "core")]
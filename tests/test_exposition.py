@@ -0,0 +1,142 @@
+import argparse
+import gzip
+import io
+from datetime import datetime, timezone
+
+from prometheus_client import CollectorRegistry, Gauge
+from prometheus_client.openmetrics import parser as openmetrics_parser
+from prometheus_client.parser import text_string_to_metric_families
+
+from github_rate_limits_exporter.collector import (
+    GithubDerivedCollector,
+    GithubRateLimitsCollector,
+)
+from github_rate_limits_exporter.constants import EXPOSITION_CACHE_VARIANTS
+from github_rate_limits_exporter.exposition import (
+    CachedExposition,
+    make_cached_metrics_app,
+)
+
+OPENMETRICS = "application/openmetrics-text; version=1.0.0; charset=utf-8"
+
+
+class Versioned:
+    def __init__(self):
+        self.registry = CollectorRegistry()
+        self.gauge = Gauge("exporter_test", "Test gauge", registry=self.registry)
+        self.version = 1
+
+    def exposition(self):
+        return CachedExposition(self.registry, lambda: self.version)
+
+
+def scrape(app, **environ):
+    response = {}
+
+    def start_response(status, headers):
+        response.update(status=status, headers=dict(headers))
+
+    body = b"".join(
+        app({"PATH_INFO": "/metrics", "wsgi.input": io.BytesIO(), **environ}, start_response)
+    )
+    return response, body
+
+
+def test_cached_exposition_renders_once_per_version():
+    versioned = Versioned()
+    exposition = versioned.exposition()
+    versioned.gauge.set(1)
+    plain, content_type = exposition.render()
+    assert content_type.startswith("text/plain")
+    assert b"exporter_test 1.0" in plain
+    versioned.gauge.set(2)
+    # Unchanged version, the same buffer.
+    assert exposition.render()[0] is plain
+    compressed, _ = exposition.render(gzipped=True)
+    assert gzip.decompress(compressed) == plain
+    assert exposition.render(gzipped=True)[0] is compressed
+    openmetrics, content_type = exposition.render("application/openmetrics-text")
+    assert content_type == OPENMETRICS
+    assert openmetrics.endswith(b"# EOF\n")
+    assert exposition.renders == 3
+    versioned.version = 2
+    assert b"exporter_test 2.0" in exposition.render()[0]
+    assert exposition.renders == 4
+
+
+def test_cached_exposition_variants_are_capped():
+    exposition = Versioned().exposition()
+    for minor in range(EXPOSITION_CACHE_VARIANTS + 2):
+        exposition.render(f"application/openmetrics-text; version=1.{minor}.0")
+    exposition.render("application/openmetrics-text; version=1.0.0")
+    exposition.render(f"application/openmetrics-text; version=1.{minor}.0")
+    assert exposition.renders == EXPOSITION_CACHE_VARIANTS + 3
+
+
+def reset_seconds(exposition, parser=text_string_to_metric_families):
+    return {
+        sample.labels["resource"]: sample.value
+        for family in parser(exposition.decode())
+        if family.name == "github_rate_limits_reset_seconds"
+        for sample in family.samples
+    }
+
+
+def test_cached_exposition_live_metrics(freezer, github_mock, exception_queue):
+    # 873 seconds before the reset of the core rate-limits of the fixture.
+    freezer.move_to(datetime.fromtimestamp(1372700000, timezone.utc))
+    collector = GithubRateLimitsCollector(
+        argparse.Namespace(
+            github_auth_type="pat",
+            github_account="pat_account",
+            github_token="some-value",
+            poll_interval=60,
+        ),
+        exception_queue,
+    )
+    rate_limits, live = CollectorRegistry(), CollectorRegistry()
+    rate_limits.register(collector)
+    live.register(GithubDerivedCollector(collector))
+    exposition = CachedExposition(
+        rate_limits, lambda: collector.exposition_version, live
+    )
+    try:
+        collector.poller.poll()
+        first, _ = exposition.render()
+        freezer.tick(60)
+        second, _ = exposition.render()
+        compressed, _ = exposition.render("application/openmetrics-text", True)
+    finally:
+        collector.stop()
+    # No new poll, the rate-limits are rendered once, the live metrics twice.
+    assert github_mock.call_count == 1
+    assert exposition.renders == 2
+    assert b'github_rate_limits_core{account="pat_account",type="limit"}' in second
+    assert reset_seconds(first)["core"] == 873.0
+    assert reset_seconds(second)["core"] == 813.0
+    # A single exposition, out of the cached and the live gzip members.
+    openmetrics = gzip.decompress(compressed)
+    parser = openmetrics_parser.text_string_to_metric_families
+    assert reset_seconds(openmetrics, parser)["core"] == 813.0
+
+
+def test_cached_metrics_app():
+    versioned = Versioned()
+    fallback_calls = []
+
+    def fallback(environ, start_response):
+        fallback_calls.append(environ)
+        start_response("200 OK", [])
+        return [b"fallback"]
+
+    app = make_cached_metrics_app(versioned.exposition(), fallback)
+    response, body = scrape(app, HTTP_ACCEPT_ENCODING="gzip, deflate")
+    assert response["status"] == "200 OK"
+    assert response["headers"]["Content-Encoding"] == "gzip"
+    assert response["headers"]["Content-Length"] == str(len(body))
+    assert b"exporter_test 0.0" in gzip.decompress(body)
+    # Filtered scrapes and unversioned rate-limits are not cached.
+    assert scrape(app, QUERY_STRING="name[]=exporter_test")[1] == b"fallback"
+    versioned.version = None
+    assert scrape(app)[1] == b"fallback"
+    assert len(fallback_calls) == 2
@@ -1,19 +1,31 @@
+import threading
+import time
 from argparse import Namespace
+from concurrent.futures import ThreadPoolExecutor
 from contextlib import nullcontext as does_not_raise
-from datetime import datetime, timezone
+from datetime import datetime, timedelta, timezone
 
+import jwt
 import pytest
+import requests
 
+from github_rate_limits_exporter.exceptions import ApiRequestError
 from github_rate_limits_exporter.github import (
     GithubApp,
+    GithubAppJwt,
+    GithubHttpTransport,
     GithubRateLimitsRequester,
     GithubToken,
 )
 from tests.utils import (
     CURRENT_TIME,
+    CURRENT_TIMESTAMP,
     MOVE_FORWARD_CURRENT_TIME,
     NEW_TOKEN_EXPIRATION_TIME,
+    NEW_TOKEN_EXPIRES_AT,
+    TOKEN_EXPIRATION_TIME,
     TOKEN_EXPIRES_AT,
+    GithubApiStub,
 )
 
 
@@ -179,10 +191,10 @@ def test_github_rate_limits_requester(
     github_mock,
     github_app_access_token_mock,
     github_app_requester,
-    rate_limits_json_dotmap,
+    rate_limits_snapshot,
 ):
     freezer.move_to(CURRENT_TIME)
-    assert github_app_requester.get_rate_limits() == rate_limits_json_dotmap
+    assert github_app_requester.get_rate_limits() == rate_limits_snapshot
     assert github_mock.call_count == 1
     assert github_app_access_token_mock.call_count == 1
 
@@ -192,10 +204,10 @@ def test_github_rate_limits_request_refresh_token(
     github_mock,
     github_app_access_token_mock,
     github_app_requester,
-    rate_limits_json_dotmap,
+    rate_limits_snapshot,
 ):
     freezer.move_to(MOVE_FORWARD_CURRENT_TIME)
-    assert github_app_requester.get_rate_limits() == rate_limits_json_dotmap
+    assert github_app_requester.get_rate_limits() == rate_limits_snapshot
     assert github_app_requester.token == GithubToken(
         "some-value", NEW_TOKEN_EXPIRATION_TIME
     )
@@ -206,46 +218,51 @@ def test_github_rate_limits_request_refresh_token(
 def test_github_rate_limits_unwraps_resources(
     freezer, github_mock, github_app_access_token_mock, github_app_requester
 ):
-    """``get_rate_limits()`` must unwrap the ``resources`` key from PyGithub's
-    full ``raw_data`` so the collector sees per-resource maps at the top level.
+    """``get_rate_limits()`` must unwrap the ``resources`` key from the
+    full ``/rate_limit`` response so the collector sees per-resource maps at the top level.
 
     Regression test for the silent-zero-metrics bug: the previous code returned
     the full response, which has ``resources`` and ``rate`` at the top — so
-    callers doing ``rate_limits.core`` got an empty DotMap (defaulting to all
+    callers doing ``rate_limits.core`` got an empty mapping (defaulting to all
     zeros) instead of the actual core limits.
     """
     freezer.move_to(CURRENT_TIME)
     rate_limits = github_app_requester.get_rate_limits()
     # Per-resource keys must be reachable directly, not via .resources.*
-    assert rate_limits.core.limit == 5000
-    assert rate_limits.search.limit == 30
+    assert rate_limits["core"].limit == 5000
+    assert rate_limits["search"].limit == 30
     # And .resources must NOT be a passthrough (i.e. we are not returning
     # the full raw_data)
     assert "resources" not in rate_limits
 
 
-def test_github_rate_limits_requester_pat_uses_base_url(mocker, freezer, private_key_str):
+def test_github_rate_limits_requester_pat_uses_base_url(
+    freezer, github_mock, rate_limits_snapshot
+):
     freezer.move_to(CURRENT_TIME)
-    github_init = mocker.patch(
-        "github_rate_limits_exporter.github.Github", autospec=True
-    )
-    GithubRateLimitsRequester(
+    requester = GithubRateLimitsRequester(
         Namespace(
             github_auth_type="pat",
             github_token="some-value",
-            github_base_url="https://ghe.example.com/api/v3",
+            github_base_url="https://ghe.example.com/api/v3/",
         )
     )
-    github_init.assert_called_once_with(
-        login_or_token="some-value", base_url="https://ghe.example.com/api/v3"
+    assert requester.get_rate_limits() == rate_limits_snapshot
+    github_mock.assert_called_once_with(
+        requester._transport,
+        "GET",
+        "https://ghe.example.com/api/v3/rate_limit",
+        "token some-value",
     )
 
 
 def test_github_app_uses_base_url(mocker, private_key_str):
-    integration_mock = mocker.patch(
-        "github_rate_limits_exporter.github.GithubIntegration", autospec=True
+    request_mock = mocker.patch(
+        "github_rate_limits_exporter.github.GithubHttpTransport.request",
+        return_value={"token": "some-value", "expires_at": NEW_TOKEN_EXPIRES_AT},
+        autospec=True,
     )
-    GithubApp(
+    app = GithubApp(
         Namespace(
             github_app_id=123,
             github_app_private_key_path=private_key_str,
@@ -253,22 +270,267 @@ def test_github_app_uses_base_url(mocker, private_key_str):
             github_base_url="https://ghe.example.com/api/v3",
         )
     )
-    integration_mock.assert_called_once_with(
-        123, private_key_str, base_url="https://ghe.example.com/api/v3"
+    assert app.base_url == "https://ghe.example.com/api/v3"
+    assert app.access_token.token == "some-value"
+    __, method, url, authorization = request_mock.call_args.args
+    assert (method, url) == (
+        "POST",
+        "https://ghe.example.com/api/v3/app/installations/456/access_tokens",
     )
+    assert authorization == f"Bearer {app.jwt}"
 
 
-def test_github_rate_limits_requester_default_base_url(
-    mocker, freezer, private_key_str
-):
-    """Defaults to public github.com when github_base_url is missing on the namespace."""
+def test_github_app_jwt(freezer, private_key_str):
+    freezer.move_to(CURRENT_TIME)
+    signer = GithubAppJwt(123, private_key_str)
+    token = signer.jwt
+    claims = jwt.decode(
+        token,
+        signer._key.public_key(),
+        algorithms=["RS256"],
+        options={"verify_exp": False, "verify_iat": False},
+    )
+    assert claims == {
+        "iat": int(CURRENT_TIMESTAMP) - 60,
+        "exp": int(CURRENT_TIMESTAMP) + 300,
+        "iss": "123",
+    }
+    # Reused for its validity window (minus the refresh ahead margin).
+    freezer.tick(239)
+    assert signer.jwt == token
+    assert signer.signatures == 1
+    freezer.tick(1)
+    assert signer.cached is None
+    assert signer.jwt != token
+    assert signer.signatures == 2
+
+
+def test_github_app_jwt_invalid_private_key():
+    with pytest.raises(ValueError):
+        GithubAppJwt(123, "not a PEM private key")
+
+
+def test_github_app_jwt_is_shared_by_installations(freezer, private_key_str):
     freezer.move_to(CURRENT_TIME)
-    github_init = mocker.patch(
-        "github_rate_limits_exporter.github.Github", autospec=True
+    app = GithubApp(
+        Namespace(
+            github_app_id=123,
+            github_app_private_key_path=private_key_str,
+            github_app_installation_id=None,
+        )
     )
-    GithubRateLimitsRequester(
+    installations = [app.with_installation_id(i) for i in range(1, 50)]
+    with ThreadPoolExecutor(max_workers=8) as executor:
+        tokens = set(executor.map(lambda installation: installation.jwt, installations))
+    assert tokens == {app.jwt}
+    assert app.signer.signatures == 1
+
+
+def test_github_rate_limits_requester_default_base_url(freezer, github_mock):
+    """Defaults to public github.com when github_base_url is missing on the namespace."""
+    freezer.move_to(CURRENT_TIME)
+    requester = GithubRateLimitsRequester(
         Namespace(github_auth_type="pat", github_token="some-value")
     )
-    github_init.assert_called_once_with(
-        login_or_token="some-value", base_url="https://api.github.com"
+    requester.get_rate_limits()
+    github_mock.assert_called_once_with(
+        requester._transport,
+        "GET",
+        "https://api.github.com/rate_limit",
+        "token some-value",
+    )
+
+
+def test_github_rate_limits_requester_coalesces_concurrent_calls(
+    mocker, freezer, github_app_access_token_mock, github_app_requester, rate_limits_json
+):
+    freezer.move_to(MOVE_FORWARD_CURRENT_TIME)
+    started, release = threading.Event(), threading.Event()
+
+    def get_rate_limit(transport, method, url, authorization):
+        started.set()
+        release.wait(5)
+        return rate_limits_json
+
+    github_mock = mocker.patch(
+        "github_rate_limits_exporter.github.GithubHttpTransport.request",
+        side_effect=get_rate_limit,
+        autospec=True,
+    )
+    results = []
+    threads = [
+        threading.Thread(
+            target=lambda: results.append(github_app_requester.get_rate_limits())
+        )
+        for __ in range(4)
+    ]
+    threads[0].start()
+    started.wait(5)
+    for thread in threads[1:]:
+        thread.start()
+    while github_app_requester.coalesced < 3:
+        time.sleep(0.001)
+    release.set()
+    for thread in threads:
+        thread.join(5)
+    assert len(results) == 4
+    assert all(result is results[0] for result in results)
+    assert github_mock.call_count == 1
+    # a single token refresh (on top of the initial token)
+    assert github_app_access_token_mock.call_count == 2
+
+
+@pytest.fixture
+def github_api_stub(rate_limits_json):
+    with GithubApiStub(rate_limits_json) as stub:
+        yield stub
+
+
+def test_github_http_transport_from_args():
+    transport = GithubHttpTransport.from_args(
+        Namespace(http_connect_timeout=2.5, http_read_timeout=7.0)
+    )
+    assert transport.timeout == (2.5, 7.0)
+    transport.close()
+
+
+def test_github_http_transport_reuses_connections(
+    freezer, github_api_stub, rate_limits_snapshot
+):
+    freezer.move_to(CURRENT_TIME)
+    transport = GithubHttpTransport(pool_size=1)
+    requesters = [
+        GithubRateLimitsRequester(
+            Namespace(
+                github_auth_type="pat",
+                github_token=f"token-{index}",
+                github_base_url=github_api_stub.base_url,
+            ),
+            transport,
+        )
+        for index in range(2)
+    ]
+    for __ in range(3):
+        for requester in requesters:
+            assert requester.get_rate_limits() == rate_limits_snapshot
+    transport.close()
+    assert len(github_api_stub.requests) == 6
+    assert len(github_api_stub.connections) == 1
+    method, path, headers = github_api_stub.requests[-1]
+    assert (method, path) == ("GET", "/rate_limit")
+    assert headers["Authorization"] == "token token-1"
+    assert headers["User-Agent"] == "github-rate-limits-exporter"
+
+
+def test_github_http_transport_retries_server_errors(github_api_stub):
+    github_api_stub.failures = 2
+    transport = GithubHttpTransport(retries=2)
+    with pytest.raises(requests.HTTPError):
+        GithubHttpTransport(retries=1).request(
+            "GET", f"{github_api_stub.base_url}/rate_limit", "token some-value"
+        )
+    github_api_stub.failures = 2
+    data = transport.request(
+        "GET", f"{github_api_stub.base_url}/rate_limit", "token some-value"
+    )
+    assert "resources" in data
+    transport.close()
+
+
+def test_github_http_transport_does_not_retry_token_mints(github_api_stub):
+    github_api_stub.failures = 1
+    transport = GithubHttpTransport(retries=2)
+    with pytest.raises(requests.HTTPError):
+        transport.request(
+            "POST",
+            f"{github_api_stub.base_url}/app/installations/11112222/access_tokens",
+            "Bearer some-jwt",
+        )
+    transport.close()
+    assert len(github_api_stub.requests) == 1
+
+
+def test_github_http_transport_raises_on_client_errors(github_api_stub):
+    github_api_stub.status = 401
+    transport = GithubHttpTransport()
+    with pytest.raises(requests.HTTPError):
+        transport.request(
+            "GET", f"{github_api_stub.base_url}/rate_limit", "token some-value"
+        )
+    assert len(github_api_stub.requests) == 1
+    transport.close()
+
+
+def test_github_app_token_refresh_shares_transport(
+    freezer, private_key_str, github_api_stub
+):
+    github_api_stub.expires_at = TOKEN_EXPIRES_AT
+    transport = GithubHttpTransport()
+    requester = GithubRateLimitsRequester(
+        Namespace(
+            github_auth_type="app",
+            github_app_id=123123,
+            github_app_private_key_path=private_key_str,
+            github_app_installation_id=11112222,
+            github_base_url=github_api_stub.base_url,
+        ),
+        transport,
     )
+    github_api_stub.expires_at = NEW_TOKEN_EXPIRES_AT
+    freezer.move_to(MOVE_FORWARD_CURRENT_TIME)
+    requester.get_rate_limits()
+    transport.close()
+    assert [(method, path) for method, path, __ in github_api_stub.requests] == [
+        ("POST", "/app/installations/11112222/access_tokens"),
+        ("POST", "/app/installations/11112222/access_tokens"),
+        ("GET", "/rate_limit"),
+    ]
+    assert github_api_stub.requests[0][2]["Authorization"].startswith("Bearer ")
+    assert requester.token.expires_at == NEW_TOKEN_EXPIRATION_TIME
+    assert len(github_api_stub.connections) == 1
+
+
+def test_github_managed_requester_keeps_current_token(
+    freezer, github_mock, github_app_access_token_mock, github_app_requester
+):
+    github_app_requester.managed = True
+    token = github_app_requester.token
+    freezer.tick(TOKEN_EXPIRATION_TIME - CURRENT_TIME - timedelta(seconds=100))
+    assert github_app_requester.deadlines.refresh_due()
+    github_app_requester.get_rate_limits()
+    assert github_app_requester.token is token
+    assert github_app_access_token_mock.call_count == 1
+    # an expired token is refreshed by the request itself
+    freezer.tick(200)
+    github_app_requester.get_rate_limits()
+    assert github_app_requester.token.expires_at == NEW_TOKEN_EXPIRATION_TIME
+    assert github_app_access_token_mock.call_count == 2
+
+
+def test_github_refresh_token_latency(
+    freezer, github_app_access_token_mock, github_app_requester
+):
+    assert github_app_requester.refreshable
+    assert github_app_requester.deadlines.latency == 0.0
+    assert github_app_requester.refresh_token().expires_at == NEW_TOKEN_EXPIRATION_TIME
+    assert github_app_requester.deadlines.age == 0.0
+
+
+def test_github_pat_requester_is_not_refreshable(github_pat_requester):
+    assert not github_pat_requester.refreshable
+    with pytest.raises(ApiRequestError):
+        github_pat_requester.refresh_token()
+
+
+def test_github_http_transport_instrumented(instruments, github_api_stub):
+    transport = GithubHttpTransport()
+    transport.request("GET", f"{github_api_stub.base_url}/rate_limit", "token tok")
+    github_api_stub.status = 401
+    with pytest.raises(requests.HTTPError):
+        transport.request("GET", f"{github_api_stub.base_url}/rate_limit", "token tok")
+    transport.close()
+    requests_latency = instruments.snapshot().requests
+    assert {key: value.count for key, value in requests_latency.items()} == {
+        ("/rate_limit", "200"): 1,
+        ("/rate_limit", "401"): 1,
+    }
@@ -0,0 +1,129 @@
+import io
+import json
+
+import pytest
+
+from github_rate_limits_exporter.history import (
+    HISTORY_FIELDS,
+    RateLimitsHistory,
+    RingBuffer,
+    make_history_app,
+)
+from github_rate_limits_exporter.models import RateLimit, RateLimitsSnapshot
+
+TIMESTAMP = 1671885900.0
+RESET = TIMESTAMP + 3600
+
+
+def snapshot(used, timestamp, resources=("core",)):
+    return RateLimitsSnapshot(
+        {name: RateLimit(5000.0, used, 5000.0 - used, RESET) for name in resources},
+        timestamp=timestamp,
+    )
+
+
+def request(app, query="", method="GET"):
+    status = []
+    environ = {
+        "REQUEST_METHOD": method,
+        "PATH_INFO": "/api/v1/history",
+        "QUERY_STRING": query,
+        "wsgi.input": io.BytesIO(),
+    }
+    body = b"".join(app(environ, lambda line, headers: status.append(line)))
+    return status[0], json.loads(body)
+
+
+@pytest.mark.parametrize("capacity", [0, -1, 2.5, None])
+def test_ring_buffer_invalid_capacity(capacity):
+    with pytest.raises(ValueError):
+        RingBuffer(capacity)
+
+
+def test_ring_buffer_wraps_around():
+    ring = RingBuffer(3)
+    assert ring.last_timestamp is None
+    for second in range(5):
+        ring.append(TIMESTAMP + second, RateLimit(5000.0, second, 5000.0 - second, RESET))
+    assert len(ring) == 3
+    assert ring.last_timestamp == TIMESTAMP + 4
+    assert [sample[0] for sample in ring.samples()] == [
+        TIMESTAMP + 2,
+        TIMESTAMP + 3,
+        TIMESTAMP + 4,
+    ]
+    assert ring.samples()[-1] == (TIMESTAMP + 4, 5000.0, 4.0, 4996.0, RESET)
+    assert ring.samples(TIMESTAMP + 3, TIMESTAMP + 3) == [
+        (TIMESTAMP + 3, 5000.0, 3.0, 4997.0, RESET)
+    ]
+
+
+def test_ring_buffer_memory_is_flat():
+    ring = RingBuffer(10)
+    nbytes = ring.nbytes
+    assert nbytes == 10 * len(HISTORY_FIELDS) * 8
+    for second in range(100):
+        ring.append(TIMESTAMP + second, RateLimit(5000.0, 0.0, 5000.0, RESET))
+    assert ring.nbytes == nbytes
+
+
+def test_history_record_and_query():
+    history = RateLimitsHistory(2)
+    history.record("account", snapshot(10.0, TIMESTAMP))
+    # The same fetch (e.g. a not due account) and unfetched snapshots are ignored.
+    history.record("account", snapshot(10.0, TIMESTAMP))
+    history.record("account", RateLimitsSnapshot(snapshot(20.0, None)))
+    history.record("account", snapshot(20.0, TIMESTAMP + 60))
+    history.record("other", snapshot(30.0, TIMESTAMP + 60, ("core", "search")))
+    assert history.query({"account"}) == {
+        "account": {
+            "core": [
+                (TIMESTAMP, 5000.0, 10.0, 4990.0, RESET),
+                (TIMESTAMP + 60, 5000.0, 20.0, 4980.0, RESET),
+            ]
+        }
+    }
+    assert history.query(start=TIMESTAMP + 1)["account"]["core"] == [
+        (TIMESTAMP + 60, 5000.0, 20.0, 4980.0, RESET)
+    ]
+    assert history.query(end=TIMESTAMP)["other"] == {"core": [], "search": []}
+    assert history.nbytes == 3 * 2 * len(HISTORY_FIELDS) * 8
+    history.retain(["other"])
+    assert list(history.query()) == ["other"]
+
+
+def test_history_app():
+    history = RateLimitsHistory(10)
+    history.record("a", snapshot(10.0, TIMESTAMP))
+    history.record("b", snapshot(20.0, TIMESTAMP + 60))
+    history.record("c", snapshot(30.0, TIMESTAMP + 60))
+    app = make_history_app(history)
+    status, body = request(app, "account=a,b&start=1671885960")
+    assert status == "200 OK"
+    assert body == {
+        "status": "success",
+        "data": {
+            "fields": list(HISTORY_FIELDS),
+            "accounts": {
+                "a": {"core": []},
+                "b": {"core": [[TIMESTAMP + 60, 5000.0, 20.0, 4980.0, RESET]]},
+            },
+        },
+    }
+    _, body = request(app, "account=a&account=c")
+    assert sorted(body["data"]["accounts"]) == ["a", "c"]
+
+
+@pytest.mark.parametrize(
+    "query, method, status",
+    [
+        ("start=yesterday", "GET", "400 Bad Request"),
+        ("end=", "GET", "200 OK"),
+        ("", "POST", "405 Method Not Allowed"),
+    ],
+)
+def test_history_app_errors(query, method, status):
+    app = make_history_app(RateLimitsHistory(10))
+    response_status, body = request(app, query, method)
+    assert response_status == status
+    assert body["status"] == ("success" if status == "200 OK" else "error")
@@ -0,0 +1,163 @@
+import json
+import logging
+import os
+
+import pytest
+
+from github_rate_limits_exporter.ingest import (
+    GithubAccessLogTailer,
+    TailedFile,
+    parse_access_log_line,
+)
+from github_rate_limits_exporter.models import RateLimit
+from github_rate_limits_exporter.observations import RateLimitObservations
+from tests.utils import CURRENT_TIME
+
+TIMESTAMP = 1671885900.0
+RESET = TIMESTAMP + 3600
+
+
+def log_line(used, account="account", resource="core", timestamp=TIMESTAMP):
+    return json.dumps(
+        {
+            "account": account,
+            "timestamp": timestamp,
+            "headers": {
+                "X-RateLimit-Limit": "5000",
+                "X-RateLimit-Remaining": str(5000 - used),
+                "X-RateLimit-Used": str(used),
+                "X-RateLimit-Reset": str(int(RESET)),
+                "X-RateLimit-Resource": resource,
+            },
+        }
+    ) + "\n"
+
+
+def append(path, *lines):
+    with open(path, "a", encoding="utf-8") as log:
+        log.write("".join(lines))
+
+
+def test_parse_access_log_line():
+    account, resource, limits, timestamp = parse_access_log_line(
+        log_line(10, resource="search").encode()
+    )
+    assert (account, resource, timestamp) == ("account", "search", TIMESTAMP)
+    assert limits == RateLimit(5000.0, 10.0, 4990.0, RESET)
+
+
+def test_parse_access_log_line_defaults(freezer):
+    freezer.move_to(CURRENT_TIME)
+    line = json.dumps(
+        {"X-RateLimit-Limit": "60", "X-RateLimit-Remaining": "59"}
+    ).encode()
+    assert parse_access_log_line(line, "default") == (
+        "default",
+        "core",
+        RateLimit(60.0, 1.0, 59.0, 0.0),
+        CURRENT_TIME.timestamp(),
+    )
+    line = json.dumps(
+        {"timestamp": "2022-12-24T12:45:00Z", "headers": {"X-RateLimit-Limit": 60}}
+    ).encode()
+    assert parse_access_log_line(line, "default")[3] == CURRENT_TIME.timestamp()
+    assert parse_access_log_line(b'{"status": 200}', "default") is None
+
+
+@pytest.mark.parametrize(
+    "line",
+    [
+        b"not json",
+        b"[]",
+        b'{"headers": []}',
+        b'{"headers": {"X-RateLimit-Limit": "60"}}',
+        b'{"account": "a", "timestamp": true, "headers": {"X-RateLimit-Limit": 1}}',
+        b'{"account": "a", "timestamp": "today", "headers": {"X-RateLimit-Limit": 1}}',
+    ],
+)
+def test_parse_access_log_line_invalid(line):
+    with pytest.raises(ValueError):
+        parse_access_log_line(line)
+
+
+def test_tailed_file_partial_lines_and_rotation(tmp_path):
+    path = tmp_path / "access.log"
+    append(path, "first\n", "partial")
+    tailed = TailedFile(str(path))
+    assert list(tailed.lines()) == [b"first\n"]
+    assert list(tailed.lines()) == []
+    append(path, " line\n")
+    assert list(tailed.lines()) == [b"partial line\n"]
+    # Truncated (or rotated) logs are read from their start.
+    path.write_text("rotated\n", encoding="utf-8")
+    assert list(tailed.lines()) == [b"rotated\n"]
+
+
+def test_access_log_tailer_directory(tmp_path):
+    append(tmp_path / "a.log", log_line(10), log_line(20, timestamp=TIMESTAMP + 2))
+    append(tmp_path / ".hidden", log_line(99))
+    observations = RateLimitObservations()
+    tailer = GithubAccessLogTailer(str(tmp_path), observations)
+    assert tailer.ingest() == 2
+    append(
+        tmp_path / "b.log",
+        "\n",
+        "garbage\n",
+        log_line(15, timestamp=TIMESTAMP + 1),
+        log_line(1, account="other", resource="search"),
+    )
+    assert tailer.ingest() == 1
+    assert (tailer.lines, tailer.errors) == (6, 1)
+    snapshots = observations.snapshots()
+    assert snapshots["account"]["core"].used == 20.0
+    assert snapshots["other"]["search"].used == 1.0
+    os.remove(tmp_path / "a.log")
+    assert tailer.ingest() == 0
+    assert tailer.read_errors == 0
+
+
+def test_access_log_tailer_unreadable_log(tmp_path, monkeypatch, caplog):
+    caplog.set_level(logging.DEBUG, logger="github_rate_limits_exporter.ingest")
+    append(tmp_path / "a.log", log_line(10))
+    append(tmp_path / "b.log", log_line(1, account="other"))
+    lines = TailedFile.lines
+
+    def unreadable(tailed):
+        if tailed.path.endswith("a.log"):
+            raise PermissionError(13, "Permission denied", tailed.path)
+        return lines(tailed)
+
+    monkeypatch.setattr(TailedFile, "lines", unreadable)
+    observations = RateLimitObservations()
+    tailer = GithubAccessLogTailer(str(tmp_path), observations)
+    assert tailer.ingest() == 1
+    append(tmp_path / "b.log", log_line(2, account="other", timestamp=TIMESTAMP + 1))
+    assert tailer.ingest() == 1
+    assert tailer.read_errors == 2
+    assert list(observations.snapshots()) == ["other"]
+    assert observations.snapshots()["other"]["core"].used == 2.0
+    # Logged once until the access log is read again.
+    assert [record.levelno for record in caplog.records] == [
+        logging.WARNING,
+        logging.DEBUG,
+    ]
+    monkeypatch.setattr(TailedFile, "lines", lines)
+    assert tailer.ingest() == 1
+    assert observations.snapshots()["account"]["core"].used == 10.0
+
+
+def test_access_log_tailer_thread(tmp_path):
+    path = tmp_path / "access.log"
+    append(path, log_line(10))
+    observations = RateLimitObservations()
+    tailer = GithubAccessLogTailer(str(path), observations, interval=0.01)
+    tailer.start()
+    try:
+        for _ in range(500):
+            if len(observations):
+                break
+            tailer.join(0.01)
+    finally:
+        tailer.stop(timeout=5)
+    assert not tailer.is_alive()
+    assert observations.snapshots()["account"]["core"].used == 10.0
@@ -0,0 +1,237 @@
+import logging
+from argparse import Namespace
+
+import pytest
+import requests
+
+from github_rate_limits_exporter import github
+from github_rate_limits_exporter.collector import (
+    GithubRateLimitsCollector,
+    GithubRequestsCollector,
+)
+from github_rate_limits_exporter.github import (
+    GithubHttpTransport,
+    GithubRateLimitsRequester,
+)
+from github_rate_limits_exporter.installations import GithubAppInstallations
+from github_rate_limits_exporter.sharding import Shard
+from tests.utils import GithubApiStub
+
+
+def installation(installation_id, login, suspended_at=None):
+    return {
+        "id": installation_id,
+        "account": {"login": login},
+        "suspended_at": suspended_at,
+    }
+
+
+@pytest.fixture
+def github_api_stub(rate_limits_json):
+    """Returns a running local stub of the Github REST API with 3 installations"""
+    with GithubApiStub(rate_limits_json, expires_at="2099-01-01T00:00:00Z") as stub:
+        stub.installations = [
+            installation(1, "org-a"),
+            installation(2, "org-b"),
+            installation(3, "org-c", suspended_at="2022-12-24T12:45:00Z"),
+        ]
+        yield stub
+
+
+@pytest.fixture
+def app_args(github_api_stub, private_key_str):
+    return Namespace(
+        github_auth_type="app",
+        github_account="app",
+        github_app_id=123123,
+        github_app_installation_id=None,
+        github_app_discover_installations=True,
+        github_app_private_key_path=private_key_str,
+        github_base_url=github_api_stub.base_url,
+        http_retries=0,
+    )
+
+
+@pytest.fixture
+def installations(app_args):
+    transport = GithubHttpTransport(retries=0)
+    yield GithubAppInstallations(
+        app_args,
+        transport,
+        lambda app: GithubRateLimitsRequester(app_args, transport, app=app),
+    )
+    transport.close()
+
+
+def requested_paths(stub):
+    return [(method, path) for method, path, __ in stub.requests]
+
+
+def test_discover_installations(mocker, github_api_stub, installations):
+    mocker.patch.object(github, "GITHUB_API_PAGE_SIZE", 2)
+    requesters = installations.discover()
+    assert list(requesters) == ["app/org-a", "app/org-b"]
+    assert [r._app.installation_id for r in requesters.values()] == [1, 2]
+    # The installation tokens are requested on the first poll.
+    assert all(requester.token is None for requester in requesters.values())
+    assert requested_paths(github_api_stub) == [
+        ("GET", "/app/installations?per_page=2&page=1"),
+        ("GET", "/app/installations?per_page=2&page=2"),
+    ]
+    assert github_api_stub.requests[0][2]["Authorization"].startswith("Bearer ")
+
+
+def test_discover_installations_without_login(github_api_stub, installations):
+    github_api_stub.installations = [
+        installation(1, "org-a"),
+        {"id": 4, "account": {"slug": "my-enterprise", "name": "My Enterprise"}},
+        {"id": 5, "account": None},
+    ]
+    requesters = installations.discover()
+    assert list(requesters) == ["app/org-a", "app/my-enterprise", "app/5"]
+    assert [r._app.installation_id for r in requesters.values()] == [1, 4, 5]
+
+
+def test_discover_installations_lazy_token(github_api_stub, installations):
+    requester = installations.discover()["app/org-b"]
+    requester.get_rate_limits()
+    assert requester.token.token == "installation-token"
+    assert requested_paths(github_api_stub)[1:] == [
+        ("POST", "/app/installations/2/access_tokens"),
+        ("GET", "/rate_limit"),
+    ]
+
+
+def test_discover_installations_interval(github_api_stub, installations):
+    requesters = installations.discover()
+    github_api_stub.installations = []
+    assert installations.discover() == requesters
+    assert len(github_api_stub.requests) == 1
+
+
+def test_discover_installations_eviction(github_api_stub, installations, caplog):
+    caplog.set_level(logging.INFO)
+    installations._interval = 0
+    requesters = installations.discover()
+    github_api_stub.installations = [
+        installation(4, "org-a"),
+        installation(2, "org-b"),
+    ]
+    discovered = installations.discover()
+    assert list(discovered) == ["app/org-a", "app/org-b"]
+    # Reinstalled (new installation id) App gets a new requester.
+    assert discovered["app/org-a"] is not requesters["app/org-a"]
+    assert discovered["app/org-b"] is requesters["app/org-b"]
+    github_api_stub.installations = [installation(2, "org-b")]
+    assert list(installations.discover()) == ["app/org-b"]
+    assert "Evicted Github App installation(s): ['app/org-a']" in caplog.text
+
+
+def test_rediscover_failed_installation(github_api_stub, installations):
+    requesters = installations.discover()
+    assert not installations.rediscover("app/org-c")
+    assert installations.rediscover("app/org-a")
+    # Listed again before the interval, the failed installation is retried.
+    discovered = installations.discover()
+    assert len(github_api_stub.requests) == 2
+    assert discovered["app/org-a"] is not requesters["app/org-a"]
+    assert discovered["app/org-b"] is requesters["app/org-b"]
+    assert installations.discover() == discovered
+    assert len(github_api_stub.requests) == 2
+
+
+def test_collector_uninstalled_installation_is_not_fatal(
+    github_api_stub, app_args, exception_queue
+):
+    github_api_stub.missing_installations.add(1)
+    collector = GithubRateLimitsCollector(app_args, exception_queue)
+
+    def limits():
+        core = collector.collect()[0]
+        return {s.labels["account"]: s.value for s in core.samples[::4]}
+
+    try:
+        assert limits() == {"app/org-a": 0.0, "app/org-b": 5000.0}
+        assert isinstance(collector.errors.failures["app/org-a"], requests.HTTPError)
+        github_api_stub.installations = github_api_stub.installations[1:]
+        # The uninstalled installation is evicted on the next poll.
+        assert limits() == {"app/org-b": 5000.0}
+        assert collector.errors.counts == {}
+    finally:
+        collector.stop()
+    assert exception_queue.equeue.empty()
+
+
+def test_collector_discover_installations(
+    github_api_stub, app_args, exception_queue
+):
+    args = Namespace(
+        github_accounts=[
+            Namespace(
+                github_auth_type="pat",
+                github_account="pat",
+                github_token="some-value",
+                github_base_url=github_api_stub.base_url,
+            ),
+            app_args,
+        ],
+        max_workers=2,
+        http_retries=0,
+    )
+    collector = GithubRateLimitsCollector(args, exception_queue)
+    try:
+        metrics = collector.collect()
+        assert {s.labels["account"] for s in metrics[0].samples} == {
+            "pat",
+            "app/org-a",
+            "app/org-b",
+        }
+        assert list(collector._token_manager.requesters) == [
+            "app/org-a",
+            "app/org-b",
+        ]
+        installations = GithubRequestsCollector(collector).collect()[3]
+        assert [(s.labels["account"], s.value) for s in installations.samples] == [
+            ("app", 2.0)
+        ]
+        github_api_stub.installations = github_api_stub.installations[1:]
+        collector._installations[0]._interval = 0
+        metrics = collector.collect()
+        assert {s.labels["account"] for s in metrics[0].samples} == {
+            "pat",
+            "app/org-b",
+        }
+        assert exception_queue.equeue.empty()
+    finally:
+        collector.stop()
+
+
+def test_collector_discover_installations_error(
+    github_api_stub, app_args, exception_queue
+):
+    collector = GithubRateLimitsCollector(app_args, exception_queue)
+    github_api_stub.status = 500
+    try:
+        collector.collect()
+    finally:
+        collector.stop()
+    assert isinstance(collector.errors.failures["app"], requests.HTTPError)
+    assert exception_queue.equeue.empty()
+
+
+@pytest.mark.parametrize("index, expected", [(0, []), (1, ["app/org-a", "app/org-b"])])
+def test_discover_installations_shard(
+    github_api_stub, app_args, index, expected
+):
+    transport = GithubHttpTransport(retries=0)
+    installations = GithubAppInstallations(
+        app_args,
+        transport,
+        lambda app: GithubRateLimitsRequester(app_args, transport, app=app),
+        shard=Shard(index, 2),
+    )
+    try:
+        assert list(installations.discover()) == expected
+        assert installations.listed == 2
+    finally:
+        transport.close()
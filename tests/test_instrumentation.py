@@ -0,0 +1,69 @@
+import pytest
+
+from github_rate_limits_exporter.instrumentation import (
+    LATENCY_BUCKETS,
+    ExporterInstruments,
+    LatencyHistogram,
+    github_endpoint,
+)
+
+
+@pytest.mark.parametrize(
+    "url, expected",
+    [
+        ("https://api.github.com/rate_limit", "/rate_limit"),
+        (
+            "https://api.github.com/app/installations/12345678/access_tokens",
+            "/app/installations/{id}/access_tokens",
+        ),
+        ("/app/installations?per_page=100&page=2", "/app/installations"),
+        ("/repos/org/repo-2/issues/42", "/repos/org/repo-2/issues/{id}"),
+    ],
+)
+def test_github_endpoint(url, expected):
+    assert github_endpoint(url) == expected
+
+
+def test_latency_histogram_buckets():
+    histogram = LatencyHistogram()
+    for seconds in (0.001, 0.005, 0.3, 60):
+        histogram.observe(seconds)
+    buckets = dict(histogram.buckets())
+    assert len(buckets) == len(LATENCY_BUCKETS) + 1
+    assert buckets["0.005"] == 2.0
+    assert buckets["0.25"] == 2.0
+    assert buckets["0.5"] == 3.0
+    assert buckets["+Inf"] == 4.0
+    assert histogram.count == 4
+    assert histogram.total == pytest.approx(60.306)
+
+
+def test_instruments_observe():
+    instruments = ExporterInstruments()
+    instruments.observe_request("https://api.github.com/rate_limit", "200", 0.1)
+    instruments.observe_request("https://api.github.com/rate_limit", "200", 0.2)
+    instruments.observe_request("https://api.github.com/rate_limit", "error", 5)
+    instruments.observe(instruments.scrapes, 0.01)
+    instruments.count_error(ValueError("invalid value"))
+    instruments.count_error(ValueError("invalid value"))
+    snapshot = instruments.snapshot()
+    assert {key: value.count for key, value in snapshot.requests.items()} == {
+        ("/rate_limit", "200"): 2,
+        ("/rate_limit", "error"): 1,
+    }
+    assert snapshot.scrapes.count == 1
+    assert snapshot.errors == {"ValueError": 2}
+    # The snapshot is a copy, unaffected by the following observations.
+    instruments.observe(instruments.scrapes, 0.01)
+    assert snapshot.scrapes.count == 1
+
+
+def test_instruments_disabled():
+    instruments = ExporterInstruments(enabled=False)
+    instruments.observe_request("/rate_limit", "200", 0.1)
+    instruments.observe(instruments.token_mints, 0.1)
+    instruments.count_error(ValueError("invalid value"))
+    snapshot = instruments.snapshot()
+    assert not snapshot.requests
+    assert snapshot.token_mints.count == 0
+    assert not snapshot.errors
@@ -0,0 +1,284 @@
+import json
+import os
+import socket
+import subprocess
+import sys
+import time
+import urllib.request
+
+import pytest
+import requests
+
+from github_rate_limits_exporter import main
+from github_rate_limits_exporter.exceptions import (
+    ERROR_STATUS_ON_EXCEPTIONS,
+    error_status_on_exceptions,
+)
+from tests.utils import GithubApiStub, RemoteWriteStub
+
+ROOT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+HEAVY_MODULES = ("github", "aiohttp", "prometheus_client", "cryptography", "jwt")
+
+
+def run_python(code, *args, **kwargs):
+    env = {**os.environ, "PYTHONPATH": ROOT_DIR}
+    return subprocess.run(
+        [sys.executable, *args, "-c", code],
+        capture_output=True,
+        text=True,
+        env=env,
+        timeout=60,
+        check=False,
+        **kwargs,
+    )
+
+
+def loaded_modules(statement):
+    code = (
+        "import sys\n"
+        f"{statement}\n"
+        f"print(json.dumps([m for m in {HEAVY_MODULES!r} if m in sys.modules]))"
+    )
+    result = run_python(f"import json\n{code}")
+    assert result.returncode == 0, result.stderr
+    return json.loads(result.stdout.splitlines()[-1])
+
+
+def free_port():
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+def test_import_is_lazy():
+    assert loaded_modules("import github_rate_limits_exporter") == []
+
+
+def test_version_is_lazy():
+    statement = (
+        "from github_rate_limits_exporter import main\n"
+        "try:\n"
+        "    main(['--version'])\n"
+        "except SystemExit:\n"
+        "    pass"
+    )
+    assert loaded_modules(statement) == []
+
+
+def test_pat_requester_does_not_import_pygithub():
+    statement = (
+        "import argparse\n"
+        "from github_rate_limits_exporter.github import GithubRateLimitsRequester\n"
+        "GithubRateLimitsRequester(argparse.Namespace("
+        "github_auth_type='pat', github_token='some-value'))"
+    )
+    assert loaded_modules(statement) == []
+
+
+def test_error_status_on_exceptions():
+    errors = error_status_on_exceptions()
+    assert errors[: len(ERROR_STATUS_ON_EXCEPTIONS)] == ERROR_STATUS_ON_EXCEPTIONS
+    # requests has been imported by the test modules.
+    assert requests.RequestException in errors
+
+
+def test_main_argument_error():
+    assert main(["--github-auth-type", "pat", "--github-account", "a"]) == 1
+
+
+@pytest.fixture
+def github_api_stub(rate_limits_json):
+    with GithubApiStub(rate_limits_json) as stub:
+        yield stub
+
+
+def test_first_metrics_scrape(github_api_stub):
+    port = free_port()
+    env = {**os.environ, "PYTHONPATH": ROOT_DIR}
+    started = time.perf_counter()
+    exporter = subprocess.Popen(
+        [
+            sys.executable,
+            "-m",
+            "github_rate_limits_exporter",
+            "--github-auth-type", "pat",
+            "--github-account", "startup",
+            "--github-token", "some-value",
+            "--github-base-url", github_api_stub.base_url,
+            "--bind-address", "127.0.0.1",
+            "--listen-port", str(port),
+        ],
+        env=env,
+    )
+    body = None
+    try:
+        while body is None and time.perf_counter() - started < 30:
+            try:
+                with urllib.request.urlopen(
+                    f"http://127.0.0.1:{port}/metrics", timeout=5
+                ) as response:
+                    body = response.read().decode()
+            except OSError:
+                assert exporter.poll() is None
+                time.sleep(0.05)
+    finally:
+        exporter.terminate()
+        exporter.wait(10)
+    assert body is not None
+    assert 'github_rate_limits_core{account="startup",type="limit"} 5000.0' in body
+    assert (
+        "github_rate_limits_exporter_github_request_duration_seconds_count"
+        '{endpoint="/rate_limit",status="200"}'
+    ) in body
+
+
+def test_pushed_observations_scrape():
+    port = free_port()
+    env = {**os.environ, "PYTHONPATH": ROOT_DIR}
+    exporter = subprocess.Popen(
+        [
+            sys.executable,
+            "-m",
+            "github_rate_limits_exporter",
+            "--push-observations",
+            "--bind-address", "127.0.0.1",
+            "--listen-port", str(port),
+        ],
+        env=env,
+    )
+    batch = json.dumps(
+        [
+            {
+                "account": "runners",
+                "resource": "core",
+                "headers": {"X-RateLimit-Limit": "5000", "X-RateLimit-Remaining": "42"},
+            }
+        ]
+    ).encode()
+    body = ""
+    started = time.perf_counter()
+    try:
+        while "runners" not in body and time.perf_counter() - started < 30:
+            try:
+                request = urllib.request.Request(
+                    f"http://127.0.0.1:{port}/api/v1/observations", data=batch
+                )
+                with urllib.request.urlopen(request, timeout=5) as response:
+                    assert response.status == 202
+                with urllib.request.urlopen(
+                    f"http://127.0.0.1:{port}/metrics", timeout=5
+                ) as response:
+                    body = response.read().decode()
+            except OSError:
+                assert exporter.poll() is None
+                time.sleep(0.05)
+    finally:
+        exporter.terminate()
+        exporter.wait(10)
+    assert 'github_rate_limits_core{account="runners",type="remaining"} 42.0' in body
+
+
+def test_asyncio_http_server_scrape(github_api_stub):
+    port = free_port()
+    env = {**os.environ, "PYTHONPATH": ROOT_DIR}
+    exporter = subprocess.Popen(
+        [
+            sys.executable,
+            "-m",
+            "github_rate_limits_exporter",
+            "--github-auth-type", "pat",
+            "--github-account", "startup",
+            "--github-token", "some-value",
+            "--github-base-url", github_api_stub.base_url,
+            "--poll-interval", "60",
+            "--exposition-cache",
+            "--http-server", "asyncio",
+            "--bind-address", "127.0.0.1",
+            "--listen-port", str(port),
+        ],
+        env=env,
+    )
+    body = None
+    started = time.perf_counter()
+    try:
+        while body is None and time.perf_counter() - started < 30:
+            try:
+                with urllib.request.urlopen(
+                    f"http://127.0.0.1:{port}/-/ready", timeout=5
+                ) as response:
+                    assert response.status == 200
+                with urllib.request.urlopen(
+                    f"http://127.0.0.1:{port}/metrics", timeout=5
+                ) as response:
+                    body = response.read().decode()
+            except OSError:
+                assert exporter.poll() is None
+                time.sleep(0.05)
+    finally:
+        exporter.terminate()
+        exporter.wait(10)
+    assert body is not None
+    assert 'github_rate_limits_core{account="startup",type="limit"} 5000.0' in body
+
+
+def test_remote_write_push(github_api_stub, rate_limits_json):
+    with RemoteWriteStub() as receiver:
+        exporter = subprocess.Popen(
+            [
+                sys.executable,
+                "-m",
+                "github_rate_limits_exporter",
+                "--github-auth-type", "pat",
+                "--github-account", "startup",
+                "--github-token", "some-value",
+                "--github-base-url", github_api_stub.base_url,
+                "--poll-interval", "60",
+                "--remote-write-url", receiver.url,
+                "--bind-address", "127.0.0.1",
+                "--listen-port", str(free_port()),
+            ],
+            env={**os.environ, "PYTHONPATH": ROOT_DIR},
+        )
+        started = time.perf_counter()
+        try:
+            while not receiver.samples and time.perf_counter() - started < 30:
+                assert exporter.poll() is None
+                time.sleep(0.05)
+        finally:
+            exporter.terminate()
+            exporter.wait(10)
+    assert (
+        {
+            "__name__": "github_rate_limits_core",
+            "account": "startup",
+            "type": "limit",
+        },
+        5000.0,
+    ) in [(labels, value) for labels, value, _ in receiver.samples]
+    # Only the rate-limits series, not the exporter's own metrics.
+    assert {labels["__name__"] for labels, *_ in receiver.samples} == {
+        f"github_rate_limits_{resource}" for resource in rate_limits_json["resources"]
+    }
+
+
+def test_once_below_threshold(github_api_stub):
+    result = subprocess.run(
+        [
+            sys.executable,
+            "-m",
+            "github_rate_limits_exporter",
+            "--once",
+            "--github-auth-type", "pat",
+            "--github-account", "startup",
+            "--github-token", "some-value",
+            "--github-base-url", github_api_stub.base_url,
+            "--min-remaining", "core=500,search=20",
+        ],
+        capture_output=True,
+        text=True,
+        env={**os.environ, "PYTHONPATH": ROOT_DIR},
+        timeout=60,
+        check=False,
+    )
+    assert result.returncode == 2, result.stderr
+    assert 'github_rate_limits_search{account="startup",type="remaining"}' in result.stdout
@@ -0,0 +1,87 @@
+from contextlib import nullcontext as does_not_raise
+
+import pytest
+
+from github_rate_limits_exporter.models import RateLimit, RateLimitsSnapshot
+
+
+@pytest.mark.parametrize(
+    "data, expected",
+    [
+        (
+            {"limit": 5000, "used": 1, "remaining": 4999, "reset": 1372700873},
+            RateLimit(5000.0, 1.0, 4999.0, 1372700873.0),
+        ),
+        (
+            {"limit": 5000, "remaining": 4990, "reset": 1372700873},
+            RateLimit(5000.0, 10.0, 4990.0, 1372700873.0),
+        ),
+        ({}, RateLimit()),
+    ],
+)
+def test_rate_limit_from_dict(data, expected):
+    assert RateLimit.from_dict(data) == expected
+
+
+@pytest.mark.parametrize(
+    "data, expectation",
+    [
+        ([], pytest.raises(ValueError)),
+        ({"limit": "unlimited"}, pytest.raises(ValueError)),
+        ({"limit": None}, pytest.raises(ValueError)),
+        ({"limit": "10"}, does_not_raise()),
+    ],
+)
+def test_rate_limit_from_dict_errors(data, expectation):
+    with expectation:
+        RateLimit.from_dict(data)
+
+
+def test_rate_limits_snapshot_from_json(rate_limits_json, rate_limits_resources):
+    snapshot = RateLimitsSnapshot.from_json(rate_limits_json)
+    assert snapshot == RateLimitsSnapshot.from_json(rate_limits_resources)
+    assert list(snapshot) == [
+        "core",
+        "search",
+        "graphql",
+        "integration_manifest",
+        "code_scanning_upload",
+    ]
+    assert len(snapshot) == 5
+    assert snapshot["search"] == RateLimit(30.0, 12.0, 18.0, 1372697452.0)
+    assert snapshot.get("scim") is None
+    assert "resources" not in snapshot
+    assert repr(snapshot).startswith("RateLimitsSnapshot(")
+
+
+def test_rate_limits_snapshot_is_slotted():
+    snapshot = RateLimitsSnapshot()
+    assert not hasattr(snapshot, "__dict__")
+    with pytest.raises(AttributeError):
+        snapshot.extra = True
+
+
+@pytest.mark.parametrize(
+    "data",
+    [
+        [],
+        "rate_limit",
+        {"core": []},
+        {"resources": []},
+        {"resources": None},
+        {"resources": "core"},
+    ],
+)
+def test_rate_limits_snapshot_from_json_errors(data):
+    with pytest.raises(ValueError):
+        RateLimitsSnapshot.from_json(data)
+
+
+def test_rate_limits_snapshot_with_timestamp(rate_limits_resources):
+    snapshot = RateLimitsSnapshot.from_json(rate_limits_resources)
+    assert snapshot.timestamp is None
+    stamped = snapshot.with_timestamp(1000.0)
+    assert stamped.timestamp == 1000.0
+    assert snapshot.timestamp is None
+    assert stamped == snapshot
+    assert stamped is not snapshot
@@ -0,0 +1,88 @@
+import pytest
+
+from github_rate_limits_exporter.models import RateLimit, RateLimitsSnapshot
+from github_rate_limits_exporter.observations import (
+    RateLimitObservations,
+    parse_rate_limit_headers,
+)
+
+TIMESTAMP = 1671885900.0
+RESET = TIMESTAMP + 3600
+
+
+def rate_limit(used, limit=5000.0):
+    return RateLimit(limit, used, limit - used, RESET)
+
+
+@pytest.mark.parametrize(
+    "headers, expected",
+    [
+        (
+            {
+                "X-RateLimit-Limit": "5000",
+                "X-RateLimit-Remaining": "4990",
+                "X-RateLimit-Used": "10",
+                "X-RateLimit-Reset": str(int(RESET)),
+                "X-RateLimit-Resource": "search",
+            },
+            ("search", rate_limit(10.0)),
+        ),
+        (
+            {"x-ratelimit-limit": 5000, "x-ratelimit-remaining": 4990},
+            ("core", RateLimit(5000.0, 10.0, 4990.0, 0.0)),
+        ),
+        ({"Content-Type": "application/json"}, None),
+    ],
+)
+def test_parse_rate_limit_headers(headers, expected):
+    assert parse_rate_limit_headers(headers) == expected
+
+
+def test_parse_rate_limit_headers_invalid():
+    with pytest.raises(ValueError):
+        parse_rate_limit_headers({"X-RateLimit-Limit": "many"})
+
+
+def test_observations_newest_wins():
+    observations = RateLimitObservations()
+    assert observations.update(
+        [
+            ("account", "core", rate_limit(20.0), TIMESTAMP + 1),
+            ("account", "core", rate_limit(10.0), TIMESTAMP),
+            ("account", "search", rate_limit(1.0, 30.0), TIMESTAMP),
+        ]
+    ) == 2
+    snapshot = observations.snapshots()["account"]
+    assert dict(snapshot) == {"core": rate_limit(20.0), "search": rate_limit(1.0, 30.0)}
+    assert snapshot.timestamp == TIMESTAMP + 1
+    assert len(observations) == 2
+    # Unchanged accounts keep their snapshot.
+    assert observations.snapshots()["account"] is snapshot
+    observations.update([("account", "core", rate_limit(30.0), TIMESTAMP + 2)])
+    assert observations.snapshots()["account"]["core"] == rate_limit(30.0)
+
+
+def test_observations_merge():
+    observations = RateLimitObservations()
+    observations.update(
+        [
+            ("fetched", "core", rate_limit(20.0), TIMESTAMP + 60),
+            ("fetched", "search", rate_limit(1.0, 30.0), TIMESTAMP - 60),
+            ("observed", "core", rate_limit(5.0), TIMESTAMP),
+        ]
+    )
+    fetched = RateLimitsSnapshot(
+        {"core": rate_limit(10.0), "search": rate_limit(2.0, 30.0)},
+        timestamp=TIMESTAMP,
+    )
+    merged = observations.merge({"fetched": fetched, "failed": None})
+    assert list(merged) == ["fetched", "failed", "observed"]
+    assert dict(merged["fetched"]) == {
+        "core": rate_limit(20.0),
+        "search": rate_limit(2.0, 30.0),
+    }
+    assert merged["fetched"].timestamp == TIMESTAMP + 60
+    assert merged["failed"] is None
+    assert merged["observed"]["core"] == rate_limit(5.0)
+    # The merged snapshot is reused until any of its sources changes.
+    assert observations.merge({"fetched": fetched})["fetched"] is merged["fetched"]
@@ -0,0 +1,115 @@
+import json
+from argparse import Namespace
+
+import pytest
+import requests
+
+from github_rate_limits_exporter.models import RateLimit, RateLimitsSnapshot
+from github_rate_limits_exporter.oneshot import (
+    RemainingThreshold,
+    below_thresholds,
+    parse_thresholds,
+    run_once,
+)
+from tests.utils import GithubApiStub, PushgatewayStub
+
+
+@pytest.fixture
+def github_api_stub(rate_limits_json):
+    with GithubApiStub(rate_limits_json) as stub:
+        yield stub
+
+
+@pytest.fixture
+def once_args(github_api_stub):
+    def make(**kwargs):
+        account = dict(
+            github_auth_type="pat",
+            github_token="some-value",
+            github_base_url=github_api_stub.base_url,
+        )
+        options = dict(
+            github_accounts=[
+                Namespace(github_account=name, **account) for name in ("a", "b")
+            ],
+            http_retries=0,
+            output_format="exposition",
+            pushgateway_url=None,
+            min_remaining=[],
+        )
+        options.update(kwargs)
+        return Namespace(**options)
+
+    return make
+
+
+def test_parse_thresholds():
+    assert parse_thresholds("core=500, search=10%,") == [
+        RemainingThreshold("core", 500.0),
+        RemainingThreshold("search", 10.0, percent=True),
+    ]
+    assert parse_thresholds("") == []
+    assert str(RemainingThreshold("search", 10.0, percent=True)) == "search=10%"
+
+
+@pytest.mark.parametrize("value", ["core", "core=", "=5", "core=-1", "core=many%"])
+def test_parse_invalid_thresholds(value):
+    with pytest.raises(ValueError, match="Invalid remaining threshold"):
+        parse_thresholds(value)
+
+
+def test_below_thresholds():
+    limits = {
+        "a": RateLimitsSnapshot(
+            {
+                "core": RateLimit(5000, 4600, 400, 0),
+                "search": RateLimit(30, 25, 5, 0),
+            }
+        ),
+        "b": None,
+    }
+    thresholds = parse_thresholds("core=500,search=10%,graphql=1")
+    assert below_thresholds(limits, thresholds) == [
+        {"account": "a", "resource": "core", "remaining": 400, "threshold": "core=500"}
+    ]
+    assert below_thresholds(limits, parse_thresholds("search=20%")) == [
+        {"account": "a", "resource": "search", "remaining": 5, "threshold": "search=20%"}
+    ]
+
+
+def test_run_once_exposition(once_args, github_api_stub, exception_queue, capsys):
+    assert run_once(once_args(), exception_queue) == 0
+    output = capsys.readouterr().out
+    assert 'github_rate_limits_core{account="a",type="limit"} 5000.0' in output
+    assert 'github_rate_limits_core{account="b",type="remaining"} 4999.0' in output
+    assert len(github_api_stub.requests) == 2
+
+
+def test_run_once_json_below_threshold(once_args, exception_queue, capsys):
+    args = once_args(output_format="json", min_remaining=parse_thresholds("search=20"))
+    assert run_once(args, exception_queue) == 2
+    document = json.loads(capsys.readouterr().out)
+    assert document["accounts"]["a"]["core"] == {
+        "limit": 5000.0,
+        "used": 1.0,
+        "remaining": 4999.0,
+        "reset": 1372700873.0,
+    }
+    assert [breach["account"] for breach in document["below_threshold"]] == ["a", "b"]
+
+
+def test_run_once_request_error(once_args, github_api_stub, exception_queue, capsys):
+    github_api_stub.status = 401
+    with pytest.raises(requests.RequestException):
+        run_once(once_args(), exception_queue)
+    assert capsys.readouterr().out == ""
+
+
+def test_run_once_pushgateway(once_args, exception_queue, capsys):
+    with PushgatewayStub() as pushgateway:
+        assert run_once(once_args(pushgateway_url=pushgateway.url), exception_queue) == 0
+    assert capsys.readouterr().out == ""
+    [(method, path, body)] = pushgateway.requests
+    assert (method, path) == ("PUT", "/metrics/job/github_rate_limits_exporter")
+    # Untimestamped samples, rejected by the Pushgateway otherwise.
+    assert 'github_rate_limits_core{account="a",type="limit"} 5000.0\n' in body
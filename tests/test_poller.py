@@ -0,0 +1,69 @@
+import threading
+from contextlib import nullcontext as does_not_raise
+from unittest.mock import Mock
+
+import pytest
+
+from github_rate_limits_exporter.poller import GithubRateLimitsPoller
+
+
+@pytest.mark.parametrize(
+    "interval, expectation",
+    [
+        (0, pytest.raises(ValueError)),
+        (-1, pytest.raises(ValueError)),
+        ("10", pytest.raises(ValueError)),
+        (0.5, does_not_raise()),
+        (15, does_not_raise()),
+    ],
+)
+def test_poller_interval(interval, expectation):
+    with expectation:
+        GithubRateLimitsPoller(Mock(), interval)
+
+
+def test_poller_snapshot():
+    fetch = Mock(side_effect=["first", None, "third"])
+    poller = GithubRateLimitsPoller(fetch, 60)
+    assert poller.snapshot is None
+    assert not poller.wait_ready(timeout=0)
+    poller.poll()
+    assert poller.snapshot == "first"
+    assert poller.wait_ready(timeout=0)
+    # failed polls keep serving the previous snapshot
+    poller.poll()
+    assert poller.snapshot == "first"
+    poller.poll()
+    assert poller.snapshot == "third"
+    assert fetch.call_count == 3
+
+
+def test_poller_thread_start_stop():
+    fetch = Mock(return_value="snapshot")
+    poller = GithubRateLimitsPoller(fetch, 60)
+    poller.start()
+    assert poller.wait_ready(timeout=5)
+    poller.stop(timeout=5)
+    assert not poller.is_alive()
+    assert poller.snapshot == "snapshot"
+    assert fetch.call_count == 1
+
+
+def test_poller_schedule(monkeypatch):
+    errors = []
+    monkeypatch.setattr(threading, "excepthook", errors.append)
+    fetch = Mock(return_value="snapshot")
+    waits = []
+
+    def schedule():
+        waits.append(len(waits))
+        if len(waits) == 3:
+            poller.stop()
+        return 0.0
+
+    poller = GithubRateLimitsPoller(fetch, 60, schedule=schedule)
+    poller.start()
+    poller.join(timeout=5)
+    assert not poller.is_alive()
+    assert fetch.call_count == 3
+    assert errors == []
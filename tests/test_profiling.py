@@ -0,0 +1,157 @@
+import marshal
+import pstats
+import threading
+
+import pytest
+
+from github_rate_limits_exporter.profiling import (
+    HEAP_PATH,
+    PROFILE_PATH,
+    StackSampler,
+    heap_collapsed,
+    heap_report,
+    make_pprof_routes,
+    trace_allocations,
+)
+from github_rate_limits_exporter.utils import parse_networks
+
+LOCALHOST = parse_networks("127.0.0.0/8,::1")
+
+
+def busy_loop(stopped):
+    while not stopped.is_set():
+        sum(range(1000))
+
+
+@pytest.fixture
+def busy_thread():
+    stopped = threading.Event()
+    thread = threading.Thread(target=busy_loop, args=(stopped,))
+    thread.start()
+    yield thread
+    stopped.set()
+    thread.join()
+
+
+def call(app, query="", remote_addr="127.0.0.1", method="GET"):
+    responses = []
+
+    def start_response(status, headers):
+        responses.append((status, dict(headers)))
+
+    body = b"".join(
+        app(
+            {
+                "REQUEST_METHOD": method,
+                "QUERY_STRING": query,
+                "REMOTE_ADDR": remote_addr,
+            },
+            start_response,
+        )
+    )
+    status, headers = responses[0]
+    return status, headers, body
+
+
+def test_stack_sampler(busy_thread):
+    sampler = StackSampler(interval=0.001)
+    sampler.run(0.2)
+    assert sampler.stacks
+    assert "busy_loop (test_profiling.py:" in sampler.collapsed()
+    stats = sampler.stats()
+    busy = [key for key in stats if key[2] == "busy_loop"]
+    assert len(busy) == 1
+    calls, _, own, cumulative, callers = stats[busy[0]]
+    assert calls > 0
+    assert 0 < own <= cumulative
+    assert [key[2] for key in callers] == ["run"]
+    assert "busy_loop" in sampler.report()
+
+
+def test_stack_sampler_without_samples():
+    assert StackSampler().report() == "0 samples\n"
+
+
+def test_trace_allocations():
+    allocated = []
+
+    def allocate():
+        allocated.append(bytearray(256 * 1024))
+
+    thread = threading.Timer(0.01, allocate)
+    thread.start()
+    start, end = trace_allocations(0.2)
+    thread.join()
+    assert "test_profiling.py" in heap_report(start, end)
+    collapsed = heap_collapsed(start, end)
+    assert any(
+        line.split(";")[-1].startswith("test_profiling.py")
+        and int(line.rsplit(" ", 1)[1]) >= 256 * 1024
+        for line in collapsed.splitlines()
+    )
+
+
+@pytest.mark.parametrize(
+    "query, content_type, filename",
+    [
+        ("seconds=0.1", "text/plain; charset=utf-8", None),
+        ("seconds=0.1&format=collapsed", "text/plain; charset=utf-8", "profile"),
+        ("seconds=0.1&format=pstats", "application/octet-stream", "profile"),
+    ],
+)
+def test_profile_route(busy_thread, tmp_path, query, content_type, filename):
+    status, headers, body = call(make_pprof_routes(LOCALHOST)[PROFILE_PATH], query)
+    assert status == "200 OK"
+    assert headers["Content-Type"] == content_type
+    assert headers["Content-Length"] == str(len(body))
+    if filename is None:
+        assert "Content-Disposition" not in headers
+        assert b"busy_loop" in body
+    else:
+        assert filename in headers["Content-Disposition"]
+    if query.endswith("pstats"):
+        # The profile is loadable by the standard pstats module.
+        path = tmp_path / "profile.pstats"
+        path.write_bytes(body)
+        stats = pstats.Stats(str(path))
+        assert any(key[2] == "busy_loop" for key in stats.stats)
+        assert marshal.loads(body) == stats.stats
+
+
+def test_heap_route():
+    status, headers, body = call(
+        make_pprof_routes(LOCALHOST)[HEAP_PATH], "seconds=0.05&format=collapsed"
+    )
+    assert status == "200 OK"
+    assert "heap.collapsed" in headers["Content-Disposition"]
+
+
+@pytest.mark.parametrize(
+    "query, remote_addr, method, expected",
+    [
+        ("seconds=0.01", "10.0.0.1", "GET", "403 Forbidden"),
+        ("seconds=0.01", "", "GET", "403 Forbidden"),
+        ("seconds=0.01", "::ffff:127.0.0.1", "POST", "405 Method Not Allowed"),
+        ("seconds=0", "::1", "GET", "400 Bad Request"),
+        ("seconds=301", "127.0.0.1", "GET", "400 Bad Request"),
+        ("seconds=ten", "127.0.0.1", "GET", "400 Bad Request"),
+        ("seconds=0.01&format=svg", "127.0.0.1", "GET", "400 Bad Request"),
+    ],
+)
+def test_pprof_routes_errors(query, remote_addr, method, expected):
+    for app in make_pprof_routes(LOCALHOST).values():
+        assert call(app, query, remote_addr, method)[0] == expected
+
+
+def test_pprof_routes_single_profile():
+    routes = make_pprof_routes(LOCALHOST)
+    statuses = []
+    thread = threading.Thread(
+        target=lambda: statuses.append(call(routes[PROFILE_PATH], "seconds=0.5")[0])
+    )
+    thread.start()
+    thread.join(0.1)
+    assert call(routes[HEAP_PATH], "seconds=0.01")[0] == "409 Conflict"
+    thread.join()
+    assert statuses == ["200 OK"]
+    assert call(routes[HEAP_PATH], "seconds=0.01")[0] == "200 OK"
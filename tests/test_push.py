@@ -0,0 +1,133 @@
+import io
+import json
+
+import pytest
+
+from github_rate_limits_exporter.constants import PUSH_MAX_BATCH_SIZE
+from github_rate_limits_exporter.observations import RateLimitObservations
+from github_rate_limits_exporter.push import (
+    ObservationsPushQueue,
+    make_push_app,
+    parse_observations,
+)
+
+TIMESTAMP = 1671885900.0
+
+
+def observation(used, account="account", resource="core", timestamp=TIMESTAMP):
+    return {
+        "account": account,
+        "resource": resource,
+        "timestamp": timestamp,
+        "headers": {
+            "X-RateLimit-Limit": "5000",
+            "X-RateLimit-Remaining": str(5000 - used),
+            "X-RateLimit-Used": str(used),
+        },
+    }
+
+
+def post(app, body, method="POST", length=None):
+    status = []
+    environ = {
+        "REQUEST_METHOD": method,
+        "PATH_INFO": "/api/v1/observations",
+        "CONTENT_LENGTH": str(len(body) if length is None else length),
+        "wsgi.input": io.BytesIO(body),
+    }
+    response = b"".join(app(environ, lambda line, headers: status.append(line)))
+    return status[0], json.loads(response)
+
+
+def test_parse_observations():
+    batch = parse_observations(
+        json.dumps([observation(1, resource="search"), {"status": 200}]).encode()
+    )
+    assert [(account, resource) for account, resource, _, _ in batch] == [
+        ("account", "search")
+    ]
+
+
+@pytest.mark.parametrize(
+    "body",
+    [
+        b"",
+        b"{}",
+        json.dumps([{"headers": {"X-RateLimit-Limit": "1"}}]).encode(),
+        json.dumps([observation(1)] * (PUSH_MAX_BATCH_SIZE + 1)).encode(),
+    ],
+)
+def test_parse_observations_invalid(body):
+    with pytest.raises(ValueError):
+        parse_observations(body)
+
+
+def test_push_queue_is_bounded_and_batched(exception_queue):
+    observations = RateLimitObservations()
+    push_queue = ObservationsPushQueue(observations, exception_queue, maxsize=2)
+    batches = [parse_observations(json.dumps([observation(used)]).encode()) for used in (1, 2, 3)]
+    assert push_queue.submit(batches[0])
+    assert push_queue.submit(batches[1])
+    assert not push_queue.submit(batches[2])
+    assert (push_queue.accepted, push_queue.rejected) == (2, 1)
+    assert len(observations) == 0
+    assert push_queue.drain() == 2
+    assert observations.snapshots()["account"]["core"].used == 2.0
+    assert push_queue.drain() == 0
+
+
+def test_push_queue_thread(exception_queue):
+    observations = RateLimitObservations()
+    push_queue = ObservationsPushQueue(observations, exception_queue)
+    push_queue.start()
+    push_queue.submit(parse_observations(json.dumps([observation(7)]).encode()))
+    push_queue.stop(timeout=5)
+    assert not push_queue.is_alive()
+    assert observations.snapshots()["account"]["core"].used == 7.0
+
+
+def test_observations_are_capped():
+    observations = RateLimitObservations(max_entries=2)
+    batch = parse_observations(
+        json.dumps(
+            [
+                observation(1, account="a"),
+                observation(1, account="b"),
+                observation(1, account="c"),
+                observation(2, account="a", timestamp=TIMESTAMP + 1),
+            ]
+        ).encode()
+    )
+    assert observations.update(batch) == 3
+    assert (len(observations), observations.dropped) == (2, 1)
+    assert sorted(observations.snapshots()) == ["a", "b"]
+
+
+def test_push_app(exception_queue):
+    push_queue = ObservationsPushQueue(
+        RateLimitObservations(), exception_queue, maxsize=1
+    )
+    app = make_push_app(push_queue)
+    body = json.dumps([observation(1), observation(2, resource="graphql")]).encode()
+    assert post(app, body) == (
+        "202 Accepted",
+        {"status": "success", "data": {"accepted": 2}},
+    )
+    status, response = post(app, body)
+    assert status == "503 Service Unavailable"
+    assert response["status"] == "error"
+
+
+@pytest.mark.parametrize(
+    "body, method, length, status",
+    [
+        (b"[]", "GET", None, "405 Method Not Allowed"),
+        (b"[1]", "POST", None, "400 Bad Request"),
+        (b"[]", "POST", "many", "400 Bad Request"),
+        (b"[]", "POST", 2 * 1024 * 1024, "413 Payload Too Large"),
+        (b"[]", "POST", None, "202 Accepted"),
+    ],
+)
+def test_push_app_errors(exception_queue, body, method, length, status):
+    app = make_push_app(ObservationsPushQueue(RateLimitObservations(), exception_queue))
+    assert post(app, body, method, length)[0] == status
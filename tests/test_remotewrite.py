@@ -0,0 +1,156 @@
+import time
+
+import pytest
+from prometheus_client import CollectorRegistry, Gauge
+from prometheus_client.core import GaugeMetricFamily
+
+from github_rate_limits_exporter.remotewrite import (
+    RemoteWriter,
+    encode_write_request,
+    metrics_to_series,
+)
+from tests.utils import RemoteWriteStub, decode_write_request
+
+NOW_MS = 1671885900000
+
+
+class Versioned:
+    def __init__(self, accounts=1):
+        self.version = 1
+        self.registry = CollectorRegistry()
+        self.gauge = Gauge(
+            "github_rate_limits_core",
+            "API requests in core per hour",
+            ["account", "type"],
+            registry=self.registry,
+        )
+        for account in range(accounts):
+            self.gauge.labels(f"account-{account}", "remaining").set(account)
+
+
+@pytest.fixture
+def remote_write_stub():
+    with RemoteWriteStub() as stub:
+        yield stub
+
+
+@pytest.fixture
+def writer(remote_write_stub):
+    source = Versioned()
+    writer = RemoteWriter(
+        source.registry,
+        lambda: source.version,
+        remote_write_stub.url,
+        retries=2,
+    )
+    writer.source = source
+    yield writer
+    writer.stop()
+
+
+def test_encode_write_request():
+    series = [
+        ((("__name__", "up"), ("job", "exporter")), 1.0, NOW_MS),
+        ((("__name__", "down"),), -0.5, 1),
+    ]
+    assert decode_write_request(encode_write_request(series)) == [
+        ({"__name__": "up", "job": "exporter"}, 1.0, NOW_MS),
+        ({"__name__": "down"}, -0.5, 1),
+    ]
+    assert encode_write_request([]) == b""
+
+
+def test_metrics_to_series():
+    metric = GaugeMetricFamily("limit", "Limit", labels=["type", "account"])
+    metric.add_metric(["used", "a"], 12, timestamp=1671885900.5)
+    metric.add_metric(["limit", "a"], 30)
+    assert metrics_to_series([metric], NOW_MS) == [
+        ((("__name__", "limit"), ("account", "a"), ("type", "used")), 12.0, 1671885900500),
+        ((("__name__", "limit"), ("account", "a"), ("type", "limit")), 30.0, NOW_MS),
+    ]
+
+
+def test_remote_writer_push(writer, remote_write_stub):
+    assert writer.enqueue() == 1
+    assert writer.flush() == 1
+    path, headers = remote_write_stub.requests[0]
+    assert path == "/api/v1/write"
+    assert headers["Content-Encoding"] == "snappy"
+    assert headers["Content-Type"] == "application/x-protobuf"
+    assert headers["X-Prometheus-Remote-Write-Version"] == "0.1.0"
+    [(labels, value, timestamp)] = remote_write_stub.samples
+    assert labels == {
+        "__name__": "github_rate_limits_core",
+        "account": "account-0",
+        "type": "remaining",
+    }
+    assert value == 0.0
+    assert abs(timestamp / 1000 - time.time()) < 60
+
+
+def test_remote_writer_once_per_version(writer, remote_write_stub):
+    writer.enqueue()
+    assert writer.enqueue() == 0
+    writer.source.version = 2
+    writer.source.gauge.labels("account-0", "remaining").set(7)
+    assert writer.enqueue() == 1
+    writer.flush()
+    assert [value for _, value, _ in remote_write_stub.samples] == [0.0, 7.0]
+    assert writer.sent == 2
+
+
+def test_remote_writer_retries(writer, remote_write_stub):
+    remote_write_stub.failures = 2
+    writer.enqueue()
+    assert writer.flush() == 1
+    assert writer.retried == 2
+    assert len(remote_write_stub.requests) == 3
+    assert len(remote_write_stub.samples) == 1
+
+
+def test_remote_writer_retries_exhausted(writer, remote_write_stub):
+    remote_write_stub.failures = 3
+    writer.enqueue()
+    assert writer.flush() == 0
+    assert (writer.sent, writer.dropped) == (0, 1)
+    assert len(writer) == 0
+
+
+def test_remote_writer_rejected(writer, remote_write_stub):
+    remote_write_stub.status = 400
+    writer.enqueue()
+    assert writer.flush() == 0
+    assert writer.dropped == 1
+    # Not recoverable, never retried.
+    assert len(remote_write_stub.requests) == 1
+
+
+def test_remote_writer_bounded_queue(remote_write_stub):
+    source = Versioned(accounts=10)
+    writer = RemoteWriter(
+        source.registry,
+        lambda: source.version,
+        remote_write_stub.url,
+        max_samples=15,
+    )
+    writer.enqueue()
+    source.version = 2
+    writer.enqueue()
+    assert (len(writer), writer.dropped) == (15, 5)
+    writer.stop()
+    assert len(remote_write_stub.samples) == 15
+
+
+def test_remote_writer_batches(remote_write_stub, caplog):
+    source = Versioned(accounts=10000)
+    writer = RemoteWriter(
+        source.registry, lambda: source.version, remote_write_stub.url
+    )
+    assert writer.enqueue() == 10000
+    assert writer.flush() == 10000
+    writer.stop()
+    # Batched: 10000 samples in 5 requests of (at most) 2000 samples.
+    assert (writer.sent, writer.dropped, len(writer)) == (10000, 0, 0)
+    assert len(remote_write_stub.samples) == 10000
+    assert len(remote_write_stub.requests) == 5
+    assert "Remote-write failed" not in caplog.text
@@ -0,0 +1,105 @@
+from contextlib import nullcontext as does_not_raise
+
+import pytest
+
+from github_rate_limits_exporter.models import RateLimit, RateLimitsSnapshot
+from github_rate_limits_exporter.scheduler import AccountSchedule, AdaptivePollScheduler
+
+NOW = 1000.0
+TIMESTAMP = 1671885900.0
+
+
+def snapshot(used, remaining, reset=TIMESTAMP + 3600, limit=5000.0):
+    return RateLimitsSnapshot(
+        {"core": RateLimit(limit, used, remaining, reset)}, timestamp=TIMESTAMP
+    )
+
+
+@pytest.mark.parametrize(
+    "bounds, expectation",
+    [
+        ((0, 10), pytest.raises(ValueError)),
+        ((20, 10), pytest.raises(ValueError)),
+        ((10, 10), does_not_raise()),
+        ((5, 300), does_not_raise()),
+    ],
+)
+def test_account_schedule_bounds(bounds, expectation):
+    with expectation:
+        AccountSchedule(*bounds)
+
+
+@pytest.mark.parametrize(
+    "used, remaining, interval",
+    [
+        (0.0, 5000.0, 300.0),
+        (2500.0, 2500.0, 152.5),
+        (5000.0, 0.0, 5.0),
+    ],
+)
+def test_account_schedule_remaining_fraction(used, remaining, interval):
+    schedule = AccountSchedule(5, 300)
+    assert schedule.update(snapshot(used, remaining), NOW) == interval
+    assert schedule.next_poll_at == NOW + interval
+
+
+def test_account_schedule_burn_rate():
+    schedule = AccountSchedule(5, 300)
+    schedule.update(snapshot(100.0, 4900.0), NOW)
+    # 10 requests/second, exhausted in 480 seconds, polled 4 times before.
+    assert schedule.update(snapshot(700.0, 4300.0), NOW + 60) == 4300.0 / 10 / 4
+
+
+def test_account_schedule_new_window_resets_burn_rate():
+    schedule = AccountSchedule(5, 300)
+    schedule.update(snapshot(4000.0, 1000.0), NOW)
+    interval = schedule.update(
+        snapshot(100.0, 4900.0, reset=TIMESTAMP + 7200), NOW + 60
+    )
+    assert interval == pytest.approx(5 + 295 * 4900 / 5000)
+
+
+def test_account_schedule_polls_after_reset():
+    schedule = AccountSchedule(5, 300)
+    assert schedule.update(snapshot(10.0, 4990.0, reset=TIMESTAMP + 42), NOW) == 43.0
+    # Idle buckets are not polled after their reset.
+    assert schedule.update(snapshot(0.0, 5000.0, reset=TIMESTAMP + 42), NOW) == 300.0
+
+
+def test_account_schedule_failed_poll():
+    schedule = AccountSchedule(5, 300, interval=60)
+    assert schedule.update(None, NOW) == 60.0
+    assert AccountSchedule(5, 30, interval=60).update(None, NOW) == 30.0
+
+
+def test_scheduler_due_and_wait():
+    scheduler = AdaptivePollScheduler(5, 300, interval=60)
+    scheduler.set_bounds("fast", 1, 10)
+    assert scheduler.wait(NOW) == 300.0
+    assert scheduler.due(["fast", "slow"], NOW) == ["fast", "slow"]
+    scheduler.update({"fast": snapshot(0.0, 5000.0), "slow": None}, NOW)
+    assert scheduler.intervals == {"fast": 10.0, "slow": 60.0}
+    assert scheduler.due(["fast", "slow"], NOW + 9) == []
+    assert scheduler.wait(NOW + 9) == 1.0
+    assert scheduler.due(["fast", "slow"], NOW + 10) == ["fast"]
+
+
+def test_scheduler_set_bounds():
+    scheduler = AdaptivePollScheduler(5, 300)
+    scheduler.update({"account": snapshot(0.0, 5000.0)}, NOW)
+    # Unchanged bounds keep the schedule.
+    scheduler.set_bounds("account")
+    assert scheduler.due(["account"], NOW) == []
+    scheduler.set_bounds("account", max_interval=30)
+    assert scheduler.due(["account"], NOW) == ["account"]
+    with pytest.raises(ValueError):
+        scheduler.set_bounds("account", min_interval=60, max_interval=30)
+
+
+def test_scheduler_retain():
+    scheduler = AdaptivePollScheduler(5, 300)
+    scheduler.set_bounds("evicted", 1, 10)
+    scheduler.update({"kept": None, "evicted": None}, NOW)
+    scheduler.retain(["kept"])
+    assert list(scheduler.intervals) == ["kept"]
+    assert scheduler._bounds == {}
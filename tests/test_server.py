@@ -0,0 +1,70 @@
+import json
+import urllib.request
+
+from prometheus_client import CollectorRegistry, Gauge
+
+from github_rate_limits_exporter.server import (
+    json_response,
+    make_exporter_app,
+    make_health_routes,
+    start_exporter_server,
+)
+
+
+def hello_app(environ, start_response):
+    return json_response(start_response, "200 OK", {"path": environ["PATH_INFO"]})
+
+
+def test_exporter_server_routes():
+    registry = CollectorRegistry()
+    Gauge("exporter_test", "Test gauge", registry=registry).set(1)
+    app = make_exporter_app(registry, {"/api/v1/hello": hello_app})
+    httpd, thread = start_exporter_server(0, "127.0.0.1", app)
+    base_url = f"http://127.0.0.1:{httpd.server_port}"
+    try:
+        with urllib.request.urlopen(f"{base_url}/api/v1/hello", timeout=5) as response:
+            assert response.headers["Content-Type"] == "application/json"
+            assert json.loads(response.read()) == {"path": "/api/v1/hello"}
+        with urllib.request.urlopen(f"{base_url}/metrics", timeout=5) as response:
+            assert "exporter_test 1.0" in response.read().decode()
+    finally:
+        httpd.shutdown()
+        httpd.server_close()
+    thread.join(5)
+    assert not thread.is_alive()
+
+
+def test_health_routes():
+    ready = []
+    routes = make_health_routes(lambda: bool(ready))
+    responses = []
+
+    def start_response(status, headers):
+        responses.append((status, dict(headers)))
+
+    assert routes["/-/healthy"]({}, start_response) == [b"OK\n"]
+    assert routes["/-/ready"]({}, start_response) == [b"Service Unavailable\n"]
+    ready.append(True)
+    assert routes["/-/ready"]({}, start_response) == [b"OK\n"]
+    assert [status for status, _ in responses] == [
+        "200 OK",
+        "503 Service Unavailable",
+        "200 OK",
+    ]
+    assert responses[0][1]["Content-Length"] == "3"
+
+
+def test_exporter_app_scrape_duration(instruments):
+    registry = CollectorRegistry()
+    Gauge("exporter_test", "Test gauge", registry=registry).set(1)
+    app = make_exporter_app(registry, make_health_routes(lambda: True))
+
+    def start_response(status, headers):
+        pass
+
+    app({"PATH_INFO": "/-/healthy"}, start_response)
+    assert instruments.snapshot().scrapes.count == 0
+    environ = {"PATH_INFO": "/metrics", "QUERY_STRING": "", "REQUEST_METHOD": "GET"}
+    body = app(environ, start_response)
+    assert b"exporter_test 1.0" in b"".join(body)
+    assert instruments.snapshot().scrapes.count == 1
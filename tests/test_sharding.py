@@ -0,0 +1,43 @@
+from collections import Counter
+
+import pytest
+
+from github_rate_limits_exporter.sharding import Shard, jump_hash, shard_of
+
+ACCOUNTS = [f"org-{index}" for index in range(10000)]
+
+
+def test_jump_hash_single_bucket():
+    assert {jump_hash(key, 1) for key in range(100)} == {0}
+
+
+def test_shard_of_is_stable():
+    # Process independent (not the salted builtin hash).
+    assert [shard_of("pat_account", count) for count in (1, 2, 3, 4)] == [0, 0, 2, 2]
+
+
+@pytest.mark.parametrize("count", [2, 3, 8, 50])
+def test_shard_of_is_balanced(count):
+    shards = Counter(shard_of(account, count) for account in ACCOUNTS)
+    assert sorted(shards) == list(range(count))
+    expected = len(ACCOUNTS) / count
+    assert all(abs(size - expected) < expected * 0.2 for size in shards.values())
+
+
+@pytest.mark.parametrize("count", [1, 2, 5, 10])
+def test_new_shard_moves_minimal_accounts(count):
+    moved = [
+        account
+        for account in ACCOUNTS
+        if shard_of(account, count) != shard_of(account, count + 1)
+    ]
+    # Only to the new shard and only its fair share.
+    assert {shard_of(account, count + 1) for account in moved} == {count}
+    assert abs(len(moved) - len(ACCOUNTS) / (count + 1)) < len(ACCOUNTS) * 0.03
+
+
+def test_shards_own_every_account_once():
+    shards = [Shard(index, 4) for index in range(4)]
+    for account in ACCOUNTS[:1000]:
+        assert sum(shard.owns(account) for shard in shards) == 1
+    assert all(Shard().owns(account) for account in ACCOUNTS[:1000])
@@ -0,0 +1,109 @@
+import logging
+import threading
+from datetime import datetime, timedelta, timezone
+import pytest
+
+from github_rate_limits_exporter.github import GithubToken
+from github_rate_limits_exporter.tokens import GithubTokenManager, TokenDeadlines
+from tests.utils import CURRENT_TIME
+
+
+class TokenRequester:
+    """Minimal refreshable requester of the token manager"""
+
+    def __init__(self, lifetime=3600, refreshable=True, error=None):
+        self.lifetime = lifetime
+        self.refreshable = refreshable
+        self.error = error
+        self.managed = False
+        self.refreshes = 0
+        self.refreshed = threading.Event()
+        self.deadlines = self._mint()
+
+    def _mint(self):
+        expires_at = datetime.now(timezone.utc) + timedelta(seconds=self.lifetime)
+        return TokenDeadlines(GithubToken(f"token-{self.refreshes}", expires_at), 0.25)
+
+    def refresh_token(self):
+        if self.error is not None:
+            raise self.error
+        self.refreshes += 1
+        self.deadlines = self._mint()
+        self.refreshed.set()
+        return self.deadlines.token
+
+
+def test_token_deadlines(freezer):
+    freezer.move_to(CURRENT_TIME)
+    deadlines = TokenDeadlines(
+        GithubToken("token", CURRENT_TIME + timedelta(hours=1)), latency=0.5
+    )
+    assert deadlines.expires_at - deadlines.minted_at == 3600
+    assert deadlines.refresh_at - deadlines.minted_at == 3300
+    assert deadlines.latency == 0.5
+    assert not deadlines.refresh_due()
+    freezer.tick(3300)
+    assert deadlines.age == 3300
+    assert deadlines.refresh_due()
+    assert not deadlines.has_expired()
+    freezer.tick(300)
+    assert deadlines.has_expired()
+
+
+def test_token_manager_ignores_pat_requesters(freezer):
+    freezer.move_to(CURRENT_TIME)
+    requesters = {"pat": TokenRequester(refreshable=False), "app": TokenRequester()}
+    manager = GithubTokenManager(requesters)
+    assert list(manager.requesters) == ["app"]
+    assert GithubTokenManager({}).refresh() == float("inf")
+
+
+def test_token_manager_refresh_ahead_of_expiry(freezer):
+    freezer.move_to(CURRENT_TIME)
+    requester = TokenRequester()
+    manager = GithubTokenManager({"app": requester})
+    assert manager.refresh() == 3300
+    assert requester.refreshes == 0
+    freezer.tick(3300)
+    assert manager.refresh() == 3300
+    assert requester.refreshes == 1
+    assert requester.deadlines.token.token == "token-1"
+
+
+def test_token_manager_retries_failed_refresh(freezer, caplog):
+    caplog.set_level(logging.WARNING, logger="github_rate_limits_exporter.tokens")
+    freezer.move_to(CURRENT_TIME)
+    requester = TokenRequester(lifetime=400, error=ValueError("failed"))
+    manager = GithubTokenManager({"app": requester}, 30)
+    freezer.tick(100)
+    # the current token is still valid, keep it and retry later
+    assert manager.refresh() == 30
+    freezer.tick(10)
+    assert manager.refresh() == 20
+    freezer.tick(300)
+    # an expired token is not fatal either, the refresh keeps being retried
+    assert manager.refresh() == 30
+    assert [
+        record.levelno
+        for record in caplog.records
+        if record.name == "github_rate_limits_exporter.tokens"
+        and record.thread == threading.get_ident()
+    ] == [logging.WARNING, logging.ERROR]
+
+
+def test_token_manager_short_lived_tokens_do_not_spin(freezer):
+    freezer.move_to(CURRENT_TIME)
+    requester = TokenRequester(lifetime=60)
+    manager = GithubTokenManager({"app": requester}, 30)
+    assert manager.refresh() == 30
+    assert requester.refreshes == 1
+
+
+def test_token_manager_thread():
+    requester = TokenRequester(lifetime=-1)
+    manager = GithubTokenManager({"app": requester}, 60)
+    manager.start()
+    assert requester.managed
+    assert requester.refreshed.wait(5)
+    manager.stop(timeout=5)
+    assert not manager.is_alive()
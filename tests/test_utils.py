@@ -1,10 +1,14 @@
 import datetime
 import logging
 import os
+import threading
+import time
 
 import pytest
 
 from github_rate_limits_exporter.utils import (
+    AccountErrors,
+    SingleFlight,
     base64_decode,
     extend_datetime_now,
     initialize_logger,
@@ -108,3 +112,81 @@ def test_shared_exception_queue_get_error(exception_queue, exception_queue_put_e
     exception_queue_put_error()
     with pytest.raises(ValueError):
         exception_queue.get_error()
+
+
+def test_single_flight_coalesces_concurrent_calls():
+    flight = SingleFlight()
+    started, release = threading.Event(), threading.Event()
+    calls = []
+
+    def expensive():
+        calls.append(1)
+        started.set()
+        release.wait(5)
+        return "result"
+
+    results = []
+    leader = threading.Thread(target=lambda: results.append(flight.do("k", expensive)))
+    leader.start()
+    started.wait(5)
+    followers = [
+        threading.Thread(target=lambda: results.append(flight.do("k", expensive)))
+        for __ in range(3)
+    ]
+    for follower in followers:
+        follower.start()
+    while flight.coalesced < 3:
+        time.sleep(0.001)
+    release.set()
+    for thread in [leader, *followers]:
+        thread.join(5)
+    assert results == ["result"] * 4
+    assert len(calls) == 1
+    assert flight.coalesced == 3
+    # the next call is not coalesced with the completed one
+    assert flight.do("k", lambda: "next") == "next"
+
+
+def test_single_flight_shares_errors():
+    flight = SingleFlight()
+    started, release = threading.Event(), threading.Event()
+
+    def failing():
+        started.set()
+        release.wait(5)
+        raise ValueError("failed")
+
+    errors = []
+
+    def call():
+        try:
+            flight.do("k", failing)
+        except ValueError as err:
+            errors.append(err)
+
+    threads = [threading.Thread(target=call) for __ in range(2)]
+    threads[0].start()
+    started.wait(5)
+    threads[1].start()
+    while flight.coalesced < 1:
+        time.sleep(0.001)
+    release.set()
+    for thread in threads:
+        thread.join(5)
+    assert len(errors) == 2
+    assert errors[0] is errors[1]
+
+
+def test_account_errors():
+    errors = AccountErrors()
+    error = ValueError("failed")
+    errors.failed("a", error)
+    errors.failed("a", error)
+    errors.failed("b", error)
+    assert errors.counts == {"a": 2, "b": 1}
+    errors.succeeded(["a"])
+    assert errors.failures == {"b": error}
+    assert errors.counts == {"a": 2, "b": 1}
+    errors.retain(["a"])
+    assert errors.counts == {"a": 2}
+    assert errors.failures == {}
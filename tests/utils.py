@@ -1,5 +1,12 @@
+import json
+import struct
+import threading
 from dataclasses import dataclass
 from datetime import datetime, timedelta, timezone
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlsplit
+
+import snappy
 
 CURRENT_TIME = datetime(2022, 12, 24, 12, 45, 0, 0, tzinfo=timezone.utc)
 CURRENT_TIMESTAMP = CURRENT_TIME.timestamp()
@@ -19,3 +26,227 @@ class LogLevel:
 
     name: str
     value: int
+
+
+class GithubApiStub(ThreadingHTTPServer):
+    """Local (HTTP/1.1 keep-alive) stub of the Github REST API"""
+
+    daemon_threads = True
+
+    def __init__(self, rate_limits, expires_at=NEW_TOKEN_EXPIRES_AT):
+        super().__init__(("127.0.0.1", 0), GithubApiStubHandler)
+        self.rate_limits = rate_limits
+        self.expires_at = expires_at
+        self.requests = []
+        self.connections = set()
+        self.status = 200
+        self.failures = 0
+        self.installations = []
+        # Tokens answered 401 and (uninstalled) installation ids answered 404.
+        self.rejected_tokens = set()
+        self.missing_installations = set()
+        self._thread = threading.Thread(
+            target=self.serve_forever, kwargs={"poll_interval": 0.01}, daemon=True
+        )
+
+    @property
+    def base_url(self):
+        return f"http://127.0.0.1:{self.server_address[1]}"
+
+    def __enter__(self):
+        self._thread.start()
+        return self
+
+    def __exit__(self, *args):
+        self.shutdown()
+        self.server_close()
+
+
+class GithubApiStubHandler(BaseHTTPRequestHandler):
+    """
+    Serves ``/rate_limit``, ``/app/installations`` (paginated) and
+    ``/app/installations/{id}/access_tokens``
+    """
+
+    protocol_version = "HTTP/1.1"
+
+    def log_message(self, *args):
+        pass
+
+    def _reply(self, body, status=None):
+        self.server.requests.append((self.command, self.path, dict(self.headers)))
+        self.server.connections.add(self.client_address)
+        self.rfile.read(int(self.headers.get("Content-Length") or 0))
+        payload = json.dumps(body).encode()
+        status = status or self.server.status
+        if self.server.failures > 0:
+            self.server.failures -= 1
+            status = 503
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(payload)))
+        self.end_headers()
+        self.wfile.write(payload)
+
+    def do_GET(self):
+        url = urlsplit(self.path)
+        if url.path == "/rate_limit":
+            token = self.headers.get("Authorization", "").split()[-1]
+            if token in self.server.rejected_tokens:
+                self._reply({"message": "Bad credentials"}, 401)
+            else:
+                self._reply(self.server.rate_limits)
+        elif url.path == "/app/installations":
+            query = parse_qs(url.query)
+            per_page = int(query.get("per_page", ["30"])[0])
+            page = int(query.get("page", ["1"])[0])
+            start = (page - 1) * per_page
+            self._reply(self.server.installations[start : start + per_page])
+        else:
+            self._reply({"message": "Not Found"})
+
+    def do_POST(self):
+        installation_id = self.path.split("/")[-2]
+        if installation_id.isdigit() and int(installation_id) in (
+            self.server.missing_installations
+        ):
+            self._reply({"message": "Not Found"}, 404)
+        else:
+            self._reply(
+                {"token": "installation-token", "expires_at": self.server.expires_at}
+            )
+
+
+def _read_varint(data, offset):
+    value = shift = 0
+    while True:
+        byte = data[offset]
+        offset += 1
+        value |= (byte & 0x7F) << shift
+        shift += 7
+        if byte < 0x80:
+            return value, offset
+
+
+def _read_fields(data):
+    """Yields the ``(field number, value)`` of a protobuf message"""
+    offset = 0
+    while offset < len(data):
+        key, offset = _read_varint(data, offset)
+        field, wire_type = key >> 3, key & 0x07
+        if wire_type == 0:
+            value, offset = _read_varint(data, offset)
+        elif wire_type == 1:
+            value, offset = struct.unpack_from("<d", data, offset)[0], offset + 8
+        elif wire_type == 2:
+            length, offset = _read_varint(data, offset)
+            value, offset = data[offset : offset + length], offset + length
+        else:
+            raise ValueError(f"Unexpected wire type: {wire_type}")
+        yield field, value
+
+
+def decode_write_request(data):
+    """Returns the ``(labels, value, timestamp)`` samples of a ``WriteRequest``"""
+    samples = []
+    for _, timeseries in _read_fields(data):
+        labels, points = {}, []
+        for field, value in _read_fields(timeseries):
+            if field == 1:
+                label = dict(_read_fields(value))
+                labels[label[1].decode()] = label[2].decode()
+            else:
+                points.append(dict(_read_fields(value)))
+        samples.extend((labels, point[1], point[2]) for point in points)
+    return samples
+
+
+class RemoteWriteStub(ThreadingHTTPServer):
+    """Local stub of a Prometheus remote-write receiver"""
+
+    daemon_threads = True
+
+    def __init__(self):
+        super().__init__(("127.0.0.1", 0), RemoteWriteStubHandler)
+        self.requests = []
+        self.samples = []
+        self.status = 204
+        self.failures = 0
+        self._thread = threading.Thread(
+            target=self.serve_forever, kwargs={"poll_interval": 0.01}, daemon=True
+        )
+
+    @property
+    def url(self):
+        return f"http://127.0.0.1:{self.server_address[1]}/api/v1/write"
+
+    def __enter__(self):
+        self._thread.start()
+        return self
+
+    def __exit__(self, *args):
+        self.shutdown()
+        self.server_close()
+
+
+class RemoteWriteStubHandler(BaseHTTPRequestHandler):
+    """Decodes the snappy compressed ``WriteRequest`` of ``POST /api/v1/write``"""
+
+    protocol_version = "HTTP/1.1"
+
+    def log_message(self, *args):
+        pass
+
+    def do_POST(self):
+        body = self.rfile.read(int(self.headers.get("Content-Length") or 0))
+        self.server.requests.append((self.path, dict(self.headers)))
+        status = self.server.status
+        if self.server.failures > 0:
+            self.server.failures -= 1
+            status = 503
+        elif status < 300:
+            self.server.samples.extend(decode_write_request(snappy.decompress(body)))
+        self.send_response(status)
+        self.send_header("Content-Length", "0")
+        self.end_headers()
+
+
+class PushgatewayStub(ThreadingHTTPServer):
+    """Local stub of a Prometheus Pushgateway"""
+
+    daemon_threads = True
+
+    def __init__(self):
+        super().__init__(("127.0.0.1", 0), PushgatewayStubHandler)
+        self.requests = []
+        self._thread = threading.Thread(
+            target=self.serve_forever, kwargs={"poll_interval": 0.01}, daemon=True
+        )
+
+    @property
+    def url(self):
+        return f"http://127.0.0.1:{self.server_address[1]}"
+
+    def __enter__(self):
+        self._thread.start()
+        return self
+
+    def __exit__(self, *args):
+        self.shutdown()
+        self.server_close()
+
+
+class PushgatewayStubHandler(BaseHTTPRequestHandler):
+    """Records the ``PUT /metrics/job/<job>`` pushes"""
+
+    protocol_version = "HTTP/1.1"
+
+    def log_message(self, *args):
+        pass
+
+    def do_PUT(self):
+        body = self.rfile.read(int(self.headers.get("Content-Length") or 0))
+        self.server.requests.append((self.command, self.path, body.decode()))
+        self.send_response(200)
+        self.send_header("Content-Length", "0")
+        self.end_headers()